@@ -1521,6 +1521,13 @@ class SecureBrowser(QMainWindow):
         try:
             self._warning_poller = WarningPoller(parent=self)
             self._warning_poller.warning_received.connect(self._on_warning_received)
+            if self._batch_poster is not None:
+                # Warnings + acks ride on the batch round trip when the
+                # server supports it; the poller covers the gaps.
+                self._batch_poster.warnings_received.connect(
+                    self._warning_poller.deliver_piggybacked
+                )
+                self._warning_poller.set_ack_sink(self._batch_poster.queue_ack)
             self._warning_poller.start()
             logger.info("WarningPoller QThread launched")
         except Exception as exc:
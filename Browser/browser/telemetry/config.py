@@ -33,11 +33,16 @@ class TelemetryConfig:
             return None
         return f"{self.api_base.rstrip('/')}/behavior/attempts/{self.attempt_id}/events:batch"
 
-    def warnings_url(self, since_id: int = 0) -> Optional[str]:
+    def warnings_url(self, since_id: int = 0, wait: int = 0) -> Optional[str]:
         if not self.is_active:
             return None
         base = f"{self.api_base.rstrip('/')}/proctor/attempts/{self.attempt_id}/warnings"
-        return f"{base}?since_id={since_id}" if since_id else base
+        params = []
+        if since_id:
+            params.append(f"since_id={since_id}")
+        if wait:
+            params.append(f"wait={wait}")
+        return f"{base}?{'&'.join(params)}" if params else base
 
     def warning_ack_url(self, warning_id: int) -> Optional[str]:
         if not self.is_active:
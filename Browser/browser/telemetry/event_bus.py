@@ -8,12 +8,21 @@ unbounded memory.
 
 Severity ``critical`` events also set a flag the poster watches so it
 flushes the queue immediately instead of waiting for the next 5s tick.
+
+Every event gets a ``seq`` at emit time, one more than the last. The
+server uses it to drop events from a batch it already stored when a
+response got lost and the poster retried, and acknowledges the highest
+seq up to which it has everything. Before its first batch the poster
+asks the server for that mark and :meth:`EventBus.rebase` moves the
+numbering above it, so a kiosk restarted with its clock set back does
+not have every new event dropped as a duplicate.
 """
 
 from __future__ import annotations
 
 import logging
 import threading
+import time
 from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
@@ -28,21 +37,37 @@ logger = logging.getLogger(__name__)
 DEFAULT_MAX_BUFFER = 20_000
 
 
+def _initial_seq() -> int:
+    """Start numbering at the current time in microseconds.
+
+    The server treats any seq at or below the last one it stored for the
+    attempt as a duplicate, so a kiosk restarted mid-attempt must not
+    start again from 1. Wall-clock microseconds normally stay ahead of
+    the old process's counter and fit comfortably in a BIGINT; when the
+    clock went backwards, :meth:`EventBus.rebase` catches it.
+    """
+    return time.time_ns() // 1_000
+
+
 @dataclass
 class TelemetryEvent:
     event_type: str
     payload: Optional[dict] = None
     severity: str = "info"
     event_time: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    seq: Optional[int] = None
 
     def to_api_dict(self) -> dict:
         """Shape matches BehaviorEventCreateRequest on the server."""
-        return {
+        data = {
             "event_type": self.event_type,
             "payload": self.payload,
             "severity": self.severity,
             "event_time": self.event_time.isoformat(),
         }
+        if self.seq is not None:
+            data["seq"] = self.seq
+        return data
 
 
 class EventBus:
@@ -53,6 +78,7 @@ class EventBus:
         self._lock = threading.Lock()
         self._wake = threading.Event()
         self._dropped_count = 0
+        self._next_seq = _initial_seq()
 
     # ------------------------------------------------------------------
     # Producer API
@@ -71,6 +97,9 @@ class EventBus:
                 severity=(severity or "info").lower(),
             )
             with self._lock:
+                # Numbered under the lock so seq order == queue order.
+                ev.seq = self._next_seq
+                self._next_seq += 1
                 # ``deque(maxlen=...)`` discards from the LEFT on overflow;
                 # we want to know if that happened so the poster can log it.
                 if len(self._dq) == self._dq.maxlen:
@@ -113,6 +142,21 @@ class EventBus:
             for ev in reversed(list(events)):
                 self._dq.appendleft(ev)
 
+    def rebase(self, first_seq: int) -> None:
+        """Make sure the oldest buffered event (or the next one emitted)
+        is numbered at least ``first_seq``, shifting the buffer to keep
+        seqs consecutive. Only call it before anything has been sent."""
+        with self._lock:
+            oldest = self._dq[0].seq if self._dq else self._next_seq
+            shift = first_seq - oldest if oldest is not None else 0
+            if shift <= 0:
+                return
+            for ev in self._dq:
+                if ev.seq is not None:
+                    ev.seq += shift
+            self._next_seq += shift
+        logger.warning("EventBus: seq behind the server's mark - renumbered from %d", first_seq)
+
     def wait(self, timeout: float) -> bool:
         """Block until a critical event arrives or ``timeout`` elapses."""
         return self._wake.wait(timeout)
@@ -3,20 +3,42 @@
 Runs on a dedicated QThread so a slow / unreachable backend never stalls
 the UI thread. Uses ``urllib`` to avoid adding ``requests`` / ``httpx`` as
 a runtime dependency (PyInstaller bundles cleaner with stdlib-only HTTP).
+
+Batch bodies are gzipped (stdlib, same reason): KEYSTROKE bursts repeat
+the same keys dozens of times per event and shrink several-fold. If the
+server refuses the encoding the poster falls back to plain JSON for the
+rest of the session.
+
+The batch round trip is also the kiosk's warning channel: acks for
+warnings the banner has shown (:meth:`BatchPoster.queue_ack`) ride on the
+next batch, and the server answers with the attempt's unacknowledged
+warnings, re-emitted as ``warnings_received`` for the WarningPoller.
+
+Before the first batch the poster sends an empty one to learn the
+attempt's ``acked_seq`` and rebases the bus's numbering above it (see
+``event_bus``); until that succeeds events stay buffered.
+
+The body starts out as JSON. Once a response's ``Accept-Post`` header
+lists ``application/msgpack`` (and ``msgpack`` is installed here) the
+poster switches to the compact binary encoding in ``wire``; a refusal
+sends it back to JSON for good.
 """
 
 from __future__ import annotations
 
+import gzip
 import json
 import logging
 import threading
 import time
 import urllib.error
 import urllib.request
+from datetime import datetime
 from typing import Optional
 
 from PyQt6.QtCore import QThread, pyqtSignal
 
+from . import wire
 from .config import TelemetryConfig, get_config
 from .event_bus import EventBus, get_event_bus
 
@@ -26,6 +48,23 @@ FLUSH_INTERVAL_SEC = 5.0
 MAX_BATCH = 200
 HTTP_TIMEOUT = 8.0
 MAX_BACKOFF = 60.0
+# Statuses that mean "not now" rather than "bad request": the batch is
+# requeued instead of dropped like other 4xx.
+RETRYABLE_STATUS = frozenset({429, 503})
+# Smaller bodies aren't worth the CPU (or the gzip header overhead).
+COMPRESS_MIN_BYTES = 1024
+# What a server that can't decode the body answers: 415 from ours,
+# 400 / 422 from one that tried to parse gzip / msgpack bytes as JSON.
+ENCODING_REFUSED_STATUS = frozenset({400, 415, 422})
+
+
+def _retry_after(http_err: urllib.error.HTTPError) -> float:
+    """Seconds from a ``Retry-After`` header (delta form only), else 0."""
+    try:
+        value = float(http_err.headers.get("Retry-After") or 0)
+    except (TypeError, ValueError, AttributeError):
+        return 0.0
+    return min(max(value, 0.0), MAX_BACKOFF)
 
 
 class BatchPoster(QThread):
@@ -34,6 +73,9 @@ class BatchPoster(QThread):
     # Emitted whenever the server returns a fresh latest_warning_id so the
     # WarningPoller can advance its high-water mark without an extra GET.
     latest_warning_id_changed = pyqtSignal(int)
+    # Unacknowledged warnings from a batch response. Only emitted by
+    # servers that piggyback them (the response has a ``warnings`` list).
+    warnings_received = pyqtSignal(list)
 
     def __init__(
         self,
@@ -47,6 +89,15 @@ class BatchPoster(QThread):
         self._stop = threading.Event()
         self._backoff = 1.0
         self._last_warning_id = 0
+        self._compress = True
+        # Flipped on by the server's Accept-Post header, off for good on
+        # a refusal.
+        self._msgpack = False
+        self._msgpack_refused = False
+        # Warning id -> when the banner showed it, sent with the next batch.
+        self._acks: dict[int, datetime] = {}
+        self._acks_lock = threading.Lock()
+        self._seq_synced = False
 
     # ------------------------------------------------------------------
     # Lifecycle
@@ -96,6 +147,12 @@ class BatchPoster(QThread):
             pass
         logger.info("BatchPoster stopped (final queue depth=%d)", len(self._bus))
 
+    def queue_ack(self, warning_id: int, delivered_at: datetime) -> None:
+        """Ack ``warning_id`` with the next batch. Thread-safe; kept until
+        a batch carrying it succeeds."""
+        with self._acks_lock:
+            self._acks.setdefault(warning_id, delivered_at)
+
     # ------------------------------------------------------------------
     # One tick: drain → POST → on failure requeue.
     # ------------------------------------------------------------------
@@ -106,26 +163,45 @@ class BatchPoster(QThread):
             self._bus.drain(max_items=MAX_BATCH)
             return
 
+        if not self._seq_synced and not self._sync_seq():
+            return
+
         events = self._bus.drain(max_items=MAX_BATCH)
-        if not events:
+        with self._acks_lock:
+            acks = dict(self._acks)
+        if not events and not acks:
             return
 
-        body = json.dumps({"events": [ev.to_api_dict() for ev in events]}).encode("utf-8")
+        use_msgpack = self._msgpack and not self._msgpack_refused
+        if use_msgpack:
+            body = wire.encode_batch(events, acks)
+            content_type = wire.MEDIA_TYPE
+        else:
+            envelope: dict = {"events": [ev.to_api_dict() for ev in events]}
+            if acks:
+                envelope["acks"] = [
+                    {"warning_id": warning_id, "delivered_at": delivered_at.isoformat()}
+                    for warning_id, delivered_at in acks.items()
+                ]
+            body = json.dumps(envelope).encode("utf-8")
+            content_type = "application/json"
+        headers = {
+            "Content-Type": content_type,
+            "Authorization": f"Bearer {self._config.auth_token}",
+        }
+        compressed = self._compress and len(body) >= COMPRESS_MIN_BYTES
+        if compressed:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
         url = self._config.events_url()
-        req = urllib.request.Request(
-            url,
-            data=body,
-            method="POST",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self._config.auth_token}",
-            },
-        )
+        req = urllib.request.Request(url, data=body, method="POST", headers=headers)
 
         try:
             with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT) as resp:
                 raw = resp.read().decode("utf-8") or "{}"
                 ctype = (resp.headers.get("Content-Type") or "").lower()
+                if wire.AVAILABLE and not self._msgpack_refused:
+                    self._msgpack = wire.server_accepts_msgpack(resp.headers.get("Accept-Post"))
                 if "json" not in ctype:
                     # Almost always means the kiosk is pointed at the wrong
                     # base URL (e.g. Vite dev server returning index.html).
@@ -141,12 +217,14 @@ class BatchPoster(QThread):
                 payload = json.loads(raw)
                 logger.info(
                     "BatchPoster: POST %s -> %s (sent=%d, accepted=%s, "
-                    "rejected=%s, latest_warning_id=%s)",
+                    "rejected=%s, duplicates=%s, acked_seq=%s, latest_warning_id=%s)",
                     url,
                     resp.status,
                     len(events),
                     payload.get("accepted"),
                     payload.get("rejected"),
+                    payload.get("duplicates"),
+                    payload.get("acked_seq"),
                     payload.get("latest_warning_id"),
                 )
         except urllib.error.HTTPError as http_err:
@@ -155,6 +233,34 @@ class BatchPoster(QThread):
                 body_preview = http_err.read().decode("utf-8", errors="replace")[:200]
             except Exception:
                 pass
+            if use_msgpack and http_err.code in ENCODING_REFUSED_STATUS:
+                logger.warning(
+                    "BatchPoster: HTTP %d for a msgpack body from %s - sending "
+                    "JSON from now on, requeueing %d events",
+                    http_err.code, url, len(events),
+                )
+                self._msgpack_refused = True
+                self._bus.requeue(events)
+                return
+            if compressed and http_err.code in ENCODING_REFUSED_STATUS:
+                logger.warning(
+                    "BatchPoster: HTTP %d for a gzip body from %s - sending "
+                    "uncompressed from now on, requeueing %d events",
+                    http_err.code, url, len(events),
+                )
+                self._compress = False
+                self._bus.requeue(events)
+                return
+            if http_err.code in RETRYABLE_STATUS:
+                # Server is shedding load (ingest queue full / restarting):
+                # keep the batch and wait at least as long as it asked.
+                logger.warning(
+                    "BatchPoster: HTTP %d from %s - requeueing %d events",
+                    http_err.code, url, len(events),
+                )
+                self._bus.requeue(events)
+                self._sleep_backoff(_retry_after(http_err))
+                return
             if 400 <= http_err.code < 500:
                 logger.error(
                     "BatchPoster: HTTP %d from %s - dropping %d events. Body: %r",
@@ -177,9 +283,20 @@ class BatchPoster(QThread):
             self._sleep_backoff()
             return
 
-        # Success path - reset backoff and surface the latest_warning_id
-        # so the WarningPoller can advance.
+        # Success path - reset backoff, forget the acks that went out and
+        # hand warnings + the latest_warning_id to the WarningPoller.
+        # Warnings go first: the id hint would otherwise skip them.
         self._backoff = 1.0
+        self._trim_to_ack(events, payload)
+        with self._acks_lock:
+            for warning_id in acks:
+                self._acks.pop(warning_id, None)
+        warnings = payload.get("warnings") if isinstance(payload, dict) else None
+        if isinstance(warnings, list):
+            try:
+                self.warnings_received.emit(warnings)
+            except Exception:
+                pass
         latest = payload.get("latest_warning_id") if isinstance(payload, dict) else None
         if isinstance(latest, int) and latest > self._last_warning_id:
             self._last_warning_id = latest
@@ -188,8 +305,58 @@ class BatchPoster(QThread):
             except Exception:
                 pass
 
-    def _sleep_backoff(self) -> None:
-        time.sleep(self._backoff)
+    def _sync_seq(self) -> bool:
+        """POST an empty batch and rebase the bus above the server's
+        ``acked_seq``. False on a network / server error (retried next
+        tick); a server that doesn't number events counts as synced."""
+        url = self._config.events_url()
+        req = urllib.request.Request(
+            url,
+            data=b'{"events": []}',
+            method="POST",
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self._config.auth_token}",
+            },
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+                payload = json.loads(resp.read().decode("utf-8") or "{}")
+        except urllib.error.HTTPError as http_err:
+            if 400 <= http_err.code < 500 and http_err.code not in RETRYABLE_STATUS:
+                self._seq_synced = True
+                return True
+            logger.warning("BatchPoster: seq sync got HTTP %d from %s", http_err.code, url)
+            return False
+        except (urllib.error.URLError, TimeoutError, ValueError) as err:
+            logger.warning("BatchPoster: seq sync failed for %s: %s", url, err)
+            return False
+        acked = payload.get("acked_seq") if isinstance(payload, dict) else None
+        if isinstance(acked, int):
+            self._bus.rebase(acked + 1)
+        self._seq_synced = True
+        return True
+
+    def _trim_to_ack(self, events: list, payload) -> None:
+        """Keep any event the server did not acknowledge.
+
+        ``acked_seq`` covers everything the server handled (stored,
+        duplicate or permanently rejected), so normally the whole batch
+        is done. Older servers don't send it; then the 200 is the ack.
+        """
+        acked = payload.get("acked_seq") if isinstance(payload, dict) else None
+        if not isinstance(acked, int):
+            return
+        leftover = [ev for ev in events if ev.seq is not None and ev.seq > acked]
+        if leftover:
+            logger.warning(
+                "BatchPoster: server acked seq %d - requeueing %d unacknowledged events",
+                acked, len(leftover),
+            )
+            self._bus.requeue(leftover)
+
+    def _sleep_backoff(self, minimum: float = 0.0) -> None:
+        time.sleep(max(self._backoff, minimum))
         self._backoff = min(self._backoff * 2, MAX_BACKOFF)
 
 
@@ -1,9 +1,20 @@
 """Polls the WebClient for new teacher-sent warnings.
 
-Runs on its own QThread on a 3s cadence. New warnings are emitted as
+Runs on its own QThread. Each GET long-polls (``?wait=``): the server
+holds it until a warning is sent or the wait elapses, so warnings show up
+immediately and an idle kiosk makes one request per ``LONG_POLL_WAIT_SEC``.
+A server that answers an empty poll early (one without long-poll support)
+gets the old 3s cadence instead. New warnings are emitted as
 ``warning_received`` Qt signals - the main thread is responsible for
 showing the banner UI. After a warning is shown we POST /warnings/{id}/ack
 so the teacher dashboard knows it landed.
+
+Servers that piggyback warnings on the events:batch response make all of
+that unnecessary while batches are flowing: the BatchPoster hands their
+warnings to :meth:`WarningPoller.deliver_piggybacked` and acks go back on
+the next batch through the ack sink. The poller only polls when no batch
+has come back for ``PIGGYBACK_FRESH_SEC`` (idle kiosk, failing posts, or
+an older server).
 """
 
 from __future__ import annotations
@@ -14,21 +25,30 @@ import threading
 import time
 import urllib.error
 import urllib.request
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Callable, Optional
 
 from PyQt6.QtCore import QThread, pyqtSignal
 
 from .config import TelemetryConfig, get_config
+from .poster import FLUSH_INTERVAL_SEC
 
 logger = logging.getLogger(__name__)
 
 POLL_INTERVAL_SEC = 3.0
+LONG_POLL_WAIT_SEC = 25
 HTTP_TIMEOUT = 6.0
+# Headroom over the server-side wait before the socket read gives up.
+LONG_POLL_TIMEOUT = LONG_POLL_WAIT_SEC + HTTP_TIMEOUT
 MAX_BACKOFF = 30.0
+# Piggybacked warnings count as "flowing" for two batch intervals.
+PIGGYBACK_FRESH_SEC = 2 * FLUSH_INTERVAL_SEC
+
+AckSink = Callable[[int, datetime], None]
 
 
 class WarningPoller(QThread):
-    """GET /warnings every 3s, surface new ones via Qt signal."""
+    """Long-poll GET /warnings, surface new ones via Qt signal."""
 
     # Emitted on the poller thread; main-thread slot is responsible for UI.
     warning_received = pyqtSignal(dict)
@@ -41,10 +61,27 @@ class WarningPoller(QThread):
         self._since_id = 0
         self._backoff = 1.0
         self._lock = threading.Lock()
+        self._ack_sink: Optional[AckSink] = None
+        self._piggyback_at = float("-inf")
 
     def stop(self) -> None:
         self._stop.set()
 
+    def set_ack_sink(self, sink: Optional[AckSink]) -> None:
+        """Where acks go while batches carry warnings (``BatchPoster.queue_ack``)."""
+        self._ack_sink = sink
+
+    def deliver_piggybacked(self, warnings: list) -> None:
+        """Warnings from an events:batch response; also tells us batches
+        are flowing, so polling can pause."""
+        with self._lock:
+            self._piggyback_at = time.monotonic()
+        self._deliver(warnings)
+
+    def _piggybacked(self) -> bool:
+        with self._lock:
+            return time.monotonic() - self._piggyback_at < PIGGYBACK_FRESH_SEC
+
     def advance_since(self, since_id: int) -> None:
         """BatchPoster can hint us to skip ahead when it sees a fresh latest_warning_id."""
         with self._lock:
@@ -58,8 +95,12 @@ class WarningPoller(QThread):
 
         logger.info("WarningPoller started (attempt_id=%s)", self._config.attempt_id)
         while not self._stop.is_set():
+            if self._piggybacked():
+                self._sleep(POLL_INTERVAL_SEC)
+                continue
+            started = time.monotonic()
             try:
-                self._poll_once()
+                got_warnings = self._poll_once()
                 self._backoff = 1.0
             except Exception as exc:
                 logger.warning("WarningPoller failed: %s", exc)
@@ -67,22 +108,31 @@ class WarningPoller(QThread):
                 self._backoff = min(self._backoff * 2, MAX_BACKOFF)
                 continue
 
-            # Sleep in small slices so .stop() reacts quickly.
-            slept = 0.0
-            while slept < POLL_INTERVAL_SEC and not self._stop.is_set():
-                time.sleep(0.25)
-                slept += 0.25
+            # A long poll that was held (or brought warnings) can go
+            # straight back; an empty answer that came back at once means
+            # the server doesn't long-poll, so keep to the 3s cadence.
+            if got_warnings or time.monotonic() - started >= POLL_INTERVAL_SEC:
+                continue
+            self._sleep(POLL_INTERVAL_SEC)
 
         logger.info("WarningPoller stopped")
 
+    def _sleep(self, seconds: float) -> None:
+        # Sleep in small slices so .stop() reacts quickly.
+        slept = 0.0
+        while slept < seconds and not self._stop.is_set():
+            time.sleep(0.25)
+            slept += 0.25
+
     # ------------------------------------------------------------------
-    def _poll_once(self) -> None:
+    def _poll_once(self) -> bool:
+        """One (long) poll; True if it delivered any warnings."""
         with self._lock:
             since_id = self._since_id
 
-        url = self._config.warnings_url(since_id=since_id)
+        url = self._config.warnings_url(since_id=since_id, wait=LONG_POLL_WAIT_SEC)
         if not url:
-            return
+            return False
 
         req = urllib.request.Request(
             url,
@@ -94,7 +144,7 @@ class WarningPoller(QThread):
         )
 
         try:
-            with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT) as resp:
+            with urllib.request.urlopen(req, timeout=LONG_POLL_TIMEOUT) as resp:
                 body = resp.read().decode("utf-8")
         except urllib.error.HTTPError as http_err:
             if http_err.code in (401, 403):
@@ -104,38 +154,47 @@ class WarningPoller(QThread):
             raise
 
         if not body:
-            return
+            return False
         try:
             payload = json.loads(body)
         except json.JSONDecodeError:
             logger.warning("WarningPoller got non-JSON body")
-            return
+            return False
 
         warnings = payload if isinstance(payload, list) else payload.get("warnings", [])
-        if not warnings:
-            return
+        return self._deliver(warnings)
 
-        max_id = since_id
-        for w in warnings:
-            try:
-                wid = int(w.get("id", 0))
-            except (TypeError, ValueError):
-                continue
-            if wid <= since_id:
-                continue
+    def _deliver(self, warnings: list) -> bool:
+        """Emit + ack the warnings above our high-water mark; True if any.
+
+        Called from the poll thread and (piggybacked) the main thread; the
+        mark moves under the lock so a warning is never shown twice.
+        """
+        fresh = []
+        with self._lock:
+            for w in warnings or []:
+                try:
+                    wid = int(w.get("id", 0))
+                except (TypeError, ValueError, AttributeError):
+                    continue
+                if wid > self._since_id:
+                    fresh.append((wid, w))
+            if fresh:
+                self._since_id = max(wid for wid, _ in fresh)
+
+        for wid, w in sorted(fresh, key=lambda item: item[0]):
             try:
                 self.warning_received.emit(dict(w))
             except Exception:
                 pass
             self._ack(wid)
-            if wid > max_id:
-                max_id = wid
-
-        with self._lock:
-            if max_id > self._since_id:
-                self._since_id = max_id
+        return bool(fresh)
 
     def _ack(self, warning_id: int) -> None:
+        sink = self._ack_sink
+        if sink is not None and self._piggybacked():
+            sink(warning_id, datetime.now(timezone.utc))
+            return
         url = self._config.warning_ack_url(warning_id)
         if not url:
             return
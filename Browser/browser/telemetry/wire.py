@@ -0,0 +1,83 @@
+"""Compact MessagePack encoding for ``events:batch``.
+
+Mirrors ``WebClient/app/services/event_codec.py``: each event is a
+positional array ``[event_type, severity, event_time_ms, seq, payload]``
+with the event type and severity as small ints. The code tables are
+wire protocol - append, never renumber, and keep both sides in sync.
+
+``msgpack`` is optional. Without it ``AVAILABLE`` is False and the
+poster keeps sending JSON.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, Mapping
+
+try:
+    import msgpack  # type: ignore[import-not-found]
+except Exception:
+    msgpack = None  # type: ignore[assignment]
+
+from .event_bus import TelemetryEvent
+
+MEDIA_TYPE = "application/msgpack"
+VERSION = 1
+AVAILABLE = msgpack is not None
+
+EVENT_TYPE_CODES: dict[str, int] = {
+    "TAB_SWITCH": 1,
+    "WINDOW_SWITCH": 2,
+    "KEYBOARD_PRESS": 3,
+    "COPY": 4,
+    "PASTE": 5,
+    "FOCUS_LOSS": 6,
+    "FOCUS_REGAIN": 7,
+    "MONITOR_COUNT_CHANGE": 8,
+    "KEYSTROKE": 9,
+    "BLOCKED_HOTKEY": 10,
+    "CLIPBOARD_COPY": 11,
+    "CLIPBOARD_PASTE": 12,
+    "VM_DETECTED": 13,
+    "SUSPICIOUS_PROCESS": 14,
+    "NETWORK_BLOCKED": 15,
+    "FULLSCREEN_EXIT": 16,
+    "RENDERER_CRASH": 17,
+    "WARNING_DELIVERED": 18,
+}
+
+SEVERITY_CODES: dict[str, int] = {"info": 0, "warn": 1, "critical": 2}
+
+
+def _compact(ev: TelemetryEvent) -> list:
+    event_type = (ev.event_type or "").upper()
+    return [
+        # Types without a code yet go by name; the server accepts both.
+        EVENT_TYPE_CODES.get(event_type, event_type),
+        SEVERITY_CODES.get(ev.severity, 0),
+        int(ev.event_time.timestamp() * 1000),
+        ev.seq,
+        ev.payload,
+    ]
+
+
+def server_accepts_msgpack(accept_post: str | None) -> bool:
+    """True if an ``Accept-Post`` response header lists our media type."""
+    if not accept_post:
+        return False
+    return any(part.split(";", 1)[0].strip().lower() == MEDIA_TYPE for part in accept_post.split(","))
+
+
+def encode_batch(
+    events: Iterable[TelemetryEvent],
+    acks: Mapping[int, datetime] | None = None,
+) -> bytes:
+    """``acks`` maps warning id to when it was shown; sent as
+    ``[warning_id, delivered_at_ms]``."""
+    envelope = {"v": VERSION, "events": [_compact(ev) for ev in events]}
+    if acks:
+        envelope["acks"] = [
+            [warning_id, int(delivered_at.timestamp() * 1000)]
+            for warning_id, delivered_at in acks.items()
+        ]
+    return msgpack.packb(envelope)
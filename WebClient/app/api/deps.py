@@ -8,9 +8,9 @@ from sqlalchemy.orm import Session
 
 from app.core.security import decode_access_token
 from app.db.session import get_db
-from app.models.test_attempt import TestAttempt
 from app.models.user import User, UserRole
 from app.services.kiosk_token_service import decode_kiosk_token
+from app.services.lookup_cache import AttemptRef, get_attempt_ref
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
@@ -70,8 +70,11 @@ StudentOnly = Annotated[User, Depends(role_required(UserRole.STUDENT))]
 def get_kiosk_attempt(
     db: DBSession,
     token: Annotated[str, Depends(kiosk_oauth_scheme)],
-) -> TestAttempt:
-    """Resolve the kiosk's bearer token to the bound TestAttempt row.
+) -> AttemptRef:
+    """Resolve the kiosk's bearer token to the bound attempt's ids.
+
+    Every kiosk call goes through here, so the lookup is cached (see
+    ``lookup_cache``); load the ``TestAttempt`` row if you need more.
 
     A 401 is returned for an invalid/expired/foreign-audience token, OR
     if the attempt referenced in the token has been deleted server-side
@@ -93,7 +96,7 @@ def get_kiosk_attempt(
             detail="Malformed kiosk token",
         ) from None
 
-    attempt = db.query(TestAttempt).filter(TestAttempt.id == attempt_id).first()
+    attempt = get_attempt_ref(db, attempt_id)
     if attempt is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -102,7 +105,7 @@ def get_kiosk_attempt(
     return attempt
 
 
-KioskAttempt = Annotated[TestAttempt, Depends(get_kiosk_attempt)]
+KioskAttempt = Annotated[AttemptRef, Depends(get_kiosk_attempt)]
 
 
 @dataclass
@@ -121,7 +124,7 @@ class WarningReader:
     """
 
     user: User | None = None
-    attempt: TestAttempt | None = None
+    attempt: AttemptRef | None = None
 
     @property
     def is_kiosk(self) -> bool:
@@ -149,7 +152,7 @@ def get_warning_reader(
         except (TypeError, ValueError):
             attempt_id = None
         if attempt_id:
-            attempt = db.query(TestAttempt).filter(TestAttempt.id == attempt_id).first()
+            attempt = get_attempt_ref(db, attempt_id)
             if attempt is not None:
                 return WarningReader(attempt=attempt)
         # Fall through to user decode rather than 401-ing - a malformed
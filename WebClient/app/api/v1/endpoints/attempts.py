@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, status
 
 from app.api.deps import AdminTeacherProctor, DBSession, KioskAttempt, StudentOnly
-from app.models.user import UserRole
+from app.models.user import User, UserRole
 from app.schemas.attempt import AttemptEndRequest, AttemptSummaryResponse, AttemptWithSummaryResponse, TestAttemptResponse
 from app.services.attempt_service import end_attempt, get_attempt_summary, list_attempts_for_student, start_attempt
 from app.services.kiosk_token_service import issue_kiosk_token
@@ -49,7 +49,7 @@ def end_test_attempt(
             detail="Kiosk token does not belong to this test",
         )
     test = get_test_or_404(db, test_id)
-    student = kiosk_attempt.student
+    student = db.get(User, kiosk_attempt.student_id)
     attempt = end_attempt(db, test, student, payload.reason)
     summary = get_attempt_summary(db, test, student.id)
     return {"attempt": attempt, "summary": summary}
@@ -1,10 +1,15 @@
 import logging
+from typing import Annotated
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 
 from app.api.deps import AdminTeacherProctor, CurrentUser, DBSession, KioskAttempt
+from app.core.config import settings
 from app.models.user import UserRole
 from app.schemas.behavior import (
+    MAX_BATCH_ACKS,
     MAX_BATCH_SIZE,
     BehaviorEventBatchRequest,
     BehaviorEventBatchResponse,
@@ -15,11 +20,30 @@ from app.services.behavior_service import (
     create_behavior_event,
     create_behavior_events_bulk,
     get_attempt_or_404,
+    get_event_with_payload_or_404,
     list_events_for_attempt,
     list_events_for_test_student,
 )
-from app.services.test_service import ensure_manage_permission, get_test_or_404
-from app.services.warning_service import latest_warning_id_for_attempt
+from app.services import ingest_dedup
+from app.services.event_codec import (
+    MSGPACK_MEDIA_TYPE,
+    MalformedBatch,
+    RawBatch,
+    decode_json_acks,
+    decode_json_events,
+    decode_msgpack_acks,
+    decode_msgpack_events,
+    unpack_msgpack_batch,
+)
+from app.services.event_writer import event_rows
+from app.services.ingest_queue import RETRY_AFTER_SECONDS, IngestQueueFull, ingest_queue
+from app.services.test_service import ensure_manage_permission, get_test_meta_or_404, get_test_or_404
+from app.services.warning_service import (
+    acknowledge_warnings,
+    latest_warning_id_for_attempt,
+    unacknowledged_warnings,
+    warning_response,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -56,15 +80,58 @@ def ingest_behavior_event(
     )
 
 
+ACCEPT_POST = f"application/json, {MSGPACK_MEDIA_TYPE}"
+
+
+async def read_event_batch(request: Request) -> RawBatch:
+    """Raw events and warning acks of an ``events:batch`` body, by
+    Content-Type.
+
+    Per-item validation is left to the endpoint so one bad event never
+    rejects the batch.
+    """
+    media_type = (request.headers.get("content-type") or "application/json")
+    media_type = media_type.split(";", 1)[0].strip().lower()
+    body = await request.body()
+    if media_type == MSGPACK_MEDIA_TYPE:
+        try:
+            return RawBatch(media_type, *unpack_msgpack_batch(body))
+        except MalformedBatch as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from None
+    if media_type == "application/json" or media_type.endswith("+json"):
+        try:
+            payload = BehaviorEventBatchRequest.model_validate_json(body)
+        except ValidationError as exc:
+            raise RequestValidationError(exc.errors(include_url=False), body=body) from None
+        return RawBatch("application/json", payload.events, payload.acks)
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail=f"Unsupported Content-Type: {media_type}",
+        headers={"Accept-Post": ACCEPT_POST},
+    )
+
+
 @router.post(
     "/attempts/{attempt_id}/events:batch",
     response_model=BehaviorEventBatchResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": BehaviorEventBatchRequest.model_json_schema()},
+                MSGPACK_MEDIA_TYPE: {
+                    "schema": {"type": "string", "format": "binary"},
+                },
+            },
+        }
+    },
 )
 def ingest_behavior_events_batch(
     attempt_id: int,
-    payload: BehaviorEventBatchRequest,
     db: DBSession,
     kiosk_attempt: KioskAttempt,
+    body: Annotated[RawBatch, Depends(read_event_batch)],
+    response: Response,
 ):
     """Bulk ingestion path used by the kiosk's BatchPoster.
 
@@ -77,8 +144,28 @@ def ingest_behavior_events_batch(
     a future ``event_type`` the server doesn't know yet) doesn't reject
     the whole batch.
 
-    Returns the latest warning id known for the attempt so the kiosk can
-    dedup its warning poll without an extra round-trip.
+    Also the kiosk's warning channel: the body may carry acks for the
+    warnings it has shown (applied here, like ``POST /warnings/{id}/ack``),
+    and the response lists the attempt's still-unacknowledged warnings plus
+    the latest warning id. A kiosk posting batches therefore needs no
+    warnings poll and no ack requests.
+
+    Accepts ``application/json`` or the compact
+    ``application/msgpack`` encoding (see ``event_codec``). Every
+    response lists what is accepted in ``Accept-Post`` so the kiosk can
+    switch once it sees msgpack there.
+
+    Idempotent for kiosks that number their events: anything at or below
+    the attempt's acked ``seq`` is counted in ``duplicates`` and not
+    stored again, and ``acked_seq`` - the highest seq up to which every
+    event is stored or rejected - tells the kiosk how far it may trim its
+    buffer (see ``ingest_dedup``); it is None for a batch without seqs
+    when the attempt has no marks. An empty batch just returns it, which
+    is how a restarted kiosk picks up numbering where it left off.
+
+    With ``INGEST_WRITE_BEHIND`` enabled the events are handed to the
+    group-commit writer instead of being inserted here; a full queue
+    answers 429 with ``Retry-After`` and the kiosk keeps the batch.
     """
     if kiosk_attempt.id != attempt_id:
         raise HTTPException(
@@ -86,36 +173,69 @@ def ingest_behavior_events_batch(
             detail="Kiosk token does not match attempt",
         )
 
-    raw_events = payload.events or []
+    media_type, raw_events = body.media_type, body.events
     if len(raw_events) > MAX_BATCH_SIZE:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             detail=f"Batch may not exceed {MAX_BATCH_SIZE} events",
         )
 
-    valid: list[BehaviorEventCreateRequest] = []
-    rejected = 0
-    for raw in raw_events:
+    raw_acks = body.acks[:MAX_BATCH_ACKS]
+    if media_type == MSGPACK_MEDIA_TYPE:
+        decoded = decode_msgpack_events(raw_events, attempt_id)
+        acks = decode_msgpack_acks(raw_acks, attempt_id)
+    else:
+        decoded = decode_json_events(raw_events, attempt_id)
+        acks = decode_json_acks(raw_acks, attempt_id)
+    valid, rejected = decoded.valid, decoded.rejected
+    response.headers["Accept-Post"] = ACCEPT_POST
+
+    fresh, duplicates = ingest_dedup.split_new(db, attempt_id, valid)
+    if not fresh:
+        accepted = 0
+        handled = decoded.rejected_seqs
+    elif settings.ingest_write_behind:
         try:
-            valid.append(BehaviorEventCreateRequest.model_validate(raw))
-        except Exception as exc:
-            rejected += 1
-            logger.warning(
-                "Dropping malformed event in batch (attempt %s): %s | event=%r",
-                attempt_id,
-                exc,
-                raw,
-            )
-
-    accepted = create_behavior_events_bulk(db, kiosk_attempt, valid) if valid else 0
+            accepted = ingest_queue.enqueue(event_rows(kiosk_attempt, fresh))
+        except IngestQueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Telemetry ingest is saturated, retry shortly",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            ) from None
+        # Acknowledged by the writer once committed.
+        ingest_dedup.mark_pending(attempt_id, [ev.seq for ev in fresh])
+        handled = decoded.rejected_seqs
+    else:
+        accepted = create_behavior_events_bulk(db, kiosk_attempt, fresh)
+        handled = [ev.seq for ev in fresh] + decoded.rejected_seqs
 
+    seqs = [ev.seq for ev in valid if ev.seq is not None] + decoded.rejected_seqs
+    ingest_dedup.advance(attempt_id, handled, oldest=min(seqs, default=None))
+    # Kiosks that don't number their events get None, unless marks are
+    # already loaded; an empty batch is a kiosk asking for the mark.
+    acked_seq = ingest_dedup.acked_seq(db, attempt_id, load=bool(seqs) or not raw_events)
+    acknowledge_warnings(db, kiosk_attempt, acks)
     return BehaviorEventBatchResponse(
         accepted=accepted,
-        rejected=rejected + (len(valid) - accepted),
+        rejected=rejected + (len(fresh) - accepted),
+        duplicates=duplicates,
+        acked_seq=acked_seq,
         latest_warning_id=latest_warning_id_for_attempt(db, attempt_id),
+        warnings=[warning_response(w) for w in unacknowledged_warnings(db, attempt_id)],
     )
 
 
+def _ensure_can_view_attempt(db, attempt, current_user) -> None:
+    if current_user.role == UserRole.STUDENT and attempt.student_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot view another student's events")
+
+    if current_user.role in {UserRole.ADMIN, UserRole.TEACHER, UserRole.PROCTOR}:
+        test = get_test_meta_or_404(db, attempt.test_id)
+        if current_user.role in {UserRole.ADMIN, UserRole.TEACHER}:
+            ensure_manage_permission(test, current_user)
+
+
 @router.get("/attempts/{attempt_id}/events", response_model=list[BehaviorEventResponse])
 def get_attempt_events(attempt_id: int, db: DBSession, current_user: CurrentUser):
     """Read path - used by the live monitor / behavior logs UI in the
@@ -123,16 +243,18 @@ def get_attempt_events(attempt_id: int, db: DBSession, current_user: CurrentUser
     to GET its own events.
     """
     attempt = get_attempt_or_404(db, attempt_id)
+    _ensure_can_view_attempt(db, attempt, current_user)
+    return list_events_for_attempt(db, attempt_id)
 
-    if current_user.role == UserRole.STUDENT and attempt.student_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot view another student's events")
-
-    if current_user.role in {UserRole.ADMIN, UserRole.TEACHER, UserRole.PROCTOR}:
-        test = get_test_or_404(db, attempt.test_id)
-        if current_user.role in {UserRole.ADMIN, UserRole.TEACHER}:
-            ensure_manage_permission(test, current_user)
 
-    return list_events_for_attempt(db, attempt_id)
+@router.get("/events/{event_id}", response_model=BehaviorEventResponse)
+def get_event(event_id: int, db: DBSession, current_user: CurrentUser):
+    """A single event with its full payload. KEYSTROKE bursts are stored
+    packed and listed as a summary; this decodes them on demand.
+    """
+    event = get_event_with_payload_or_404(db, event_id)
+    _ensure_can_view_attempt(db, get_attempt_or_404(db, event.attempt_id), current_user)
+    return event
 
 
 @router.get("/tests/{test_id}/students/{student_id}/events", response_model=list[BehaviorEventResponse])
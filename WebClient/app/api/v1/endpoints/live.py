@@ -3,29 +3,125 @@
 GET /api/v1/proctor/tests/{test_id}/live returns a per-attempt snapshot for
 the live dashboard. Polled every ~3s by the frontend, with a 1s in-memory
 cache on the server so a roomful of teachers viewing the same page doesn't
-hammer the DB.
+hammer the DB. The cache holds the rendered JSON and its ETag; a poll
+whose If-None-Match names the current ETag gets a bodyless 304. With
+``?since=<version>`` the response is a LiveTestDelta of the rows that
+changed since that version, or the full snapshot if it is too old. Any of
+the filter / paging parameters instead returns a LiveBoardPage.
+
+GET /api/v1/proctor/tests/{test_id}/live/stream is the push alternative:
+a Server-Sent Events stream with one full snapshot followed by deltas of
+the rows that changed. All viewers of a test share one rebuild per change.
+
+GET /api/v1/proctor/live/overview aggregates every running test the
+caller may watch: live attempts per risk band, the riskiest candidates
+across all of them and kiosks that have gone quiet. One page for a
+proctor supervising several halls instead of one board per test.
 """
 
 from __future__ import annotations
 
-from fastapi import APIRouter
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 
 from app.api.deps import AdminTeacherProctor, DBSession
+from app.core.http_cache import json_response
 from app.models.user import UserRole
-from app.schemas.live import LiveTestSnapshot
-from app.services.live_service import get_live_snapshot
-from app.services.test_service import ensure_manage_permission, get_test_or_404
+from app.schemas.live import FleetOverview, LiveBoardPage, LiveTestDelta, LiveTestSnapshot
+from app.services.fleet_service import DEFAULT_TOP, get_fleet_response
+from app.services.live_service import DEFAULT_PAGE_SIZE, BoardQuery, decode_cursor, get_live_response
+from app.services.live_stream import stream_test
+from app.services.test_service import ensure_manage_permission, get_test_meta_or_404
 
 router = APIRouter()
 
 
-@router.get("/tests/{test_id}/live", response_model=LiveTestSnapshot)
+@router.get("/live/overview", response_model=FleetOverview)
+def live_fleet_overview(
+    request: Request,
+    db: DBSession,
+    current_user: AdminTeacherProctor,
+    top: int = Query(DEFAULT_TOP, ge=1, le=200, description="Size of top_risky"),
+):
+    body, etag = get_fleet_response(db, current_user, top)
+    return json_response(request, body, etag)
+
+
+@router.get(
+    "/tests/{test_id}/live",
+    response_model=LiveTestSnapshot | LiveTestDelta | LiveBoardPage,
+)
 def live_test_snapshot(
+    test_id: int,
+    request: Request,
+    db: DBSession,
+    current_user: AdminTeacherProctor,
+    since: int | None = Query(
+        None,
+        ge=0,
+        description="Board version the caller holds; returns only the rows changed since.",
+    ),
+    band: list[Literal["ok", "warn", "critical"]] | None = Query(None),
+    min_score: int | None = Query(None, ge=0),
+    focus_state: Literal["in_focus", "out_of_focus", "unknown"] | None = Query(None),
+    vm_detected: bool | None = Query(None),
+    q: str | None = Query(None, min_length=1, max_length=100, description="Name or email contains"),
+    limit: int | None = Query(None, ge=1, le=1000, description="Top-K / page size"),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+):
+    test = get_test_meta_or_404(db, test_id)
+    if current_user.role in {UserRole.ADMIN, UserRole.TEACHER}:
+        ensure_manage_permission(test, current_user)
+
+    query = None
+    filters = (band, min_score, focus_state, vm_detected, q, limit, cursor)
+    if any(value is not None for value in filters):
+        if since is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="since cannot be combined with filters or paging",
+            )
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed cursor"
+            ) from None
+        query = BoardQuery(
+            bands=frozenset(band or ()),
+            min_score=min_score,
+            focus_state=focus_state,
+            vm_detected=vm_detected,
+            search=q.lower() if q else None,
+            limit=limit or DEFAULT_PAGE_SIZE,
+            after=after,
+        )
+    body, etag = get_live_response(db, test, since, query)
+    return json_response(request, body, etag)
+
+
+@router.get("/tests/{test_id}/live/stream")
+def live_test_stream(
     test_id: int,
     db: DBSession,
     current_user: AdminTeacherProctor,
 ):
-    test = get_test_or_404(db, test_id)
+    """SSE stream of the live board: ``snapshot`` then ``delta`` events.
+
+    Same permission checks as :func:`live_test_snapshot`; they run before
+    the stream opens so a forbidden caller gets a plain 403.
+    """
+    test = get_test_meta_or_404(db, test_id)
     if current_user.role in {UserRole.ADMIN, UserRole.TEACHER}:
         ensure_manage_permission(test, current_user)
-    return get_live_snapshot(db, test)
+    return StreamingResponse(
+        stream_test(test.id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop nginx from buffering the stream in front of uvicorn.
+            "X-Accel-Buffering": "no",
+        },
+    )
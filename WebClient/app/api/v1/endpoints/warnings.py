@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter, HTTPException, Query, status
 from sqlalchemy.orm import joinedload
+from starlette.concurrency import run_in_threadpool
 
 from app.api.deps import (
     AdminTeacherProctor,
@@ -15,36 +16,28 @@ from app.models.proctor_warning import ProctorWarning
 from app.models.user import UserRole
 from app.schemas.warning import (
     ProctorWarningAckRequest,
+    ProctorWarningBroadcastRequest,
+    ProctorWarningBroadcastResponse,
     ProctorWarningCreateRequest,
     ProctorWarningResponse,
+    WarningLatencySummary,
 )
+from app.services import warning_latency, warning_waiters
 from app.services.behavior_service import get_attempt_or_404
-from app.services.test_service import ensure_manage_permission, get_test_or_404
+from app.services.test_service import ensure_manage_permission, get_test_meta_or_404, get_test_or_404
 from app.services.warning_service import (
     acknowledge_warning,
+    broadcast_warning,
     create_warning,
     get_warning_or_404,
     list_warnings_for_attempt,  # noqa: F401  - kept for downstream import compatibility
+    warning_response,
 )
 
 router = APIRouter()
 
-
-def _serialize(warning: ProctorWarning) -> ProctorWarningResponse:
-    sender_name = None
-    if warning.sender is not None:
-        sender_name = warning.sender.full_name or warning.sender.email
-    return ProctorWarningResponse(
-        id=warning.id,
-        attempt_id=warning.attempt_id,
-        sender_id=warning.sender_id,
-        sender_name=sender_name,
-        message=warning.message,
-        severity=warning.severity,
-        created_at=warning.created_at,
-        delivered_at=warning.delivered_at,
-        acknowledged_at=warning.acknowledged_at,
-    )
+# Upper bound on ``?wait=``; stays under common proxy read timeouts (60 s).
+MAX_WAIT_SECONDS = 30
 
 
 @router.post("/attempts/{attempt_id}/warnings", response_model=ProctorWarningResponse)
@@ -61,11 +54,111 @@ def send_warning(
         ensure_manage_permission(test, current_user)
 
     warning = create_warning(db, attempt, current_user, payload.message, payload.severity)
-    return _serialize(warning)
+    return warning_response(warning)
+
+
+@router.post(
+    "/tests/{test_id}/warnings:broadcast", response_model=ProctorWarningBroadcastResponse
+)
+def broadcast_warnings(
+    test_id: int,
+    payload: ProctorWarningBroadcastRequest,
+    db: DBSession,
+    current_user: AdminTeacherProctor,
+):
+    """Push the same warning to every matching attempt at a test.
+
+    Filters combine: attempt status (in-progress by default), current
+    risk band and an explicit list of student ids. An empty match is not
+    an error - the response just reports ``sent: 0``.
+    """
+    test = get_test_meta_or_404(db, test_id)
+    if current_user.role in {UserRole.ADMIN, UserRole.TEACHER}:
+        ensure_manage_permission(test, current_user)
+
+    attempt_ids = broadcast_warning(
+        db,
+        test_id,
+        current_user,
+        payload.message,
+        payload.severity,
+        statuses=payload.statuses,
+        bands=payload.bands,
+        student_ids=payload.student_ids,
+    )
+    return ProctorWarningBroadcastResponse(sent=len(attempt_ids), attempt_ids=attempt_ids)
+
+
+@router.get("/warnings/latency", response_model=WarningLatencySummary)
+def warning_latency_overall(current_user: AdminTeacherProctor):
+    """Warning delivery / ack latency across every test."""
+    return warning_latency.summary()
+
+
+@router.get("/tests/{test_id}/warnings/latency", response_model=WarningLatencySummary)
+def warning_latency_for_test(test_id: int, db: DBSession, current_user: AdminTeacherProctor):
+    """Warning delivery / ack latency for one test, from acked warnings."""
+    test = get_test_meta_or_404(db, test_id)
+    if current_user.role in {UserRole.ADMIN, UserRole.TEACHER}:
+        ensure_manage_permission(test, current_user)
+    return warning_latency.summary(test_id)
+
+
+def _authorize_reader(db: DBSession, reader: WarningReaderDep, attempt_id: int) -> bool:
+    """Check ``reader`` may see ``attempt_id``'s warnings; True for
+    kiosk / student callers."""
+    if reader.is_kiosk:
+        if reader.attempt is None or reader.attempt.id != attempt_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Kiosk token does not match attempt",
+            )
+        return True
+
+    user = reader.user
+    assert user is not None  # excluded by get_warning_reader
+    attempt = get_attempt_or_404(db, attempt_id)
+    if user.role == UserRole.STUDENT:
+        if attempt.student_id != user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Cannot view another student's warnings",
+            )
+    else:
+        test = get_test_meta_or_404(db, attempt.test_id)
+        if user.role in {UserRole.ADMIN, UserRole.TEACHER}:
+            ensure_manage_permission(test, user)
+    return user.role == UserRole.STUDENT
+
+
+def _load_warnings(
+    db: DBSession,
+    attempt_id: int,
+    since_id: int,
+    include_acknowledged: bool,
+    *,
+    release: bool = False,
+) -> list[ProctorWarningResponse]:
+    try:
+        rows = (
+            db.query(ProctorWarning)
+            .options(joinedload(ProctorWarning.sender))
+            .filter(ProctorWarning.attempt_id == attempt_id)
+        )
+        if since_id:
+            rows = rows.filter(ProctorWarning.id > since_id)
+        if not include_acknowledged:
+            rows = rows.filter(ProctorWarning.acknowledged_at.is_(None))
+        return [warning_response(w) for w in rows.order_by(ProctorWarning.id.asc()).all()]
+    finally:
+        if release:
+            # End the read transaction so the connection goes back to the
+            # pool instead of staying checked out while the request parks.
+            db.commit()
 
 
 @router.get("/attempts/{attempt_id}/warnings", response_model=list[ProctorWarningResponse])
-def list_warnings(
+async def list_warnings(
     attempt_id: int,
     db: DBSession,
     reader: WarningReaderDep,
@@ -79,6 +172,15 @@ def list_warnings(
             "still shows a full audit trail)."
         ),
     ),
+    wait: int = Query(
+        0,
+        ge=0,
+        le=MAX_WAIT_SECONDS,
+        description=(
+            "Long-poll: if there is nothing to return, hold the request up to "
+            "this many seconds until a warning is sent."
+        ),
+    ),
 ):
     """Polled by both the kiosk (capability token) and staff (user JWT).
 
@@ -86,47 +188,32 @@ def list_warnings(
     confirm the path attempt_id matches. Students viewing in the
     WebClient may only see their own warnings; staff can see any
     attempt for tests they manage (or any test if admin/proctor).
-    """
-    attempt = get_attempt_or_404(db, attempt_id)
 
-    if reader.is_kiosk:
-        if reader.attempt is None or reader.attempt.id != attempt_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Kiosk token does not match attempt",
-            )
-        kiosk_call = True
-    else:
-        user = reader.user
-        assert user is not None  # excluded by get_warning_reader
-        if user.role == UserRole.STUDENT:
-            if attempt.student_id != user.id:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Cannot view another student's warnings",
-                )
-        else:
-            test = get_test_or_404(db, attempt.test_id)
-            if user.role in {UserRole.ADMIN, UserRole.TEACHER}:
-                ensure_manage_permission(test, user)
-        kiosk_call = user.role == UserRole.STUDENT
+    With ``wait`` an empty answer is held back until ``create_warning``
+    fires for this attempt or the wait elapses; the request holds no DB
+    connection or worker thread while parked. Kiosks poll this way.
+    """
+    kiosk_call = await run_in_threadpool(_authorize_reader, db, reader, attempt_id)
 
     if include_acknowledged is None:
         # Default: kiosk/student callers see only un-acked (so a relaunch
         # doesn't replay), staff see everything.
         include_acknowledged = not kiosk_call
 
-    rows = (
-        db.query(ProctorWarning)
-        .options(joinedload(ProctorWarning.sender))
-        .filter(ProctorWarning.attempt_id == attempt_id)
+    if not wait:
+        return await run_in_threadpool(
+            _load_warnings, db, attempt_id, since_id, include_acknowledged
+        )
+
+    with warning_waiters.waiting(attempt_id) as waiter:
+        warnings = await run_in_threadpool(
+            _load_warnings, db, attempt_id, since_id, include_acknowledged, release=True
+        )
+        if warnings or not await waiter.wait(wait):
+            return warnings
+    return await run_in_threadpool(
+        _load_warnings, db, attempt_id, since_id, include_acknowledged, release=True
     )
-    if since_id:
-        rows = rows.filter(ProctorWarning.id > since_id)
-    if not include_acknowledged:
-        rows = rows.filter(ProctorWarning.acknowledged_at.is_(None))
-    rows = rows.order_by(ProctorWarning.id.asc()).all()
-    return [_serialize(w) for w in rows]
 
 
 @router.post("/warnings/{warning_id}/ack", response_model=ProctorWarningResponse)
@@ -150,4 +237,4 @@ def ack_warning(
         )
 
     warning = acknowledge_warning(db, warning, payload.delivered_at)
-    return _serialize(warning)
+    return warning_response(warning)
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.models.assignment import TestAssignment
 from app.models.test import Test
-from app.services.attempt_service import get_attempt_summary_map
+from app.services.attempt_service import build_attempt_summary
 
 
 def _normalize_for_compare(value: datetime) -> datetime:
@@ -16,7 +16,7 @@ def _normalize_for_compare(value: datetime) -> datetime:
 
 def my_assigned_tests_controller(db: Session, user_id: int):
     assigned_tests = (
-        db.query(Test)
+        db.query(Test, TestAssignment.attempts_used)
         .join(TestAssignment, TestAssignment.test_id == Test.id)
         .filter(TestAssignment.student_id == user_id)
         .order_by(Test.id.desc())
@@ -25,15 +25,15 @@ def my_assigned_tests_controller(db: Session, user_id: int):
 
     now = datetime.now(timezone.utc).replace(tzinfo=None)
     visible_tests = []
-    for test in assigned_tests:
+    for test, attempts_used in assigned_tests:
         start = _normalize_for_compare(test.start_time)
         end = _normalize_for_compare(test.end_time)
         if test.is_active and start <= now <= end:
-            visible_tests.append(test)
+            visible_tests.append((test, attempts_used))
 
     response = []
-    for test in visible_tests:
-        summary = get_attempt_summary_map(db, test, [user_id])[user_id]
+    for test, attempts_used in visible_tests:
+        summary = build_attempt_summary(test, user_id, attempts_used)
         response.append(
             {
                 "id": test.id,
@@ -0,0 +1,315 @@
+"""Pluggable cache shared by the hot read paths.
+
+Live snapshots, kiosk-token attempt lookups and test metadata are read
+far more often than they change. They go through a :class:`CacheBackend`
+picked by ``settings.cache_backend``:
+
+  * ``memory`` (default) - :class:`MemoryBackend`, a dict in this
+    process. Fine for a single worker; with several, each keeps its own
+    copy and only sees its own invalidations.
+  * ``redis`` - :class:`RedisBackend`. Entries live in Redis so every
+    worker shares one copy (one live snapshot build per TTL for the
+    whole deployment, not per process). Callers may also keep a short
+    per-process copy of a read (``local_ttl``); :meth:`CacheBackend.delete`
+    publishes the key on a pub/sub channel and every worker drops its
+    copy. Needs the ``redis`` extra.
+
+Keys come from :meth:`CacheBackend.key` and embed
+:data:`CACHE_KEY_VERSION`. Bump it whenever the encoding of a cached
+value changes, so workers on old and new code during a rolling deploy
+never decode each other's entries.
+
+Values are bytes; encoding them is up to the caller. The cache is an
+optimisation: a Redis error is logged and treated as a miss, never
+surfaced to the request.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+
+from app.core.config import settings
+
+try:
+    import redis  # type: ignore[import-not-found]
+except ImportError:
+    redis = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_VERSION = 2
+
+InvalidationListener = Callable[[str], None]
+_listeners: list[InvalidationListener] = []
+
+
+def add_invalidation_listener(listener: InvalidationListener) -> None:
+    """Call ``listener(key)`` whenever a key is deleted, by this worker or,
+    with a shared backend, by any other. Used to drop per-process state
+    derived from a cached entry."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def _invalidated(key: str) -> None:
+    for listener in list(_listeners):
+        try:
+            listener(key)
+        except Exception:
+            logger.exception("Cache invalidation listener failed for %s", key)
+
+
+class CacheBackend(ABC):
+    # True when entries are visible to other worker processes.
+    shared = False
+
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+
+    def key(self, namespace: str, ident: object) -> str:
+        return f"{self.prefix}:v{CACHE_KEY_VERSION}:{namespace}:{ident}"
+
+    @abstractmethod
+    def get(self, key: str, local_ttl: float = 0.0) -> bytes | None:
+        """The value, or None on a miss. ``local_ttl`` lets a shared
+        backend serve repeat reads from process memory for that long;
+        :meth:`delete` still evicts those copies."""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    @abstractmethod
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Set only if absent; True if this call stored it. Used as a
+        short lease so one worker does a rebuild the others wait for."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove ``key`` everywhere and notify invalidation listeners."""
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """:meth:`delete` for several keys; shared backends do it in one
+        round trip."""
+        for key in keys:
+            self.delete(key)
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process TTL dict. Expired entries go on read, or in a sweep
+    once the dict grows past ``max_entries``."""
+
+    def __init__(self, prefix: str, max_entries: int = 10_000) -> None:
+        super().__init__(prefix)
+        self.max_entries = max_entries
+        self._entries: dict[str, tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, local_ttl: float = 0.0) -> bytes | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (now + ttl, value)
+            if len(self._entries) > self.max_entries:
+                self._evict(now)
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return False
+            self._entries.pop(key, None)
+            self._entries[key] = (now + ttl, value)
+            return True
+
+    def delete(self, key: str) -> None:
+        self.discard(key)
+        _invalidated(key)
+
+    def discard(self, key: str) -> None:
+        """Drop ``key`` here only, without notifying anyone."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self, now: float) -> None:
+        for key in [key for key, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        # Still full of live entries: drop the oldest writes.
+        excess = len(self._entries) - self.max_entries
+        for key in list(self._entries)[: max(excess, 0)]:
+            del self._entries[key]
+
+
+class RedisBackend(CacheBackend):
+    """Entries in Redis, plus opt-in per-process copies kept coherent by
+    pub/sub. A listener thread evicts copies as other workers delete."""
+
+    shared = True
+
+    def __init__(self, client, prefix: str) -> None:
+        super().__init__(prefix)
+        self._client = client
+        self._local = MemoryBackend(prefix)
+        self.channel = f"{prefix}:v{CACHE_KEY_VERSION}:invalidate"
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._listen, name="cache-invalidation", daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str) -> RedisBackend:
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis needs the 'redis' extra (uv sync --extra redis)")
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def get(self, key: str, local_ttl: float = 0.0) -> bytes | None:
+        if local_ttl > 0:
+            value = self._local.get(key)
+            if value is not None:
+                return value
+        try:
+            value = self._client.get(key)
+        except Exception:
+            logger.warning("Cache get failed for %s", key, exc_info=True)
+            return None
+        if value is not None and local_ttl > 0:
+            self._local.set(key, value, local_ttl)
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._local.discard(key)
+        try:
+            self._client.set(key, value, px=max(int(ttl * 1000), 1))
+        except Exception:
+            logger.warning("Cache set failed for %s", key, exc_info=True)
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        try:
+            return bool(self._client.set(key, value, px=max(int(ttl * 1000), 1), nx=True))
+        except Exception:
+            logger.warning("Cache add failed for %s", key, exc_info=True)
+            # Can't coordinate, so let the caller go ahead on its own.
+            return True
+
+    def delete(self, key: str) -> None:
+        self._local.discard(key)
+        try:
+            self._client.delete(key)
+            self._client.publish(self.channel, key)
+        except Exception:
+            logger.warning("Cache delete failed for %s", key, exc_info=True)
+        # Our own publish comes back through the listener too; listeners
+        # are idempotent, but this worker shouldn't wait for the round trip.
+        _invalidated(key)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if not keys:
+            return
+        for key in keys:
+            self._local.discard(key)
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            pipe.delete(*keys)
+            for key in keys:
+                pipe.publish(self.channel, key)
+            pipe.execute()
+        except Exception:
+            logger.warning("Cache delete failed for %d keys", len(keys), exc_info=True)
+        for key in keys:
+            _invalidated(key)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5.0)
+
+    def _listen(self) -> None:
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Deletes published while we weren't subscribed are lost;
+                # start from an empty local copy instead.
+                self._local.clear()
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None or message.get("type") != "message":
+                        continue
+                    data = message["data"]
+                    key = data.decode() if isinstance(data, bytes) else str(data)
+                    self._local.discard(key)
+                    _invalidated(key)
+            except Exception:
+                logger.warning("Cache invalidation listener lost its connection", exc_info=True)
+                self._local.clear()
+                self._stop.wait(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+
+_backend: CacheBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def _from_settings() -> CacheBackend:
+    if settings.cache_backend == "redis":
+        return RedisBackend.from_url(settings.cache_redis_url, settings.cache_key_prefix)
+    if settings.cache_backend != "memory":
+        raise RuntimeError(f"Unknown CACHE_BACKEND {settings.cache_backend!r}")
+    return MemoryBackend(settings.cache_key_prefix)
+
+
+def get_cache() -> CacheBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _from_settings()
+        return _backend
+
+
+def use_cache(backend: CacheBackend | None) -> CacheBackend | None:
+    """Swap the process-wide backend (None: rebuild from settings on the
+    next :func:`get_cache`). Returns the previous one, not closed."""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+        return previous
+
+
+def close() -> None:
+    previous = use_cache(None)
+    if previous is not None:
+        previous.close()
+
+
+def reset() -> None:
+    """Test hook - start again from an empty backend built from settings."""
+    close()
@@ -0,0 +1,145 @@
+"""Transparent request-body decompression.
+
+The kiosk gzips ``events:batch`` bodies - KEYSTROKE bursts repeat the
+same keys (``key``, ``scan_code``, ``modifiers``, ``proc``, ``ts``) up
+to 25 times per event, so JSON compresses very well. This middleware
+inflates ``Content-Encoding: gzip`` (and ``zstd`` when the optional
+``zstandard`` package is installed) before FastAPI parses the body, so
+endpoints never see compressed bytes.
+
+Both the compressed and the inflated size are capped at
+``max_request_body_bytes``; anything larger is answered with 413 without
+inflating the rest, so a small zip bomb can't balloon in memory. An
+unknown encoding gets 415, a corrupt stream 400.
+"""
+
+from __future__ import annotations
+
+import json
+import zlib
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
+_READ_CHUNK = 64 * 1024
+
+
+class _TooLarge(Exception):
+    pass
+
+
+def supported_encodings() -> tuple[str, ...]:
+    return ("gzip", "zstd") if zstandard is not None else ("gzip",)
+
+
+def _gunzip(body: bytes, limit: int) -> bytes:
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    out = inflater.decompress(body, limit + 1)
+    if len(out) > limit or inflater.unconsumed_tail:
+        raise _TooLarge
+    if not inflater.eof:
+        raise zlib.error("truncated gzip stream")
+    return out
+
+
+def _unzstd(body: bytes, limit: int) -> bytes:
+    chunks: list[bytes] = []
+    size = 0
+    with zstandard.ZstdDecompressor().stream_reader(body) as reader:
+        while chunk := reader.read(_READ_CHUNK):
+            size += len(chunk)
+            if size > limit:
+                raise _TooLarge
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def decompress(encoding: str, body: bytes, limit: int) -> bytes:
+    """Inflate ``body``; raises ``ValueError`` for unsupported encodings."""
+    if encoding in ("gzip", "x-gzip"):
+        return _gunzip(body, limit)
+    if encoding == "zstd" and zstandard is not None:
+        return _unzstd(body, limit)
+    raise ValueError(encoding)
+
+
+class RequestDecompressionMiddleware:
+    def __init__(self, app: ASGIApp, *, max_body_bytes: int) -> None:
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = list(scope["headers"])
+        encoding = next(
+            (v.decode("latin-1").strip().lower() for k, v in headers if k == b"content-encoding"),
+            "",
+        )
+        if encoding in ("", "identity"):
+            await self.app(scope, receive, send)
+            return
+
+        if encoding not in ("x-gzip", *supported_encodings()):
+            await _error(send, 415, f"Unsupported Content-Encoding: {encoding}")
+            return
+
+        chunks: list[bytes] = []
+        received = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            received += len(chunk)
+            if received > self.max_body_bytes:
+                await _error(send, 413, "Request body too large")
+                return
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+
+        try:
+            body = decompress(encoding, b"".join(chunks), self.max_body_bytes)
+        except _TooLarge:
+            await _error(send, 413, "Decompressed request body too large")
+            return
+        except Exception:
+            await _error(send, 400, f"Malformed {encoding} request body")
+            return
+
+        scope = dict(scope)
+        scope["headers"] = [
+            (k, v) for k, v in headers if k not in (b"content-encoding", b"content-length")
+        ] + [(b"content-length", str(len(body)).encode("latin-1"))]
+
+        delivered = False
+
+        async def replay() -> Message:
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, replay, send)
+
+
+async def _error(send: Send, status_code: int, detail: str) -> None:
+    payload = json.dumps({"detail": detail}).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(payload)).encode("latin-1")),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": payload})
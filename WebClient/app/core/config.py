@@ -29,6 +29,73 @@ class Settings(BaseSettings):
 
     cors_origins: list[str] = ["*"]
 
+    # Live monitoring ----------------------------------------------------
+    # When true, live-board risk scores come from the in-process
+    # ``risk_engine`` fed at ingest time instead of re-reading the last
+    # 60 s of events per poll. The engine only sees events ingested by
+    # its own process, so turn this off when running several uvicorn
+    # workers / replicas, including with ``cache_backend = "redis"``.
+    live_risk_engine: bool = True
+    # How long past its 1 s TTL a live snapshot may still be served while
+    # a background rebuild runs (see ``live_service``). 0 disables.
+    live_snapshot_stale_seconds: float = 5.0
+    # The fleet overview lists an in-progress attempt as disconnected once
+    # its kiosk has sent nothing for this long.
+    live_disconnected_seconds: float = 45.0
+
+    # Cache for live snapshots, kiosk-token attempt lookups and test
+    # metadata (see ``app.core.cache``). "memory" keeps one copy per
+    # process; "redis" shares them across workers through
+    # ``cache_redis_url`` and needs the optional ``redis`` package.
+    cache_backend: str = "memory"
+    cache_redis_url: str = "redis://localhost:6379/0"
+    cache_key_prefix: str = "omniproctor"
+
+    # Telemetry ingestion ------------------------------------------------
+    # Write-behind mode: events:batch validates + enqueues and returns;
+    # a writer thread commits queued events as large multi-row INSERTs
+    # every ``ingest_batch_max_rows`` rows or ``ingest_batch_max_delay_ms``,
+    # whichever comes first. Off by default because acknowledged events
+    # can be lost if the process is killed before the writer flushes.
+    ingest_write_behind: bool = False
+    ingest_queue_max_events: int = 50_000
+    ingest_batch_max_rows: int = 2_000
+    ingest_batch_max_delay_ms: int = 200
+    # Stream large event batches with COPY on Postgres + psycopg instead
+    # of a multi-row INSERT (see ``event_writer``).
+    ingest_use_copy: bool = True
+    # Store KEYSTROKE bursts column-packed in ``payload_packed`` (see
+    # ``keystroke_codec``). Off writes the kiosk's JSON unchanged.
+    ingest_pack_keystrokes: bool = True
+    # Apply pending schema migrations when a worker starts. Turn off to
+    # run `python -m app.db.migrations upgrade` as a separate deploy step.
+    migrate_on_startup: bool = True
+    # Postgres: create behavior_events range-partitioned by month of
+    # event_time (see ``event_partitions``). Only affects new databases;
+    # existing tables are converted explicitly.
+    behavior_events_partitioned: bool = True
+    event_partition_months_ahead: int = 2
+    # Monthly partitions entirely older than this are detached and
+    # dropped. 0 keeps everything.
+    event_retention_months: int = 0
+    event_partition_check_hours: float = 6.0
+    # Background close of abandoned IN_PROGRESS attempts (see
+    # ``attempt_reaper``). At most ``attempt_reaper_batch_size`` per sweep.
+    attempt_reaper_enabled: bool = True
+    attempt_reaper_interval_seconds: float = 30.0
+    attempt_reaper_batch_size: int = 1_000
+    # Longest a worker trusts its in-memory warning marks before
+    # re-reading them (see ``warning_index``).
+    warning_index_max_age_seconds: float = 5.0
+    # How often warning latency histograms are added to the roll-up
+    # table and re-read from it (see ``warning_latency``).
+    warning_latency_rollup_enabled: bool = True
+    warning_latency_rollup_seconds: float = 60.0
+    # Cap on a Content-Encoding'd request body, both as sent and once
+    # inflated (see ``app.core.compression``). A full 200-event batch of
+    # keystroke bursts is well under 1 MiB of JSON.
+    max_request_body_bytes: int = 4 * 1024 * 1024
+
     # Kiosk-browser installer distribution -------------------------------
     # Two delivery modes - the first one to be configured wins:
     #
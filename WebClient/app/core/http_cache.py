@@ -0,0 +1,39 @@
+"""Conditional GET helpers for endpoints that serve pre-rendered JSON.
+
+A hot read endpoint can cache its rendered response body alongside a
+strong ETag, computed once when the body is built. :func:`json_response`
+sends those bytes as they are, skipping ``response_model`` validation
+and serialisation, or a bodyless 304 when the client's ``If-None-Match``
+already names that ETag. Browsers revalidate on their own under
+``Cache-Control: no-cache``, so polling pages need no client changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+# Cache, but revalidate on every request; never in a shared proxy.
+REVALIDATE = "private, no-cache"
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match compares weakly: W/"x" matches "x".
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def json_response(request: Request, body: bytes, etag: str, cache_control: str = REVALIDATE) -> Response:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
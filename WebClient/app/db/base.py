@@ -5,3 +5,4 @@ from app.models.proctor_warning import ProctorWarning  # noqa: F401
 from app.models.test import Test  # noqa: F401
 from app.models.test_attempt import TestAttempt  # noqa: F401
 from app.models.user import User  # noqa: F401
+from app.models.warning_latency import WarningLatencyRollup  # noqa: F401
@@ -0,0 +1,398 @@
+"""Versioned schema migrations.
+
+Replaces the ``create_all`` + ``ensure_schema_compatibility`` pair that
+used to run on every worker boot - a dozen ``ALTER TYPE``s, several
+``ALTER TABLE``s and full-table ``UPDATE tests`` on a live database,
+raced by every uvicorn worker. Each step in :data:`MIGRATIONS` now runs
+once per database and is recorded in ``schema_migrations``:
+
+  * Steps are ordered by ``version`` and idempotent (``IF NOT EXISTS``
+    throughout), so a database that predates the version table - already
+    brought partway by the old startup code - just replays them.
+  * One runner at a time: :func:`upgrade` holds a Postgres advisory
+    lock. Other workers wait on it, then find nothing left to do.
+  * A transactional step commits together with its version row. Steps
+    that can't run in a transaction (``ALTER TYPE ... ADD VALUE``,
+    ``CREATE INDEX CONCURRENTLY``) run in autocommit and are recorded
+    once they finish; re-running them is harmless.
+  * Most steps only concern Postgres; on SQLite (tests, local dev) they
+    are recorded without running, as before.
+
+Worker startup calls :func:`ensure_schema`, a single ``SELECT`` when the
+schema is at head. Deploys can migrate ahead of time and start workers
+with ``MIGRATE_ON_STARTUP=false``::
+
+    python -m app.db.migrations upgrade
+    python -m app.db.migrations status
+
+To change the schema, append a step. Never edit or renumber one that
+has shipped.
+"""
+
+from __future__ import annotations
+
+import logging
+import sys
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.db.base import Base
+from app.models.warning_latency import WarningLatencyRollup
+from app.services import event_partitions
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock key for the runner ("schema").
+_LOCK_KEY = 0x7363_6865_6D61
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+class SchemaOutOfDate(RuntimeError):
+    """Raised at startup when migrations are pending and may not run."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+    # False: runs on an AUTOCOMMIT connection (see module docstring).
+    transactional: bool = True
+    postgres_only: bool = True
+
+
+def _partitioning_enabled(conn: Connection) -> bool:
+    return conn.dialect.name == "postgresql" and settings.behavior_events_partitioned
+
+
+# ---------------------------------------------------------------------------
+# Steps
+# ---------------------------------------------------------------------------
+def _base_schema(conn: Connection) -> None:
+    if _partitioning_enabled(conn):
+        # behavior_events needs hand-written partitioned DDL; everything
+        # it references has to exist first.
+        Base.metadata.create_all(
+            bind=conn,
+            tables=[t for t in Base.metadata.sorted_tables if t.name != event_partitions.PARENT],
+        )
+        event_partitions.create_partitioned_table(conn)
+    Base.metadata.create_all(bind=conn)
+
+
+# Enum values added after the first release. Any new BehaviorEventType
+# member needs a step like this one.
+_BEHAVIOR_EVENT_VALUES: tuple[str, ...] = (
+    "FOCUS_LOSS",
+    "FOCUS_REGAIN",
+    "MONITOR_COUNT_CHANGE",
+    "KEYSTROKE",
+    "BLOCKED_HOTKEY",
+    "CLIPBOARD_COPY",
+    "CLIPBOARD_PASTE",
+    "VM_DETECTED",
+    "SUSPICIOUS_PROCESS",
+    "NETWORK_BLOCKED",
+    "FULLSCREEN_EXIT",
+    "RENDERER_CRASH",
+    "WARNING_DELIVERED",
+)
+
+
+def _behavior_event_types(conn: Connection) -> None:
+    # ALTER TYPE ... ADD VALUE cannot run inside a transaction in older
+    # Postgres versions.
+    for value in _BEHAVIOR_EVENT_VALUES:
+        conn.execute(text(f"ALTER TYPE behavioreventtype ADD VALUE IF NOT EXISTS '{value}'"))
+
+
+def _test_schedule_columns(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE tests ADD COLUMN IF NOT EXISTS start_time TIMESTAMPTZ"))
+    conn.execute(text("ALTER TABLE tests ADD COLUMN IF NOT EXISTS end_time TIMESTAMPTZ"))
+    conn.execute(text("ALTER TABLE tests ADD COLUMN IF NOT EXISTS max_attempts INTEGER"))
+    # Only rows that predate the columns; no full-table rewrite.
+    conn.execute(
+        text(
+            """
+            UPDATE tests
+            SET start_time = COALESCE(start_time, created_at, NOW()),
+                end_time = COALESCE(end_time, NOW() + INTERVAL '2 hours'),
+                max_attempts = COALESCE(max_attempts, 1)
+            WHERE start_time IS NULL OR end_time IS NULL OR max_attempts IS NULL
+            """
+        )
+    )
+    conn.execute(text("ALTER TABLE tests ALTER COLUMN start_time SET NOT NULL"))
+    conn.execute(text("ALTER TABLE tests ALTER COLUMN end_time SET NOT NULL"))
+    conn.execute(text("ALTER TABLE tests ALTER COLUMN max_attempts SET NOT NULL"))
+
+
+def _behavior_event_seq(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE behavior_events ADD COLUMN IF NOT EXISTS seq BIGINT"))
+    # Partitioned tables already carry the (attempt_id, seq, event_time)
+    # index under this name.
+    conn.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_behavior_events_attempt_seq "
+            "ON behavior_events (attempt_id, seq)"
+        )
+    )
+
+
+def _behavior_event_payload_packed(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE behavior_events ADD COLUMN IF NOT EXISTS payload_packed BYTEA"))
+
+
+# Single-column behavior_events indexes replaced by the model's composite ones.
+_RETIRED_BEHAVIOR_EVENT_INDEXES: tuple[str, ...] = (
+    "ix_behavior_events_id",
+    "ix_behavior_events_attempt_id",
+    "ix_behavior_events_test_id",
+    "ix_behavior_events_student_id",
+    "ix_behavior_events_event_type",
+    "ix_behavior_events_event_time",
+)
+
+
+def _behavior_event_composite_indexes(conn: Connection) -> None:
+    # An unpartitioned table from before the composite indexes: build
+    # those and drop the old ones without blocking ingestion.
+    if event_partitions.table_kind(conn) != "heap":
+        return
+    for ddl in event_partitions.composite_index_ddl(concurrently=True):
+        conn.execute(text(ddl))
+    for name in _RETIRED_BEHAVIOR_EVENT_INDEXES:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+
+def _attempt_number_and_activity(conn: Connection) -> None:
+    conn.execute(text("ALTER TABLE test_attempts ADD COLUMN IF NOT EXISTS attempt_number INTEGER"))
+    conn.execute(text("ALTER TABLE test_attempts ADD COLUMN IF NOT EXISTS last_activity_at TIMESTAMPTZ"))
+    # Same order the read paths used to rank by.
+    conn.execute(
+        text(
+            """
+            UPDATE test_attempts t
+            SET attempt_number = ranked.n
+            FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY test_id, student_id ORDER BY started_at, id
+                ) AS n
+                FROM test_attempts
+            ) ranked
+            WHERE t.id = ranked.id AND t.attempt_number IS NULL
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            UPDATE test_attempts t
+            SET last_activity_at = GREATEST(
+                t.started_at,
+                (SELECT MAX(e.event_time) FROM behavior_events e WHERE e.attempt_id = t.id)
+            )
+            WHERE t.last_activity_at IS NULL
+            """
+        )
+    )
+    conn.execute(text("ALTER TABLE test_attempts ALTER COLUMN attempt_number SET DEFAULT 1"))
+    conn.execute(text("ALTER TABLE test_attempts ALTER COLUMN attempt_number SET NOT NULL"))
+    conn.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_test_attempts_student_number "
+            "ON test_attempts (test_id, student_id, attempt_number)"
+        )
+    )
+
+
+def _attempt_in_progress_index(conn: Connection) -> None:
+    conn.execute(
+        text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_test_attempts_in_progress_activity "
+            "ON test_attempts (last_activity_at, started_at) WHERE status = 'IN_PROGRESS'"
+        )
+    )
+
+
+def _attempt_counters(conn: Connection) -> None:
+    conn.execute(
+        text(
+            "ALTER TABLE test_attempts "
+            "ADD COLUMN IF NOT EXISTS counts_toward_limit BOOLEAN NOT NULL DEFAULT false"
+        )
+    )
+    conn.execute(
+        text(
+            "ALTER TABLE test_assignments "
+            "ADD COLUMN IF NOT EXISTS attempts_used INTEGER NOT NULL DEFAULT 0"
+        )
+    )
+    # Same rule the COUNT used to apply on every read (and
+    # attempt_counters.counts_toward_limit applies from now on).
+    conn.execute(
+        text(
+            """
+            UPDATE test_attempts
+            SET counts_toward_limit = true
+            WHERE status = 'ENDED'
+              AND (ended_reason IS NULL
+                   OR (ended_reason NOT LIKE 'auto_closed_stale_%'
+                       AND ended_reason NOT LIKE 'orphan_%'))
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            UPDATE test_assignments a
+            SET attempts_used = c.used
+            FROM (
+                SELECT test_id, student_id, COUNT(*) AS used
+                FROM test_attempts
+                WHERE counts_toward_limit
+                GROUP BY test_id, student_id
+            ) c
+            WHERE a.test_id = c.test_id AND a.student_id = c.student_id
+            """
+        )
+    )
+
+
+def _warning_latency_rollups(conn: Connection) -> None:
+    # Databases created at head already have it from the base schema step.
+    WarningLatencyRollup.__table__.create(bind=conn, checkfirst=True)
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "base schema", _base_schema, postgres_only=False),
+    Migration(2, "behavior event types", _behavior_event_types, transactional=False),
+    Migration(3, "test schedule columns", _test_schedule_columns),
+    Migration(4, "behavior event seq", _behavior_event_seq),
+    Migration(5, "behavior event payload_packed", _behavior_event_payload_packed),
+    Migration(6, "behavior event composite indexes", _behavior_event_composite_indexes, transactional=False),
+    Migration(7, "attempt number and last activity", _attempt_number_and_activity),
+    Migration(8, "in-progress attempt index", _attempt_in_progress_index, transactional=False),
+    Migration(9, "attempt limit counters", _attempt_counters),
+    Migration(10, "warning latency rollups", _warning_latency_rollups, postgres_only=False),
+)
+HEAD = MIGRATIONS[-1].version
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+def applied_versions(conn: Connection) -> set[int]:
+    if not inspect(conn).has_table(schema_migrations.name):
+        return set()
+    return set(conn.scalars(select(schema_migrations.c.version)))
+
+
+def pending(conn: Connection) -> list[Migration]:
+    done = applied_versions(conn)
+    return [m for m in MIGRATIONS if m.version not in done]
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(
+        schema_migrations.insert().values(
+            version=migration.version,
+            name=migration.name,
+            applied_at=datetime.now(timezone.utc),
+        )
+    )
+
+
+@contextmanager
+def _runner_lock(engine: Engine):
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+
+
+def upgrade(engine: Engine) -> list[Migration]:
+    """Apply every pending step; returns the ones this call ran."""
+    ran: list[Migration] = []
+    with _runner_lock(engine):
+        with engine.begin() as conn:
+            _metadata.create_all(bind=conn)
+            todo = pending(conn)
+        for migration in todo:
+            started = time.perf_counter()
+            skip = migration.postgres_only and engine.dialect.name != "postgresql"
+            if migration.transactional or skip:
+                with engine.begin() as conn:
+                    if not skip:
+                        migration.apply(conn)
+                    _record(conn, migration)
+            else:
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    migration.apply(conn)
+                with engine.begin() as conn:
+                    _record(conn, migration)
+            logger.info(
+                "Schema migration %s (%s) %s in %.0f ms",
+                migration.version,
+                migration.name,
+                "recorded" if skip else "applied",
+                (time.perf_counter() - started) * 1000,
+            )
+            ran.append(migration)
+    return ran
+
+
+def ensure_schema(engine: Engine) -> None:
+    """Worker startup: check the version, migrate only if behind."""
+    with engine.connect() as conn:
+        todo = pending(conn)
+    if not todo:
+        return
+    if not settings.migrate_on_startup:
+        raise SchemaOutOfDate(
+            f"Database schema is behind ({len(todo)} pending migration(s)); "
+            "run `python -m app.db.migrations upgrade`"
+        )
+    upgrade(engine)
+
+
+def main(argv: list[str]) -> int:
+    from app.db.session import engine
+
+    logging.basicConfig(level=logging.INFO)
+    command = argv[0] if argv else "status"
+    if command == "upgrade":
+        upgrade(engine)
+    elif command != "status":
+        print("usage: python -m app.db.migrations [status|upgrade]")
+        return 2
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+    for migration in MIGRATIONS:
+        mark = "x" if migration.version in done else " "
+        print(f"[{mark}] {migration.version:>3}  {migration.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,14 +1,23 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
 
 from app.api.v1.api import api_router
+from app.core import cache
+from app.core.compression import RequestDecompressionMiddleware
 from app.core.config import settings
-from app.db.base import Base
+from app.db import migrations
 from app.db.session import engine
+from app.services import event_partitions, warning_latency
+from app.services.attempt_reaper import attempt_reaper
+from app.services.ingest_queue import ingest_queue
 
 app = FastAPI(title=settings.app_name, debug=settings.debug)
 
+app.add_middleware(
+    RequestDecompressionMiddleware,
+    max_body_bytes=settings.max_request_body_bytes,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -18,119 +27,29 @@ app.add_middleware(
 )
 
 
-NEW_BEHAVIOR_EVENT_VALUES: tuple[str, ...] = (
-    "FOCUS_LOSS",
-    "FOCUS_REGAIN",
-    "MONITOR_COUNT_CHANGE",
-    "KEYSTROKE",
-    "BLOCKED_HOTKEY",
-    "CLIPBOARD_COPY",
-    "CLIPBOARD_PASTE",
-    "VM_DETECTED",
-    "SUSPICIOUS_PROCESS",
-    "NETWORK_BLOCKED",
-    "FULLSCREEN_EXIT",
-    "RENDERER_CRASH",
-    "WARNING_DELIVERED",
-)
-
-
-def ensure_schema_compatibility() -> None:
-    # Keep existing Docker volumes usable when new model columns are introduced.
-    if engine.dialect.name != "postgresql":
-        return
-
-    # ALTER TYPE ... ADD VALUE cannot run inside a transaction in older
-    # Postgres versions, so we use AUTOCOMMIT for the enum upgrade.
-    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
-        for value in NEW_BEHAVIOR_EVENT_VALUES:
-            conn.execute(
-                text(f"ALTER TYPE behavioreventtype ADD VALUE IF NOT EXISTS '{value}'")
-            )
-
-    with engine.begin() as conn:
-        conn.execute(
-            text(
-                """
-                ALTER TABLE tests
-                ADD COLUMN IF NOT EXISTS start_time TIMESTAMPTZ
-                """
-            )
-        )
-        conn.execute(
-            text(
-                """
-                ALTER TABLE tests
-                ADD COLUMN IF NOT EXISTS end_time TIMESTAMPTZ
-                """
-            )
-        )
-        conn.execute(
-            text(
-                """
-                ALTER TABLE tests
-                ADD COLUMN IF NOT EXISTS max_attempts INTEGER
-                """
-            )
-        )
-
-        conn.execute(
-            text(
-                """
-                UPDATE tests
-                SET start_time = COALESCE(start_time, created_at, NOW())
-                """
-            )
-        )
-        conn.execute(
-            text(
-                """
-                UPDATE tests
-                SET end_time = COALESCE(end_time, NOW() + INTERVAL '2 hours')
-                """
-            )
-        )
-        conn.execute(
-            text(
-                """
-                UPDATE tests
-                SET max_attempts = COALESCE(max_attempts, 1)
-                """
-            )
-        )
-
-        conn.execute(
-            text(
-                """
-                ALTER TABLE tests
-                ALTER COLUMN start_time SET NOT NULL
-                """
-            )
-        )
-        conn.execute(
-            text(
-                """
-                ALTER TABLE tests
-                ALTER COLUMN end_time SET NOT NULL
-                """
-            )
-        )
-        conn.execute(
-            text(
-                """
-                ALTER TABLE tests
-                ALTER COLUMN max_attempts SET NOT NULL
-                """
-            )
-        )
-
-
 @app.on_event("startup")
 def startup() -> None:
-    # Create base schema first so ensure_schema_compatibility's ALTER TABLE
-    # statements have something to alter on a fresh database.
-    Base.metadata.create_all(bind=engine)
-    ensure_schema_compatibility()
+    # A single version check when the schema is at head; pending
+    # migrations run under an advisory lock (see app.db.migrations).
+    migrations.ensure_schema(engine)
+    if engine.dialect.name == "postgresql" and settings.behavior_events_partitioned:
+        event_partitions.partition_maintainer.start(engine)
+    if settings.attempt_reaper_enabled:
+        attempt_reaper.start(engine)
+    if settings.warning_latency_rollup_enabled:
+        warning_latency.rollup.start(engine)
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    # Flush write-behind telemetry before the worker exits.
+    ingest_queue.drain()
+    event_partitions.partition_maintainer.stop()
+    attempt_reaper.stop()
+    if settings.warning_latency_rollup_enabled:
+        # Last roll-up, so acks since the previous one survive the restart.
+        warning_latency.rollup.stop()
+    cache.close()
 
 
 @app.get("/health")
@@ -138,4 +57,14 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition (warning latency histograms, reaper
+    sweep counters)."""
+    return PlainTextResponse(
+        warning_latency.render_prometheus() + attempt_reaper.render_prometheus(),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
 app.include_router(api_router, prefix=settings.api_v1_prefix)
@@ -4,6 +4,7 @@ from app.models.proctor_warning import ProctorWarning
 from app.models.test import Test
 from app.models.test_attempt import AttemptStatus, TestAttempt
 from app.models.user import User, UserRole
+from app.models.warning_latency import WarningLatencyRollup
 
 __all__ = [
 	"User",
@@ -15,4 +16,5 @@ __all__ = [
 	"BehaviorEvent",
 	"BehaviorEventType",
 	"ProctorWarning",
+	"WarningLatencyRollup",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, String, UniqueConstraint
+from sqlalchemy import ForeignKey, Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin
@@ -15,6 +15,9 @@ class TestAssignment(Base, TimestampMixin):
     student_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
     added_by: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     note: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # Attempts that count towards the test's max_attempts; maintained by
+    # attempt_service when an attempt ends (see attempt_counters).
+    attempts_used: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
     test = relationship("Test", back_populates="assignments")
     student = relationship("User", back_populates="assignments", foreign_keys=[student_id])
@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, Enum, ForeignKey, JSON, String
+from sqlalchemy import BigInteger, DateTime, Enum, ForeignKey, Index, JSON, LargeBinary, String, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin
@@ -16,9 +16,8 @@ class BehaviorEventType(str, enum.Enum):
     PASTE = "PASTE"
 
     # Proctoring telemetry emitted by the kiosk Browser. Each new value MUST
-    # also be added to ``ensure_schema_compatibility`` in ``app/main.py`` so
-    # existing Postgres databases can ``ALTER TYPE ... ADD VALUE IF NOT
-    # EXISTS`` without a full migration.
+    # also get an ``ALTER TYPE ... ADD VALUE IF NOT EXISTS`` step in
+    # ``app/db/migrations.py`` so existing Postgres databases accept it.
     FOCUS_LOSS = "FOCUS_LOSS"
     FOCUS_REGAIN = "FOCUS_REGAIN"
     MONITOR_COUNT_CHANGE = "MONITOR_COUNT_CHANGE"
@@ -45,15 +44,34 @@ ALLOWED_SEVERITIES = {SEVERITY_INFO, SEVERITY_WARN, SEVERITY_CRITICAL}
 
 class BehaviorEvent(Base, TimestampMixin):
     __tablename__ = "behavior_events"
+    __table_args__ = (
+        # Composite indexes for the real read paths instead of one index
+        # per column: per-attempt timelines (event list, risk windows),
+        # newest event per type on the live board, and the per-student
+        # log view.
+        Index("ix_behavior_events_attempt_time", "attempt_id", text("event_time DESC")),
+        Index("ix_behavior_events_attempt_type_time", "attempt_id", "event_type", text("event_time DESC")),
+        Index("ix_behavior_events_test_student_time", "test_id", "student_id", text("event_time DESC")),
+        # Backs idempotent batch ingestion (see ``ingest_dedup``). NULL
+        # seqs (older kiosks, single-event endpoint) never collide. On
+        # Postgres the table is partitioned and this also includes
+        # event_time (see ``event_partitions``).
+        Index("uq_behavior_events_attempt_seq", "attempt_id", "seq", unique=True),
+    )
 
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    attempt_id: Mapped[int] = mapped_column(ForeignKey("test_attempts.id", ondelete="CASCADE"), nullable=False, index=True)
-    test_id: Mapped[int] = mapped_column(ForeignKey("tests.id", ondelete="CASCADE"), nullable=False, index=True)
-    student_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    event_type: Mapped[BehaviorEventType] = mapped_column(Enum(BehaviorEventType), nullable=False, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    attempt_id: Mapped[int] = mapped_column(ForeignKey("test_attempts.id", ondelete="CASCADE"), nullable=False)
+    test_id: Mapped[int] = mapped_column(ForeignKey("tests.id", ondelete="CASCADE"), nullable=False)
+    student_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    event_type: Mapped[BehaviorEventType] = mapped_column(Enum(BehaviorEventType), nullable=False)
     payload: Mapped[dict | None] = mapped_column(JSON, nullable=True)
-    event_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
+    event_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     severity: Mapped[str] = mapped_column(String(20), default="info", nullable=False)
+    # Kiosk-assigned, per-attempt, strictly increasing.
+    seq: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    # Columnar KEYSTROKE burst (see ``keystroke_codec``); ``payload`` then
+    # only holds a summary. Deferred so list queries never load it.
+    payload_packed: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True, deferred=True)
 
     attempt = relationship("TestAttempt", back_populates="events")
     test = relationship("Test")
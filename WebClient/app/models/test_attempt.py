@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Index, Integer, String, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin
@@ -14,6 +14,18 @@ class AttemptStatus(str, enum.Enum):
 
 class TestAttempt(Base, TimestampMixin):
     __tablename__ = "test_attempts"
+    __table_args__ = (
+        # Also what keeps two concurrent starts from taking the same number.
+        Index("uq_test_attempts_student_number", "test_id", "student_id", "attempt_number", unique=True),
+        # Only live attempts, for the stale-attempt reaper's scan.
+        Index(
+            "ix_test_attempts_in_progress_activity",
+            "last_activity_at",
+            "started_at",
+            postgresql_where=text("status = 'IN_PROGRESS'"),
+            sqlite_where=text("status = 'IN_PROGRESS'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     test_id: Mapped[int] = mapped_column(ForeignKey("tests.id", ondelete="CASCADE"), index=True, nullable=False)
@@ -23,6 +35,15 @@ class TestAttempt(Base, TimestampMixin):
     started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     ended_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     ended_reason: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # Set when the attempt ends: False for attempts the system closed on
+    # the candidate's behalf (attempt_counters.counts_toward_limit).
+    counts_toward_limit: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # 1-based sequence among this student's attempts at this test, fixed
+    # when the attempt is created (see attempt_service).
+    attempt_number: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+    # Newest telemetry seen, kept by the ingest path at
+    # attempt_activity.ACTIVITY_RESOLUTION_SECONDS granularity.
+    last_activity_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     test = relationship("Test", back_populates="attempts")
     student = relationship("User", back_populates="attempts", foreign_keys=[student_id])
@@ -0,0 +1,28 @@
+"""Persisted roll-ups of the warning delivery latency histograms."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class WarningLatencyRollup(Base):
+    """One histogram bucket for one test and stage (see
+    ``app.services.warning_latency``). ``count`` and ``sum_ms`` are
+    running totals that every worker's roll-up adds to."""
+
+    __tablename__ = "warning_latency_rollups"
+
+    test_id: Mapped[int] = mapped_column(
+        ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True
+    )
+    stage: Mapped[str] = mapped_column(String(16), primary_key=True)
+    # Bucket upper bound in milliseconds; -1 for the overflow bucket.
+    le_ms: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    sum_ms: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
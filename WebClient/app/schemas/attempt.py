@@ -13,6 +13,7 @@ class TestAttemptResponse(BaseModel):
     id: int
     test_id: int
     student_id: int
+    attempt_number: int
     status: AttemptStatus
     started_at: datetime
     ended_at: datetime | None
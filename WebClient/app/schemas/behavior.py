@@ -3,6 +3,7 @@ from datetime import datetime
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 from app.models.behavior_event import ALLOWED_SEVERITIES, BehaviorEventType
+from app.schemas.warning import ProctorWarningResponse
 
 
 class BehaviorEventCreateRequest(BaseModel):
@@ -10,6 +11,9 @@ class BehaviorEventCreateRequest(BaseModel):
     payload: dict | None = None
     severity: str = "info"
     event_time: datetime | None = None
+    # Per-attempt sequence number assigned by the kiosk; lets the server
+    # drop events from a retried batch it already stored.
+    seq: int | None = Field(default=None, ge=1)
 
     @field_validator("event_type", mode="before")
     @classmethod
@@ -35,8 +39,8 @@ class BehaviorEventCreateRequest(BaseModel):
 class BehaviorEventResponse(BaseModel):
     id: int
     attempt_id: int
-    # 1-based sequence among this student's attempts at this test (ordered
-    # by started_at). attempt_id is the global test_attempts PK and is
+    # 1-based sequence among this student's attempts at this test (stored
+    # on test_attempts). attempt_id is the global test_attempts PK and is
     # not user-meaningful - the UI displays attempt_number. Defaults to 1
     # so older code paths that haven't been updated still produce a sane
     # value.
@@ -55,6 +59,9 @@ class BehaviorEventResponse(BaseModel):
 # Batch ingest (used by the kiosk BatchPoster).
 # ---------------------------------------------------------------------------
 MAX_BATCH_SIZE = 200
+# Warning acks handled per batch; any beyond this are ignored and the
+# kiosk sends them again with the next batch.
+MAX_BATCH_ACKS = 50
 
 
 class BehaviorEventBatchRequest(BaseModel):
@@ -69,9 +76,20 @@ class BehaviorEventBatchRequest(BaseModel):
     """
 
     events: list[dict] = Field(default_factory=list)
+    # Warning acks (``ProctorWarningBatchAck``), checked one by one too.
+    acks: list[dict] = Field(default_factory=list)
 
 
 class BehaviorEventBatchResponse(BaseModel):
     accepted: int
     rejected: int
+    # Events skipped because their seq was already stored (retried batch).
+    duplicates: int = 0
+    # Every event with ``seq <= acked_seq`` has been handled; the kiosk
+    # can trim its buffer up to here. None when a non-empty batch carries
+    # no seqs and none are known for the attempt.
+    acked_seq: int | None = None
     latest_warning_id: int | None = None
+    # The attempt's unacknowledged warnings, after applying the batch's
+    # acks, so a kiosk needs no separate warnings poll.
+    warnings: list[ProctorWarningResponse] = Field(default_factory=list)
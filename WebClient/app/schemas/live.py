@@ -36,4 +36,81 @@ class LiveTestSnapshot(BaseModel):
     test_id: int
     test_name: str
     generated_at: datetime
+    # Board version; pass it back as ``?since=`` to get a LiveTestDelta.
+    # Increases whenever the board changes. 0 on SSE snapshots.
+    version: int = 0
     rows: list[LiveAttemptRow]
+
+
+class LiveTestDelta(BaseModel):
+    """Rows that changed between version ``since`` and ``version``.
+
+    Apply by replacing ``changed`` rows (by attempt_id), dropping
+    ``removed`` attempt ids and re-sorting. ``since`` that is too old or
+    unknown gets a full LiveTestSnapshot instead - check for ``rows``.
+    """
+
+    test_id: int
+    test_name: str
+    generated_at: datetime
+    version: int
+    since: int
+    changed: list[LiveAttemptRow]
+    removed: list[int]
+
+
+class LiveBoardPage(BaseModel):
+    """One page of a filtered live board, highest risk first.
+
+    Pass ``next_cursor`` back as ``?cursor=`` (with the same filters) for
+    the next page; None on the last one.
+    """
+
+    test_id: int
+    test_name: str
+    generated_at: datetime
+    version: int
+    rows: list[LiveAttemptRow]
+    next_cursor: str | None
+
+
+class FleetTestSummary(BaseModel):
+    """One running test on the fleet overview: live attempts by risk band."""
+
+    test_id: int
+    test_name: str
+    end_time: datetime
+    live_attempts: int
+    ok: int
+    warn: int
+    critical: int
+    disconnected: int
+
+
+class FleetAttempt(BaseModel):
+    test_id: int
+    test_name: str
+    attempt_id: int
+    student_id: int
+    student_name: str
+    student_email: str
+    risk_score: int
+    risk_band: str  # ok | warn | critical
+    top_contributors: list[tuple[str, int]]
+    # Last telemetry from the kiosk; lags by up to the activity throttle
+    # (``attempt_activity.ACTIVITY_RESOLUTION_SECONDS``).
+    last_seen_at: datetime
+
+
+class FleetOverview(BaseModel):
+    """Every running test the caller may watch, in one response.
+
+    ``top_risky`` is the highest-risk attempts across all of them (risk
+    above zero only); ``disconnected`` the in-progress attempts whose
+    kiosk has gone quiet, longest silence first.
+    """
+
+    generated_at: datetime
+    tests: list[FleetTestSummary]
+    top_risky: list[FleetAttempt]
+    disconnected: list[FleetAttempt]
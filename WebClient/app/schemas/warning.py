@@ -3,12 +3,15 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 from app.models.behavior_event import ALLOWED_SEVERITIES
+from app.models.test_attempt import AttemptStatus
 
 MAX_MESSAGE_LENGTH = 1000
+MAX_BROADCAST_STUDENTS = 1000
 
 
 class ProctorWarningCreateRequest(BaseModel):
@@ -22,6 +25,21 @@ class ProctorWarningCreateRequest(BaseModel):
         return normalized if normalized in ALLOWED_SEVERITIES else "warn"
 
 
+class ProctorWarningBroadcastRequest(ProctorWarningCreateRequest):
+    """One warning for every attempt at a test matching all given filters."""
+
+    bands: list[Literal["ok", "warn", "critical"]] | None = None
+    statuses: list[AttemptStatus] = Field(
+        default_factory=lambda: [AttemptStatus.IN_PROGRESS], min_length=1
+    )
+    student_ids: list[int] | None = Field(default=None, max_length=MAX_BROADCAST_STUDENTS)
+
+
+class ProctorWarningBroadcastResponse(BaseModel):
+    sent: int
+    attempt_ids: list[int]
+
+
 class ProctorWarningResponse(BaseModel):
     id: int
     attempt_id: int
@@ -38,3 +56,34 @@ class ProctorWarningResponse(BaseModel):
 
 class ProctorWarningAckRequest(BaseModel):
     delivered_at: datetime | None = None
+
+
+class ProctorWarningBatchAck(BaseModel):
+    """An ack riding on an ``events:batch`` request instead of its own POST."""
+
+    warning_id: int = Field(ge=1)
+    delivered_at: datetime | None = None
+
+
+class WarningLatencyBucket(BaseModel):
+    le_seconds: float | None  # None for the overflow bucket
+    count: int
+
+
+class WarningLatencyStats(BaseModel):
+    count: int
+    mean_seconds: float | None
+    p50_seconds: float | None
+    p90_seconds: float | None
+    p99_seconds: float | None
+    buckets: list[WarningLatencyBucket]
+
+
+class WarningLatencySummary(BaseModel):
+    """Latency of acknowledged warnings for one test, or every test when
+    ``test_id`` is None: ``deliver`` is sent -> on screen, ``ack`` is on
+    screen -> acknowledged."""
+
+    test_id: int | None
+    deliver: WarningLatencyStats
+    ack: WarningLatencyStats
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from app.models.assignment import TestAssignment
 from app.models.test import Test
 from app.models.user import User, UserRole
+from app.services.lookup_cache import forget_attempts
 
 
 def ensure_student(user: User) -> None:
@@ -49,5 +50,9 @@ def unassign_student(db: Session, test_id: int, student_id: int) -> None:
     if not assignment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assignment not found")
 
+    # The assignment's attempts are deleted with it; their kiosk tokens
+    # must stop resolving.
+    attempt_ids = [attempt.id for attempt in assignment.attempts]
     db.delete(assignment)
     db.commit()
+    forget_attempts(attempt_ids)
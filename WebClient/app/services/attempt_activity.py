@@ -0,0 +1,95 @@
+"""Throttled ``test_attempts.last_activity_at`` upkeep for the ingest path.
+
+``start_attempt`` needs to know when an IN_PROGRESS attempt last sent
+telemetry to tell a mid-test reload from an orphan. That used to be a
+``MAX(event_time)`` over ``behavior_events`` on every start; now the
+ingest paths stamp it on the attempt row instead.
+
+Writing the column on every batch would turn each insert into an insert
+plus a row update on ``test_attempts``, so updates are throttled: an
+attempt's column only moves once the new activity is at least
+:data:`ACTIVITY_RESOLUTION_SECONDS` past the value this process last
+wrote. Readers must therefore treat the column as up to that much
+behind. The ``UPDATE`` only ever moves the value forward, so several
+workers - each with its own marks - can't regress it.
+
+Usage mirrors ``risk_engine``: :func:`stamp` inside the transaction,
+:func:`record` once it has committed.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.models.test_attempt import TestAttempt
+
+ACTIVITY_RESOLUTION_SECONDS = 15
+
+_RESOLUTION = timedelta(seconds=ACTIVITY_RESOLUTION_SECONDS)
+_last_written: dict[int, datetime] = {}
+_lock = threading.Lock()
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def stamp(db: Session, events: Iterable) -> dict[int, datetime]:
+    """Move ``last_activity_at`` forward for the attempts in ``events``.
+
+    ``events`` only needs ``attempt_id`` and ``event_time`` (ORM rows,
+    ``insert_event_rows`` results). Runs in the caller's transaction and
+    returns what it wrote, for :func:`record`.
+    """
+    now = datetime.now(timezone.utc)
+    latest: dict[int, datetime] = {}
+    for ev in events:
+        # A kiosk with a fast clock must not keep an attempt alive.
+        at = min(_as_utc(ev.event_time), now) if ev.event_time else now
+        if ev.attempt_id not in latest or at > latest[ev.attempt_id]:
+            latest[ev.attempt_id] = at
+
+    with _lock:
+        due = {
+            attempt_id: at
+            for attempt_id, at in latest.items()
+            if attempt_id not in _last_written or at - _last_written[attempt_id] >= _RESOLUTION
+        }
+    for attempt_id, at in due.items():
+        db.execute(
+            update(TestAttempt)
+            .where(
+                TestAttempt.id == attempt_id,
+                or_(TestAttempt.last_activity_at.is_(None), TestAttempt.last_activity_at < at),
+            )
+            .values(last_activity_at=at)
+            .execution_options(synchronize_session=False)
+        )
+    return due
+
+
+def record(written: dict[int, datetime]) -> None:
+    """Remember committed stamps so the next ones can be throttled."""
+    if not written:
+        return
+    with _lock:
+        for attempt_id, at in written.items():
+            if attempt_id not in _last_written or at > _last_written[attempt_id]:
+                _last_written[attempt_id] = at
+
+
+def forget_attempt(attempt_id: int) -> None:
+    """Drop an attempt's mark once it has ended."""
+    with _lock:
+        _last_written.pop(attempt_id, None)
+
+
+def reset() -> None:
+    """Test hook - forget every mark, as if the process had restarted."""
+    with _lock:
+        _last_written.clear()
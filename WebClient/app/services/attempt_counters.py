@@ -0,0 +1,161 @@
+"""Materialised attempt-limit counters.
+
+``test_assignments.attempts_used`` holds how many of the candidate's
+attempts at that test count towards ``max_attempts``, so a limit check
+is a single-row read instead of a ``COUNT`` over ``test_attempts`` with
+a ``LIKE`` per non-counting reason.
+
+Whether an attempt counts is decided once, when it ends, and stored in
+``test_attempts.counts_toward_limit``; :func:`increment` bumps the
+assignment in the same transaction. Every code path that ends an
+attempt goes through ``attempt_service`` or ``attempt_reaper``.
+
+The counters are derived data. :func:`find_drift` recomputes them from
+attempt history and :func:`repair` writes the recomputed values back::
+
+    python -m app.services.attempt_counters check
+    python -m app.services.attempt_counters repair
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+
+from sqlalchemy import func, not_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.assignment import TestAssignment
+from app.models.test_attempt import AttemptStatus, TestAttempt
+
+# Reasons that mark an ENDED attempt as something the system closed on
+# the candidate's behalf rather than a real attempt the candidate spent.
+# These don't count towards ``attempts_used`` so an installer / network /
+# kiosk-crash glitch can't burn a candidate's allowance of tries.
+#
+# - ``auto_closed_stale_after_*`` is set by ``_close_stale_attempt`` when
+#   the kiosk goes idle for >120 s and we recycle its IN_PROGRESS row;
+#   ``auto_closed_stale_reaped`` when ``attempt_reaper`` closes it first.
+# - ``orphan_*`` is set when ``end_attempt`` is called with no live
+#   IN_PROGRESS row and we synthesise an ENDED row purely for audit.
+NON_COUNTING_REASON_PREFIXES = ("auto_closed_stale_", "orphan_")
+
+
+def counts_toward_limit(reason: str | None) -> bool:
+    """Whether an attempt ending with ``reason`` uses up a try."""
+    return reason is None or not reason.startswith(NON_COUNTING_REASON_PREFIXES)
+
+
+def _counting_history_filter():
+    """:func:`counts_toward_limit` over stored rows - ENDED, with a null
+    or counting ``ended_reason``. Only used to recompute; live reads use
+    the stored column."""
+    return (TestAttempt.status == AttemptStatus.ENDED) & or_(
+        TestAttempt.ended_reason.is_(None),
+        not_(
+            or_(
+                *(
+                    TestAttempt.ended_reason.like(f"{prefix}%")
+                    for prefix in NON_COUNTING_REASON_PREFIXES
+                )
+            )
+        ),
+    )
+
+
+def increment(db: Session, test_id: int, student_id: int) -> None:
+    """Count one more attempt for (test, student); commits with the caller.
+
+    An in-database ``attempts_used + 1``, so concurrent ends can't lose
+    an update.
+    """
+    db.execute(
+        update(TestAssignment)
+        .where(TestAssignment.test_id == test_id, TestAssignment.student_id == student_id)
+        .values(attempts_used=TestAssignment.attempts_used + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+@dataclass(frozen=True)
+class CounterDrift:
+    assignment_id: int
+    test_id: int
+    student_id: int
+    stored: int
+    actual: int
+
+
+def find_drift(db: Session) -> list[CounterDrift]:
+    """Assignments whose ``attempts_used`` disagrees with attempt history."""
+    history = (
+        select(
+            TestAttempt.test_id,
+            TestAttempt.student_id,
+            func.count(TestAttempt.id).label("actual"),
+        )
+        .where(_counting_history_filter())
+        .group_by(TestAttempt.test_id, TestAttempt.student_id)
+        .subquery()
+    )
+    actual = func.coalesce(history.c.actual, 0)
+    rows = db.execute(
+        select(
+            TestAssignment.id,
+            TestAssignment.test_id,
+            TestAssignment.student_id,
+            TestAssignment.attempts_used,
+            actual.label("actual"),
+        )
+        .outerjoin(
+            history,
+            (history.c.test_id == TestAssignment.test_id)
+            & (history.c.student_id == TestAssignment.student_id),
+        )
+        .where(TestAssignment.attempts_used != actual)
+        .order_by(TestAssignment.id)
+    ).all()
+    return [CounterDrift(row.id, row.test_id, row.student_id, row.attempts_used, row.actual) for row in rows]
+
+
+def repair(db: Session) -> list[CounterDrift]:
+    """Recompute ``counts_toward_limit`` and ``attempts_used`` from history
+    and commit; returns the assignments that were off."""
+    db.execute(
+        update(TestAttempt)
+        .where(TestAttempt.counts_toward_limit != _counting_history_filter())
+        .values(counts_toward_limit=_counting_history_filter())
+        .execution_options(synchronize_session=False)
+    )
+    drift = find_drift(db)
+    for item in drift:
+        db.execute(
+            update(TestAssignment)
+            .where(TestAssignment.id == item.assignment_id)
+            .values(attempts_used=item.actual)
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    return drift
+
+
+def main(argv: list[str]) -> int:
+    from app.db.session import SessionLocal
+
+    command = argv[0] if argv else "check"
+    if command not in ("check", "repair"):
+        print("usage: python -m app.services.attempt_counters [check|repair]")
+        return 2
+    with SessionLocal() as db:
+        drift = repair(db) if command == "repair" else find_drift(db)
+    for item in drift:
+        print(
+            f"assignment {item.assignment_id} (test {item.test_id}, student {item.student_id}): "
+            f"stored {item.stored}, actual {item.actual}"
+        )
+    print(f"{len(drift)} assignment(s) {'repaired' if command == 'repair' else 'out of date'}")
+    return 1 if drift and command == "check" else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,193 @@
+"""Background closing of abandoned IN_PROGRESS attempts.
+
+A kiosk that crashes or loses the network before End Session leaves its
+attempt IN_PROGRESS. ``start_attempt`` only notices when the same
+candidate starts again, so until then the dead attempt stays on every
+live board poll. The reaper sweeps periodically instead:
+
+  * One ``UPDATE ... RETURNING`` per sweep closes every attempt idle for
+    longer than ``start_attempt`` tolerates (``last_activity_at``, or
+    ``started_at`` if no telemetry ever arrived), up to
+    ``attempt_reaper_batch_size`` rows; the rest go next sweep. The
+    partial index on in-progress attempts keeps the scan to live rows.
+  * Several workers: ``pg_try_advisory_xact_lock`` lets one sweep at a
+    time and the others skip, and ``FOR UPDATE SKIP LOCKED`` steps over
+    attempts a request is ending right now instead of waiting on them.
+  * Reaped attempts get :data:`REAPED_REASON`, which does not count
+    towards the attempt limit, so ``attempts_used`` is left alone. The
+    idle time is ``ended_at - last_activity_at`` on the row.
+
+``start_attempt`` keeps its inline check for the window between sweeps.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, or_, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.models.test_attempt import AttemptStatus, TestAttempt
+from app.services import attempt_activity, ingest_dedup, risk_engine, warning_index
+from app.services.attempt_service import STALE_ATTEMPT_SECONDS
+from app.services.live_stream import notify_test_changed
+
+logger = logging.getLogger(__name__)
+
+REAPED_REASON = "auto_closed_stale_reaped"
+
+# pg_try_advisory_xact_lock key for a sweep ("reaper").
+_LOCK_KEY = 0x7265_6170_6572
+
+
+def idle_cutoff(now: datetime) -> datetime:
+    """Attempts with no activity since this are stale. Same bound as
+    ``start_attempt``, including the ``last_activity_at`` throttle lag."""
+    return now - timedelta(
+        seconds=STALE_ATTEMPT_SECONDS + attempt_activity.ACTIVITY_RESOLUTION_SECONDS
+    )
+
+
+def close_stale(conn: Connection, now: datetime | None = None) -> list[tuple[int, int]] | None:
+    """Close stale attempts in the caller's transaction. Returns
+    ``[(attempt_id, test_id)]`` for the ones closed, or None if another
+    worker is already sweeping. Call :func:`forget` after committing."""
+    now = now or datetime.now(timezone.utc)
+    cutoff = idle_cutoff(now)
+    if conn.dialect.name == "postgresql" and not conn.scalar(
+        text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _LOCK_KEY}
+    ):
+        return None
+    in_progress = TestAttempt.status == AttemptStatus.IN_PROGRESS
+    stale = (
+        select(TestAttempt.id)
+        .where(
+            in_progress,
+            or_(
+                TestAttempt.last_activity_at < cutoff,
+                and_(TestAttempt.last_activity_at.is_(None), TestAttempt.started_at < cutoff),
+            ),
+        )
+        .order_by(TestAttempt.id)
+        .limit(settings.attempt_reaper_batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    rows = conn.execute(
+        update(TestAttempt)
+        # Re-checked in case End Session committed after the scan.
+        .where(TestAttempt.id.in_(stale.scalar_subquery()), in_progress)
+        .values(
+            status=AttemptStatus.ENDED,
+            ended_at=now,
+            ended_reason=REAPED_REASON,
+            counts_toward_limit=False,
+        )
+        .returning(TestAttempt.id, TestAttempt.test_id)
+    ).all()
+    return [(row.id, row.test_id) for row in rows]
+
+
+def forget(reaped: list[tuple[int, int]]) -> None:
+    """Drop in-memory state for reaped attempts and refresh their boards."""
+    for attempt_id, _ in reaped:
+        risk_engine.forget_attempt(attempt_id)
+        ingest_dedup.forget_attempt(attempt_id)
+        attempt_activity.forget_attempt(attempt_id)
+        warning_index.forget_attempt(attempt_id)
+    for test_id in {test_id for _, test_id in reaped}:
+        notify_test_changed(test_id)
+
+
+@dataclass
+class ReaperStats:
+    sweeps: int = 0
+    skipped: int = 0
+    failed: int = 0
+    reaped: int = 0
+    last_reaped: int = 0
+    last_sweep_ms: float = 0.0
+    last_sweep_at: datetime | None = None
+
+
+class AttemptReaper:
+    def __init__(self, interval_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats = ReaperStats()
+
+    def start(self, engine: Engine) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(engine,), name="attempt-reaper", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def sweep(self, engine: Engine, now: datetime | None = None) -> list[tuple[int, int]] | None:
+        started = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                reaped = close_stale(conn, now)
+        except Exception:
+            with self._lock:
+                self._stats.failed += 1
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            if reaped is None:
+                self._stats.skipped += 1
+                return None
+            self._stats.sweeps += 1
+            self._stats.reaped += len(reaped)
+            self._stats.last_reaped = len(reaped)
+            self._stats.last_sweep_ms = elapsed_ms
+            self._stats.last_sweep_at = datetime.now(timezone.utc)
+        forget(reaped)
+        if reaped:
+            logger.info("Closed %d stale attempt(s) in %.0f ms", len(reaped), elapsed_ms)
+        return reaped
+
+    def stats(self) -> ReaperStats:
+        with self._lock:
+            return ReaperStats(**vars(self._stats))
+
+    def render_prometheus(self) -> str:
+        """Text exposition format: this worker's sweep counters."""
+        stats = self.stats()
+        lines = []
+        for field, help_text in (
+            ("sweeps", "Stale attempt sweeps completed."),
+            ("skipped", "Sweeps skipped while another worker held the lock."),
+            ("failed", "Sweeps that raised."),
+            ("reaped", "Stale attempts closed by the reaper."),
+        ):
+            name = f"omniproctor_attempt_reaper_{field}_total"
+            lines += [
+                f"# HELP {name} {help_text}",
+                f"# TYPE {name} counter",
+                f"{name} {getattr(stats, field)}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def _run(self, engine: Engine) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.sweep(engine)
+            except Exception:
+                logger.exception("Stale attempt sweep failed")
+
+
+attempt_reaper = AttemptReaper(settings.attempt_reaper_interval_seconds)
@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 
 from fastapi import HTTPException, status
-from sqlalchemy import func, not_, or_
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.models.assignment import TestAssignment
@@ -9,39 +9,17 @@ from app.models.test import Test
 from app.models.test_attempt import AttemptStatus, TestAttempt
 from app.models.user import User
 from app.schemas.attempt import AttemptSummaryResponse
+from app.services import (
+    attempt_activity,
+    attempt_counters,
+    ingest_dedup,
+    risk_engine,
+    warning_index,
+)
+from app.services.live_stream import notify_test_changed
 
-# Reasons that mark an ENDED attempt as something the system closed on
-# the candidate's behalf rather than a real attempt the candidate spent.
-# These are excluded from ``attempts_used`` so an installer / network /
-# kiosk-crash glitch can't burn a candidate's allowance of tries.
-#
-# - ``auto_closed_stale_after_*`` is set by ``_close_stale_attempt`` when
-#   the kiosk goes idle for >120 s and we recycle its IN_PROGRESS row.
-# - ``orphan_*`` is set when ``end_attempt`` is called with no live
-#   IN_PROGRESS row and we synthesise an ENDED row purely for audit.
-_NON_COUNTING_REASON_PREFIXES = ("auto_closed_stale_", "orphan_")
-
-
-def _attempts_used_filter():
-    """SQLAlchemy expression matching attempts that should count towards
-    ``attempts_used``. A row counts iff it is ENDED AND its
-    ``ended_reason`` is null (real End Session) or doesn't start with any
-    non-counting prefix.
-    """
-    return (TestAttempt.status == AttemptStatus.ENDED) & or_(
-        TestAttempt.ended_reason.is_(None),
-        not_(
-            or_(
-                *(
-                    TestAttempt.ended_reason.like(f"{prefix}%")
-                    for prefix in _NON_COUNTING_REASON_PREFIXES
-                )
-            )
-        ),
-    )
 
-
-def _build_summary(test: Test, student_id: int, attempts_used: int) -> AttemptSummaryResponse:
+def build_attempt_summary(test: Test, student_id: int, attempts_used: int) -> AttemptSummaryResponse:
     attempts_remaining = max(test.max_attempts - attempts_used, 0)
     return AttemptSummaryResponse(
         test_id=test.id,
@@ -54,13 +32,11 @@ def _build_summary(test: Test, student_id: int, attempts_used: int) -> AttemptSu
 
 
 def get_attempts_used(db: Session, test_id: int, student_id: int) -> int:
+    """Tries used so far - the assignment's counter (see
+    ``attempt_counters``); 0 when not assigned."""
     return (
-        db.query(func.count(TestAttempt.id))
-        .filter(
-            TestAttempt.test_id == test_id,
-            TestAttempt.student_id == student_id,
-            _attempts_used_filter(),
-        )
+        db.query(TestAssignment.attempts_used)
+        .filter(TestAssignment.test_id == test_id, TestAssignment.student_id == student_id)
         .scalar()
         or 0
     )
@@ -68,7 +44,7 @@ def get_attempts_used(db: Session, test_id: int, student_id: int) -> int:
 
 def get_attempt_summary(db: Session, test: Test, student_id: int) -> AttemptSummaryResponse:
     used = get_attempts_used(db, test.id, student_id)
-    return _build_summary(test, student_id, used)
+    return build_attempt_summary(test, student_id, used)
 
 
 def get_attempt_summary_map(db: Session, test: Test, student_ids: list[int]) -> dict[int, AttemptSummaryResponse]:
@@ -76,22 +52,29 @@ def get_attempt_summary_map(db: Session, test: Test, student_ids: list[int]) ->
         return {}
 
     rows = (
-        db.query(TestAttempt.student_id, func.count(TestAttempt.id))
-        .filter(
-            TestAttempt.test_id == test.id,
-            TestAttempt.student_id.in_(student_ids),
-            _attempts_used_filter(),
-        )
-        .group_by(TestAttempt.student_id)
+        db.query(TestAssignment.student_id, TestAssignment.attempts_used)
+        .filter(TestAssignment.test_id == test.id, TestAssignment.student_id.in_(student_ids))
         .all()
     )
-    used_map = {student_id: count for student_id, count in rows}
+    used_map = {student_id: used for student_id, used in rows}
     return {
-        student_id: _build_summary(test, student_id, used_map.get(student_id, 0))
+        student_id: build_attempt_summary(test, student_id, used_map.get(student_id, 0))
         for student_id in student_ids
     }
 
 
+def _finish_attempt(db: Session, attempt: TestAttempt, ended_at: datetime, reason: str | None) -> None:
+    """Mark ``attempt`` ENDED and, if it counts, charge it to the
+    assignment - both in the caller's transaction."""
+    attempt.status = AttemptStatus.ENDED
+    attempt.ended_at = ended_at
+    attempt.ended_reason = reason
+    attempt.counts_toward_limit = attempt_counters.counts_toward_limit(reason)
+    db.add(attempt)
+    if attempt.counts_toward_limit:
+        attempt_counters.increment(db, attempt.test_id, attempt.student_id)
+
+
 # How long an IN_PROGRESS attempt can sit with no activity before we
 # treat it as orphaned (kiosk crashed / network died on End Session) and
 # auto-close it. Anything shorter than this and a true mid-test reload
@@ -100,24 +83,47 @@ STALE_ATTEMPT_SECONDS = 120
 
 
 def _close_stale_attempt(db: Session, attempt: TestAttempt, *, reason: str) -> None:
-    attempt.status = AttemptStatus.ENDED
-    attempt.ended_at = datetime.now(timezone.utc)
-    attempt.ended_reason = reason
-    db.add(attempt)
+    _finish_attempt(db, attempt, datetime.now(timezone.utc), reason)
     db.commit()
+    risk_engine.forget_attempt(attempt.id)
+    ingest_dedup.forget_attempt(attempt.id)
+    attempt_activity.forget_attempt(attempt.id)
+    warning_index.forget_attempt(attempt.id)
+    notify_test_changed(attempt.test_id)
 
 
-def start_attempt(db: Session, test: Test, student: User) -> TestAttempt:
-    assignment = (
+def _lock_assignment(db: Session, test_id: int, student_id: int) -> TestAssignment | None:
+    """Load the (test, student) assignment row FOR UPDATE.
+
+    Serialises start / end for one candidate on Postgres, so the
+    ``attempt_number`` read by :func:`_next_attempt_number` can't be
+    taken twice (the unique index on the column backs this up) and the
+    ``attempts_used`` checked against the limit is current.
+    """
+    return (
         db.query(TestAssignment)
-        .filter(TestAssignment.test_id == test.id, TestAssignment.student_id == student.id)
+        .filter(TestAssignment.test_id == test_id, TestAssignment.student_id == student_id)
+        .with_for_update()
         .first()
     )
+
+
+def _next_attempt_number(db: Session, test_id: int, student_id: int) -> int:
+    """Number for a new attempt; call with the assignment row locked."""
+    current = (
+        db.query(func.max(TestAttempt.attempt_number))
+        .filter(TestAttempt.test_id == test_id, TestAttempt.student_id == student_id)
+        .scalar()
+    )
+    return (current or 0) + 1
+
+
+def start_attempt(db: Session, test: Test, student: User) -> TestAttempt:
+    assignment = _lock_assignment(db, test.id, student.id)
     if not assignment:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Student is not assigned to this test")
 
-    summary = get_attempt_summary(db, test, student.id)
-    if not summary.can_attempt:
+    if not build_attempt_summary(test, student.id, assignment.attempts_used).can_attempt:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Attempt limit reached")
 
     existing = (
@@ -137,16 +143,10 @@ def start_attempt(db: Session, test: Test, student: User) -> TestAttempt:
         # never reached us (auto-close + create a fresh one so we don't
         # replay old warnings into the new session).
         last_activity = existing.started_at
-        from app.models.behavior_event import BehaviorEvent
-        latest_event_time = (
-            db.query(func.max(BehaviorEvent.event_time))
-            .filter(BehaviorEvent.attempt_id == existing.id)
-            .scalar()
-        )
-        if latest_event_time and (
-            last_activity is None or latest_event_time > last_activity
+        if existing.last_activity_at and (
+            last_activity is None or existing.last_activity_at > last_activity
         ):
-            last_activity = latest_event_time
+            last_activity = existing.last_activity_at
 
         if last_activity is None:
             return existing
@@ -157,7 +157,9 @@ def start_attempt(db: Session, test: Test, student: User) -> TestAttempt:
         if last_activity.tzinfo is None:
             last_activity = last_activity.replace(tzinfo=timezone.utc)
         idle_seconds = (now - last_activity).total_seconds()
-        if idle_seconds < STALE_ATTEMPT_SECONDS:
+        # last_activity_at is throttled and may trail the newest event
+        # by up to one resolution step; don't close a live session early.
+        if idle_seconds < STALE_ATTEMPT_SECONDS + attempt_activity.ACTIVITY_RESOLUTION_SECONDS:
             return existing
 
         # Orphaned attempt - close it server-side and fall through to
@@ -167,11 +169,10 @@ def start_attempt(db: Session, test: Test, student: User) -> TestAttempt:
             existing,
             reason=f"auto_closed_stale_after_{int(idle_seconds)}s",
         )
-        # Re-check the attempt limit now that we've consumed one. We use
-        # the freshly committed state so the count includes the just-
-        # closed orphan.
-        summary = get_attempt_summary(db, test, student.id)
-        if not summary.can_attempt:
+        # That commit released the assignment lock; take it back and
+        # re-check the limit against the counter as it is now.
+        assignment = _lock_assignment(db, test.id, student.id)
+        if not build_attempt_summary(test, student.id, assignment.attempts_used).can_attempt:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Attempt limit reached")
 
     attempt = TestAttempt(
@@ -179,19 +180,17 @@ def start_attempt(db: Session, test: Test, student: User) -> TestAttempt:
         student_id=student.id,
         assignment_id=assignment.id,
         status=AttemptStatus.IN_PROGRESS,
+        attempt_number=_next_attempt_number(db, test.id, student.id),
     )
     db.add(attempt)
     db.commit()
+    notify_test_changed(test.id)
     db.refresh(attempt)
     return attempt
 
 
 def end_attempt(db: Session, test: Test, student: User, reason: str | None = None) -> TestAttempt:
-    assignment = (
-        db.query(TestAssignment)
-        .filter(TestAssignment.test_id == test.id, TestAssignment.student_id == student.id)
-        .first()
-    )
+    assignment = _lock_assignment(db, test.id, student.id)
     if not assignment:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Student is not assigned to this test")
 
@@ -208,16 +207,17 @@ def end_attempt(db: Session, test: Test, student: User, reason: str | None = Non
 
     now = datetime.now(timezone.utc)
     if active:
-        active.status = AttemptStatus.ENDED
-        active.ended_at = now
-        active.ended_reason = reason
-        db.add(active)
+        _finish_attempt(db, active, now, reason)
         db.commit()
+        risk_engine.forget_attempt(active.id)
+        ingest_dedup.forget_attempt(active.id)
+        attempt_activity.forget_attempt(active.id)
+        warning_index.forget_attempt(active.id)
+        notify_test_changed(test.id)
         db.refresh(active)
         return active
 
-    summary = get_attempt_summary(db, test, student.id)
-    if not summary.can_attempt:
+    if not build_attempt_summary(test, student.id, assignment.attempts_used).can_attempt:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Attempt limit reached")
 
     # Audit-only row. The candidate has no live IN_PROGRESS attempt, so
@@ -235,6 +235,8 @@ def end_attempt(db: Session, test: Test, student: User, reason: str | None = Non
         started_at=now,
         ended_at=now,
         ended_reason=orphan_reason,
+        counts_toward_limit=False,
+        attempt_number=_next_attempt_number(db, test.id, student.id),
     )
     db.add(attempt)
     db.commit()
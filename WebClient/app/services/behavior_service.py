@@ -2,46 +2,23 @@ from datetime import datetime, timezone
 from typing import Iterable
 
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.config import settings
 from app.models.behavior_event import BehaviorEvent
 from app.models.test_attempt import TestAttempt
 from app.schemas.behavior import BehaviorEventCreateRequest
-
-
-def _attempt_number_map(db: Session, test_id: int, student_id: int) -> dict[int, int]:
-    """Return ``{attempt_id: 1-based sequence}`` for this (test, student).
-
-    Sequence is by ``started_at`` ascending so the candidate's first
-    attempt is #1, second is #2, etc. - independent of the global
-    ``test_attempts.id`` PK.
-    """
-    attempts = (
-        db.query(TestAttempt.id, TestAttempt.started_at)
-        .filter(TestAttempt.test_id == test_id, TestAttempt.student_id == student_id)
-        .order_by(TestAttempt.started_at.asc(), TestAttempt.id.asc())
-        .all()
-    )
-    return {row.id: idx for idx, row in enumerate(attempts, start=1)}
-
-
-def attempt_number_for(db: Session, attempt: TestAttempt) -> int:
-    """1-based sequence for a single attempt (cheap path - just a COUNT)."""
-    earlier = (
-        db.query(TestAttempt.id)
-        .filter(
-            TestAttempt.test_id == attempt.test_id,
-            TestAttempt.student_id == attempt.student_id,
-            TestAttempt.started_at < attempt.started_at,
-        )
-        .count()
-    )
-    return earlier + 1
+from app.services import attempt_activity, risk_engine
+from app.services.event_writer import event_rows, insert_event_rows
+from app.services.keystroke_codec import pack_payload, unpack_payload
+from app.services.live_stream import notify_test_changed
+from app.services.lookup_cache import AttemptRef
 
 
 def create_behavior_event(
     db: Session,
-    attempt: TestAttempt,
+    attempt: TestAttempt | AttemptRef,
     event_type,
     payload: dict | None,
     severity: str,
@@ -49,6 +26,9 @@ def create_behavior_event(
 ) -> BehaviorEvent:
     if not event_time:
         event_time = datetime.now(timezone.utc)
+    packed = None
+    if settings.ingest_pack_keystrokes:
+        payload, packed = pack_payload(event_type, payload)
 
     event = BehaviorEvent(
         attempt_id=attempt.id,
@@ -58,9 +38,16 @@ def create_behavior_event(
         payload=payload,
         severity=severity,
         event_time=event_time,
+        payload_packed=packed,
     )
     db.add(event)
+    db.flush()
+    entries = risk_engine.window_entries([event])
+    activity = attempt_activity.stamp(db, [event])
     db.commit()
+    risk_engine.record_entries(attempt.id, entries)
+    attempt_activity.record(activity)
+    notify_test_changed(attempt.test_id)
     db.refresh(event)
     return event
 
@@ -74,48 +61,45 @@ def get_attempt_or_404(db: Session, attempt_id: int) -> TestAttempt:
 
 def create_behavior_events_bulk(
     db: Session,
-    attempt: TestAttempt,
+    attempt: TestAttempt | AttemptRef,
     events: Iterable[BehaviorEventCreateRequest],
 ) -> int:
     """Insert a batch of events in a single commit. Returns count inserted.
 
     Silently drops malformed entries (e.g. unknown event_type slipping in
     after the kiosk + server fall out of sync) so a single bad event
-    doesn't reject the whole batch.
+    doesn't reject the whole batch. Goes through the Core / COPY fast
+    path in ``event_writer`` - no ORM instance per event.
     """
-    now = datetime.now(timezone.utc)
-    rows: list[BehaviorEvent] = []
-    for ev in events:
-        try:
-            rows.append(
-                BehaviorEvent(
-                    attempt_id=attempt.id,
-                    test_id=attempt.test_id,
-                    student_id=attempt.student_id,
-                    event_type=ev.event_type,
-                    payload=ev.payload,
-                    severity=ev.severity,
-                    event_time=ev.event_time or now,
-                )
-            )
-        except Exception:
-            continue
+    rows = event_rows(attempt, events)
     if not rows:
         return 0
-    db.add_all(rows)
+    inserted = insert_event_rows(db, rows)
+    entries = risk_engine.window_entries(inserted)
+    activity = attempt_activity.stamp(db, inserted)
     db.commit()
-    return len(rows)
+    risk_engine.record_entries(attempt.id, entries)
+    attempt_activity.record(activity)
+    notify_test_changed(attempt.test_id)
+    return len(inserted)
 
 
-def _attach_attempt_numbers(
-    events: list[BehaviorEvent], number_by_attempt: dict[int, int]
-) -> list[BehaviorEvent]:
-    """Stamp each ORM event with ``attempt_number`` so Pydantic's
-    ``from_attributes=True`` picks it up in BehaviorEventResponse.
+def _attach_attempt_numbers(db: Session, events: list[BehaviorEvent]) -> list[BehaviorEvent]:
+    """Stamp each ORM event with its attempt's ``attempt_number`` so
+    Pydantic's ``from_attributes=True`` picks it up in
+    BehaviorEventResponse.
 
     Attaching as a plain Python attribute is fine - SQLAlchemy doesn't
     fight us as long as the name isn't a mapped column.
     """
+    if not events:
+        return events
+    attempt_ids = {event.attempt_id for event in events}
+    number_by_attempt = dict(
+        db.query(TestAttempt.id, TestAttempt.attempt_number)
+        .filter(TestAttempt.id.in_(attempt_ids))
+        .all()
+    )
     for event in events:
         event.attempt_number = number_by_attempt.get(event.attempt_id, 1)
     return events
@@ -128,16 +112,7 @@ def list_events_for_attempt(db: Session, attempt_id: int) -> list[BehaviorEvent]
         .order_by(BehaviorEvent.event_time.desc(), BehaviorEvent.id.desc())
         .all()
     )
-    if not events:
-        return events
-    # All events in this list share one attempt_id. Use the cheap
-    # single-attempt rank rather than building a full map.
-    first = events[0]
-    attempt = db.query(TestAttempt).filter(TestAttempt.id == first.attempt_id).first()
-    if attempt is not None:
-        number = attempt_number_for(db, attempt)
-        return _attach_attempt_numbers(events, {attempt.id: number})
-    return events
+    return _attach_attempt_numbers(db, events)
 
 
 def list_events_for_test_student(db: Session, test_id: int, student_id: int) -> list[BehaviorEvent]:
@@ -147,6 +122,24 @@ def list_events_for_test_student(db: Session, test_id: int, student_id: int) ->
         .order_by(BehaviorEvent.event_time.desc(), BehaviorEvent.id.desc())
         .all()
     )
-    if not events:
-        return events
-    return _attach_attempt_numbers(events, _attempt_number_map(db, test_id, student_id))
+    return _attach_attempt_numbers(db, events)
+
+
+def get_event_with_payload_or_404(db: Session, event_id: int) -> BehaviorEvent:
+    """One event with its full payload - packed KEYSTROKE bursts decoded.
+
+    List endpoints return the stored summary; this is the lazy path the
+    log drawer hits when a single event is opened.
+    """
+    event = (
+        db.query(BehaviorEvent)
+        .options(undefer(BehaviorEvent.payload_packed))
+        .filter(BehaviorEvent.id == event_id)
+        .first()
+    )
+    if not event:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    if event.payload_packed is not None:
+        # Committed value: the decoded form is never written back.
+        set_committed_value(event, "payload", unpack_payload(event.payload, event.payload_packed))
+    return _attach_attempt_numbers(db, [event])[0]
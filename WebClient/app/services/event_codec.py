@@ -0,0 +1,250 @@
+"""Decoding ``events:batch`` bodies - JSON or compact MessagePack.
+
+JSON keeps the original shape (``{"events": [{...}, ...]}``) and every
+item goes through ``BehaviorEventCreateRequest.model_validate``.
+
+``application/msgpack`` bodies are ``{"v": 1, "events": [[...], ...]}``
+where each event is a positional array::
+
+    [event_type, severity, event_time_ms, seq, payload]
+
+  * ``event_type`` - small int from :data:`EVENT_TYPE_CODES`, or the
+    enum name as a string for types the kiosk has no code for yet.
+  * ``severity`` - index into :data:`SEVERITY_CODES`; unknown codes
+    become ``info`` like unknown strings do on the JSON path.
+  * ``event_time_ms`` - Unix epoch milliseconds, or nil for "now".
+  * ``seq`` / ``payload`` - as on the JSON path; both may be nil and
+    trailing nils may be omitted.
+
+Either body may also carry warning acks (``acks``) so the kiosk needs no
+separate ack request: JSON items are ``{"warning_id", "delivered_at"}``,
+MessagePack items ``[warning_id, delivered_at_ms]`` (the time may be nil
+or omitted). A malformed ack is dropped on its own, like an event.
+
+Those items are checked by hand and built with ``model_construct``,
+skipping pydantic validation - the point of the binary format is to
+take decode + validate off the hot path for large batches. That includes
+the payload: MessagePack can carry bin/ext values and non-string keys
+that the JSON column cannot store, so such an event is rejected here
+rather than failing the insert for the whole batch.
+
+The code tables are wire protocol shared with
+``Browser/browser/telemetry/wire.py``: append, never renumber.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import msgpack
+
+from app.models.behavior_event import (
+    SEVERITY_CRITICAL,
+    SEVERITY_INFO,
+    SEVERITY_WARN,
+    BehaviorEventType,
+)
+from app.schemas.behavior import BehaviorEventCreateRequest
+from app.schemas.warning import ProctorWarningBatchAck
+
+logger = logging.getLogger(__name__)
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_VERSION = 1
+
+EVENT_TYPE_CODES: dict[int, BehaviorEventType] = {
+    1: BehaviorEventType.TAB_SWITCH,
+    2: BehaviorEventType.WINDOW_SWITCH,
+    3: BehaviorEventType.KEYBOARD_PRESS,
+    4: BehaviorEventType.COPY,
+    5: BehaviorEventType.PASTE,
+    6: BehaviorEventType.FOCUS_LOSS,
+    7: BehaviorEventType.FOCUS_REGAIN,
+    8: BehaviorEventType.MONITOR_COUNT_CHANGE,
+    9: BehaviorEventType.KEYSTROKE,
+    10: BehaviorEventType.BLOCKED_HOTKEY,
+    11: BehaviorEventType.CLIPBOARD_COPY,
+    12: BehaviorEventType.CLIPBOARD_PASTE,
+    13: BehaviorEventType.VM_DETECTED,
+    14: BehaviorEventType.SUSPICIOUS_PROCESS,
+    15: BehaviorEventType.NETWORK_BLOCKED,
+    16: BehaviorEventType.FULLSCREEN_EXIT,
+    17: BehaviorEventType.RENDERER_CRASH,
+    18: BehaviorEventType.WARNING_DELIVERED,
+}
+
+SEVERITY_CODES: tuple[str, ...] = (SEVERITY_INFO, SEVERITY_WARN, SEVERITY_CRITICAL)
+
+
+class MalformedBatch(ValueError):
+    """The body as a whole could not be decoded."""
+
+
+@dataclass
+class RawBatch:
+    """An ``events:batch`` body unpacked but not yet validated."""
+
+    media_type: str
+    events: list
+    acks: list = field(default_factory=list)
+
+
+@dataclass
+class DecodedBatch:
+    valid: list[BehaviorEventCreateRequest] = field(default_factory=list)
+    rejected: int = 0
+    # Kiosk seqs of rejected events, so they are acknowledged too.
+    rejected_seqs: list[int] = field(default_factory=list)
+
+
+def _reject(batch: DecodedBatch, attempt_id: int, exc: Exception, raw, seq) -> None:
+    batch.rejected += 1
+    if isinstance(seq, int) and not isinstance(seq, bool):
+        batch.rejected_seqs.append(seq)
+    logger.warning(
+        "Dropping malformed event in batch (attempt %s): %s | event=%r",
+        attempt_id,
+        exc,
+        raw,
+    )
+
+
+def decode_json_events(raw_events: list[dict], attempt_id: int) -> DecodedBatch:
+    batch = DecodedBatch()
+    for raw in raw_events:
+        try:
+            batch.valid.append(BehaviorEventCreateRequest.model_validate(raw))
+        except Exception as exc:
+            _reject(batch, attempt_id, exc, raw, raw.get("seq"))
+    return batch
+
+
+def unpack_msgpack_batch(body: bytes) -> tuple[list, list]:
+    """The raw event and ack arrays of a MessagePack batch body."""
+    try:
+        envelope = msgpack.unpackb(body, raw=False)
+    except Exception as exc:
+        raise MalformedBatch(f"Invalid MessagePack body: {exc}") from None
+    if not isinstance(envelope, dict) or not isinstance(envelope.get("events", []), list):
+        raise MalformedBatch("MessagePack body must be a map with an 'events' array")
+    if not isinstance(envelope.get("acks", []), list):
+        raise MalformedBatch("MessagePack 'acks' must be an array")
+    if envelope.get("v", MSGPACK_VERSION) != MSGPACK_VERSION:
+        raise MalformedBatch(f"Unsupported MessagePack batch version {envelope.get('v')!r}")
+    return envelope.get("events", []), envelope.get("acks", [])
+
+
+def _check_json_value(value) -> None:
+    """Raise ValueError unless ``value`` is storable in a JSON column."""
+    if value is None or isinstance(value, (str, bool, int)):
+        return
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"payload has a non-finite number {value!r}")
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _check_json_value(item)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if not isinstance(key, str):
+                raise ValueError(f"payload has a non-string key {key!r}")
+            _check_json_value(item)
+    else:
+        raise ValueError(f"payload has a non-JSON value of type {type(value).__name__}")
+
+
+def _compact_event(item) -> BehaviorEventCreateRequest:
+    if not isinstance(item, (list, tuple)) or not 1 <= len(item) <= 5:
+        raise ValueError("event must be an array of 1-5 items")
+    type_code, severity_code, time_ms, seq, payload = (*item, None, None, None, None)[:5]
+
+    if isinstance(type_code, int) and not isinstance(type_code, bool):
+        event_type = EVENT_TYPE_CODES.get(type_code)
+        if event_type is None:
+            raise ValueError(f"unknown event type code {type_code}")
+    elif isinstance(type_code, str):
+        event_type = BehaviorEventType(type_code.strip().upper())
+    else:
+        raise ValueError(f"bad event type {type_code!r}")
+
+    severity = SEVERITY_INFO
+    if isinstance(severity_code, int) and 0 <= severity_code < len(SEVERITY_CODES):
+        severity = SEVERITY_CODES[severity_code]
+
+    event_time = None
+    if time_ms is not None:
+        if not isinstance(time_ms, (int, float)) or isinstance(time_ms, bool):
+            raise ValueError(f"bad event_time {time_ms!r}")
+        event_time = datetime.fromtimestamp(time_ms / 1000, tz=timezone.utc)
+
+    if seq is not None and (not isinstance(seq, int) or isinstance(seq, bool) or seq < 1):
+        raise ValueError(f"bad seq {seq!r}")
+    if payload is not None:
+        if not isinstance(payload, dict):
+            raise ValueError("payload must be a map")
+        _check_json_value(payload)
+
+    return BehaviorEventCreateRequest.model_construct(
+        event_type=event_type,
+        payload=payload,
+        severity=severity,
+        event_time=event_time,
+        seq=seq,
+    )
+
+
+def decode_msgpack_events(raw_events: list, attempt_id: int) -> DecodedBatch:
+    batch = DecodedBatch()
+    for item in raw_events:
+        try:
+            batch.valid.append(_compact_event(item))
+        except Exception as exc:
+            seq = item[3] if isinstance(item, (list, tuple)) and len(item) > 3 else None
+            _reject(batch, attempt_id, exc, item, seq)
+    return batch
+
+
+def _drop_ack(attempt_id: int, exc: Exception, raw) -> None:
+    logger.warning(
+        "Dropping malformed ack in batch (attempt %s): %s | ack=%r",
+        attempt_id,
+        exc,
+        raw,
+    )
+
+
+def decode_json_acks(raw_acks: list[dict], attempt_id: int) -> list[ProctorWarningBatchAck]:
+    acks = []
+    for raw in raw_acks:
+        try:
+            acks.append(ProctorWarningBatchAck.model_validate(raw))
+        except Exception as exc:
+            _drop_ack(attempt_id, exc, raw)
+    return acks
+
+
+def _compact_ack(item) -> ProctorWarningBatchAck:
+    if not isinstance(item, (list, tuple)) or not 1 <= len(item) <= 2:
+        raise ValueError("ack must be an array of 1-2 items")
+    warning_id, time_ms = (*item, None)[:2]
+    if not isinstance(warning_id, int) or isinstance(warning_id, bool) or warning_id < 1:
+        raise ValueError(f"bad warning id {warning_id!r}")
+    delivered_at = None
+    if time_ms is not None:
+        if not isinstance(time_ms, (int, float)) or isinstance(time_ms, bool):
+            raise ValueError(f"bad delivered_at {time_ms!r}")
+        delivered_at = datetime.fromtimestamp(time_ms / 1000, tz=timezone.utc)
+    return ProctorWarningBatchAck.model_construct(warning_id=warning_id, delivered_at=delivered_at)
+
+
+def decode_msgpack_acks(raw_acks: list, attempt_id: int) -> list[ProctorWarningBatchAck]:
+    acks = []
+    for item in raw_acks:
+        try:
+            acks.append(_compact_ack(item))
+        except Exception as exc:
+            _drop_ack(attempt_id, exc, item)
+    return acks
@@ -0,0 +1,410 @@
+"""Monthly range partitions for ``behavior_events`` (Postgres only).
+
+``behavior_events`` is the one table that grows without bound - tens of
+millions of rows a semester. On Postgres it is declared
+``PARTITION BY RANGE (event_time)`` with one partition per calendar
+month (UTC), named ``behavior_events_YYYY_MM``:
+
+  * :func:`rotate` keeps ``event_partition_months_ahead`` future months
+    created and, when ``event_retention_months`` is set, detaches and
+    drops months that fell out of retention - a metadata operation
+    instead of a multi-million-row ``DELETE`` and the vacuum after it.
+    :class:`PartitionMaintainer` runs it in the background; every
+    worker may run one, a transaction-level advisory lock keeps them
+    from racing.
+  * ``behavior_events_default`` catches rows outside every monthly
+    range (a kiosk with a badly wrong clock) so such an insert can't
+    fail a whole batch. When a month is created later, its rows are
+    moved out of the default partition first.
+  * Postgres requires every unique index to contain the partition key,
+    so the primary key is ``(id, event_time)`` and the kiosk-seq index
+    is ``(attempt_id, seq, event_time)``. A retried batch resends each
+    event with its original ``event_time``, so retries still collide.
+
+The ORM model is unchanged (``id`` stays its identity); SQLite and the
+tests keep an ordinary table. A pre-existing, unpartitioned table is not
+touched at startup; convert it once with::
+
+    python -m app.services.event_partitions convert
+
+which attaches the old table as ``behavior_events_legacy`` covering
+everything up to the end of the current month - no rows are copied.
+``status`` and ``rotate`` are available from the same entry point.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+
+from app.core.config import settings
+from app.models.behavior_event import BehaviorEvent
+
+logger = logging.getLogger(__name__)
+
+PARENT = "behavior_events"
+DEFAULT_PARTITION = "behavior_events_default"
+LEGACY_PARTITION = "behavior_events_legacy"
+SEQUENCE = "behavior_events_id_seq"
+# pg_advisory_xact_lock key shared by every worker's maintenance run.
+_LOCK_KEY = 0x6265_7665_6E74  # "bevent"
+_LOCK_TIMEOUT = "5s"
+
+_PARENT_DDL = f"""
+CREATE TABLE {PARENT} (
+    id INTEGER NOT NULL DEFAULT nextval('{SEQUENCE}'),
+    attempt_id INTEGER NOT NULL REFERENCES test_attempts (id) ON DELETE CASCADE,
+    test_id INTEGER NOT NULL REFERENCES tests (id) ON DELETE CASCADE,
+    student_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    event_type behavioreventtype NOT NULL,
+    payload JSON,
+    event_time TIMESTAMP WITH TIME ZONE NOT NULL,
+    severity VARCHAR(20) NOT NULL,
+    seq BIGINT,
+    payload_packed BYTEA,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    PRIMARY KEY (id, event_time)
+) PARTITION BY RANGE (event_time)
+"""
+
+_SEQ_INDEX = "uq_behavior_events_attempt_seq"
+_SEQ_INDEX_DDL = f"CREATE UNIQUE INDEX {_SEQ_INDEX} ON {PARENT} (attempt_id, seq, event_time)"
+
+_TO_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    # Exclusive upper bound; None for the default partition.
+    upper: datetime | None
+
+
+# ---------------------------------------------------------------------------
+# Month arithmetic (pure - unit tested)
+# ---------------------------------------------------------------------------
+def month_start(when: datetime) -> datetime:
+    when = when.astimezone(timezone.utc)
+    return datetime(when.year, when.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT}_{month.year:04d}_{month.month:02d}"
+
+
+def parse_upper_bound(bound: str) -> datetime | None:
+    """Upper bound of a ``pg_get_expr(relpartbound)`` string, read with
+    ``TimeZone = UTC``; None for ``DEFAULT``."""
+    match = _TO_BOUND.search(bound)
+    if match is None:
+        return None
+    return datetime.fromisoformat(match.group(1)).astimezone(timezone.utc)
+
+
+def months_to_create(existing: set[str], now: datetime, months_ahead: int) -> list[datetime]:
+    current = month_start(now)
+    return [
+        month
+        for month in (add_months(current, i) for i in range(months_ahead + 1))
+        if partition_name(month) not in existing
+    ]
+
+
+def expired(partitions: list[Partition], now: datetime, retention_months: int) -> list[Partition]:
+    """Partitions wholly older than the retention window; never the
+    default partition. ``retention_months <= 0`` keeps everything."""
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(now), -retention_months)
+    return [p for p in partitions if p.upper is not None and p.upper <= cutoff]
+
+
+# ---------------------------------------------------------------------------
+# Catalog
+# ---------------------------------------------------------------------------
+def _literal(when: datetime) -> str:
+    return when.astimezone(timezone.utc).strftime("'%Y-%m-%d %H:%M:%S+00'")
+
+
+def table_kind(conn: Connection) -> str | None:
+    """``"partitioned"``, ``"heap"``, or None if the table doesn't exist."""
+    kind = conn.scalar(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": PARENT},
+    )
+    return {"p": "partitioned", "r": "heap"}.get(kind) if kind else None
+
+
+def list_partitions(conn: Connection) -> list[Partition]:
+    conn.execute(text("SET LOCAL TimeZone = 'UTC'"))
+    rows = conn.execute(
+        text(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(:name)
+            ORDER BY c.relname
+            """
+        ),
+        {"name": PARENT},
+    ).all()
+    return [Partition(name, parse_upper_bound(bound)) for name, bound in rows]
+
+
+# ---------------------------------------------------------------------------
+# DDL
+# ---------------------------------------------------------------------------
+def composite_index_ddl(*, concurrently: bool = False) -> list[str]:
+    """``CREATE INDEX IF NOT EXISTS`` for the model's non-unique indexes."""
+    statements = []
+    for index in BehaviorEvent.__table__.indexes:
+        if index.unique:
+            continue
+        ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=postgresql.dialect()))
+        if concurrently:
+            ddl = ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+        statements.append(ddl)
+    return statements
+
+
+def _create_parent(conn: Connection) -> None:
+    conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCE} AS INTEGER"))
+    conn.execute(text(_PARENT_DDL))
+    conn.execute(text(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {PARENT}.id"))
+    for ddl in composite_index_ddl():
+        conn.execute(text(ddl))
+    conn.execute(text(_SEQ_INDEX_DDL))
+    conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"))
+
+
+def create_partitioned_table(conn: Connection, now: datetime | None = None) -> None:
+    """Create the partitioned table on a database that has none.
+
+    Run after the tables it references exist. An existing unpartitioned
+    table is left alone (see :func:`convert_heap`).
+    """
+    kind = table_kind(conn)
+    if kind == "heap":
+        logger.warning(
+            "%s is not partitioned; run `python -m app.services.event_partitions convert`",
+            PARENT,
+        )
+        return
+    if kind is None:
+        BehaviorEvent.__table__.c.event_type.type.create(conn, checkfirst=True)
+        _create_parent(conn)
+    ensure_partitions(conn, now or datetime.now(timezone.utc), settings.event_partition_months_ahead)
+
+
+def _create_month(conn: Connection, month: datetime) -> None:
+    name = partition_name(month)
+    lower, upper = _literal(month), _literal(add_months(month, 1))
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)"))
+    # Rows that landed in the default partition while this month had no
+    # partition of its own; ATTACH would refuse to create the overlap.
+    conn.execute(
+        text(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE event_time >= {lower} AND event_time < {upper}
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """
+        )
+    )
+    conn.execute(
+        text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ({lower}) TO ({upper})")
+    )
+
+
+def ensure_partitions(conn: Connection, now: datetime, months_ahead: int) -> list[str]:
+    existing = {p.name for p in list_partitions(conn)}
+    created = []
+    for month in months_to_create(existing, now, months_ahead):
+        _create_month(conn, month)
+        created.append(partition_name(month))
+    if created:
+        logger.info("Created %s partitions: %s", PARENT, ", ".join(created))
+    return created
+
+
+def drop_expired_partitions(conn: Connection, now: datetime, retention_months: int) -> list[str]:
+    dropped = []
+    for partition in expired(list_partitions(conn), now, retention_months):
+        conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {partition.name}"))
+        conn.execute(text(f"DROP TABLE {partition.name}"))
+        dropped.append(partition.name)
+    if dropped:
+        logger.info("Dropped expired %s partitions: %s", PARENT, ", ".join(dropped))
+    return dropped
+
+
+def rotate(engine: Engine, now: datetime | None = None) -> bool:
+    """Create upcoming months and drop expired ones. False if skipped
+    (not partitioned, or another worker holds the lock)."""
+    now = now or datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        if table_kind(conn) != "partitioned":
+            return False
+        if not conn.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": _LOCK_KEY}):
+            return False
+        # Don't queue behind a long report query holding the parent.
+        conn.execute(text(f"SET LOCAL lock_timeout = '{_LOCK_TIMEOUT}'"))
+        ensure_partitions(conn, now, settings.event_partition_months_ahead)
+        drop_expired_partitions(conn, now, settings.event_retention_months)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# One-off conversion of an existing table
+# ---------------------------------------------------------------------------
+def convert_heap(engine: Engine, now: datetime | None = None) -> None:
+    """Turn an existing unpartitioned ``behavior_events`` into the first
+    partition of a new partitioned table, without copying rows.
+
+    The slow parts - building the indexes the partitioned layout needs
+    and validating the range check - run first without blocking
+    writes. The swap itself is a short ``ACCESS EXCLUSIVE`` transaction.
+    Re-runnable if interrupted before the swap.
+    """
+    now = now or datetime.now(timezone.utc)
+    bound = add_months(month_start(now), 1)
+    with engine.connect() as conn:
+        if table_kind(conn) != "heap":
+            raise RuntimeError(f"{PARENT} is missing or already partitioned")
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(
+            text(
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {LEGACY_PARTITION}_pkey_idx "
+                f"ON {PARENT} (id, event_time)"
+            )
+        )
+        conn.execute(
+            text(
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {LEGACY_PARTITION}_seq_idx "
+                f"ON {PARENT} (attempt_id, seq, event_time)"
+            )
+        )
+        for ddl in composite_index_ddl(concurrently=True):
+            conn.execute(text(ddl))
+        conn.execute(
+            text(f"ALTER TABLE {PARENT} DROP CONSTRAINT IF EXISTS {LEGACY_PARTITION}_bound")
+        )
+        conn.execute(
+            text(
+                f"ALTER TABLE {PARENT} ADD CONSTRAINT {LEGACY_PARTITION}_bound "
+                f"CHECK (event_time < {_literal(bound)}) NOT VALID"
+            )
+        )
+        # Fails if a kiosk clock put rows past the bound; fix those first.
+        conn.execute(text(f"ALTER TABLE {PARENT} VALIDATE CONSTRAINT {LEGACY_PARTITION}_bound"))
+
+    with engine.begin() as conn:
+        conn.execute(text(f"SET LOCAL lock_timeout = '{_LOCK_TIMEOUT}'"))
+        conn.execute(text(f"LOCK TABLE {PARENT} IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text(f"ALTER TABLE {PARENT} RENAME TO {LEGACY_PARTITION}"))
+        conn.execute(text(f"ALTER TABLE {LEGACY_PARTITION} DROP CONSTRAINT {PARENT}_pkey"))
+        conn.execute(
+            text(
+                f"ALTER TABLE {LEGACY_PARTITION} ADD CONSTRAINT {LEGACY_PARTITION}_pkey "
+                f"PRIMARY KEY USING INDEX {LEGACY_PARTITION}_pkey_idx"
+            )
+        )
+        # The old (attempt_id, seq) index is superseded by _seq_idx; the
+        # composite ones keep working for the legacy partition under a
+        # new name so the parent can reuse theirs.
+        conn.execute(text(f"DROP INDEX IF EXISTS {_SEQ_INDEX}"))
+        for index in BehaviorEvent.__table__.indexes:
+            if not index.unique:
+                conn.execute(text(f"ALTER INDEX {index.name} RENAME TO {index.name}_legacy"))
+        _create_parent(conn)
+        conn.execute(
+            text(
+                f"ALTER TABLE {PARENT} ATTACH PARTITION {LEGACY_PARTITION} "
+                f"FOR VALUES FROM (MINVALUE) TO ({_literal(bound)})"
+            )
+        )
+        conn.execute(text(f"ALTER TABLE {LEGACY_PARTITION} DROP CONSTRAINT {LEGACY_PARTITION}_bound"))
+        ensure_partitions(conn, bound, settings.event_partition_months_ahead)
+    logger.info("Converted %s; rows before %s live in %s", PARENT, bound.date(), LEGACY_PARTITION)
+
+
+# ---------------------------------------------------------------------------
+# Background maintenance
+# ---------------------------------------------------------------------------
+class PartitionMaintainer:
+    def __init__(self, interval_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, engine: Engine) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(engine,), name="event-partitions", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, engine: Engine) -> None:
+        while True:
+            try:
+                rotate(engine)
+            except Exception:
+                logger.exception("%s partition maintenance failed", PARENT)
+            if self._stop.wait(self.interval_seconds):
+                return
+
+
+partition_maintainer = PartitionMaintainer(settings.event_partition_check_hours * 3600)
+
+
+def main(argv: list[str]) -> int:
+    from app.db.session import engine
+
+    logging.basicConfig(level=logging.INFO)
+    command = argv[0] if argv else "status"
+    if command == "convert":
+        convert_heap(engine)
+    elif command == "rotate":
+        if not rotate(engine):
+            print(f"{PARENT} is not partitioned or maintenance is already running")
+            return 1
+    elif command != "status":
+        print("usage: python -m app.services.event_partitions [status|rotate|convert]")
+        return 2
+    with engine.begin() as conn:
+        print(f"{PARENT}: {table_kind(conn) or 'missing'}")
+        if table_kind(conn) == "partitioned":
+            for partition in list_partitions(conn):
+                upper = partition.upper.date() if partition.upper else "DEFAULT"
+                print(f"  {partition.name:<32} < {upper}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,226 @@
+"""Bulk INSERT paths for behavior events.
+
+``create_behavior_events_bulk`` and the write-behind ``ingest_queue``
+both land here. Neither builds ``BehaviorEvent`` ORM instances: rows
+are plain column dicts, so a 200-event batch skips identity-map,
+unit-of-work and attribute instrumentation entirely.
+
+  * Default: one Core ``INSERT ... RETURNING`` executed with a list of
+    parameter dicts. SQLAlchemy's insertmanyvalues turns that into a
+    handful of multi-row ``VALUES`` statements.
+  * Postgres + psycopg, batches of ``COPY_MIN_ROWS`` or more: ids are
+    reserved from the table's sequence in one round-trip and the rows are
+    streamed with ``COPY ... FROM STDIN``. COPY has no RETURNING, hence
+    the pre-allocated ids - the risk engine de-duplicates on them.
+
+Both paths return the same lightweight rows (id, attempt_id, event_type,
+severity, payload, event_time) - everything ``risk_engine.window_entries``
+needs - in input order.
+
+Rows carrying a kiosk ``seq`` that trip the unique ``(attempt_id, seq)``
+index (a retried batch that got past ``ingest_dedup``'s in-memory mark)
+are filtered against what is already stored and the insert is retried
+once, so duplicates are skipped instead of failing the whole batch. Only
+the failed insert's savepoint is rolled back.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import Any, NamedTuple
+
+from sqlalchemy import insert, select, text, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.behavior_event import BehaviorEvent, BehaviorEventType
+from app.models.test_attempt import TestAttempt
+from app.schemas.behavior import BehaviorEventCreateRequest
+from app.services.keystroke_codec import pack_payload
+from app.services.lookup_cache import AttemptRef
+
+# Below this COPY's extra sequence round-trip isn't worth it.
+COPY_MIN_ROWS = 50
+
+_COPY_COLUMNS = (
+    "id",
+    "attempt_id",
+    "test_id",
+    "student_id",
+    "event_type",
+    "payload",
+    "severity",
+    "event_time",
+    "seq",
+    "payload_packed",
+)
+
+
+class InsertedEvent(NamedTuple):
+    id: int
+    attempt_id: int
+    event_type: BehaviorEventType
+    severity: str
+    payload: dict | None
+    event_time: datetime
+
+
+def event_rows(
+    attempt: TestAttempt | AttemptRef,
+    events: Iterable[BehaviorEventCreateRequest],
+) -> list[dict]:
+    """Plain column dicts for ``events``; safe to hand to another thread.
+
+    Silently drops malformed entries (e.g. an event_type that doesn't map
+    onto the enum) so one bad event doesn't sink the batch. KEYSTROKE
+    bursts are column-packed here, off the writer thread's hot path.
+    """
+    now = datetime.now(timezone.utc)
+    pack = settings.ingest_pack_keystrokes
+    rows: list[dict] = []
+    for ev in events:
+        try:
+            event_type = BehaviorEventType(ev.event_type)
+        except (ValueError, AttributeError):
+            continue
+        payload, packed = pack_payload(event_type, ev.payload) if pack else (ev.payload, None)
+        rows.append(
+            {
+                "attempt_id": attempt.id,
+                "test_id": attempt.test_id,
+                "student_id": attempt.student_id,
+                "event_type": event_type,
+                "payload": payload,
+                "severity": ev.severity,
+                "event_time": ev.event_time or now,
+                "seq": ev.seq,
+                "payload_packed": packed,
+            }
+        )
+    return rows
+
+
+def _use_copy(db: Session, count: int) -> bool:
+    if not settings.ingest_use_copy or count < COPY_MIN_ROWS:
+        return False
+    bind = db.get_bind()
+    return bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg"
+
+
+def _insert_rows(db: Session, rows: list[dict]) -> list[Any]:
+    result = db.execute(
+        insert(BehaviorEvent).returning(
+            BehaviorEvent.id,
+            BehaviorEvent.attempt_id,
+            BehaviorEvent.event_type,
+            BehaviorEvent.severity,
+            BehaviorEvent.payload,
+            BehaviorEvent.event_time,
+            sort_by_parameter_order=True,
+        ),
+        rows,
+    )
+    return result.all()
+
+
+def _copy_rows(db: Session, rows: list[dict]) -> list[InsertedEvent]:
+    from psycopg.errors import UniqueViolation
+    from psycopg.types.json import Json
+
+    ids = db.scalars(
+        text(
+            "SELECT nextval(pg_get_serial_sequence('behavior_events', 'id')) "
+            "FROM generate_series(1, :n)"
+        ),
+        {"n": len(rows)},
+    ).all()
+
+    inserted: list[InsertedEvent] = []
+    raw = db.connection().connection.driver_connection
+    try:
+        with raw.cursor() as cursor:
+            with cursor.copy(
+                f"COPY behavior_events ({', '.join(_COPY_COLUMNS)}) FROM STDIN"
+            ) as copy:
+                for event_id, row in zip(ids, rows):
+                    payload = row["payload"]
+                    copy.write_row(
+                        (
+                            event_id,
+                            row["attempt_id"],
+                            row["test_id"],
+                            row["student_id"],
+                            # SQLAlchemy's Enum stores member names.
+                            row["event_type"].name,
+                            Json(payload) if payload is not None else None,
+                            row["severity"],
+                            row["event_time"],
+                            row.get("seq"),
+                            row.get("payload_packed"),
+                        )
+                    )
+                    inserted.append(
+                        InsertedEvent(
+                            id=event_id,
+                            attempt_id=row["attempt_id"],
+                            event_type=row["event_type"],
+                            severity=row["severity"],
+                            payload=payload,
+                            event_time=row["event_time"],
+                        )
+                    )
+    except UniqueViolation as exc:
+        # Raw driver errors bypass SQLAlchemy's wrapping; normalise so
+        # callers only handle IntegrityError.
+        raise IntegrityError("COPY behavior_events", None, exc) from exc
+    return inserted
+
+
+def _insert(db: Session, rows: list[dict]) -> list[Any]:
+    if _use_copy(db, len(rows)):
+        return _copy_rows(db, rows)
+    return _insert_rows(db, rows)
+
+
+def _drop_stored_seqs(db: Session, rows: list[dict]) -> list[dict]:
+    """``rows`` minus those whose (attempt_id, seq) is already stored or
+    repeated earlier in ``rows``."""
+    keys = {(row["attempt_id"], row["seq"]) for row in rows if row.get("seq") is not None}
+    stored = set(
+        db.execute(
+            select(BehaviorEvent.attempt_id, BehaviorEvent.seq).where(
+                tuple_(BehaviorEvent.attempt_id, BehaviorEvent.seq).in_(keys)
+            )
+        ).all()
+    )
+    kept: list[dict] = []
+    for row in rows:
+        if row.get("seq") is not None:
+            key = (row["attempt_id"], row["seq"])
+            if key in stored:
+                continue
+            stored.add(key)
+        kept.append(row)
+    return kept
+
+
+def insert_event_rows(db: Session, rows: list[dict]) -> list[Any]:
+    """Insert ``rows`` (from :func:`event_rows`) without committing.
+
+    Returns one row per *inserted* event, in input order, exposing
+    ``id``, ``attempt_id``, ``event_type``, ``severity``, ``payload`` and
+    ``event_time``. The first attempt runs in a savepoint, so a seq
+    conflict only rolls back that insert, not the caller's other work.
+    """
+    if not rows:
+        return []
+    try:
+        with db.begin_nested():
+            return _insert(db, rows)
+    except IntegrityError:
+        if all(row.get("seq") is None for row in rows):
+            raise
+        rows = _drop_stored_seqs(db, rows)
+        return _insert(db, rows) if rows else []
@@ -0,0 +1,166 @@
+"""Cross-test overview for proctors supervising several exams at once.
+
+``live_service`` builds one board per test; a proctor watching five halls
+would poll five of them. :func:`build_fleet_overview` answers "how is
+every running exam doing" with a fixed number of set-based queries
+instead - running tests, their in-progress attempts with the students,
+and the risk window when ``risk_engine`` is off or has to hydrate -
+however many tests and candidates there are. Per-test band counts, the
+riskiest attempts across the fleet and the quiet kiosks are then tallied
+in one pass over those rows.
+
+A test is running while it is active and inside its time window, or for
+as long as any attempt at it is still in progress.
+
+Like the live board, the rendered overview is cached for
+``_CACHE_TTL_SECONDS`` in the shared cache backend, per visibility scope
+(admins and proctors share one; each teacher has their own) and
+``top`` size, so a room of proctors polling together costs one build.
+"""
+
+from __future__ import annotations
+
+import heapq
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.core import cache
+from app.core.config import settings
+from app.core.http_cache import etag_for
+from app.models.test import Test
+from app.models.test_attempt import AttemptStatus, TestAttempt
+from app.models.user import User, UserRole
+from app.schemas.live import FleetAttempt, FleetOverview, FleetTestSummary
+from app.services import risk_engine
+from app.services.attempt_activity import ACTIVITY_RESOLUTION_SECONDS
+from app.services.risk_scorer import compute_risk_for_attempts, score_from_events
+
+_CACHE_TTL_SECONDS = 1.0
+DEFAULT_TOP = 20
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _scope(user: User) -> tuple[str, int | None]:
+    """Cache scope and the ``created_by`` filter for ``user``: teachers
+    see their own tests, admins and proctors every test."""
+    if user.role == UserRole.TEACHER:
+        return f"teacher-{user.id}", user.id
+    return "all", None
+
+
+def build_fleet_overview(
+    db: Session,
+    *,
+    created_by: int | None = None,
+    top: int = DEFAULT_TOP,
+    now: datetime | None = None,
+) -> FleetOverview:
+    """Uncached build. Pollers go through :func:`get_fleet_response`."""
+    now = now or datetime.now(timezone.utc)
+    in_progress = TestAttempt.status == AttemptStatus.IN_PROGRESS
+
+    tests_query = db.query(Test.id, Test.name, Test.end_time).filter(
+        or_(
+            and_(Test.is_active.is_(True), Test.start_time <= now, Test.end_time >= now),
+            Test.id.in_(select(TestAttempt.test_id).where(in_progress)),
+        )
+    )
+    if created_by is not None:
+        tests_query = tests_query.filter(Test.created_by == created_by)
+    tests = tests_query.order_by(Test.end_time, Test.id).all()
+
+    summaries = {
+        test.id: FleetTestSummary(
+            test_id=test.id,
+            test_name=test.name,
+            end_time=test.end_time,
+            live_attempts=0,
+            ok=0,
+            warn=0,
+            critical=0,
+            disconnected=0,
+        )
+        for test in tests
+    }
+    top_risky: list[tuple[tuple[int, str, int], FleetAttempt]] = []
+    disconnected: list[tuple[datetime, int, FleetAttempt]] = []
+
+    attempts = []
+    if summaries:
+        attempts = (
+            db.query(
+                TestAttempt.id,
+                TestAttempt.test_id,
+                TestAttempt.started_at,
+                TestAttempt.last_activity_at,
+                User.id.label("student_id"),
+                User.full_name,
+                User.email,
+            )
+            .join(User, User.id == TestAttempt.student_id)
+            .filter(in_progress, TestAttempt.test_id.in_(list(summaries)))
+            .all()
+        )
+
+    if attempts:
+        ids = [attempt.id for attempt in attempts]
+        if settings.live_risk_engine:
+            risk_by_id = risk_engine.get_risk_for_attempts(db, ids)
+        else:
+            risk_by_id = compute_risk_for_attempts(db, ids)
+        empty_risk = score_from_events([])
+        # ``last_activity_at`` is throttled, so it may trail the kiosk by
+        # up to the activity resolution; don't count that lag as silence.
+        quiet_before = now - timedelta(
+            seconds=settings.live_disconnected_seconds + ACTIVITY_RESOLUTION_SECONDS
+        )
+
+        for attempt in attempts:
+            summary = summaries[attempt.test_id]
+            risk = risk_by_id.get(attempt.id, empty_risk)
+            last_seen = _as_utc(attempt.last_activity_at or attempt.started_at)
+            row = FleetAttempt(
+                test_id=attempt.test_id,
+                test_name=summary.test_name,
+                attempt_id=attempt.id,
+                student_id=attempt.student_id,
+                student_name=attempt.full_name,
+                student_email=attempt.email,
+                risk_score=risk.score,
+                risk_band=risk.band,
+                top_contributors=risk.top_contributors,
+                last_seen_at=last_seen,
+            )
+            summary.live_attempts += 1
+            setattr(summary, risk.band, getattr(summary, risk.band) + 1)
+            if last_seen < quiet_before:
+                summary.disconnected += 1
+                disconnected.append((last_seen, attempt.id, row))
+            if risk.score > 0:
+                key = (-risk.score, attempt.full_name.lower(), attempt.id)
+                top_risky.append((key, row))
+
+    return FleetOverview(
+        generated_at=now,
+        tests=list(summaries.values()),
+        top_risky=[row for _, row in heapq.nsmallest(top, top_risky, key=lambda item: item[0])],
+        disconnected=[row for *_, row in sorted(disconnected, key=lambda item: item[:2])],
+    )
+
+
+def get_fleet_response(db: Session, user: User, top: int = DEFAULT_TOP) -> tuple[bytes, str]:
+    """Rendered :class:`FleetOverview` for ``user`` and its ETag."""
+    scope, created_by = _scope(user)
+    backend = cache.get_cache()
+    key = backend.key("fleet", f"{scope}:{top}")
+    body = backend.get(key)
+    if body is None:
+        overview = build_fleet_overview(db, created_by=created_by, top=top)
+        body = overview.model_dump_json().encode()
+        backend.set(key, body, _CACHE_TTL_SECONDS)
+    return body, etag_for(body)
@@ -0,0 +1,160 @@
+"""Idempotent ``events:batch`` via kiosk-assigned sequence numbers.
+
+The kiosk stamps every event with a per-attempt ``seq`` that only ever
+grows by one, and ``BatchPoster`` sends them in order (a failed batch, or
+the unacknowledged tail of one, goes back to the front of its buffer).
+Per attempt this module keeps the *acked* seq: the highest ``n`` such
+that every seq up to ``n`` is handled - stored, or rejected for good.
+Anything at or below it is a retry of a batch whose response got lost
+and is dropped without touching the DB; the kiosk trims its buffer up to
+it. A seq only counts as handled once its row is committed, so with
+write-behind the acked seq trails the queue, and a row the writer drops
+is never acknowledged - the kiosk resends it.
+
+A gap below the oldest seq of a batch can never be filled: the kiosk
+sends oldest first, so it no longer holds those events (dropped on
+overflow, or refused with a 4xx). Each batch therefore also moves the
+acked seq up to just below its oldest seq.
+
+The marks live in memory, loaded on first use with one ``MAX(seq)``
+index lookup (so after a restart the mark is the highest stored seq).
+They are only a fast path: the unique ``(attempt_id, seq)`` index on
+``behavior_events`` is the real guarantee, and
+``event_writer.insert_event_rows`` falls back to filtering already-stored
+seqs when it trips (concurrent retries, several workers each with their
+own marks).
+
+Events without a seq (older kiosks, the single-event endpoint) are never
+de-duplicated.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.behavior_event import BehaviorEvent
+from app.schemas.behavior import BehaviorEventCreateRequest
+
+
+@dataclass
+class _Marks:
+    acked: int
+    # Handled seqs above ``acked``, waiting on a gap below them.
+    handled: set[int] = field(default_factory=set)
+    # Queued for the write-behind writer, not committed yet.
+    pending: set[int] = field(default_factory=set)
+
+    def settle(self) -> None:
+        while self.acked + 1 in self.handled:
+            self.acked += 1
+            self.handled.discard(self.acked)
+
+
+_marks: dict[int, _Marks] = {}
+_lock = threading.Lock()
+
+
+def _marks_for(db: Session, attempt_id: int) -> None:
+    """Load the attempt's marks if this process has none yet."""
+    with _lock:
+        if attempt_id in _marks:
+            return
+    stored = db.scalar(
+        select(func.max(BehaviorEvent.seq)).where(BehaviorEvent.attempt_id == attempt_id)
+    )
+    with _lock:
+        # An ingest may have loaded them while we were querying.
+        _marks.setdefault(attempt_id, _Marks(acked=stored or 0))
+
+
+def split_new(
+    db: Session,
+    attempt_id: int,
+    events: list[BehaviorEventCreateRequest],
+) -> tuple[list[BehaviorEventCreateRequest], int]:
+    """Return ``(events not seen before, number of duplicates dropped)``.
+
+    Events already queued for the writer count as duplicates too.
+    """
+    if all(ev.seq is None for ev in events):
+        return events, 0
+    _marks_for(db, attempt_id)
+    fresh: list[BehaviorEventCreateRequest] = []
+    seen: set[int] = set()
+    with _lock:
+        marks = _marks[attempt_id]
+        for ev in events:
+            if ev.seq is not None:
+                if (
+                    ev.seq <= marks.acked
+                    or ev.seq in seen
+                    or ev.seq in marks.handled
+                    or ev.seq in marks.pending
+                ):
+                    continue
+                seen.add(ev.seq)
+            fresh.append(ev)
+    return fresh, len(events) - len(fresh)
+
+
+def mark_pending(attempt_id: int, seqs: Iterable[int | None]) -> None:
+    """``seqs`` were queued for the write-behind writer."""
+    with _lock:
+        marks = _marks.get(attempt_id)
+        if marks is not None:
+            marks.pending.update(s for s in seqs if s is not None)
+
+
+def advance(attempt_id: int, seqs: Iterable[int | None], *, oldest: int | None = None) -> None:
+    """Record ``seqs`` as handled: committed, or malformed and rejected
+    for good. ``oldest`` is the lowest seq of the batch being answered;
+    nothing below it is coming back."""
+    with _lock:
+        marks = _marks.get(attempt_id)
+        if marks is None:
+            return
+        for seq in seqs:
+            if seq is not None:
+                marks.pending.discard(seq)
+                if seq > marks.acked:
+                    marks.handled.add(seq)
+        if oldest is not None and oldest - 1 > marks.acked:
+            marks.acked = oldest - 1
+            marks.handled = {seq for seq in marks.handled if seq > marks.acked}
+        marks.settle()
+
+
+def release(attempt_id: int, seqs: Iterable[int | None]) -> None:
+    """The writer gave up on ``seqs``; a resend should be stored."""
+    with _lock:
+        marks = _marks.get(attempt_id)
+        if marks is not None:
+            marks.pending.difference_update(s for s in seqs if s is not None)
+
+
+def acked_seq(db: Session, attempt_id: int, *, load: bool = True) -> int | None:
+    """How far the kiosk may trim its buffer (0 before anything is stored).
+    With ``load=False`` an attempt without marks in this process gets None
+    instead of a ``MAX(seq)`` lookup."""
+    if load:
+        _marks_for(db, attempt_id)
+    with _lock:
+        marks = _marks.get(attempt_id)
+        return None if marks is None else marks.acked
+
+
+def forget_attempt(attempt_id: int) -> None:
+    """Drop an attempt's marks once it has ended."""
+    with _lock:
+        _marks.pop(attempt_id, None)
+
+
+def reset() -> None:
+    """Test hook - forget every mark, as if the process had restarted."""
+    with _lock:
+        _marks.clear()
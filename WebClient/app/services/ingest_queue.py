@@ -0,0 +1,255 @@
+"""Write-behind group-commit pipeline for ``events:batch``.
+
+With hundreds of kiosks flushing every few seconds, running an
+``add_all`` + ``commit`` inside every request means hundreds of tiny
+transactions per second. When ``INGEST_WRITE_BEHIND`` is enabled the
+batch endpoint only validates and enqueues here; a single writer thread
+coalesces events across attempts and commits them as one bulk INSERT
+(or COPY, see ``event_writer``) per size / time budget.
+
+  * Bounded memory: at most ``ingest_queue_max_events`` rows are
+    buffered. ``enqueue`` raises :class:`IngestQueueFull` beyond that and
+    the endpoint answers 429 + ``Retry-After`` so kiosks back off and
+    keep the batch in their own buffer.
+  * Durability: events are acknowledged before they hit the DB, so a
+    hard crash loses at most one budget's worth of rows. ``drain`` runs
+    on application shutdown to flush everything still queued.
+  * Transient DB errors (connection lost, DB restarting) put the batch
+    back at the head of the queue; any other error retries attempt by
+    attempt so one bad row group can't poison the whole batch.
+
+The single-event endpoint stays synchronous - its response returns the
+stored row, which a write-behind path cannot provide.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services import attempt_activity, ingest_dedup, risk_engine
+from app.services.event_writer import insert_event_rows
+from app.services.live_stream import notify_test_changed
+
+logger = logging.getLogger(__name__)
+
+# Seconds a kiosk is told to wait when the queue is full.
+RETRY_AFTER_SECONDS = 2
+# Pause before retrying after a transient DB failure.
+_ERROR_BACKOFF_SECONDS = 1.0
+
+
+class IngestQueueFull(Exception):
+    """Raised by :meth:`IngestQueue.enqueue` when the buffer is at capacity."""
+
+
+@dataclass
+class IngestStats:
+    enqueued: int = 0
+    written: int = 0
+    dropped: int = 0
+    rejected_full: int = 0
+    batches: int = 0
+    last_batch_rows: int = 0
+    last_batch_ms: float = 0.0
+    pending: int = 0
+
+
+class IngestQueue:
+    def __init__(
+        self,
+        *,
+        max_events: int,
+        max_batch_rows: int,
+        max_delay_seconds: float,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ) -> None:
+        self.max_events = max_events
+        self.max_batch_rows = max_batch_rows
+        self.max_delay_seconds = max_delay_seconds
+        self.session_factory = session_factory
+        self._rows: deque[dict] = deque()
+        self._cond = threading.Condition()
+        self._oldest_at: float | None = None
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self._stats = IngestStats()
+
+    # ------------------------------------------------------------------
+    # Producer side (request threads)
+    # ------------------------------------------------------------------
+    def enqueue(self, rows: list[dict]) -> int:
+        if not rows:
+            return 0
+        with self._cond:
+            if self._stopping:
+                raise IngestQueueFull("ingest queue is shutting down")
+            if len(self._rows) + len(rows) > self.max_events:
+                self._stats.rejected_full += 1
+                raise IngestQueueFull("ingest queue is full")
+            if not self._rows:
+                self._oldest_at = time.monotonic()
+            self._rows.extend(rows)
+            self._stats.enqueued += len(rows)
+            self._ensure_writer()
+            self._cond.notify()
+        return len(rows)
+
+    def _ensure_writer(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="ingest-writer", daemon=True
+            )
+            self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+    def _take_batch(self) -> list[dict] | None:
+        """Block until a batch is due; None once stopped and empty."""
+        with self._cond:
+            while True:
+                if self._rows:
+                    due = (
+                        self._stopping
+                        or len(self._rows) >= self.max_batch_rows
+                        or time.monotonic() - self._oldest_at >= self.max_delay_seconds
+                    )
+                    if due:
+                        count = min(len(self._rows), self.max_batch_rows)
+                        batch = [self._rows.popleft() for _ in range(count)]
+                        self._oldest_at = time.monotonic() if self._rows else None
+                        return batch
+                    remaining = self.max_delay_seconds - (time.monotonic() - self._oldest_at)
+                    self._cond.wait(timeout=max(remaining, 0.001))
+                elif self._stopping:
+                    return None
+                else:
+                    self._cond.wait()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            try:
+                self._write(batch)
+            except (OperationalError, DBAPIError) as exc:
+                if isinstance(exc, OperationalError) or exc.connection_invalidated:
+                    logger.warning(
+                        "Ingest writer: transient DB error, requeueing %d events: %s",
+                        len(batch),
+                        exc,
+                    )
+                    self._requeue(batch)
+                    if not self._stopping:
+                        time.sleep(_ERROR_BACKOFF_SECONDS)
+                    continue
+                self._write_per_attempt(batch)
+            except Exception:
+                logger.exception("Ingest writer: unexpected error, retrying per attempt")
+                self._write_per_attempt(batch)
+
+    def _requeue(self, batch: list[dict]) -> None:
+        with self._cond:
+            self._rows.extendleft(reversed(batch))
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+            if self._stopping:
+                # Shutting down with the DB unreachable - don't spin.
+                self._stats.dropped += len(self._rows)
+                logger.error(
+                    "Ingest writer: dropping %d events at shutdown (DB unavailable)",
+                    len(self._rows),
+                )
+                self._rows.clear()
+
+    def _write_per_attempt(self, batch: list[dict]) -> None:
+        by_attempt: dict[int, list[dict]] = {}
+        for row in batch:
+            by_attempt.setdefault(row["attempt_id"], []).append(row)
+        for attempt_id, rows in by_attempt.items():
+            try:
+                self._write(rows)
+            except Exception as exc:
+                # Never acknowledged, so the kiosk keeps and resends them.
+                ingest_dedup.release(attempt_id, [row.get("seq") for row in rows])
+                with self._cond:
+                    self._stats.dropped += len(rows)
+                logger.error(
+                    "Ingest writer: dropping %d events for attempt %s: %s",
+                    len(rows),
+                    attempt_id,
+                    exc,
+                )
+
+    def _write(self, rows: list[dict]) -> None:
+        started = time.perf_counter()
+        db = self.session_factory()
+        try:
+            inserted = insert_event_rows(db, rows)
+            activity = attempt_activity.stamp(db, inserted)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        entries_by_attempt: dict[int, list] = {}
+        for row, entry in zip(inserted, risk_engine.window_entries(inserted)):
+            entries_by_attempt.setdefault(row.attempt_id, []).append(entry)
+        for attempt_id, entries in entries_by_attempt.items():
+            risk_engine.record_entries(attempt_id, entries)
+        attempt_activity.record(activity)
+        # Rows ``insert_event_rows`` skipped were already stored, so every
+        # seq in the batch is handled now.
+        seqs_by_attempt: dict[int, list] = {}
+        for row in rows:
+            seqs_by_attempt.setdefault(row["attempt_id"], []).append(row.get("seq"))
+        for attempt_id, seqs in seqs_by_attempt.items():
+            ingest_dedup.advance(attempt_id, seqs)
+        for test_id in {row["test_id"] for row in rows}:
+            notify_test_changed(test_id)
+
+        with self._cond:
+            self._stats.written += len(rows)
+            self._stats.batches += 1
+            self._stats.last_batch_rows = len(rows)
+            self._stats.last_batch_ms = (time.perf_counter() - started) * 1000
+
+    # ------------------------------------------------------------------
+    # Lifecycle / introspection
+    # ------------------------------------------------------------------
+    def drain(self, timeout: float | None = 30.0) -> None:
+        """Flush everything queued and stop the writer. Called on shutdown."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            self._stopping = False
+
+    def stats(self) -> IngestStats:
+        with self._cond:
+            snapshot = IngestStats(**vars(self._stats))
+            snapshot.pending = len(self._rows)
+            return snapshot
+
+
+ingest_queue = IngestQueue(
+    max_events=settings.ingest_queue_max_events,
+    max_batch_rows=settings.ingest_batch_max_rows,
+    max_delay_seconds=settings.ingest_batch_max_delay_ms / 1000,
+)
@@ -0,0 +1,237 @@
+"""Compact columnar encoding for KEYSTROKE bursts.
+
+The kiosk sends each burst as
+``{"keys": [{key, scan_code, modifiers, ts, proc}, ...], "burst_size": n}``
+- the same five field names and usually the same process name repeated
+up to 25 times per row. KEYSTROKE is by far the most common event, so
+``event_writer`` stores the ``keys`` list in ``behavior_events.payload_packed``
+instead and keeps only a small summary in ``payload``::
+
+    {"burst_size": n, "keys_preview": ["h", "e", "l"], "packed": true}
+
+which is all the event lists and the live board show; nothing
+server-side reads the individual keys. The full list is decoded only when a single event is
+opened (``GET /behavior/events/{id}``).
+
+Blob layout (version 1), all integers unsigned LEB128 varints; signed
+values zigzag-encoded first. Each field is stored as its own column so
+similar values sit together::
+
+    version | count
+    key dictionary   (size, then length-prefixed UTF-8 strings)
+    proc dictionary  (same)
+    key index    x count
+    scan_code    x count
+    modifiers    x count   (bitmask over MODIFIER_NAMES)
+    proc index   x count
+    ts           x count   (microseconds: first absolute, then deltas)
+
+Timestamps are kept to the microsecond. Anything that would not
+round-trip - unknown fields, unknown modifier names, odd types - is left
+as plain JSON, so packing never loses information.
+"""
+
+from __future__ import annotations
+
+from app.models.behavior_event import BehaviorEventType
+
+FORMAT_VERSION = 1
+PREVIEW_KEYS = 3
+
+# Bit i of the modifiers mask. Matches keystroke_logger's _MODIFIER_KEYS;
+# append only.
+MODIFIER_NAMES: tuple[str, ...] = (
+    "ctrl",
+    "shift",
+    "alt",
+    "left ctrl",
+    "right ctrl",
+    "left shift",
+    "right shift",
+    "left alt",
+    "right alt",
+    "left windows",
+    "right windows",
+)
+_MODIFIER_BIT = {name: 1 << i for i, name in enumerate(MODIFIER_NAMES)}
+_RECORD_FIELDS = frozenset({"key", "scan_code", "modifiers", "ts", "proc"})
+
+
+class _NotPackable(Exception):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Varints
+# ---------------------------------------------------------------------------
+def _put_uvarint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _put_svarint(out: bytearray, value: int) -> None:
+    _put_uvarint(out, (value << 1) ^ (value >> 63))
+
+
+def _put_str(out: bytearray, value: str) -> None:
+    data = value.encode("utf-8")
+    _put_uvarint(out, len(data))
+    out += data
+
+
+class _Reader:
+    __slots__ = ("data", "pos")
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.pos = 0
+
+    def uvarint(self) -> int:
+        result = shift = 0
+        while True:
+            byte = self.data[self.pos]
+            self.pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def svarint(self) -> int:
+        raw = self.uvarint()
+        return (raw >> 1) ^ -(raw & 1)
+
+    def string(self) -> str:
+        size = self.uvarint()
+        value = self.data[self.pos : self.pos + size].decode("utf-8")
+        self.pos += size
+        return value
+
+
+# ---------------------------------------------------------------------------
+# Keys list <-> blob
+# ---------------------------------------------------------------------------
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def encode_keys(keys: list[dict]) -> bytes:
+    key_index: dict[str, int] = {}
+    proc_index: dict[str, int] = {}
+    key_col, scan_col, mod_col, proc_col, ts_col = [], [], [], [], []
+
+    for record in keys:
+        if not isinstance(record, dict) or record.keys() != _RECORD_FIELDS:
+            raise _NotPackable
+        key, scan_code, modifiers, ts, proc = (
+            record["key"],
+            record["scan_code"],
+            record["modifiers"],
+            record["ts"],
+            record["proc"],
+        )
+        if not (isinstance(key, str) and isinstance(proc, str)):
+            raise _NotPackable
+        if not _is_int(scan_code) or scan_code < 0:
+            raise _NotPackable
+        if not isinstance(ts, float) or ts < 0:
+            raise _NotPackable
+        if not isinstance(modifiers, list) or modifiers != sorted(set(modifiers)):
+            raise _NotPackable
+        mask = 0
+        for name in modifiers:
+            bit = _MODIFIER_BIT.get(name)
+            if bit is None:
+                raise _NotPackable
+            mask |= bit
+
+        key_col.append(key_index.setdefault(key, len(key_index)))
+        proc_col.append(proc_index.setdefault(proc, len(proc_index)))
+        scan_col.append(scan_code)
+        mod_col.append(mask)
+        ts_col.append(round(ts * 1_000_000))
+
+    out = bytearray([FORMAT_VERSION])
+    _put_uvarint(out, len(keys))
+    for dictionary in (key_index, proc_index):
+        _put_uvarint(out, len(dictionary))
+        for value in dictionary:
+            _put_str(out, value)
+    for column in (key_col, scan_col, mod_col, proc_col):
+        for value in column:
+            _put_uvarint(out, value)
+    previous = 0
+    for micros in ts_col:
+        _put_svarint(out, micros - previous)
+        previous = micros
+    return bytes(out)
+
+
+def decode_keys(blob: bytes) -> list[dict]:
+    reader = _Reader(blob)
+    version = reader.data[0]
+    reader.pos = 1
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unknown keystroke blob version {version}")
+    count = reader.uvarint()
+    keys = [reader.string() for _ in range(reader.uvarint())]
+    procs = [reader.string() for _ in range(reader.uvarint())]
+    key_col = [reader.uvarint() for _ in range(count)]
+    scan_col = [reader.uvarint() for _ in range(count)]
+    mod_col = [reader.uvarint() for _ in range(count)]
+    proc_col = [reader.uvarint() for _ in range(count)]
+
+    records: list[dict] = []
+    micros = 0
+    for i in range(count):
+        micros += reader.svarint()
+        mask = mod_col[i]
+        records.append(
+            {
+                "key": keys[key_col[i]],
+                "scan_code": scan_col[i],
+                "modifiers": sorted(
+                    name for name, bit in _MODIFIER_BIT.items() if mask & bit
+                ),
+                "ts": micros / 1_000_000,
+                "proc": procs[proc_col[i]],
+            }
+        )
+    return records
+
+
+# ---------------------------------------------------------------------------
+# Payload helpers used by the write / read paths
+# ---------------------------------------------------------------------------
+def pack_payload(event_type, payload: dict | None) -> tuple[dict | None, bytes | None]:
+    """``(payload to store, payload_packed)`` for one event.
+
+    Only KEYSTROKE payloads of exactly ``{"keys": [...], "burst_size": n}``
+    are packed; everything else comes back unchanged with no blob.
+    """
+    if (
+        event_type != BehaviorEventType.KEYSTROKE
+        or not isinstance(payload, dict)
+        or payload.keys() != {"keys", "burst_size"}
+        or not isinstance(payload["keys"], list)
+        or not payload["keys"]
+    ):
+        return payload, None
+    try:
+        blob = encode_keys(payload["keys"])
+    except _NotPackable:
+        return payload, None
+    summary = {
+        "burst_size": payload["burst_size"],
+        "keys_preview": [record["key"] for record in payload["keys"][:PREVIEW_KEYS]],
+        "packed": True,
+    }
+    return summary, blob
+
+
+def unpack_payload(payload: dict | None, blob: bytes | None) -> dict | None:
+    """Inverse of :func:`pack_payload`."""
+    if blob is None or not isinstance(payload, dict):
+        return payload
+    return {"keys": decode_keys(blob), "burst_size": payload.get("burst_size")}
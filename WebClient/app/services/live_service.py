@@ -1,70 +1,193 @@
 """Aggregate per-attempt proctoring snapshot for the live dashboard.
 
 Hot-path - hit every 3s by every teacher viewing the page. Uses a 1s
-in-process cache keyed on (test_id) so simultaneous polls collapse to a
-single DB hit; absolute correctness within the 1s window is not required.
+cache keyed on (test_id) so simultaneous polls collapse to a single DB
+hit; absolute correctness within the 1s window is not required. A miss is
+built single-flight, and a snapshot just past its TTL is served while one
+background thread rebuilds it. With the Redis cache backend the snapshot
+is shared between workers. Its JSON body and ETag are rendered once per
+build. Pollers can ask for only the rows changed since a board
+``version`` (:func:`get_live_response`) or for a filtered, paged slice
+(:class:`BoardQuery`).
+
+A cache miss runs a fixed number of set-based queries per test regardless
+of cohort size; never add a query inside the per-row loop.
 """
 
 from __future__ import annotations
 
+import base64
+import bisect
+import json
+import logging
 import threading
 import time
-from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import cached_property
 from datetime import datetime, timezone
 
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
 
+from app.core import cache
+from app.core.config import settings
+from app.core.http_cache import etag_for
+from app.db.session import SessionLocal
 from app.models.behavior_event import BehaviorEvent, BehaviorEventType
-from app.models.proctor_warning import ProctorWarning
 from app.models.test import Test
 from app.models.test_attempt import AttemptStatus, TestAttempt
 from app.models.user import User
-from app.schemas.live import LiveAttemptRow, LiveTestSnapshot
-from app.services.risk_scorer import compute_attempt_risk
+from app.schemas.live import LiveAttemptRow, LiveBoardPage, LiveTestDelta, LiveTestSnapshot
+from app.services import risk_engine, warning_index
+from app.services.risk_scorer import (
+    RISK_BAND_CRITICAL,
+    RISK_BAND_WARN,
+    RiskBreakdown,
+    compute_risk_for_attempts,
+    score_from_events,
+)
+
+logger = logging.getLogger(__name__)
 
 _CACHE_TTL_SECONDS = 1.0
-_cache: dict[int, tuple[float, LiveTestSnapshot]] = {}
+# Removed attempt ids remembered for deltas; past this the floor rises
+# and the oldest cursors resync.
+_MAX_REMOVED = 1_000
+_MAX_CACHED_VIEWS = 32
+# Upper bound on one build; a worker waiting on another's lease gives up
+# and builds itself after this long.
+_BUILD_LEASE_SECONDS = 10.0
+_LEASE_POLL_SECONDS = 0.05
+# Clock for cache ages; tests swap it to step past the TTL.
+_clock = time.monotonic
+
+
+@dataclass(frozen=True, eq=False)
+class RenderedSnapshot:
+    snapshot: LiveTestSnapshot
+    body: bytes
+    etag: str
+    # Version at which each row on the board last changed, and at which
+    # each recently dropped attempt left it. ``floor`` is the oldest
+    # ``since`` these can answer; older cursors get a full snapshot.
+    row_versions: dict[int, int]
+    removed: dict[int, int]
+    floor: int
+
+    @property
+    def version(self) -> int:
+        return self.snapshot.version
+
+    @cached_property
+    def sort_keys(self) -> list[tuple[int, str, int]]:
+        """:func:`_sort_key` of each row, in row order (ascending), for
+        bisecting into the board by score or page cursor."""
+        return [_sort_key(row) for row in self.snapshot.rows]
+
+    @cached_property
+    def search_text(self) -> list[str]:
+        return [f"{row.student_name}\n{row.student_email}".lower() for row in self.snapshot.rows]
+
+
+class _CacheEntry:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.rendered: RenderedSnapshot | None = None
+        self.built_at = 0.0
+        # Set while a build (foreground or background) is running; waiters
+        # block on it rather than starting a second one.
+        self.inflight: threading.Event | None = None
+        # Rendered deltas and filtered pages of the current build, keyed
+        # on (version, request): viewers polling in step ask for the same.
+        self.views: dict[tuple, tuple[bytes, str]] = {}
+
+
+_cache: dict[int, _CacheEntry] = {}
 _cache_lock = threading.Lock()
 
+# Buckets for the "latest event of each kind" window query. One row per
+# (attempt, category) comes back; the overall latest event is the newest
+# of those rows, so a single query answers last-seen, focus state,
+# monitor count and the sticky VM flag.
+_CATEGORY_FOCUS = "focus"
+_CATEGORY_MONITOR = "monitor"
+_CATEGORY_VM = "vm"
+_CATEGORY_OTHER = "other"
+
+
+def _live_attempt_ids(test_id: int):
+    """Subquery of attempt ids shown on the board for ``test_id``.
+
+    Attempts still in progress or not yet ended; an attempt drops off the
+    board as soon as it ends.
+    """
+    return select(TestAttempt.id).where(
+        TestAttempt.test_id == test_id,
+        (TestAttempt.status == AttemptStatus.IN_PROGRESS)
+        | (TestAttempt.ended_at.is_(None)),
+    )
+
+
+def _latest_events_by_category(db: Session, live_ids) -> dict[int, dict[str, object]]:
+    """``{attempt_id: {category: row}}`` with the newest event per category."""
+    category = case(
+        (
+            BehaviorEvent.event_type.in_(
+                [BehaviorEventType.FOCUS_LOSS, BehaviorEventType.FOCUS_REGAIN]
+            ),
+            _CATEGORY_FOCUS,
+        ),
+        (BehaviorEvent.event_type == BehaviorEventType.MONITOR_COUNT_CHANGE, _CATEGORY_MONITOR),
+        (BehaviorEvent.event_type == BehaviorEventType.VM_DETECTED, _CATEGORY_VM),
+        else_=_CATEGORY_OTHER,
+    )
+    ranked = select(
+        BehaviorEvent.id,
+        BehaviorEvent.attempt_id,
+        BehaviorEvent.event_type,
+        BehaviorEvent.severity,
+        BehaviorEvent.payload,
+        BehaviorEvent.event_time,
+        category.label("category"),
+        func.row_number()
+        .over(
+            partition_by=(BehaviorEvent.attempt_id, category),
+            order_by=(BehaviorEvent.event_time.desc(), BehaviorEvent.id.desc()),
+        )
+        .label("rn"),
+    ).where(BehaviorEvent.attempt_id.in_(live_ids)).subquery()
+    rows = db.execute(select(ranked).where(ranked.c.rn == 1)).all()
+
+    latest: dict[int, dict[str, object]] = {}
+    for row in rows:
+        latest.setdefault(row.attempt_id, {})[row.category] = row
+    return latest
 
-def _focus_state_from_payload(payload: dict | None) -> str:
-    if not payload:
-        return "unknown"
-    state = payload.get("state")
-    if state in ("in_focus", "out_of_focus"):
-        return state
-    return "unknown"
+
+def _warning_counts(db: Session, attempt_ids: list[int]) -> dict[int, int]:
+    """From the warning index; queries only for attempts it hasn't loaded."""
+    return {aid: marks.count for aid, marks in warning_index.get_marks(db, attempt_ids).items()}
 
 
 def _build_row(
-    db: Session,
     attempt: TestAttempt,
     student: User,
     attempt_number: int,
+    risk: RiskBreakdown,
+    latest_by_category: dict[str, object],
+    warnings_sent: int,
 ) -> LiveAttemptRow:
-    risk = compute_attempt_risk(db, attempt.id)
-
     # Latest event drives the "last_seen_at" + "latest_event" fields.
-    latest_event = (
-        db.query(BehaviorEvent)
-        .filter(BehaviorEvent.attempt_id == attempt.id)
-        .order_by(BehaviorEvent.event_time.desc(), BehaviorEvent.id.desc())
-        .first()
+    latest_event = max(
+        latest_by_category.values(),
+        key=lambda ev: (ev.event_time, ev.id),
+        default=None,
     )
 
     # Focus state: most recent FOCUS_LOSS / FOCUS_REGAIN wins.
     focus_state = "unknown"
-    focus_event = (
-        db.query(BehaviorEvent)
-        .filter(
-            BehaviorEvent.attempt_id == attempt.id,
-            BehaviorEvent.event_type.in_(
-                [BehaviorEventType.FOCUS_LOSS, BehaviorEventType.FOCUS_REGAIN]
-            ),
-        )
-        .order_by(BehaviorEvent.event_time.desc(), BehaviorEvent.id.desc())
-        .first()
-    )
+    focus_event = latest_by_category.get(_CATEGORY_FOCUS)
     if focus_event:
         if focus_event.event_type == BehaviorEventType.FOCUS_REGAIN:
             focus_state = "in_focus"
@@ -73,15 +196,7 @@ def _build_row(
 
     # Monitor count: most recent MONITOR_COUNT_CHANGE event wins.
     monitor_count: int | None = None
-    monitor_event = (
-        db.query(BehaviorEvent)
-        .filter(
-            BehaviorEvent.attempt_id == attempt.id,
-            BehaviorEvent.event_type == BehaviorEventType.MONITOR_COUNT_CHANGE,
-        )
-        .order_by(BehaviorEvent.event_time.desc(), BehaviorEvent.id.desc())
-        .first()
-    )
+    monitor_event = latest_by_category.get(_CATEGORY_MONITOR)
     if monitor_event and isinstance(monitor_event.payload, dict):
         try:
             monitor_count = int(monitor_event.payload.get("count"))
@@ -89,21 +204,7 @@ def _build_row(
             monitor_count = None
 
     # VM flag: any VM_DETECTED event in the attempt's lifetime is sticky.
-    vm_detected = (
-        db.query(BehaviorEvent.id)
-        .filter(
-            BehaviorEvent.attempt_id == attempt.id,
-            BehaviorEvent.event_type == BehaviorEventType.VM_DETECTED,
-        )
-        .first()
-        is not None
-    )
-
-    warnings_sent = (
-        db.query(ProctorWarning)
-        .filter(ProctorWarning.attempt_id == attempt.id)
-        .count()
-    )
+    vm_detected = _CATEGORY_VM in latest_by_category
 
     return LiveAttemptRow(
         attempt_id=attempt.id,
@@ -127,86 +228,456 @@ def _build_row(
     )
 
 
-def get_live_snapshot(db: Session, test: Test) -> LiveTestSnapshot:
-    now_monotonic = time.monotonic()
-
+def _entry_for(test_id: int) -> _CacheEntry:
     with _cache_lock:
-        cached = _cache.get(test.id)
-        if cached and (now_monotonic - cached[0]) < _CACHE_TTL_SECONDS:
-            return cached[1]
+        entry = _cache.get(test_id)
+        if entry is None:
+            entry = _cache[test_id] = _CacheEntry()
+        return entry
 
-    # Active attempts only; ended attempts fall off the live board after a
-    # short tail. We include ended attempts with events in the last 60s so
-    # the row doesn't disappear the instant the candidate hits End Session.
-    attempts = (
-        db.query(TestAttempt)
-        .filter(TestAttempt.test_id == test.id)
-        .filter(
-            (TestAttempt.status == AttemptStatus.IN_PROGRESS)
-            | (TestAttempt.ended_at.is_(None))
+
+def _render(snapshot: LiveTestSnapshot, previous: RenderedSnapshot | None) -> RenderedSnapshot:
+    """Render ``snapshot`` as the build after ``previous``, or keep
+    ``previous`` if the board is unchanged.
+
+    Versions are epoch milliseconds, bumped by at least one per change,
+    so a board rebuilt from scratch (new process, invalidation) starts
+    above every cursor handed out before and those cursors resync.
+    """
+    if (
+        previous is not None
+        and previous.snapshot.test_name == snapshot.test_name
+        and previous.snapshot.rows == snapshot.rows
+    ):
+        return previous
+    version = int(time.time() * 1000)
+    if previous is None:
+        row_versions = {row.attempt_id: version for row in snapshot.rows}
+        removed: dict[int, int] = {}
+        floor = version
+    else:
+        version = max(version, previous.version + 1)
+        before = {row.attempt_id: row for row in previous.snapshot.rows}
+        row_versions = {
+            row.attempt_id: (
+                previous.row_versions[row.attempt_id]
+                if before.get(row.attempt_id) == row
+                else version
+            )
+            for row in snapshot.rows
+        }
+        removed = {
+            attempt_id: at
+            for attempt_id, at in previous.removed.items()
+            if attempt_id not in row_versions
+        }
+        removed.update(
+            (attempt_id, version) for attempt_id in before if attempt_id not in row_versions
         )
-        .all()
+        floor = previous.floor
+        if len(removed) > _MAX_REMOVED:
+            ordered = sorted(removed.items(), key=lambda item: item[1])
+            dropped, kept = ordered[: -_MAX_REMOVED], ordered[-_MAX_REMOVED:]
+            floor = max(floor, dropped[-1][1])
+            removed = dict(kept)
+    snapshot = snapshot.model_copy(update={"version": version})
+    body = snapshot.model_dump_json().encode()
+    return RenderedSnapshot(snapshot, body, etag_for(body), row_versions, removed, floor)
+
+
+def render_delta(rendered: RenderedSnapshot, since: int) -> bytes | None:
+    """JSON ``LiveTestDelta`` from version ``since`` to ``rendered``, or
+    None if ``since`` is outside what ``rendered`` can answer."""
+    if since < rendered.floor or since > rendered.version:
+        return None
+    snapshot = rendered.snapshot
+    delta = LiveTestDelta(
+        test_id=snapshot.test_id,
+        test_name=snapshot.test_name,
+        generated_at=snapshot.generated_at,
+        version=rendered.version,
+        since=since,
+        changed=[row for row in snapshot.rows if rendered.row_versions[row.attempt_id] > since],
+        removed=[attempt_id for attempt_id, at in rendered.removed.items() if at > since],
     )
+    return delta.model_dump_json().encode()
 
-    student_ids = {a.student_id for a in attempts}
-    students = (
-        db.query(User).filter(User.id.in_(student_ids)).all() if student_ids else []
+
+def _encode_shared(rendered: RenderedSnapshot, built_at: float) -> bytes:
+    meta = {
+        "floor": rendered.floor,
+        "rows": rendered.row_versions,
+        "removed": rendered.removed,
+    }
+    return b"\n".join(
+        (f"{built_at!r}".encode(), json.dumps(meta, separators=(",", ":")).encode(), rendered.body)
     )
-    student_by_id = {s.id: s for s in students}
-
-    # Per-(test, student) attempt sequence so the UI can show "attempt #1"
-    # for a candidate's first try regardless of the global PK. We compute
-    # the full ranking from ALL attempts (not just live ones), then look
-    # up each row by id - one extra query per active student, capped to
-    # the cohort size and well within the 1s cache window.
-    attempt_number_by_id: dict[int, int] = {}
-    for sid in student_ids:
-        ranked = (
-            db.query(TestAttempt.id)
-            .filter(
-                TestAttempt.test_id == test.id,
-                TestAttempt.student_id == sid,
-            )
-            .order_by(TestAttempt.started_at.asc(), TestAttempt.id.asc())
-            .all()
+
+
+def _read_shared(
+    backend: cache.CacheBackend, key: str, previous: RenderedSnapshot | None
+) -> tuple[RenderedSnapshot, float] | None:
+    """The last build any worker published, and its age."""
+    raw = backend.get(key)
+    if raw is None:
+        return None
+    try:
+        header, meta, body = raw.split(b"\n", 2)
+        age = max(time.time() - float(header), 0.0)
+        etag = etag_for(body)
+        if previous is not None and previous.etag == etag:
+            return previous, age
+        meta = json.loads(meta)
+        rendered = RenderedSnapshot(
+            LiveTestSnapshot.model_validate_json(body),
+            body,
+            etag,
+            row_versions={int(k): v for k, v in meta["rows"].items()},
+            removed={int(k): v for k, v in meta["removed"].items()},
+            floor=meta["floor"],
         )
-        for idx, row in enumerate(ranked, start=1):
-            attempt_number_by_id[row.id] = idx
+        return rendered, age
+    except (ValueError, KeyError):
+        logger.warning("Discarding undecodable shared live snapshot %s", key)
+        return None
 
-    rows: list[LiveAttemptRow] = []
-    for attempt in attempts:
-        student = student_by_id.get(attempt.student_id)
-        if not student:
+
+def _build_shared(
+    test_id: int,
+    build: Callable[[], LiveTestSnapshot | None],
+    previous: RenderedSnapshot | None,
+) -> tuple[RenderedSnapshot | None, float]:
+    """``build()`` rendered, coordinated with the other workers; returns
+    the result and how old it already is.
+
+    Workers publish the rendered body with its row versions, so every
+    worker serves the same bytes, ETag and deltas for a given build.
+    """
+    backend = cache.get_cache()
+    if not backend.shared:
+        snapshot = build()
+        return (_render(snapshot, previous) if snapshot is not None else None), 0.0
+    key = backend.key("live", test_id)
+    lease = backend.key("live-lease", test_id)
+    deadline = time.monotonic() + _BUILD_LEASE_SECONDS
+    while True:
+        published = _read_shared(backend, key, previous)
+        if published is not None and published[1] < _CACHE_TTL_SECONDS:
+            return published
+        if backend.add(lease, b"1", _BUILD_LEASE_SECONDS) or time.monotonic() >= deadline:
+            break
+        time.sleep(_LEASE_POLL_SECONDS)
+    # Carry versions on from the deployment's last build. With nothing
+    # published, start afresh: this worker's own last build may predate
+    # builds other workers published since.
+    previous = published[0] if published is not None else None
+    try:
+        built_at = time.time()
+        snapshot = build()
+        if snapshot is None:
+            return None, 0.0
+        rendered = _render(snapshot, previous)
+        backend.set(
+            key,
+            _encode_shared(rendered, built_at),
+            _CACHE_TTL_SECONDS + settings.live_snapshot_stale_seconds,
+        )
+        return rendered, 0.0
+    finally:
+        backend.delete(lease)
+
+
+def _build_into(
+    entry: _CacheEntry, test_id: int, build: Callable[[], LiveTestSnapshot | None]
+) -> RenderedSnapshot | None:
+    """Run ``build`` as the entry's in-flight build and store the result.
+
+    The caller must have set ``entry.inflight``; it is cleared and set
+    here whatever happens, so waiters never hang on a failed build.
+    """
+    started = _clock()
+    try:
+        with entry.lock:
+            previous = entry.rendered
+        rendered, age = _build_shared(test_id, build, previous)
+        if rendered is not None:
+            with entry.lock:
+                if rendered is not entry.rendered:
+                    entry.views.clear()
+                entry.rendered = rendered
+                entry.built_at = started - age
+        return rendered
+    finally:
+        with entry.lock:
+            done, entry.inflight = entry.inflight, None
+        if done is not None:
+            done.set()
+
+
+def load_live_snapshot(test_id: int) -> LiveTestSnapshot | None:
+    """Build on a fresh session, off the request (background refresh,
+    live stream). None if the test no longer exists."""
+    db = SessionLocal()
+    try:
+        test = db.query(Test).filter(Test.id == test_id).first()
+        if test is None:
+            return None
+        return build_live_snapshot(db, test)
+    finally:
+        db.close()
+
+
+def _refresh_in_background(entry: _CacheEntry, test_id: int) -> None:
+    def run() -> None:
+        try:
+            _build_into(entry, test_id, lambda: load_live_snapshot(test_id))
+        except Exception:
+            logger.exception("Background live snapshot refresh failed for test %s", test_id)
+
+    threading.Thread(target=run, name=f"live-snapshot-{test_id}", daemon=True).start()
+
+
+def get_rendered_live_snapshot(db: Session, test: Test) -> RenderedSnapshot:
+    """The cached snapshot with its response body and ETag."""
+    entry = _entry_for(test.id)
+    while True:
+        with entry.lock:
+            rendered = entry.rendered
+            age = _clock() - entry.built_at
+            if rendered is not None and age < _CACHE_TTL_SECONDS:
+                return rendered
+            if rendered is not None and age < _CACHE_TTL_SECONDS + settings.live_snapshot_stale_seconds:
+                if entry.inflight is None:
+                    entry.inflight = threading.Event()
+                    _refresh_in_background(entry, test.id)
+                return rendered
+            waiting = entry.inflight
+            if waiting is None:
+                entry.inflight = threading.Event()
+        if waiting is None:
+            return _build_into(entry, test.id, lambda: build_live_snapshot(db, test))
+        # Someone else is building; take theirs. If their build failed,
+        # the loop makes one of the waiters the next builder.
+        waiting.wait()
+
+
+def get_live_snapshot(db: Session, test: Test) -> LiveTestSnapshot:
+    return get_rendered_live_snapshot(db, test).snapshot
+
+
+def _cached_view(
+    test_id: int, key: tuple, render: Callable[[], bytes | None]
+) -> tuple[bytes, str] | None:
+    entry = _entry_for(test_id)
+    with entry.lock:
+        cached = entry.views.get(key)
+    if cached is not None:
+        return cached
+    body = render()
+    if body is None:
+        return None
+    response = (body, etag_for(body))
+    with entry.lock:
+        if len(entry.views) >= _MAX_CACHED_VIEWS:
+            entry.views.clear()
+        entry.views[key] = response
+    return response
+
+
+def get_live_response(
+    db: Session,
+    test: Test,
+    since: int | None = None,
+    query: BoardQuery | None = None,
+) -> tuple[bytes, str]:
+    """Response body and ETag for a live poll: one page of the board for
+    ``query``, the delta since version ``since`` when it can be answered,
+    else the full snapshot."""
+    rendered = get_rendered_live_snapshot(db, test)
+    if query is not None:
+        return _cached_view(
+            test.id, (rendered.version, query), lambda: render_page(rendered, query)
+        )
+    if since is None:
+        return rendered.body, rendered.etag
+    delta = _cached_view(
+        test.id, (rendered.version, since), lambda: render_delta(rendered, since)
+    )
+    return delta or (rendered.body, rendered.etag)
+
+
+# ---------------------------------------------------------------------------
+# Filtered / paged board
+# ---------------------------------------------------------------------------
+# Rows are kept highest risk first, so a board is already an index on
+# score: a band or minimum score is a contiguous run of it, found by
+# bisecting ``sort_keys``, and a top-K scan stops after K matches.
+_BAND_SCORES = {
+    "ok": (0, RISK_BAND_WARN - 1),
+    "warn": (RISK_BAND_WARN, RISK_BAND_CRITICAL - 1),
+    "critical": (RISK_BAND_CRITICAL, 10_000),
+}
+DEFAULT_PAGE_SIZE = 100
+
+
+def _sort_key(row: LiveAttemptRow) -> tuple[int, str, int]:
+    return (-row.risk_score, row.student_name.lower(), row.attempt_id)
+
+
+def encode_cursor(key: tuple[int, str, int]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[int, str, int]:
+    """Inverse of :func:`encode_cursor`; ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        neg_score, name, attempt_id = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Malformed cursor") from exc
+    if not (isinstance(neg_score, int) and isinstance(name, str) and isinstance(attempt_id, int)):
+        raise ValueError("Malformed cursor")
+    return (neg_score, name, attempt_id)
+
+
+@dataclass(frozen=True)
+class BoardQuery:
+    bands: frozenset[str] = field(default_factory=frozenset)
+    min_score: int | None = None
+    focus_state: str | None = None
+    vm_detected: bool | None = None
+    search: str | None = None
+    limit: int = DEFAULT_PAGE_SIZE
+    after: tuple[int, str, int] | None = None
+
+    def score_range(self) -> tuple[int, int]:
+        low, high = 0, _BAND_SCORES["critical"][1]
+        if self.bands:
+            low = min(_BAND_SCORES[band][0] for band in self.bands)
+            high = max(_BAND_SCORES[band][1] for band in self.bands)
+        if self.min_score is not None:
+            low = max(low, self.min_score)
+        return low, high
+
+    def matches(self, row: LiveAttemptRow, text: str) -> bool:
+        return (
+            (not self.bands or row.risk_band in self.bands)
+            and (self.focus_state is None or row.focus_state == self.focus_state)
+            and (self.vm_detected is None or row.vm_detected == self.vm_detected)
+            and (not self.search or self.search in text)
+        )
+
+
+def query_board(
+    rendered: RenderedSnapshot, query: BoardQuery
+) -> tuple[list[LiveAttemptRow], tuple[int, str, int] | None]:
+    """Rows matching ``query`` in board order, and the cursor after the
+    last one if more match. Only scans the query's score range."""
+    rows = rendered.snapshot.rows
+    keys = rendered.sort_keys
+    texts = rendered.search_text if query.search else None
+    low, high = query.score_range()
+    start = bisect.bisect_left(keys, (-high,))
+    if query.after is not None:
+        start = max(start, bisect.bisect_right(keys, query.after))
+    page: list[LiveAttemptRow] = []
+    for i in range(start, len(rows)):
+        row = rows[i]
+        if row.risk_score < low:
+            break
+        if not query.matches(row, texts[i] if texts else ""):
             continue
-        rows.append(
-            _build_row(
-                db,
-                attempt,
-                student,
-                attempt_number=attempt_number_by_id.get(attempt.id, 1),
+        if len(page) == query.limit:
+            return page, _sort_key(page[-1])
+        page.append(row)
+    return page, None
+
+
+def render_page(rendered: RenderedSnapshot, query: BoardQuery) -> bytes:
+    rows, after = query_board(rendered, query)
+    snapshot = rendered.snapshot
+    page = LiveBoardPage(
+        test_id=snapshot.test_id,
+        test_name=snapshot.test_name,
+        generated_at=snapshot.generated_at,
+        version=rendered.version,
+        rows=rows,
+        next_cursor=encode_cursor(after) if after is not None else None,
+    )
+    return page.model_dump_json().encode()
+
+
+def build_live_snapshot(db: Session, test: Test) -> LiveTestSnapshot:
+    """Uncached snapshot build. Pollers go through :func:`get_live_snapshot`."""
+    live_ids = _live_attempt_ids(test.id)
+    attempts = (
+        db.query(TestAttempt, User)
+        .join(User, User.id == TestAttempt.student_id)
+        .filter(TestAttempt.id.in_(live_ids))
+        .all()
+    )
+
+    rows: list[LiveAttemptRow] = []
+    if attempts:
+        if settings.live_risk_engine:
+            risk_by_id = risk_engine.get_risk_for_attempts(
+                db, [attempt.id for attempt, _ in attempts]
+            )
+        else:
+            risk_by_id = compute_risk_for_attempts(db, live_ids)
+        latest_by_id = _latest_events_by_category(db, live_ids)
+        warnings_by_id = _warning_counts(db, [attempt.id for attempt, _ in attempts])
+        empty_risk = score_from_events([])
+
+        for attempt, student in attempts:
+            rows.append(
+                _build_row(
+                    attempt,
+                    student,
+                    attempt_number=attempt.attempt_number,
+                    risk=risk_by_id.get(attempt.id, empty_risk),
+                    latest_by_category=latest_by_id.get(attempt.id, {}),
+                    warnings_sent=warnings_by_id.get(attempt.id, 0),
+                )
             )
-        )
 
     # Highest-risk first so the teacher sees who needs attention.
-    rows.sort(key=lambda r: (-r.risk_score, r.student_name.lower()))
+    rows.sort(key=_sort_key)
 
-    snapshot = LiveTestSnapshot(
+    return LiveTestSnapshot(
         test_id=test.id,
         test_name=test.name,
         generated_at=datetime.now(timezone.utc),
         rows=rows,
     )
 
+
+def _drop_entry(test_id: int) -> None:
     with _cache_lock:
-        _cache[test.id] = (now_monotonic, snapshot)
+        _cache.pop(test_id, None)
+
+
+def _on_cache_invalidated(key: str) -> None:
+    prefix = cache.get_cache().key("live", "")
+    if key.startswith(prefix) and key[len(prefix):].isdigit():
+        _drop_entry(int(key[len(prefix):]))
+
 
-    return snapshot
+cache.add_invalidation_listener(_on_cache_invalidated)
 
 
 def invalidate_cache(test_id: int | None = None) -> None:
-    """Test hook - drop the cache so a fresh snapshot is computed."""
-    with _cache_lock:
-        if test_id is None:
+    """Drop the snapshot for ``test_id`` in every worker, so the next
+    poll rebuilds it. Without a test id, drops this process's entries
+    only (test hook).
+
+    A build still running for a dropped entry finishes into the old
+    entry, which nothing reads any more.
+    """
+    if test_id is None:
+        with _cache_lock:
             _cache.clear()
-        else:
-            _cache.pop(test_id, None)
+        return
+    _drop_entry(test_id)
+    backend = cache.get_cache()
+    backend.delete(backend.key("live", test_id))
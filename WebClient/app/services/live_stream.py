@@ -0,0 +1,225 @@
+"""Push-based live dashboard stream (Server-Sent Events).
+
+Polling ``GET /proctor/tests/{id}/live`` costs one snapshot build per
+cache miss per teacher tab. Here each test with at least one connected
+viewer gets a single ``_Channel``: a producer task that rebuilds the
+snapshot when something touched the test (ingest, warning send/ack,
+attempt start/end - see :func:`notify_test_changed`), diffs it against
+the previous build and fans the changed ``LiveAttemptRow``s out to every
+subscriber. N viewers therefore cost one computation per change, not N
+polls.
+
+Notifications are debounced so a burst of kiosk batches collapses into
+one rebuild, and the producer also refreshes every
+``REFRESH_INTERVAL_SECONDS`` while idle because risk scores decay as
+events age out of the 60 s window even when nothing new arrives.
+
+Channels are per process, like the snapshot cache. ``notify_test_changed``
+is safe to call from the sync request threadpool; it hops onto the
+channel's event loop with ``call_soon_threadsafe``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime, timezone
+
+from starlette.concurrency import run_in_threadpool
+
+from app.schemas.live import LiveAttemptRow, LiveTestSnapshot
+from app.services.live_service import load_live_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Quiet period after a notification before rebuilding, so a burst of
+# ingests from a whole exam hall collapses into one snapshot build.
+DEBOUNCE_SECONDS = 0.5
+# Rebuild at least this often while viewers are connected so scores
+# decay and "last seen" ages even without new events.
+REFRESH_INTERVAL_SECONDS = 5.0
+# SSE comment sent when nothing else went out, so proxies keep the
+# connection open.
+HEARTBEAT_SECONDS = 15.0
+# Per-subscriber backlog. A viewer that falls this far behind gets its
+# queue replaced by one full snapshot instead of an ever-growing backlog.
+MAX_PENDING_MESSAGES = 32
+
+SnapshotFactory = Callable[[int], "LiveTestSnapshot | None"]
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def snapshot_message(snapshot: LiveTestSnapshot) -> str:
+    return _sse("snapshot", snapshot.model_dump(mode="json"))
+
+
+def delta_message(
+    previous: dict[int, LiveAttemptRow],
+    snapshot: LiveTestSnapshot,
+) -> str | None:
+    """SSE ``delta`` event for rows added/changed/removed, or None."""
+    current = {row.attempt_id: row for row in snapshot.rows}
+    changed = [
+        row.model_dump(mode="json")
+        for attempt_id, row in current.items()
+        if previous.get(attempt_id) != row
+    ]
+    removed = [attempt_id for attempt_id in previous if attempt_id not in current]
+    if not changed and not removed:
+        return None
+    return _sse(
+        "delta",
+        {
+            "test_id": snapshot.test_id,
+            "generated_at": snapshot.generated_at.isoformat(),
+            "changed": changed,
+            "removed": removed,
+        },
+    )
+
+
+class _Channel:
+    def __init__(
+        self,
+        test_id: int,
+        loop: asyncio.AbstractEventLoop,
+        factory: SnapshotFactory,
+    ) -> None:
+        self.test_id = test_id
+        self.loop = loop
+        self.factory = factory
+        self.subscribers: set[asyncio.Queue[str]] = set()
+        self.dirty = asyncio.Event()
+        self.snapshot: LiveTestSnapshot | None = None
+        self.rows: dict[int, LiveAttemptRow] = {}
+        self.task: asyncio.Task | None = None
+        self.builds = 0
+
+    def subscribe(self) -> asyncio.Queue[str]:
+        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=MAX_PENDING_MESSAGES)
+        self.subscribers.add(queue)
+        if self.snapshot is not None:
+            queue.put_nowait(snapshot_message(self.snapshot))
+        else:
+            self.dirty.set()
+        if self.task is None or self.task.done():
+            self.task = self.loop.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[str]) -> None:
+        self.subscribers.discard(queue)
+        if not self.subscribers:
+            # Wake the producer so it notices and exits.
+            self.dirty.set()
+
+    def _send(self, queue: asyncio.Queue[str], message: str) -> None:
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow consumer: drop its backlog and resync with a full
+            # snapshot (self.snapshot is already the new build).
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(snapshot_message(self.snapshot))
+
+    def _publish(self, snapshot: LiveTestSnapshot) -> None:
+        first = self.snapshot is None
+        previous = self.rows
+        self.snapshot = snapshot
+        self.rows = {row.attempt_id: row for row in snapshot.rows}
+        if first:
+            message = snapshot_message(snapshot)
+        else:
+            message = delta_message(previous, snapshot)
+        if message is None:
+            return
+        for queue in list(self.subscribers):
+            self._send(queue, message)
+
+    async def _run(self) -> None:
+        try:
+            while self.subscribers:
+                try:
+                    await asyncio.wait_for(self.dirty.wait(), REFRESH_INTERVAL_SECONDS)
+                    if self.snapshot is not None:
+                        await asyncio.sleep(DEBOUNCE_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                self.dirty.clear()
+                if not self.subscribers:
+                    break
+                try:
+                    snapshot = await run_in_threadpool(self.factory, self.test_id)
+                except Exception:
+                    logger.exception("Live stream rebuild failed for test %s", self.test_id)
+                    continue
+                self.builds += 1
+                if snapshot is not None:
+                    self._publish(snapshot)
+        finally:
+            with _channels_lock:
+                if _channels.get(self.test_id) is self and not self.subscribers:
+                    del _channels[self.test_id]
+
+    def mark_dirty(self) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.dirty.set)
+        except RuntimeError:
+            # Loop already closed (shutdown / test client torn down).
+            pass
+
+
+_channels: dict[int, _Channel] = {}
+_channels_lock = threading.Lock()
+
+
+def notify_test_changed(test_id: int) -> None:
+    """Tell any open live stream for ``test_id`` that its board changed.
+
+    Cheap when nobody is watching - a dict lookup - so it is fine to call
+    from every ingest.
+    """
+    with _channels_lock:
+        channel = _channels.get(test_id)
+    if channel is not None:
+        channel.mark_dirty()
+
+
+def _get_channel(test_id: int, factory: SnapshotFactory) -> _Channel:
+    loop = asyncio.get_running_loop()
+    with _channels_lock:
+        channel = _channels.get(test_id)
+        if channel is None or channel.loop is not loop:
+            channel = _Channel(test_id, loop, factory)
+            _channels[test_id] = channel
+        return channel
+
+
+async def stream_test(
+    test_id: int,
+    *,
+    factory: SnapshotFactory = load_live_snapshot,
+) -> AsyncIterator[str]:
+    """SSE body: one ``snapshot`` event, then ``delta`` events.
+
+    Callers must have done the permission check already - this only
+    knows the test id.
+    """
+    channel = _get_channel(test_id, factory)
+    queue = channel.subscribe()
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield f": keep-alive {datetime.now(timezone.utc).isoformat()}\n\n"
+                continue
+            yield message
+    finally:
+        channel.unsubscribe(queue)
@@ -0,0 +1,127 @@
+"""Cached per-request lookups on the hot paths.
+
+Every kiosk call resolves its capability token to an attempt, and every
+live-board poll loads its test to check permissions. Both are a primary
+key ``SELECT`` whose answer almost never changes, so they are served
+from ``app.core.cache`` as small immutable values instead of ORM rows:
+
+  * :class:`AttemptRef` - the ids a kiosk request needs. They are fixed
+    for the attempt's lifetime; the entry only goes when the attempt is
+    deleted (:func:`forget_attempts`).
+  * :class:`TestMeta` - the test's own columns. ``update_test`` drops the
+    entry (:func:`forget_test`).
+
+Code that changes either row, or needs relationships, loads the ORM
+object as before.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_cache
+from app.models.test import Test
+from app.models.test_attempt import TestAttempt
+
+ATTEMPT_TTL_SECONDS = 300.0
+TEST_TTL_SECONDS = 60.0
+# How long a worker may answer from its own copy of a shared entry;
+# deletes reach those copies over pub/sub well within it.
+LOCAL_TTL_SECONDS = 5.0
+
+
+@dataclass(frozen=True)
+class AttemptRef:
+    id: int
+    test_id: int
+    student_id: int
+
+
+@dataclass(frozen=True)
+class TestMeta:
+    id: int
+    name: str
+    created_by: int
+    is_active: bool
+    max_attempts: int
+    start_time: datetime
+    end_time: datetime
+
+
+def _attempt_key(attempt_id: int) -> str:
+    return get_cache().key("attempt", attempt_id)
+
+
+def _test_key(test_id: int) -> str:
+    return get_cache().key("test", test_id)
+
+
+def get_attempt_ref(db: Session, attempt_id: int) -> AttemptRef | None:
+    cache = get_cache()
+    key = _attempt_key(attempt_id)
+    raw = cache.get(key, local_ttl=LOCAL_TTL_SECONDS)
+    if raw is not None:
+        return AttemptRef(**json.loads(raw))
+    row = db.execute(
+        select(TestAttempt.id, TestAttempt.test_id, TestAttempt.student_id).where(
+            TestAttempt.id == attempt_id
+        )
+    ).first()
+    if row is None:
+        return None
+    ref = AttemptRef(row.id, row.test_id, row.student_id)
+    cache.set(key, json.dumps(asdict(ref)).encode(), ATTEMPT_TTL_SECONDS)
+    return ref
+
+
+def forget_attempts(attempt_ids: Iterable[int]) -> None:
+    """Drop cached refs for attempts that have been deleted."""
+    cache = get_cache()
+    for attempt_id in attempt_ids:
+        cache.delete(_attempt_key(attempt_id))
+
+
+def _encode_test(meta: TestMeta) -> bytes:
+    data = asdict(meta)
+    for field in ("start_time", "end_time"):
+        data[field] = data[field].isoformat()
+    return json.dumps(data).encode()
+
+
+def _decode_test(raw: bytes) -> TestMeta:
+    data = json.loads(raw)
+    for field in ("start_time", "end_time"):
+        data[field] = datetime.fromisoformat(data[field])
+    return TestMeta(**data)
+
+
+def get_test_meta(db: Session, test_id: int) -> TestMeta | None:
+    cache = get_cache()
+    key = _test_key(test_id)
+    raw = cache.get(key, local_ttl=LOCAL_TTL_SECONDS)
+    if raw is not None:
+        return _decode_test(raw)
+    test = db.get(Test, test_id)
+    if test is None:
+        return None
+    meta = TestMeta(
+        id=test.id,
+        name=test.name,
+        created_by=test.created_by,
+        is_active=test.is_active,
+        max_attempts=test.max_attempts,
+        start_time=test.start_time,
+        end_time=test.end_time,
+    )
+    cache.set(key, _encode_test(meta), TEST_TTL_SECONDS)
+    return meta
+
+
+def forget_test(test_id: int) -> None:
+    get_cache().delete(_test_key(test_id))
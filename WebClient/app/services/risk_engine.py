@@ -0,0 +1,271 @@
+"""Incremental, in-memory risk scoring fed at ingest time.
+
+``risk_scorer.compute_attempt_risk`` re-reads the last 60s of events for
+an attempt on every live-board poll. This module keeps the same window
+per attempt in memory instead: the ingest path pushes each committed
+event in, and the live board reads a ``RiskBreakdown`` without touching
+``behavior_events``.
+
+Each attempt owns an ``_AttemptWindow`` - a time-ordered ring buffer of
+pre-weighted entries plus running per-type totals, an event count and a
+critical-event counter. Ingests and reads evict entries older than the
+window, and reads rebuild the breakdown from the running totals, so the
+result is identical to ``score_from_events`` over the same rows ordered
+by ``(event_time, id)``.
+
+State is per process. An attempt this process has never seen (fresh
+worker, restart) is hydrated lazily from the DB on first touch with one
+set-based query, and events are de-duplicated by id so a hydration that
+races with an ingest never counts a row twice. A worker never sees
+another worker's ingests, and ``CACHE_BACKEND=redis`` does not change
+that - it only shares the snapshot built from these windows, so a wrong
+score would reach every worker. Deployments with more than one worker
+must set ``LIVE_RISK_ENGINE=false`` and use the per-poll query.
+"""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, NamedTuple
+
+from sqlalchemy.orm import Session
+
+from app.models.behavior_event import BehaviorEvent
+from app.services.risk_scorer import (
+    WINDOW_SECONDS,
+    RiskBreakdown,
+    breakdown_from_totals,
+    weigh_event,
+)
+
+
+class WindowEntry(NamedTuple):
+    """One pre-weighted event. Sorts by ``(event_time, seq)``."""
+
+    event_time: datetime
+    seq: int  # event id when known, else a process-local tiebreaker
+    event_id: int | None
+    key: str
+    weight: int
+    is_critical: bool
+
+
+# Arrival-order tiebreaker for events that have no DB id (unit tests,
+# stubs). Only used for ordering; de-duplication keys on ``event_id``.
+_anonymous_seq = itertools.count(1)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; treat them as UTC like the rest
+    # of the codebase does.
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def window_entries(events: Iterable[BehaviorEvent]) -> list[WindowEntry]:
+    """Weigh ``events`` into entries ready for :func:`record_entries`.
+
+    Call this BEFORE ``db.commit()`` - committing expires the ORM rows,
+    and touching them afterwards would cost one refresh query per row.
+    """
+    now = datetime.now(timezone.utc)
+    entries: list[WindowEntry] = []
+    for ev in events:
+        key, weight, is_critical = weigh_event(ev)
+        event_id = getattr(ev, "id", None)
+        entries.append(
+            WindowEntry(
+                event_time=_as_utc(ev.event_time or now),
+                seq=event_id if event_id is not None else next(_anonymous_seq),
+                event_id=event_id,
+                key=key,
+                weight=weight,
+                is_critical=is_critical,
+            )
+        )
+    return entries
+
+
+class _AttemptWindow:
+    """Sliding-window accumulator for a single attempt."""
+
+    __slots__ = ("entries", "seen_ids", "totals", "key_entries", "critical_count", "hydrated")
+
+    def __init__(self) -> None:
+        # False while the initial DB load is in flight. Ingests still land
+        # in the window meanwhile; the load is merged in by event id.
+        self.hydrated = False
+        self.entries: deque[WindowEntry] = deque()
+        self.seen_ids: set[int] = set()
+        self.totals: dict[str, int] = {}
+        # Weighted entries per type, in window order. The head gives the
+        # type's first occurrence, which is how score_from_events orders
+        # ties in top_contributors.
+        self.key_entries: dict[str, deque[WindowEntry]] = {}
+        self.critical_count = 0
+
+    def add(self, entry: WindowEntry) -> None:
+        if entry.event_id is not None:
+            if entry.event_id in self.seen_ids:
+                return
+            self.seen_ids.add(entry.event_id)
+
+        self._insert(self.entries, entry)
+        if entry.is_critical:
+            self.critical_count += 1
+        if entry.weight > 0:
+            self.totals[entry.key] = self.totals.get(entry.key, 0) + entry.weight
+            self._insert(self.key_entries.setdefault(entry.key, deque()), entry)
+
+    @staticmethod
+    def _insert(buffer: deque[WindowEntry], entry: WindowEntry) -> None:
+        # Kiosk batches arrive almost perfectly in order; only a requeued
+        # batch lands behind newer events and pays for the bisect.
+        position = (entry.event_time, entry.seq)
+        if not buffer or (buffer[-1].event_time, buffer[-1].seq) <= position:
+            buffer.append(entry)
+        else:
+            index = bisect.bisect_right(buffer, position, key=lambda e: (e.event_time, e.seq))
+            buffer.insert(index, entry)
+
+    def evict_before(self, cutoff: datetime) -> None:
+        while self.entries and self.entries[0].event_time < cutoff:
+            entry = self.entries.popleft()
+            if entry.event_id is not None:
+                self.seen_ids.discard(entry.event_id)
+            if entry.is_critical:
+                self.critical_count -= 1
+            if entry.weight > 0:
+                remaining = self.totals[entry.key] - entry.weight
+                per_key = self.key_entries[entry.key]
+                per_key.popleft()
+                if per_key:
+                    self.totals[entry.key] = remaining
+                else:
+                    del self.totals[entry.key]
+                    del self.key_entries[entry.key]
+
+    def breakdown(self) -> RiskBreakdown:
+        ordered = sorted(self.totals, key=lambda k: self.key_entries[k][0])
+        return breakdown_from_totals(
+            {key: self.totals[key] for key in ordered},
+            len(self.entries),
+            self.critical_count > 0,
+        )
+
+
+_windows: dict[int, _AttemptWindow] = {}
+_lock = threading.Lock()
+
+
+def record_entries(attempt_id: int, entries: list[WindowEntry]) -> None:
+    """Push freshly committed events into the attempt's window.
+
+    A no-op for attempts this process is not tracking yet; the first
+    read will load them (including these rows) from the DB instead.
+    Entries more than a window older than the newest one are evicted
+    here too, so a window nobody reads stays bounded.
+    """
+    if not entries:
+        return
+    now = datetime.now(timezone.utc)
+    with _lock:
+        window = _windows.get(attempt_id)
+        if window is None:
+            return
+        for entry in entries:
+            window.add(entry)
+        # Clamped to now: a kiosk clock running ahead must not evict
+        # entries a read would still count.
+        newest = min(window.entries[-1].event_time, now)
+        window.evict_before(newest - timedelta(seconds=WINDOW_SECONDS))
+
+
+def _hydrate(db: Session, attempt_ids: list[int], window_seconds: int) -> None:
+    """Load the last window of events for ``attempt_ids`` in one query.
+
+    The placeholder windows are registered before the query runs so an
+    ingest that commits mid-hydration is recorded rather than lost; the
+    id de-duplication in ``_AttemptWindow.add`` absorbs the overlap.
+    """
+    with _lock:
+        for aid in attempt_ids:
+            _windows.setdefault(aid, _AttemptWindow())
+
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=window_seconds)
+    rows = (
+        db.query(
+            BehaviorEvent.id,
+            BehaviorEvent.attempt_id,
+            BehaviorEvent.event_type,
+            BehaviorEvent.severity,
+            BehaviorEvent.payload,
+            BehaviorEvent.event_time,
+        )
+        .filter(
+            BehaviorEvent.attempt_id.in_(attempt_ids),
+            BehaviorEvent.event_time >= cutoff,
+        )
+        .order_by(BehaviorEvent.event_time.asc(), BehaviorEvent.id.asc())
+        .all()
+    )
+    entries = window_entries(rows)
+
+    with _lock:
+        for row, entry in zip(rows, entries):
+            window = _windows.get(row.attempt_id)
+            if window is not None:
+                window.add(entry)
+        for aid in attempt_ids:
+            window = _windows.get(aid)
+            if window is not None:
+                window.hydrated = True
+
+
+def get_risk_for_attempts(
+    db: Session,
+    attempt_ids: Iterable[int],
+    *,
+    window_seconds: int = WINDOW_SECONDS,
+) -> dict[int, RiskBreakdown]:
+    """Current breakdown for every attempt in ``attempt_ids``.
+
+    Only attempts not yet tracked by this process cost a (single,
+    shared) DB query; everything else is served from memory.
+    """
+    ids = list(attempt_ids)
+    with _lock:
+        missing = [
+            aid for aid in ids if aid not in _windows or not _windows[aid].hydrated
+        ]
+    if missing:
+        _hydrate(db, missing, window_seconds)
+
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=window_seconds)
+    result: dict[int, RiskBreakdown] = {}
+    with _lock:
+        for aid in ids:
+            window = _windows.get(aid)
+            if window is None:
+                # Forgotten (attempt ended) between hydration and now.
+                window = _AttemptWindow()
+            window.evict_before(cutoff)
+            result[aid] = window.breakdown()
+    return result
+
+
+def forget_attempt(attempt_id: int) -> None:
+    """Drop an attempt's window once it has left the live board."""
+    with _lock:
+        _windows.pop(attempt_id, None)
+
+
+def reset() -> None:
+    """Test hook - forget every window, as if the process had restarted."""
+    with _lock:
+        _windows.clear()
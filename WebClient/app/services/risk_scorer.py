@@ -5,7 +5,8 @@ candidate looks. It is computed as a weighted sum over a sliding 60 second
 window of behavior events, capped at 100.
 
 Used by:
-  * the live monitoring endpoint (one row per active attempt)
+  * the live monitoring endpoint (one row per active attempt), either
+    directly or through the incremental ``risk_engine``
   * the auto-alert popup on the teacher dashboard
 
 Weights are intentionally documented as constants so they can be tuned
@@ -17,9 +18,10 @@ honest students to score under 20.
 
 from __future__ import annotations
 
+from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Iterable
+from typing import Any, Iterable
 
 from sqlalchemy.orm import Session
 
@@ -141,29 +143,37 @@ def _contextual_weight(ev: BehaviorEvent, base_weight: int) -> int:
     return base_weight
 
 
-def score_from_events(events: Iterable[BehaviorEvent]) -> RiskBreakdown:
-    """Pure function so the unit tests don't need a DB."""
-    totals: dict[str, int] = {}
-    has_critical = False
-    count = 0
+def weigh_event(ev: BehaviorEvent) -> tuple[str, int, bool]:
+    """Return ``(event_type_key, weight, is_critical)`` for one event.
 
-    for ev in events:
-        count += 1
-        base = EVENT_WEIGHTS.get(ev.event_type, 1)
-        weight = _contextual_weight(ev, base)
+    Shared by :func:`score_from_events` and the incremental
+    ``risk_engine`` so both apply exactly the same severity escalation.
+    A weight of 0 means the event only counts towards ``event_count``.
+    """
+    base = EVENT_WEIGHTS.get(ev.event_type, 1)
+    weight = _contextual_weight(ev, base)
+    severity = (ev.severity or "").lower()
+    is_critical = severity == "critical"
 
-        if (ev.severity or "").lower() == "critical":
-            weight = max(weight, 25)
-            has_critical = True
-        elif (ev.severity or "").lower() == "warn":
-            weight = max(weight, 5)
+    if is_critical:
+        weight = max(weight, 25)
+    elif severity == "warn":
+        weight = max(weight, 5)
 
-        if weight <= 0:
-            continue
+    key = ev.event_type.value if hasattr(ev.event_type, "value") else str(ev.event_type)
+    return key, weight, is_critical
 
-        key = ev.event_type.value if hasattr(ev.event_type, "value") else str(ev.event_type)
-        totals[key] = totals.get(key, 0) + weight
 
+def breakdown_from_totals(
+    totals: dict[str, int],
+    event_count: int,
+    has_critical: bool,
+) -> RiskBreakdown:
+    """Turn per-type weighted totals into the capped, banded breakdown.
+
+    ``totals`` must be ordered by first occurrence in the window so ties
+    in ``top_contributors`` resolve the same way for every caller.
+    """
     raw_score = sum(totals.values())
     if has_critical:
         raw_score = max(raw_score, CRITICAL_FLOOR)
@@ -174,11 +184,28 @@ def score_from_events(events: Iterable[BehaviorEvent]) -> RiskBreakdown:
         score=score,
         band=_band_for(score),
         top_contributors=top,
-        event_count=count,
+        event_count=event_count,
         has_critical_event=has_critical,
     )
 
 
+def score_from_events(events: Iterable[BehaviorEvent]) -> RiskBreakdown:
+    """Pure function so the unit tests don't need a DB."""
+    totals: dict[str, int] = {}
+    has_critical = False
+    count = 0
+
+    for ev in events:
+        count += 1
+        key, weight, is_critical = weigh_event(ev)
+        has_critical = has_critical or is_critical
+        if weight <= 0:
+            continue
+        totals[key] = totals.get(key, 0) + weight
+
+    return breakdown_from_totals(totals, count, has_critical)
+
+
 def compute_attempt_risk(
     db: Session,
     attempt_id: int,
@@ -193,6 +220,43 @@ def compute_attempt_risk(
             BehaviorEvent.attempt_id == attempt_id,
             BehaviorEvent.event_time >= cutoff,
         )
+        .order_by(BehaviorEvent.event_time.asc(), BehaviorEvent.id.asc())
         .all()
     )
     return score_from_events(rows)
+
+
+def compute_risk_for_attempts(
+    db: Session,
+    attempt_ids: Any,
+    *,
+    window_seconds: int = WINDOW_SECONDS,
+) -> dict[int, RiskBreakdown]:
+    """Set-based variant of :func:`compute_attempt_risk`.
+
+    ``attempt_ids`` is anything ``ColumnOperators.in_`` accepts - a list
+    of ids or a ``select(TestAttempt.id)`` subquery - so the live board
+    can score a whole cohort with a single round trip. Only the columns
+    the scorer reads are loaded. Attempts with no events in the window
+    are absent from the result; callers fall back to
+    ``score_from_events([])``.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=window_seconds)
+    rows = (
+        db.query(
+            BehaviorEvent.attempt_id,
+            BehaviorEvent.event_type,
+            BehaviorEvent.severity,
+            BehaviorEvent.payload,
+        )
+        .filter(
+            BehaviorEvent.attempt_id.in_(attempt_ids),
+            BehaviorEvent.event_time >= cutoff,
+        )
+        .order_by(BehaviorEvent.event_time.asc(), BehaviorEvent.id.asc())
+        .all()
+    )
+    by_attempt: dict[int, list] = defaultdict(list)
+    for row in rows:
+        by_attempt[row.attempt_id].append(row)
+    return {aid: score_from_events(evs) for aid, evs in by_attempt.items()}
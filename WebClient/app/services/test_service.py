@@ -4,6 +4,8 @@ from sqlalchemy.orm import Session
 from app.models.test import Test
 from app.models.user import User, UserRole
 from app.schemas.test import TestCreateRequest, TestUpdateRequest
+from app.services.live_service import invalidate_cache as invalidate_live_snapshot
+from app.services.lookup_cache import TestMeta, forget_test, get_test_meta
 
 
 def create_test(db: Session, payload: TestCreateRequest, creator: User) -> Test:
@@ -19,6 +21,9 @@ def create_test(db: Session, payload: TestCreateRequest, creator: User) -> Test:
     )
     db.add(test)
     db.commit()
+    forget_test(test.id)
+    # The board shows the test's name.
+    invalidate_live_snapshot(test.id)
     db.refresh(test)
     return test
 
@@ -30,7 +35,15 @@ def get_test_or_404(db: Session, test_id: int) -> Test:
     return test
 
 
-def ensure_manage_permission(test: Test, current_user: User) -> None:
+def get_test_meta_or_404(db: Session, test_id: int) -> TestMeta:
+    """Cached, read-only :func:`get_test_or_404` for hot read paths."""
+    meta = get_test_meta(db, test_id)
+    if meta is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Test not found")
+    return meta
+
+
+def ensure_manage_permission(test: Test | TestMeta, current_user: User) -> None:
     if current_user.role == UserRole.ADMIN:
         return
     if current_user.role == UserRole.TEACHER and test.created_by == current_user.id:
@@ -48,5 +61,8 @@ def update_test(db: Session, test: Test, payload: TestUpdateRequest) -> Test:
 
     db.add(test)
     db.commit()
+    forget_test(test.id)
+    # The board shows the test's name.
+    invalidate_live_snapshot(test.id)
     db.refresh(test)
     return test
@@ -0,0 +1,149 @@
+"""In-memory per-attempt warning high-water marks.
+
+Every ``events:batch`` answers with the attempt's latest warning id and
+its unacknowledged warnings, and every live-board build shows a warning
+count per attempt. Warnings are rare, so those reads almost always get
+the same answer as last time. This index keeps, per attempt, the latest
+warning id, the warning count and the unacknowledged count, so the hot
+paths only touch ``proctor_warnings`` when something changed:
+
+  * ``create_warning`` calls ``warning_waiters.notify_warning``, which
+    deletes the attempt's ``warnings`` cache key; the invalidation
+    listener below drops the attempt's marks (in every worker, with the
+    shared backend) and the next read reloads them.
+  * Acks (:func:`record_acknowledged`) lower the unacknowledged count in
+    place. Other workers keep a count that is too high, which only costs
+    them one query - :func:`observe_unacked` corrects it from what that
+    query saw.
+
+Marks are loaded lazily - after a restart, for attempts this process
+has not seen, or once older than ``settings.warning_index_max_age_seconds``
+- with one grouped query for all missing attempts. A load that overlaps a
+drop is not stored, so a warning committed mid-load is never hidden. The
+age bound covers drops this process never hears about (several workers on
+the memory cache backend, or a lost pub/sub message): a warning sent
+through another worker shows up here within that many seconds.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, replace
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.core import cache
+from app.core.config import settings
+from app.models.proctor_warning import ProctorWarning
+
+_NAMESPACE = "warnings"
+
+
+@dataclass(frozen=True)
+class WarningMarks:
+    latest_id: int | None
+    count: int
+    unacked: int
+
+
+_EMPTY = WarningMarks(latest_id=None, count=0, unacked=0)
+
+_marks: dict[int, WarningMarks] = {}
+# When each entry in _marks was loaded, on _clock.
+_loaded_at: dict[int, float] = {}
+# Bumped by every drop; a load that started before one isn't stored.
+_epoch = 0
+_lock = threading.Lock()
+# Clock for entry ages; tests swap it to step past the bound.
+_clock = time.monotonic
+
+
+def _load(db: Session, attempt_ids: list[int]) -> dict[int, WarningMarks]:
+    rows = (
+        db.query(
+            ProctorWarning.attempt_id,
+            func.max(ProctorWarning.id),
+            func.count(ProctorWarning.id),
+            func.sum(case((ProctorWarning.acknowledged_at.is_(None), 1), else_=0)),
+        )
+        .filter(ProctorWarning.attempt_id.in_(attempt_ids))
+        .group_by(ProctorWarning.attempt_id)
+        .all()
+    )
+    loaded = {aid: _EMPTY for aid in attempt_ids}
+    for attempt_id, latest_id, count, unacked in rows:
+        loaded[attempt_id] = WarningMarks(latest_id, int(count), int(unacked or 0))
+    return loaded
+
+
+def get_marks(db: Session, attempt_ids: Iterable[int]) -> dict[int, WarningMarks]:
+    """Marks for every attempt in ``attempt_ids``; one query for any not
+    yet indexed, none otherwise."""
+    ids = list(attempt_ids)
+    now = _clock()
+    fresh_after = now - settings.warning_index_max_age_seconds
+    with _lock:
+        result = {
+            aid: _marks[aid]
+            for aid in ids
+            if aid in _marks and _loaded_at[aid] > fresh_after
+        }
+        epoch = _epoch
+    missing = [aid for aid in ids if aid not in result]
+    if missing:
+        loaded = _load(db, missing)
+        with _lock:
+            if _epoch == epoch:
+                _marks.update(loaded)
+                _loaded_at.update(dict.fromkeys(loaded, now))
+        result.update(loaded)
+    return result
+
+
+def marks_for(db: Session, attempt_id: int) -> WarningMarks:
+    return get_marks(db, [attempt_id])[attempt_id]
+
+
+def record_acknowledged(attempt_id: int, count: int = 1) -> None:
+    """``count`` of the attempt's warnings were just acknowledged."""
+    with _lock:
+        marks = _marks.get(attempt_id)
+        if marks is not None:
+            _marks[attempt_id] = replace(marks, unacked=max(marks.unacked - count, 0))
+
+
+def observe_unacked(attempt_id: int, unacked: int) -> None:
+    """A query just counted ``unacked`` unacknowledged warnings."""
+    with _lock:
+        marks = _marks.get(attempt_id)
+        if marks is not None and marks.unacked != unacked:
+            _marks[attempt_id] = replace(marks, unacked=unacked)
+
+
+def forget_attempt(attempt_id: int) -> None:
+    global _epoch
+    with _lock:
+        _marks.pop(attempt_id, None)
+        _loaded_at.pop(attempt_id, None)
+        _epoch += 1
+
+
+def reset() -> None:
+    """Test hook - forget every mark, as if the process had restarted."""
+    global _epoch
+    with _lock:
+        _marks.clear()
+        _loaded_at.clear()
+        _epoch += 1
+
+
+def _on_cache_invalidated(key: str) -> None:
+    prefix = cache.get_cache().key(_NAMESPACE, "")
+    if key.startswith(prefix) and key[len(prefix):].isdigit():
+        forget_attempt(int(key[len(prefix):]))
+
+
+cache.add_invalidation_listener(_on_cache_invalidated)
@@ -0,0 +1,388 @@
+"""Warning delivery latency histograms.
+
+``ProctorWarning`` stamps ``created_at`` when a proctor sends a warning,
+``delivered_at`` when the kiosk put the banner up (its clock, reported
+with the ack) and ``acknowledged_at`` when the ack reached us. Each ack
+feeds two stages into a fixed-bucket histogram for the warning's test:
+
+  * ``deliver``: created -> delivered, i.e. how long the long-poll or
+    piggyback path took to get the banner on screen;
+  * ``ack``: delivered -> acknowledged, i.e. how long the ack took to
+    come back.
+
+Global figures are the sum over tests. A kiosk clock that is off can
+produce negative spans; those count as zero.
+
+Observations land in memory as pending deltas, so the ack paths never
+wait on them. :class:`LatencyRollup` adds the deltas into
+``warning_latency_rollups`` every ``warning_latency_rollup_seconds``
+(one upsert, one row per test, stage and bucket) and re-reads the rows
+other workers changed. A restarted worker therefore starts from what was
+persisted, and every worker converges on the fleet-wide totals within
+one period. A killed process loses at most one period of observations;
+shutdown flushes.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.models.test import Test
+from app.models.warning_latency import WarningLatencyRollup
+from app.schemas.warning import WarningLatencyBucket, WarningLatencyStats, WarningLatencySummary
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("deliver", "ack")
+
+# Upper bounds of the finite buckets, in seconds; an overflow bucket
+# follows. Rows are keyed by bound, so bounds may be added later - rows
+# for a bound that is gone fold into the next one up.
+BOUNDS: tuple[float, ...] = (
+    0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 300, 600,
+)
+_BOUNDS_MS = tuple(round(bound * 1000) for bound in BOUNDS)
+_OVERFLOW_KEY = -1
+
+# Rows other workers touched are re-read with this much slack for clock
+# differences between them.
+_RELOAD_SLACK = timedelta(minutes=5)
+
+
+@dataclass
+class LatencyHistogram:
+    counts: list[int] = field(default_factory=lambda: [0] * (len(BOUNDS) + 1))
+    sums_ms: list[int] = field(default_factory=lambda: [0] * (len(BOUNDS) + 1))
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    @property
+    def sum_seconds(self) -> float:
+        return sum(self.sums_ms) / 1000
+
+    def observe(self, seconds: float) -> None:
+        ms = max(round(seconds * 1000), 0)
+        index = bisect.bisect_left(_BOUNDS_MS, ms)
+        self.counts[index] += 1
+        self.sums_ms[index] += ms
+
+    def merge(self, other: LatencyHistogram) -> None:
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+            self.sums_ms[index] += other.sums_ms[index]
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate, interpolating linearly inside the bucket (as
+        Prometheus' ``histogram_quantile`` does). None when empty."""
+        total = self.count
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(BOUNDS):
+                    # Overflow: the last finite bound is all we know.
+                    return float(BOUNDS[-1])
+                lower = BOUNDS[index - 1] if index else 0.0
+                return lower + (BOUNDS[index] - lower) * (rank - seen) / count
+            seen += count
+        return float(BOUNDS[-1])
+
+
+_Key = tuple[int, str]  # (test_id, stage)
+
+# Totals as last read from the roll-up table.
+_persisted: dict[_Key, LatencyHistogram] = {}
+# Taken by a roll-up that hasn't finished; still counted by reads.
+_in_flight: dict[_Key, LatencyHistogram] = {}
+# Observed since the last roll-up started.
+_pending: dict[_Key, LatencyHistogram] = {}
+# Last observation or roll-up row per test, for the metrics exposition.
+_touched: dict[int, datetime] = {}
+_loaded_at: datetime | None = None
+_lock = threading.Lock()
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _span(start: datetime, end: datetime) -> float:
+    return (_as_utc(end) - _as_utc(start)).total_seconds()
+
+
+def observe(
+    test_id: int,
+    created_at: datetime,
+    delivered_at: datetime,
+    acknowledged_at: datetime,
+) -> None:
+    """Record one acknowledged warning."""
+    deliver = _span(created_at, delivered_at)
+    ack = _span(delivered_at, acknowledged_at)
+    with _lock:
+        for stage, seconds in (("deliver", deliver), ("ack", ack)):
+            _pending.setdefault((test_id, stage), LatencyHistogram()).observe(seconds)
+        _touched[test_id] = datetime.now(timezone.utc)
+
+
+def histograms(test_id: int | None = None) -> dict[str, LatencyHistogram]:
+    """Current histogram per stage for ``test_id``, or summed over every
+    test when it is None."""
+    result = {stage: LatencyHistogram() for stage in STAGES}
+    with _lock:
+        for source in (_persisted, _in_flight, _pending):
+            for (key_test_id, stage), histogram in source.items():
+                if test_id is None or key_test_id == test_id:
+                    result[stage].merge(histogram)
+    return result
+
+
+def _stats(histogram: LatencyHistogram) -> WarningLatencyStats:
+    count = histogram.count
+    return WarningLatencyStats(
+        count=count,
+        mean_seconds=histogram.sum_seconds / count if count else None,
+        p50_seconds=histogram.quantile(0.5),
+        p90_seconds=histogram.quantile(0.9),
+        p99_seconds=histogram.quantile(0.99),
+        buckets=[
+            WarningLatencyBucket(le_seconds=BOUNDS[index] if index < len(BOUNDS) else None, count=n)
+            for index, n in enumerate(histogram.counts)
+        ],
+    )
+
+
+def summary(test_id: int | None = None) -> WarningLatencySummary:
+    stages = histograms(test_id)
+    return WarningLatencySummary(
+        test_id=test_id, deliver=_stats(stages["deliver"]), ack=_stats(stages["ack"])
+    )
+
+
+def recent_tests(since: datetime) -> list[int]:
+    """Tests with an observation (here or, as of the last roll-up, in
+    another worker) since ``since``."""
+    with _lock:
+        return sorted(test_id for test_id, at in _touched.items() if at >= since)
+
+
+# ---------------------------------------------------------------------------
+# Roll-ups
+# ---------------------------------------------------------------------------
+def _upsert(conn: Connection):
+    table = WarningLatencyRollup.__table__
+    insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.test_id, table.c.stage, table.c.le_ms],
+        set_={
+            "count": table.c.count + stmt.excluded.count,
+            "sum_ms": table.c.sum_ms + stmt.excluded.sum_ms,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+def _write(conn: Connection, taken: dict[_Key, LatencyHistogram], now: datetime) -> None:
+    # A test deleted since its warnings were acked would fail the FK.
+    test_ids = {test_id for test_id, _ in taken}
+    existing = set(conn.scalars(select(Test.id).where(Test.id.in_(test_ids))))
+    rows = [
+        {
+            "test_id": test_id,
+            "stage": stage,
+            "le_ms": _BOUNDS_MS[index] if index < len(BOUNDS) else _OVERFLOW_KEY,
+            "count": count,
+            "sum_ms": histogram.sums_ms[index],
+            "updated_at": now,
+        }
+        for (test_id, stage), histogram in taken.items()
+        if test_id in existing
+        for index, count in enumerate(histogram.counts)
+        if count
+    ]
+    if rows:
+        conn.execute(_upsert(conn), rows)
+
+
+def _read(conn: Connection, since: datetime | None) -> list:
+    """Every row, or every row of the tests with a row changed since
+    ``since``."""
+    table = WarningLatencyRollup.__table__
+    query = select(table)
+    if since is not None:
+        changed = select(table.c.test_id).where(table.c.updated_at >= since)
+        query = query.where(table.c.test_id.in_(changed))
+    return conn.execute(query).all()
+
+
+def _bucket_index(le_ms: int) -> int:
+    if le_ms == _OVERFLOW_KEY:
+        return len(BOUNDS)
+    return bisect.bisect_left(_BOUNDS_MS, le_ms)
+
+
+_flush_lock = threading.Lock()
+
+
+def flush(engine: Engine, now: datetime | None = None) -> int:
+    """Add pending observations to the roll-up table and refresh the
+    totals from it. Returns the number of acks written."""
+    global _loaded_at
+    now = now or datetime.now(timezone.utc)
+    with _flush_lock:
+        with _lock:
+            for key, histogram in _pending.items():
+                _in_flight.setdefault(key, LatencyHistogram()).merge(histogram)
+            _pending.clear()
+            taken = dict(_in_flight)
+            since = None if _loaded_at is None else _loaded_at - _RELOAD_SLACK
+        # On failure the deltas stay in _in_flight for the next roll-up.
+        with engine.begin() as conn:
+            if taken:
+                _write(conn, taken, now)
+            rows = _read(conn, since)
+
+        loaded: dict[_Key, LatencyHistogram] = {}
+        for row in rows:
+            histogram = loaded.setdefault((row.test_id, row.stage), LatencyHistogram())
+            index = _bucket_index(row.le_ms)
+            histogram.counts[index] += row.count
+            histogram.sums_ms[index] += row.sum_ms
+        with _lock:
+            if since is None:
+                _persisted.clear()
+            else:
+                reloaded = {test_id for test_id, _ in loaded}
+                for key in [key for key in _persisted if key[0] in reloaded]:
+                    del _persisted[key]
+            _persisted.update(loaded)
+            for row in rows:
+                at = _as_utc(row.updated_at)
+                if row.test_id not in _touched or _touched[row.test_id] < at:
+                    _touched[row.test_id] = at
+            _in_flight.clear()
+            _loaded_at = now
+    return sum(histogram.count for (_, stage), histogram in taken.items() if stage == "deliver")
+
+
+class LatencyRollup:
+    def __init__(self, interval_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._engine: Engine | None = None
+
+    def start(self, engine: Engine) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._engine = engine
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(engine,), name="warning-latency-rollup", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._engine is not None:
+            self._flush(self._engine)
+
+    def _flush(self, engine: Engine) -> None:
+        started = time.perf_counter()
+        try:
+            written = flush(engine)
+        except Exception:
+            logger.exception("Warning latency roll-up failed")
+            return
+        if written:
+            logger.debug(
+                "Rolled up %d warning ack(s) in %.0f ms",
+                written,
+                (time.perf_counter() - started) * 1000,
+            )
+
+    def _run(self, engine: Engine) -> None:
+        # Load the persisted totals straight away rather than one period in.
+        self._flush(engine)
+        while not self._stop.wait(self.interval_seconds):
+            self._flush(engine)
+
+
+rollup = LatencyRollup(settings.warning_latency_rollup_seconds)
+
+
+# ---------------------------------------------------------------------------
+# Prometheus exposition
+# ---------------------------------------------------------------------------
+# Per-test series are only exposed for tests with acks this recent, so a
+# year of finished exams doesn't end up in every scrape.
+METRICS_TEST_WINDOW = timedelta(hours=24)
+
+
+def _format_bound(bound: float) -> str:
+    return f"{bound:g}"
+
+
+def _histogram_lines(name: str, labels: str, histogram: LatencyHistogram) -> list[str]:
+    lines = []
+    cumulative = 0
+    for index, count in enumerate(histogram.counts):
+        cumulative += count
+        le = _format_bound(BOUNDS[index]) if index < len(BOUNDS) else "+Inf"
+        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum_seconds:g}")
+    lines.append(f"{name}_count{{{labels}}} {cumulative}")
+    return lines
+
+
+def render_prometheus(now: datetime | None = None) -> str:
+    """Text exposition format: the global histograms plus one per test
+    with acks in the last :data:`METRICS_TEST_WINDOW`."""
+    now = now or datetime.now(timezone.utc)
+    name = "omniproctor_warning_latency_seconds"
+    lines = [
+        f"# HELP {name} Proctor warning latency: deliver = sent to on screen, "
+        "ack = on screen to acknowledged.",
+        f"# TYPE {name} histogram",
+    ]
+    for stage, histogram in histograms().items():
+        lines += _histogram_lines(name, f'stage="{stage}"', histogram)
+
+    per_test = "omniproctor_test_warning_latency_seconds"
+    lines += [
+        f"# HELP {per_test} Proctor warning latency per test (recently active tests only).",
+        f"# TYPE {per_test} histogram",
+    ]
+    for test_id in recent_tests(now - METRICS_TEST_WINDOW):
+        for stage, histogram in histograms(test_id).items():
+            lines += _histogram_lines(per_test, f'test_id="{test_id}",stage="{stage}"', histogram)
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Test hook - drop every histogram, as if the process had restarted
+    with an empty roll-up table."""
+    global _loaded_at
+    with _lock:
+        _persisted.clear()
+        _in_flight.clear()
+        _pending.clear()
+        _touched.clear()
+        _loaded_at = None
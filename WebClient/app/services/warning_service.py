@@ -2,14 +2,41 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable
 from datetime import datetime, timezone
 
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.config import settings
 
 from app.models.proctor_warning import ProctorWarning
-from app.models.test_attempt import TestAttempt
+from app.models.test_attempt import AttemptStatus, TestAttempt
 from app.models.user import User
+from app.schemas.warning import ProctorWarningBatchAck, ProctorWarningResponse
+from app.services.lookup_cache import AttemptRef
+from app.services import risk_engine, warning_index, warning_latency
+from app.services.live_stream import notify_test_changed
+from app.services.risk_scorer import compute_risk_for_attempts
+from app.services.warning_waiters import notify_warning, notify_warnings
+
+
+def warning_response(warning: ProctorWarning) -> ProctorWarningResponse:
+    sender_name = None
+    if warning.sender is not None:
+        sender_name = warning.sender.full_name or warning.sender.email
+    return ProctorWarningResponse(
+        id=warning.id,
+        attempt_id=warning.attempt_id,
+        sender_id=warning.sender_id,
+        sender_name=sender_name,
+        message=warning.message,
+        severity=warning.severity,
+        created_at=warning.created_at,
+        delivered_at=warning.delivered_at,
+        acknowledged_at=warning.acknowledged_at,
+    )
 
 
 def create_warning(
@@ -27,10 +54,71 @@ def create_warning(
     )
     db.add(warning)
     db.commit()
+    notify_test_changed(attempt.test_id)
     db.refresh(warning)
+    notify_warning(attempt.id)
     return warning
 
 
+def broadcast_warning(
+    db: Session,
+    test_id: int,
+    sender: User,
+    message: str,
+    severity: str,
+    *,
+    statuses: Iterable[AttemptStatus] = (AttemptStatus.IN_PROGRESS,),
+    bands: Iterable[str] | None = None,
+    student_ids: Iterable[int] | None = None,
+) -> list[int]:
+    """Send one warning to every attempt at ``test_id`` that matches the
+    filters; returns the attempt ids warned.
+
+    The rows go in as one multi-row INSERT and the kiosks parked on them
+    are woken with one cache round trip, so warning a hall costs the same
+    handful of statements as warning one candidate.
+    """
+    query = db.query(TestAttempt.id).filter(
+        TestAttempt.test_id == test_id, TestAttempt.status.in_(list(statuses))
+    )
+    if student_ids is not None:
+        query = query.filter(TestAttempt.student_id.in_(list(student_ids)))
+    attempt_ids = [row.id for row in query.order_by(TestAttempt.id).all()]
+
+    if bands is not None and attempt_ids:
+        wanted = set(bands)
+        if settings.live_risk_engine:
+            risk_by_id = risk_engine.get_risk_for_attempts(db, attempt_ids)
+        else:
+            risk_by_id = compute_risk_for_attempts(db, attempt_ids)
+        # Attempts with no events in the window score zero, i.e. "ok".
+        attempt_ids = [
+            aid
+            for aid in attempt_ids
+            if (risk_by_id[aid].band if aid in risk_by_id else "ok") in wanted
+        ]
+    if not attempt_ids:
+        return []
+
+    message = message.strip()
+    db.execute(
+        insert(ProctorWarning),
+        [
+            {
+                "attempt_id": attempt_id,
+                "sender_id": sender.id,
+                "message": message,
+                "severity": severity,
+            }
+            for attempt_id in attempt_ids
+        ],
+    )
+    db.commit()
+    notify_test_changed(test_id)
+    notify_warnings(attempt_ids)
+    return attempt_ids
+
+
 def list_warnings_for_attempt(
     db: Session,
     attempt_id: int,
@@ -44,13 +132,7 @@ def list_warnings_for_attempt(
 
 
 def latest_warning_id_for_attempt(db: Session, attempt_id: int) -> int | None:
-    row = (
-        db.query(ProctorWarning.id)
-        .filter(ProctorWarning.attempt_id == attempt_id)
-        .order_by(ProctorWarning.id.desc())
-        .first()
-    )
-    return row[0] if row else None
+    return warning_index.marks_for(db, attempt_id).latest_id
 
 
 def get_warning_or_404(db: Session, warning_id: int) -> ProctorWarning:
@@ -66,17 +148,74 @@ def acknowledge_warning(
     delivered_at: datetime | None = None,
 ) -> ProctorWarning:
     now = datetime.now(timezone.utc)
+    first_ack = warning.acknowledged_at is None
     if warning.delivered_at is None:
         warning.delivered_at = delivered_at or now
     warning.acknowledged_at = now
+    created_at, delivered = warning.created_at, warning.delivered_at
     db.commit()
     db.refresh(warning)
+    if first_ack:
+        warning_index.record_acknowledged(warning.attempt_id)
+        warning_latency.observe(warning.attempt.test_id, created_at, delivered, now)
+    notify_test_changed(warning.attempt.test_id)
     return warning
 
 
 def warning_count_for_attempt(db: Session, attempt_id: int) -> int:
-    return (
+    return warning_index.marks_for(db, attempt_id).count
+
+
+def acknowledge_warnings(
+    db: Session,
+    attempt: TestAttempt | AttemptRef,
+    acks: list[ProctorWarningBatchAck],
+) -> None:
+    """Batch form of :func:`acknowledge_warning` for acks riding on an
+    ``events:batch`` request. Acks for another attempt's warnings, or for
+    ones already acknowledged, are ignored; one commit for all of them."""
+    delivered = {ack.warning_id: ack.delivered_at for ack in acks}
+    if not delivered:
+        return
+    pending = (
+        db.query(ProctorWarning)
+        .filter(
+            ProctorWarning.id.in_(list(delivered)),
+            ProctorWarning.attempt_id == attempt.id,
+            ProctorWarning.acknowledged_at.is_(None),
+        )
+        .all()
+    )
+    if not pending:
+        return
+    now = datetime.now(timezone.utc)
+    spans = []
+    for warning in pending:
+        if warning.delivered_at is None:
+            warning.delivered_at = delivered[warning.id] or now
+        warning.acknowledged_at = now
+        spans.append((warning.created_at, warning.delivered_at))
+    db.commit()
+    warning_index.record_acknowledged(attempt.id, len(pending))
+    for created_at, delivered_at in spans:
+        warning_latency.observe(attempt.test_id, created_at, delivered_at, now)
+    notify_test_changed(attempt.test_id)
+
+
+def unacknowledged_warnings(db: Session, attempt_id: int) -> list[ProctorWarning]:
+    """The attempt's unacknowledged warnings, oldest first. Skips the
+    query when the warning index says there are none."""
+    if not warning_index.marks_for(db, attempt_id).unacked:
+        return []
+    rows = (
         db.query(ProctorWarning)
-        .filter(ProctorWarning.attempt_id == attempt_id)
-        .count()
+        .options(joinedload(ProctorWarning.sender))
+        .filter(
+            ProctorWarning.attempt_id == attempt_id,
+            ProctorWarning.acknowledged_at.is_(None),
+        )
+        .order_by(ProctorWarning.id.asc())
+        .all()
     )
+    warning_index.observe_unacked(attempt_id, len(rows))
+    return rows
@@ -0,0 +1,110 @@
+"""Wake-ups for kiosks long-polling ``GET /attempts/{id}/warnings?wait=``.
+
+A kiosk asking for warnings almost always gets an empty list. With
+``wait`` the endpoint instead parks the request on a per-attempt
+:class:`Waiter` until :func:`notify_warning` fires for that attempt or the
+timeout elapses, so an idle kiosk costs one request per ``wait`` seconds
+rather than one every few.
+
+Notifications go through the cache backend's invalidation channel
+(deleting a per-attempt ``warnings`` key), so with the shared Redis
+backend a warning sent on one worker wakes a kiosk parked on another.
+With the memory backend wake-ups are per process; a kiosk parked on a
+different worker than the sender sees the warning when its wait times
+out.
+
+Waiters live on the event loop of the request that created them;
+:func:`notify_warning` is safe to call from the sync request threadpool
+and hops onto that loop with ``call_soon_threadsafe``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+
+from app.core import cache
+
+_NAMESPACE = "warnings"
+
+
+class Waiter:
+    def __init__(self, attempt_id: int) -> None:
+        self.attempt_id = attempt_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def wake(self) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            # Loop already closed (shutdown / test client torn down).
+            pass
+
+    async def wait(self, timeout: float) -> bool:
+        """True if woken, False if ``timeout`` elapsed first."""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+_waiters: dict[int, set[Waiter]] = {}
+_lock = threading.Lock()
+
+
+@contextmanager
+def waiting(attempt_id: int) -> Iterator[Waiter]:
+    """Register a waiter for ``attempt_id`` for the duration of the block.
+
+    Enter it *before* reading the warnings, so one sent between the read
+    and the wait still wakes it.
+    """
+    waiter = Waiter(attempt_id)
+    with _lock:
+        _waiters.setdefault(attempt_id, set()).add(waiter)
+    try:
+        yield waiter
+    finally:
+        with _lock:
+            parked = _waiters.get(attempt_id)
+            if parked is not None:
+                parked.discard(waiter)
+                if not parked:
+                    del _waiters[attempt_id]
+
+
+def parked_count() -> int:
+    with _lock:
+        return sum(len(parked) for parked in _waiters.values())
+
+
+def _wake(attempt_id: int) -> None:
+    with _lock:
+        parked = list(_waiters.get(attempt_id, ()))
+    for waiter in parked:
+        waiter.wake()
+
+
+def notify_warning(attempt_id: int) -> None:
+    """Wake every request parked on ``attempt_id``, in every worker."""
+    backend = cache.get_cache()
+    backend.delete(backend.key(_NAMESPACE, attempt_id))
+
+
+def notify_warnings(attempt_ids: Iterable[int]) -> None:
+    """:func:`notify_warning` for many attempts in one cache round trip."""
+    backend = cache.get_cache()
+    backend.delete_many(backend.key(_NAMESPACE, attempt_id) for attempt_id in attempt_ids)
+
+
+def _on_cache_invalidated(key: str) -> None:
+    prefix = cache.get_cache().key(_NAMESPACE, "")
+    if key.startswith(prefix) and key[len(prefix):].isdigit():
+        _wake(int(key[len(prefix):]))
+
+
+cache.add_invalidation_listener(_on_cache_invalidated)
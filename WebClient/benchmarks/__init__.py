@@ -0,0 +1,9 @@
+"""Ad-hoc performance benchmarks. Not collected by pytest.
+
+Run from the ``WebClient`` directory, e.g.::
+
+    python -m benchmarks.live_snapshot_queries
+
+Each script defaults to a throw-away SQLite file; point ``BENCH_DATABASE_URL``
+at a local Postgres to measure the production dialect.
+"""
@@ -0,0 +1,113 @@
+"""Shared helpers for the benchmark scripts."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Settings are read at import time; make sure the app never tries to reach
+# the docker-compose Postgres host when a benchmark is run bare.
+_TMP_DB = Path(tempfile.gettempdir()) / f"omniproctor_bench_{os.getpid()}.db"
+os.environ.setdefault("DATABASE_URL", f"sqlite+pysqlite:///{_TMP_DB}")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+
+from app.db.base import Base  # noqa: E402
+from app.models.assignment import TestAssignment  # noqa: E402
+from app.models.test import Test  # noqa: E402
+from app.models.test_attempt import AttemptStatus, TestAttempt  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+
+
+def make_engine():
+    url = os.environ.get("BENCH_DATABASE_URL") or f"sqlite+pysqlite:///{_TMP_DB}"
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def make_session(engine) -> Session:
+    return sessionmaker(bind=engine, autoflush=False)()
+
+
+@contextmanager
+def count_queries(engine):
+    statements: list[str] = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+
+def seed_test(db: Session, *, name: str = "Bench Test") -> Test:
+    now = datetime.now(timezone.utc)
+    teacher = User(
+        full_name="Bench Teacher",
+        email=f"teacher-{name.lower().replace(' ', '-')}@bench.local",
+        hashed_password="x",
+        role=UserRole.TEACHER,
+        is_active=True,
+    )
+    db.add(teacher)
+    db.flush()
+    test = Test(
+        name=name,
+        external_link="https://example.com/bench",
+        is_active=True,
+        start_time=now - timedelta(hours=1),
+        end_time=now + timedelta(hours=2),
+        created_by=teacher.id,
+    )
+    db.add(test)
+    db.commit()
+    return test
+
+
+def seed_attempts(db: Session, test: Test, count: int, *, offset: int = 0) -> list[TestAttempt]:
+    """``count`` students with one IN_PROGRESS attempt each on ``test``."""
+    students = [
+        User(
+            full_name=f"Bench Student {offset + i}",
+            email=f"student-{test.id}-{offset + i}@bench.local",
+            hashed_password="x",
+            role=UserRole.STUDENT,
+            is_active=True,
+        )
+        for i in range(count)
+    ]
+    db.add_all(students)
+    db.flush()
+    assignments = [
+        TestAssignment(test_id=test.id, student_id=s.id, added_by=test.created_by)
+        for s in students
+    ]
+    db.add_all(assignments)
+    db.flush()
+    attempts = [
+        TestAttempt(
+            test_id=test.id,
+            student_id=a.student_id,
+            assignment_id=a.id,
+            status=AttemptStatus.IN_PROGRESS,
+        )
+        for a in assignments
+    ]
+    db.add_all(attempts)
+    db.commit()
+    return attempts
+
+
+def cleanup() -> None:
+    if _TMP_DB.exists():
+        _TMP_DB.unlink()
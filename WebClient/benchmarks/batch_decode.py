@@ -0,0 +1,113 @@
+"""Parse + validate cost of an ``events:batch`` body: JSON vs. msgpack.
+
+Builds the same events in both wire formats (the JSON shape the kiosk
+has always sent, and the compact arrays from ``event_codec``) and times
+the server side of each - body parse plus per-event validation, exactly
+as ``ingest_behavior_events_batch`` does it - per 1,000 events. Encode
+time on the kiosk side is printed alongside.
+
+    python -m benchmarks.batch_decode [events] [rounds]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import benchmarks._common  # noqa: F401  (sets a throwaway DATABASE_URL)
+
+import msgpack
+
+from app.schemas.behavior import BehaviorEventBatchRequest
+from app.services.event_codec import (
+    EVENT_TYPE_CODES,
+    SEVERITY_CODES,
+    decode_json_events,
+    decode_msgpack_events,
+    unpack_msgpack_batch,
+)
+
+_CODE_FOR = {event_type.value: code for code, event_type in EVENT_TYPE_CODES.items()}
+
+
+def _events(count: int) -> list[dict]:
+    start = datetime(2026, 1, 1, 9, 0, tzinfo=timezone.utc)
+    out = []
+    for i in range(count):
+        when = start + timedelta(milliseconds=250 * i)
+        if i % 5:
+            keys = [
+                {"key": "e", "scan_code": 18, "modifiers": [], "ts": when.timestamp(), "proc": "msedgewebview2.exe"}
+                for _ in range(10)
+            ]
+            out.append({"event_type": "KEYSTROKE", "severity": "info", "event_time": when,
+                        "seq": i + 1, "payload": {"keys": keys, "burst_size": 10}})
+        else:
+            out.append({"event_type": "FOCUS_LOSS", "severity": "warn", "event_time": when,
+                        "seq": i + 1, "payload": {"hwnd": 4242, "proc": "explorer.exe"}})
+    return out
+
+
+def _encode_json(events: list[dict]) -> bytes:
+    return json.dumps(
+        {"events": [{**ev, "event_time": ev["event_time"].isoformat()} for ev in events]}
+    ).encode("utf-8")
+
+
+def _encode_msgpack(events: list[dict]) -> bytes:
+    return msgpack.packb(
+        {
+            "v": 1,
+            "events": [
+                [
+                    _CODE_FOR[ev["event_type"]],
+                    SEVERITY_CODES.index(ev["severity"]),
+                    int(ev["event_time"].timestamp() * 1000),
+                    ev["seq"],
+                    ev["payload"],
+                ]
+                for ev in events
+            ],
+        }
+    )
+
+
+def _decode_json(body: bytes) -> int:
+    raw = BehaviorEventBatchRequest.model_validate_json(body).events
+    return len(decode_json_events(raw, attempt_id=1).valid)
+
+
+def _decode_msgpack(body: bytes) -> int:
+    return len(decode_msgpack_events(unpack_msgpack_batch(body)[0], attempt_id=1).valid)
+
+
+def _per_thousand(fn, arg, count: int, rounds: int) -> float:
+    fn(arg)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn(arg)
+    return (time.perf_counter() - started) / rounds / count * 1000 * 1000
+
+
+def main(count: int, rounds: int) -> None:
+    events = _events(count)
+    print(f"{count} events x {rounds} rounds; ms per 1,000 events")
+    print(f"{'format':>8} {'bytes':>9} {'encode':>8} {'decode':>8}")
+    for name, encode, decode in (
+        ("json", _encode_json, _decode_json),
+        ("msgpack", _encode_msgpack, _decode_msgpack),
+    ):
+        body = encode(events)
+        assert decode(body) == count
+        print(
+            f"{name:>8} {len(body):>9,} "
+            f"{_per_thousand(encode, events, count, rounds):>8.2f} "
+            f"{_per_thousand(decode, body, count, rounds):>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [1000, 20][len(args):]))
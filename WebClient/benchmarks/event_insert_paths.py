@@ -0,0 +1,95 @@
+"""ORM vs. Core vs. COPY for one kiosk-sized event batch.
+
+Inserts ``BATCHES`` batches of ``MAX_BATCH_SIZE`` (200) events through
+each path, one commit per batch as the endpoint does, and prints the
+mean milliseconds per batch. COPY needs Postgres + psycopg, so point
+``BENCH_DATABASE_URL`` at one to get that row.
+
+    python -m benchmarks.event_insert_paths [batches]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from unittest import mock
+
+from benchmarks._common import cleanup, make_engine, make_session, seed_attempts, seed_test
+
+from app.models.behavior_event import BehaviorEvent
+from app.schemas.behavior import MAX_BATCH_SIZE, BehaviorEventCreateRequest
+from app.services import event_writer
+from app.services.event_writer import event_rows, insert_event_rows
+
+
+def _batch() -> list[BehaviorEventCreateRequest]:
+    kinds = ("KEYSTROKE", "FOCUS_LOSS", "CLIPBOARD_COPY", "FOCUS_REGAIN")
+    return [
+        BehaviorEventCreateRequest(
+            event_type=kinds[i % len(kinds)],
+            severity="info",
+            payload={"burst_size": 3, "proc": "chrome.exe"},
+        )
+        for i in range(MAX_BATCH_SIZE)
+    ]
+
+
+def _orm(db, attempt, events) -> None:
+    db.add_all(
+        BehaviorEvent(
+            attempt_id=attempt.id,
+            test_id=attempt.test_id,
+            student_id=attempt.student_id,
+            event_type=ev.event_type,
+            payload=ev.payload,
+            severity=ev.severity,
+            event_time=ev.event_time,
+        )
+        for ev in events
+    )
+    db.flush()
+    db.commit()
+
+
+def _core(db, attempt, events) -> None:
+    with mock.patch.object(event_writer, "_use_copy", return_value=False):
+        insert_event_rows(db, event_rows(attempt, events))
+    db.commit()
+
+
+def _copy(db, attempt, events) -> None:
+    event_writer._copy_rows(db, event_rows(attempt, events))
+    db.commit()
+
+
+def main(batches: int) -> None:
+    engine = make_engine()
+    db = make_session(engine)
+    test = seed_test(db)
+    (attempt,) = seed_attempts(db, test, 1)
+    events = _batch()
+
+    paths = [("orm", _orm), ("core", _core)]
+    if engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg":
+        paths.append(("copy", _copy))
+
+    print(f"{batches} batches x {MAX_BATCH_SIZE} events ({engine.dialect.name})")
+    print(f"{'path':>6} {'ms/batch':>9} {'events/s':>10}")
+    for name, insert_batch in paths:
+        insert_batch(db, attempt, events)  # warm-up
+        started = time.perf_counter()
+        for _ in range(batches):
+            insert_batch(db, attempt, events)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{name:>6} {elapsed / batches * 1000:>9.2f} "
+            f"{batches * MAX_BATCH_SIZE / elapsed:>10.0f}"
+        )
+
+    db.close()
+    engine.dispose()
+    cleanup()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,99 @@
+"""Telemetry ingest throughput: per-request commit vs. write-behind queue.
+
+Simulates ``KIOSKS`` kiosks each posting ``BATCHES`` batches of
+``BATCH_SIZE`` events from a thread pool and prints events/s plus the
+number of commits for both paths.
+
+    python -m benchmarks.ingest_throughput [kiosks] [batches] [batch_size]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks._common import cleanup, make_engine, seed_attempts, seed_test
+
+from app.schemas.behavior import BehaviorEventCreateRequest
+from app.services.behavior_service import create_behavior_events_bulk
+from app.services.event_writer import event_rows
+from app.services.ingest_queue import IngestQueue
+
+
+def _batch(size: int) -> list[BehaviorEventCreateRequest]:
+    return [
+        BehaviorEventCreateRequest(event_type="KEYSTROKE", severity="info", payload={"burst_size": 3})
+        for _ in range(size)
+    ]
+
+
+def _count_commits(engine) -> list[int]:
+    commits = [0]
+
+    def _on_commit(conn):
+        commits[0] += 1
+
+    event.listen(engine, "commit", _on_commit)
+    return commits
+
+
+def _run_sync(factory, attempts, batches: int, batch_size: int) -> None:
+    def kiosk(attempt_id: int) -> None:
+        db = factory()
+        try:
+            attempt = db.get(type(attempts[0]), attempt_id)
+            for _ in range(batches):
+                create_behavior_events_bulk(db, attempt, _batch(batch_size))
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(kiosk, [a.id for a in attempts]))
+
+
+def _run_queue(factory, attempts, batches: int, batch_size: int) -> None:
+    queue = IngestQueue(
+        max_events=1_000_000,
+        max_batch_rows=2_000,
+        max_delay_seconds=0.2,
+        session_factory=factory,
+    )
+
+    def kiosk(attempt) -> None:
+        for _ in range(batches):
+            queue.enqueue(event_rows(attempt, _batch(batch_size)))
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(kiosk, attempts))
+    queue.drain(timeout=None)
+
+
+def main(kiosks: int, batches: int, batch_size: int) -> None:
+    engine = make_engine()
+    factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    db = factory()
+    test = seed_test(db)
+    attempts = seed_attempts(db, test, kiosks)
+    db.close()
+
+    total = kiosks * batches * batch_size
+    print(f"{kiosks} kiosks x {batches} batches x {batch_size} events = {total} events")
+    print(f"{'path':>12} {'events/s':>10} {'commits':>8}")
+    for name, runner in (("sync", _run_sync), ("write-behind", _run_queue)):
+        commits = _count_commits(engine)
+        started = time.perf_counter()
+        runner(factory, attempts, batches, batch_size)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>12} {total / elapsed:>10.0f} {commits[0]:>8}")
+
+    engine.dispose()
+    cleanup()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args + [100, 5, 20][len(args):]))
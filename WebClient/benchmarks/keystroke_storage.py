@@ -0,0 +1,83 @@
+"""KEYSTROKE storage: JSON payloads vs. column-packed bursts.
+
+Inserts ``batches`` batches of 200 typing-heavy events (the kiosk's real
+burst shape, from ``telemetry_compression``) through ``event_rows`` +
+``insert_event_rows`` with ``ingest_pack_keystrokes`` off and on, each
+into a fresh ``behavior_events`` table, and prints the stored payload
+bytes, the table's on-disk size and insert throughput. Point
+``BENCH_DATABASE_URL`` at Postgres for numbers that include TOAST.
+
+    python -m benchmarks.keystroke_storage [batches]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from unittest import mock
+
+from sqlalchemy import func, select, text
+
+from benchmarks._common import cleanup, make_engine, make_session, seed_attempts, seed_test
+from benchmarks.telemetry_compression import _synthetic_session
+
+from app.core.config import settings
+from app.models.behavior_event import BehaviorEvent
+from app.schemas.behavior import MAX_BATCH_SIZE, BehaviorEventCreateRequest
+from app.services.event_writer import event_rows, insert_event_rows
+
+
+def _batch() -> list[BehaviorEventCreateRequest]:
+    raw = [ev for ev in _synthetic_session(30) if ev["event_type"] == "KEYSTROKE"][:MAX_BATCH_SIZE]
+    return [BehaviorEventCreateRequest.model_validate({**ev, "seq": None}) for ev in raw]
+
+
+def _table_bytes(db) -> int:
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql":
+        db.execute(text("VACUUM behavior_events").execution_options(isolation_level="AUTOCOMMIT"))
+        return db.scalar(text("SELECT pg_total_relation_size('behavior_events')"))
+    # Pages owned by the table and its indexes (needs SQLITE_ENABLE_DBSTAT_VTAB).
+    return db.scalar(
+        text("SELECT SUM(pgsize) FROM dbstat WHERE name LIKE '%behavior_events%'")
+    )
+
+
+def _run(pack: bool, batches: int, events) -> tuple[int, int, float]:
+    engine = make_engine()
+    db = make_session(engine)
+    test = seed_test(db)
+    (attempt,) = seed_attempts(db, test, 1)
+
+    with mock.patch.object(settings, "ingest_pack_keystrokes", pack):
+        started = time.perf_counter()
+        for _ in range(batches):
+            insert_event_rows(db, event_rows(attempt, events))
+            db.commit()
+        elapsed = time.perf_counter() - started
+
+    payload_bytes = sum(
+        len(json.dumps(payload)) + len(packed or b"")
+        for payload, packed in db.execute(select(BehaviorEvent.payload, BehaviorEvent.payload_packed))
+    )
+    assert db.scalar(select(func.count()).select_from(BehaviorEvent)) == batches * len(events)
+    table_bytes = _table_bytes(db)
+    db.close()
+    engine.dispose()
+    return payload_bytes, table_bytes, batches * len(events) / elapsed
+
+
+def main(batches: int) -> None:
+    events = _batch()
+    results = {name: _run(pack, batches, events) for name, pack in (("json", False), ("packed", True))}
+
+    print(f"{batches} batches x {len(events)} KEYSTROKE events")
+    print(f"{'storage':>8} {'payload bytes':>14} {'table bytes':>12} {'events/s':>9}")
+    for name, (payload_bytes, table_bytes, rate) in results.items():
+        print(f"{name:>8} {payload_bytes:>14,} {table_bytes or 0:>12,} {rate:>9.0f}")
+    cleanup()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
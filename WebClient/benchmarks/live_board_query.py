@@ -0,0 +1,58 @@
+"""Filtered / top-K live board pages vs the full snapshot.
+
+Renders a board of ``attempts`` rows with a spread of risk scores and
+times ``render_page`` for a few typical proctor queries against the
+full body every viewer used to download. No database.
+
+    python -m benchmarks.live_board_query [attempts]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from datetime import datetime, timezone
+
+import benchmarks._common  # noqa: F401  (sets a throwaway DATABASE_URL)
+from benchmarks.live_snapshot_delta import _row
+
+from app.schemas.live import LiveTestSnapshot
+from app.services.live_service import BoardQuery, _render, _sort_key, render_page
+from app.services.risk_scorer import _band_for
+
+QUERIES = {
+    "top 20": BoardQuery(limit=20),
+    "critical": BoardQuery(bands=frozenset({"critical"})),
+    "no vm, top 50": BoardQuery(vm_detected=False, limit=50),
+    "name search": BoardQuery(search="student 42"),
+}
+
+
+def main(attempts: int) -> None:
+    rows = [_row(i, (i * 37) % 101) for i in range(attempts)]
+    rows = sorted(
+        (row.model_copy(update={"risk_band": _band_for(row.risk_score)}) for row in rows),
+        key=_sort_key,
+    )
+    rendered = _render(
+        LiveTestSnapshot(
+            test_id=1, test_name="Bench Test", generated_at=datetime.now(timezone.utc), rows=rows
+        ),
+        None,
+    )
+    # Built once per board version, on the first filtered request.
+    started = time.perf_counter()
+    rendered.sort_keys, rendered.search_text
+    index_ms = (time.perf_counter() - started) * 1000
+    print(f"{attempts} attempts, full body {len(rendered.body)} B, index {index_ms:.2f} ms")
+    print(f"{'query':>14} {'rows':>6} {'bytes':>9} {'ms':>7}")
+    for name, query in QUERIES.items():
+        started = time.perf_counter()
+        body = render_page(rendered, query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        count = body.count(b'"attempt_id"')
+        print(f"{name:>14} {count:>6} {len(body):>9} {elapsed_ms:>7.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,71 @@
+"""Live poll payload: full snapshot vs ``?since=`` delta.
+
+Renders a board of ``attempts`` rows, then a next build in which
+``changed`` rows moved, and prints the full body and the delta body
+sizes. The delta should track ``changed``, not ``attempts``. No database;
+this is only the rendering.
+
+    python -m benchmarks.live_snapshot_delta [attempts] [changed ...]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from datetime import datetime, timezone
+
+import benchmarks._common  # noqa: F401  (sets a throwaway DATABASE_URL)
+
+from app.schemas.live import LiveAttemptRow, LiveTestSnapshot
+from app.services.live_service import _render, render_delta
+
+STARTED = datetime(2026, 1, 1, 9, 0, tzinfo=timezone.utc)
+
+
+def _row(attempt_id: int, risk: int) -> LiveAttemptRow:
+    return LiveAttemptRow(
+        attempt_id=attempt_id,
+        attempt_number=1,
+        student_id=attempt_id,
+        student_name=f"Bench Student {attempt_id}",
+        student_email=f"student-{attempt_id}@bench.local",
+        status="IN_PROGRESS",
+        started_at=STARTED,
+        last_seen_at=STARTED,
+        risk_score=risk,
+        risk_band="ok" if risk < 40 else "warn",
+        top_contributors=[("FOCUS_LOSS", risk)] if risk else [],
+        event_count_window=risk // 5,
+        monitor_count=1,
+        focus_state="in_focus",
+        vm_detected=False,
+        warnings_sent=0,
+        latest_event_type="FOCUS_REGAIN",
+        latest_event_severity="info",
+    )
+
+
+def _board(attempts: int, bumped: int) -> LiveTestSnapshot:
+    return LiveTestSnapshot(
+        test_id=1,
+        test_name="Bench Test",
+        generated_at=datetime.now(timezone.utc),
+        rows=[_row(i, 10 if i < bumped else 0) for i in range(attempts)],
+    )
+
+
+def main(attempts: int, changes: list[int]) -> None:
+    print(f"{attempts} attempts")
+    print(f"{'changed':>8} {'full B':>9} {'delta B':>9} {'delta ms':>9}")
+    for changed in changes:
+        previous = _render(_board(attempts, 0), None)
+        current = _render(_board(attempts, changed), previous)
+        started = time.perf_counter()
+        delta = render_delta(current, previous.version)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"{changed:>8} {len(current.body):>9} {len(delta):>9} {elapsed_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(args[0] if args else 1000, args[1:] or [0, 1, 10, 100, 1000])
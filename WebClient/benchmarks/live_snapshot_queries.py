@@ -0,0 +1,85 @@
+"""Live snapshot cost vs. cohort size.
+
+Prints the number of SQL statements and wall time for one cache-miss
+``get_live_snapshot`` call as the number of active attempts grows. The
+statement count must stay flat; only the wall time should scale.
+
+    python -m benchmarks.live_snapshot_queries [10 100 500 2000]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks._common import (
+    cleanup,
+    count_queries,
+    make_engine,
+    make_session,
+    seed_attempts,
+    seed_test,
+)
+
+from app.models.behavior_event import BehaviorEvent, BehaviorEventType
+from app.services.live_service import get_live_snapshot, invalidate_cache
+
+EVENTS_PER_ATTEMPT = 20
+
+
+def _seed_events(db, attempts) -> None:
+    now = datetime.now(timezone.utc)
+    kinds = [
+        (BehaviorEventType.FOCUS_LOSS, "warn", None),
+        (BehaviorEventType.FOCUS_REGAIN, "info", None),
+        (BehaviorEventType.KEYSTROKE, "info", {"burst_size": 5}),
+        (BehaviorEventType.MONITOR_COUNT_CHANGE, "warn", {"count": 2, "previous_count": 1}),
+    ]
+    rows = []
+    for attempt in attempts:
+        for i in range(EVENTS_PER_ATTEMPT):
+            etype, severity, payload = kinds[i % len(kinds)]
+            rows.append(
+                BehaviorEvent(
+                    attempt_id=attempt.id,
+                    test_id=attempt.test_id,
+                    student_id=attempt.student_id,
+                    event_type=etype,
+                    severity=severity,
+                    payload=payload,
+                    event_time=now - timedelta(seconds=i * 5),
+                )
+            )
+    db.add_all(rows)
+    db.commit()
+
+
+def main(sizes: list[int]) -> None:
+    engine = make_engine()
+    db = make_session(engine)
+    test = seed_test(db)
+    seeded = 0
+
+    print(f"{'attempts':>9} {'queries':>8} {'ms':>9}")
+    for size in sizes:
+        fresh = seed_attempts(db, test, size - seeded, offset=seeded)
+        _seed_events(db, fresh)
+        seeded = size
+
+        invalidate_cache()
+        db.expire_all()
+        with count_queries(engine) as statements:
+            started = time.perf_counter()
+            snapshot = get_live_snapshot(db, test)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        assert len(snapshot.rows) == size
+        print(f"{size:>9} {len(statements):>8} {elapsed_ms:>9.1f}")
+
+    db.close()
+    engine.dispose()
+    cleanup()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10, 100, 500, 2000])
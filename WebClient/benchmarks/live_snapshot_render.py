@@ -0,0 +1,82 @@
+"""Per-poll cost of serving a cached live snapshot.
+
+Builds one snapshot of ``attempts`` active candidates, then times
+``requests`` GETs against three routes serving that same cached value:
+
+  * model - returns the ``LiveTestSnapshot`` and lets FastAPI validate it
+    against ``response_model`` and serialise it (the old cache hit);
+  * bytes - sends the pre-rendered body with its ETag;
+  * 304   - a conditional GET whose If-None-Match names that ETag.
+
+Auth and the snapshot build are left out; this is only the per-hit cost.
+
+    python -m benchmarks.live_snapshot_render [attempts] [requests]
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+import time
+
+from benchmarks._common import cleanup, make_engine, make_session, seed_attempts, seed_test
+from benchmarks.live_snapshot_queries import _seed_events
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.http_cache import json_response
+from app.schemas.live import LiveTestSnapshot
+from app.services import live_service
+
+
+def _time(client: TestClient, path: str, requests: int, headers: dict | None = None) -> tuple[float, int]:
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(path, headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), len(response.content)
+
+
+def main(attempts: int, requests: int) -> None:
+    engine = make_engine()
+    db = make_session(engine)
+    test = seed_test(db)
+    _seed_events(db, seed_attempts(db, test, attempts))
+    live_service.invalidate_cache()
+    rendered = live_service.get_rendered_live_snapshot(db, test)
+    db.close()
+
+    app = FastAPI()
+
+    @app.get("/model", response_model=LiveTestSnapshot)
+    def model():
+        return rendered.snapshot
+
+    @app.get("/bytes", response_model=LiveTestSnapshot)
+    def body(request: Request):
+        return json_response(request, rendered.body, rendered.etag)
+
+    with TestClient(app) as client:
+        for path in ("/model", "/bytes"):
+            client.get(path)
+        rows = [
+            ("model", *_time(client, "/model", requests)),
+            ("bytes", *_time(client, "/bytes", requests)),
+            ("304", *_time(client, "/bytes", requests, {"If-None-Match": rendered.etag})),
+        ]
+
+    print(f"{attempts} attempts, {requests} requests per route")
+    print(f"{'route':>6} {'p50 ms':>8} {'bytes':>8}")
+    for name, p50, size in rows:
+        print(f"{name:>6} {p50:>8.3f} {size:>8}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    try:
+        main(*(args + [200, 500][len(args):]))
+    finally:
+        cleanup()
@@ -0,0 +1,95 @@
+"""Live board under a roomful of viewers.
+
+``viewers`` threads (default 50) each poll ``get_live_snapshot`` for the
+same test every ``POLL_INTERVAL_SECONDS`` (far more often than the
+browser's 3 s, to keep every TTL window busy), each on its own session, against a cohort of
+``attempts`` active candidates. Reports how many real snapshot builds
+ran per cache TTL - one is the target, whatever the viewer count - and
+the poll latency viewers saw.
+
+    python -m benchmarks.live_snapshot_viewers [viewers] [attempts] [seconds]
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+import threading
+import time
+
+from benchmarks._common import cleanup, make_engine, make_session, seed_attempts, seed_test
+from benchmarks.live_snapshot_queries import _seed_events
+
+from app.services import live_service
+
+POLL_INTERVAL_SECONDS = 0.05
+
+
+def main(viewers: int, attempts: int, seconds: float) -> None:
+    engine = make_engine()
+    db = make_session(engine)
+    test = seed_test(db)
+    _seed_events(db, seed_attempts(db, test, attempts))
+    # One detached copy for every viewer; a build only reads id / name.
+    db.refresh(test)
+    db.expunge(test)
+    db.close()
+
+    builds = 0
+    builds_lock = threading.Lock()
+    build = live_service.build_live_snapshot
+
+    def counted_build(db, test):
+        nonlocal builds
+        with builds_lock:
+            builds += 1
+        return build(db, test)
+
+    live_service.build_live_snapshot = counted_build
+    live_service.invalidate_cache()
+
+    latencies: list[list[float]] = [[] for _ in range(viewers)]
+    barrier = threading.Barrier(viewers)
+    deadline = 0.0
+
+    def viewer(index: int) -> None:
+        session = make_session(engine)
+        own = latencies[index]
+        barrier.wait()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            live_service.get_live_snapshot(session, test)
+            own.append((time.perf_counter() - started) * 1000)
+            # Hand the connection back, like the end of a request would;
+            # 50 idle sessions would otherwise exhaust the pool.
+            session.rollback()
+            time.sleep(POLL_INTERVAL_SECONDS)
+        session.close()
+
+    threads = [threading.Thread(target=viewer, args=(i,)) for i in range(viewers)]
+    deadline = time.perf_counter() + seconds + 1.0
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    live_service.build_live_snapshot = build
+
+    samples = sorted(ms for own in latencies for ms in own)
+    periods = elapsed / live_service._CACHE_TTL_SECONDS
+    print(f"{viewers} viewers, {attempts} attempts, {elapsed:.1f} s")
+    print(f"  polls            {len(samples):>10,}")
+    print(f"  snapshot builds  {builds:>10,}  ({builds / periods:.2f} per {live_service._CACHE_TTL_SECONDS:g} s TTL)")
+    print(f"  poll p50 / p99   {statistics.median(samples):>7.2f} / {samples[int(len(samples) * 0.99)]:.2f} ms")
+    engine.dispose()
+    cleanup()
+
+
+if __name__ == "__main__":
+    args = [float(arg) for arg in sys.argv[1:]]
+    main(
+        int(args[0]) if len(args) > 0 else 50,
+        int(args[1]) if len(args) > 1 else 200,
+        args[2] if len(args) > 2 else 5.0,
+    )
@@ -0,0 +1,235 @@
+"""behavior_events at scale: old heap layout vs. monthly partitions.
+
+Needs Postgres - point ``BENCH_DATABASE_URL`` at a scratch database
+(``postgresql+psycopg://...``). Loads ``rows`` synthetic events (default
+50M) spread over the last six months into two layouts side by side:
+
+  * ``bench_heap`` - one table with the pre-partitioning indexes: PK on
+    ``id`` plus one index per ``id``, ``attempt_id``, ``test_id``,
+    ``student_id``, ``event_type``, ``event_time`` and the kiosk-seq index;
+  * ``bench_part`` - ``event_partitions``' DDL: monthly partitions and
+    the composite indexes,
+
+then measures 200-row batch inserts through ``event_writer`` into the
+current month, as live ingestion does, and p50 / p95 latency of
+the hot read paths. Loading 50M rows takes a while and needs ~40 GB.
+
+    BENCH_DATABASE_URL=postgresql+psycopg://... python -m benchmarks.partitioned_events [rows]
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from benchmarks._common import make_engine, make_session, seed_attempts, seed_test
+
+from app.schemas.behavior import MAX_BATCH_SIZE, BehaviorEventCreateRequest
+from app.services import event_partitions
+from app.services.event_partitions import add_months, month_start
+from app.services.event_writer import event_rows, insert_event_rows
+
+ATTEMPTS = 2_000
+LOAD_CHUNK = 1_000_000
+INSERT_BATCHES = 200
+QUERY_RUNS = 200
+HISTORY_MONTHS = 6
+
+_HEAP_INDEXES = (
+    "CREATE INDEX ON behavior_events (id)",
+    "CREATE INDEX ON behavior_events (attempt_id)",
+    "CREATE INDEX ON behavior_events (test_id)",
+    "CREATE INDEX ON behavior_events (student_id)",
+    "CREATE INDEX ON behavior_events (event_type)",
+    "CREATE INDEX ON behavior_events (event_time)",
+    "CREATE UNIQUE INDEX ON behavior_events (attempt_id, seq)",
+)
+
+QUERIES = {
+    "attempt timeline": (
+        "SELECT id, event_type, severity, payload, event_time FROM behavior_events "
+        "WHERE attempt_id = :attempt ORDER BY event_time DESC, id DESC LIMIT 100"
+    ),
+    "latest per type": (
+        "SELECT DISTINCT ON (event_type) id, event_type, event_time FROM behavior_events "
+        "WHERE attempt_id = :attempt ORDER BY event_type, event_time DESC"
+    ),
+    "risk window x50": (
+        "SELECT attempt_id, event_type, severity, event_time FROM behavior_events "
+        "WHERE attempt_id = ANY(:attempts) AND event_time >= now() - interval '15 minutes'"
+    ),
+    "student log": (
+        "SELECT id, event_type, event_time FROM behavior_events "
+        "WHERE test_id = :test AND student_id = :student ORDER BY event_time DESC LIMIT 100"
+    ),
+}
+
+
+def _layout_engine(url, schema: str):
+    return create_engine(url, connect_args={"options": f"-csearch_path={schema},public"})
+
+
+def _create_heap(conn) -> None:
+    conn.execute(text("CREATE SEQUENCE behavior_events_id_seq AS INTEGER"))
+    ddl = event_partitions._PARENT_DDL.replace("PRIMARY KEY (id, event_time)", "PRIMARY KEY (id)")
+    conn.execute(text(ddl.replace("PARTITION BY RANGE (event_time)", "")))
+    conn.execute(text("ALTER SEQUENCE behavior_events_id_seq OWNED BY behavior_events.id"))
+    for statement in _HEAP_INDEXES:
+        conn.execute(text(statement))
+
+
+def _create_partitioned(conn, now: datetime) -> None:
+    event_partitions.create_partitioned_table(conn, now)
+    for back in range(1, HISTORY_MONTHS + 1):
+        event_partitions.ensure_partitions(conn, add_months(month_start(now), -back), 0)
+
+
+def _load(engine, rows: int) -> float:
+    started = time.perf_counter()
+    for first in range(1, rows + 1, LOAD_CHUNK):
+        last = min(first + LOAD_CHUNK - 1, rows)
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"""
+                    INSERT INTO behavior_events
+                        (attempt_id, test_id, student_id, event_type, payload, severity, event_time, seq)
+                    SELECT a.attempt_id, a.test_id, a.student_id,
+                           (enum_range(NULL::behavioreventtype))[1 + g % 18],
+                           '{{"burst_size": 3}}'::json, 'info',
+                           now() - random() * interval '{HISTORY_MONTHS * 30} days', g
+                    FROM generate_series(:first, :last) AS g
+                    JOIN bench_attempts a ON a.idx = g % {ATTEMPTS}
+                    """
+                ),
+                {"first": first, "last": last},
+            )
+        print(f"  loaded {last:,} rows", end="\r", flush=True)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE behavior_events"))
+    return time.perf_counter() - started
+
+
+def _insert_rate(engine, attempts) -> float:
+    events = [
+        BehaviorEventCreateRequest(event_type="KEYSTROKE", severity="info", payload={"burst_size": 3})
+        for _ in range(MAX_BATCH_SIZE)
+    ]
+    rng = random.Random(1)
+    with Session(engine) as db:
+        started = time.perf_counter()
+        for _ in range(INSERT_BATCHES):
+            insert_event_rows(db, event_rows(rng.choice(attempts), events))
+            db.commit()
+        elapsed = time.perf_counter() - started
+    return INSERT_BATCHES * MAX_BATCH_SIZE / elapsed
+
+
+def _query_latency(engine, attempts) -> dict[str, tuple[float, float]]:
+    rng = random.Random(2)
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            samples = []
+            for _ in range(QUERY_RUNS):
+                attempt = rng.choice(attempts)
+                params = {
+                    "attempt": attempt.id,
+                    "attempts": [a.id for a in rng.sample(attempts, 50)],
+                    "test": attempt.test_id,
+                    "student": attempt.student_id,
+                }
+                started = time.perf_counter()
+                conn.execute(text(sql), params).all()
+                samples.append((time.perf_counter() - started) * 1000)
+            samples.sort()
+            results[name] = (statistics.median(samples), samples[int(len(samples) * 0.95)])
+    return results
+
+
+def _drop_leftovers() -> None:
+    """The bench schemas reference public tables; drop them (e.g. from
+    an interrupted run) before make_engine() recreates those."""
+    url = os.environ.get("BENCH_DATABASE_URL", "")
+    if not url.startswith("postgresql"):
+        return
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS bench_heap, bench_part CASCADE"))
+        conn.execute(text("DROP TABLE IF EXISTS bench_attempts"))
+    engine.dispose()
+
+
+def main(rows: int) -> None:
+    _drop_leftovers()
+    engine = make_engine()
+    if engine.dialect.name != "postgresql":
+        print("Set BENCH_DATABASE_URL to a Postgres database; partitioning is Postgres-only.")
+        return
+
+    db = make_session(engine)
+    test = seed_test(db)
+    # Plain copies: event_rows only needs the ids, and the ORM rows
+    # expire once the session closes.
+    attempts = [
+        SimpleNamespace(id=a.id, test_id=a.test_id, student_id=a.student_id)
+        for a in seed_attempts(db, test, ATTEMPTS)
+    ]
+    db.close()
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE behavior_events"))
+        conn.execute(
+            text(
+                "CREATE TABLE bench_attempts "
+                "(idx INTEGER PRIMARY KEY, attempt_id INTEGER, test_id INTEGER, student_id INTEGER)"
+            )
+        )
+        conn.execute(
+            text("INSERT INTO bench_attempts VALUES (:idx, :attempt_id, :test_id, :student_id)"),
+            [
+                {"idx": i, "attempt_id": a.id, "test_id": a.test_id, "student_id": a.student_id}
+                for i, a in enumerate(attempts)
+            ],
+        )
+
+    url = engine.url.render_as_string(hide_password=False)
+    layouts = {
+        "heap": ("bench_heap", _create_heap),
+        "partitioned": ("bench_part", lambda conn: _create_partitioned(conn, now)),
+    }
+    report = {}
+    for name, (schema, create) in layouts.items():
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+        layout = _layout_engine(url, schema)
+        with layout.begin() as conn:
+            create(conn)
+        print(f"{name}: loading {rows:,} rows")
+        load_seconds = _load(layout, rows)
+        report[name] = (rows / load_seconds, _insert_rate(layout, attempts), _query_latency(layout, attempts))
+        layout.dispose()
+
+    print(f"\n{rows:,} rows, {ATTEMPTS:,} attempts, {HISTORY_MONTHS} months")
+    print(f"{'layout':>12} {'bulk rows/s':>12} {'batch ev/s':>11}")
+    for name, (load_rate, insert_rate, _) in report.items():
+        print(f"{name:>12} {load_rate:>12,.0f} {insert_rate:>11,.0f}")
+    print(f"\n{'query (ms)':>18} " + " ".join(f"{name + ' p50/p95':>24}" for name in report))
+    for query in QUERIES:
+        cells = " ".join(f"{report[n][2][query][0]:>11.2f} / {report[n][2][query][1]:>9.2f}" for n in report)
+        print(f"{query:>18} {cells}")
+    engine.dispose()
+    _drop_leftovers()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000_000)
@@ -0,0 +1,125 @@
+"""Bytes on the wire for kiosk telemetry: plain JSON vs. gzip vs. zstd.
+
+Replays a kiosk session through the same batching the ``BatchPoster``
+does (one POST per 5 s flush, at most 200 events) and prints the total
+request-body bytes per encoding. Pass a recorded session - a JSON-lines
+file of ``TelemetryEvent.to_api_dict()`` objects, e.g. dumped from the
+kiosk log - or let it synthesise ``minutes`` of typing-heavy activity
+with the kiosk's real KEYSTROKE burst shape.
+
+    python -m benchmarks.telemetry_compression [session.jsonl | minutes]
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:
+    zstandard = None  # type: ignore[assignment]
+
+FLUSH_INTERVAL_SEC = 5.0
+MAX_BATCH = 200
+# Mirrors Browser/browser/telemetry/poster.py.
+COMPRESS_MIN_BYTES = 1024
+BURST_MAX_KEYS = 25
+
+_PROCS = ("msedgewebview2.exe", "OmniProctorBrowser.exe", "explorer.exe")
+_KEYS = "etaoinshrdlucmfwypvbgkjqxz" + " " * 6 + "0123456789"
+
+
+def _synthetic_session(minutes: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1, 9, 0, tzinfo=timezone.utc)
+    events: list[dict] = []
+    seq = 1
+    t = 0.0
+    while t < minutes * 60:
+        # A burst of typing, as keystroke_logger coalesces it.
+        keys = []
+        for _ in range(rng.randint(5, BURST_MAX_KEYS)):
+            t += rng.uniform(0.08, 0.3)
+            key = rng.choice(_KEYS)
+            keys.append(
+                {
+                    "key": "space" if key == " " else key,
+                    "scan_code": ord(key) % 90,
+                    "modifiers": ["left shift"] if rng.random() < 0.05 else [],
+                    "ts": start.timestamp() + t,
+                    "proc": _PROCS[0],
+                }
+            )
+        events.append(_event("KEYSTROKE", start + timedelta(seconds=t), seq,
+                             {"keys": keys, "burst_size": len(keys)}))
+        seq += 1
+        if rng.random() < 0.08:
+            events.append(_event("FOCUS_LOSS", start + timedelta(seconds=t), seq,
+                                 {"hwnd": rng.randint(1000, 9999), "proc": rng.choice(_PROCS)},
+                                 severity="warn"))
+            seq += 1
+        t += rng.uniform(0.5, 4.0)
+    return events
+
+
+def _event(event_type: str, when: datetime, seq: int, payload: dict, severity: str = "info") -> dict:
+    return {
+        "event_type": event_type,
+        "payload": payload,
+        "severity": severity,
+        "event_time": when.isoformat(),
+        "seq": seq,
+    }
+
+
+def _batches(events: list[dict]):
+    batch: list[dict] = []
+    window_end = None
+    for ev in events:
+        when = datetime.fromisoformat(ev["event_time"])
+        if window_end is None:
+            window_end = when + timedelta(seconds=FLUSH_INTERVAL_SEC)
+        if when >= window_end or len(batch) == MAX_BATCH:
+            yield batch
+            batch = []
+            window_end = when + timedelta(seconds=FLUSH_INTERVAL_SEC)
+        batch.append(ev)
+    if batch:
+        yield batch
+
+
+def main(source: str) -> None:
+    if Path(source).is_file():
+        events = [json.loads(line) for line in Path(source).read_text().splitlines() if line.strip()]
+        label = source
+    else:
+        events = _synthetic_session(int(source))
+        label = f"synthetic {source} min"
+
+    totals = {"json": 0, "gzip": 0}
+    if zstandard is not None:
+        totals["zstd"] = 0
+        zstd = zstandard.ZstdCompressor(level=3)
+    posts = 0
+    for batch in _batches(events):
+        posts += 1
+        body = json.dumps({"events": batch}).encode("utf-8")
+        small = len(body) < COMPRESS_MIN_BYTES
+        totals["json"] += len(body)
+        totals["gzip"] += len(body) if small else len(gzip.compress(body, compresslevel=6))
+        if zstandard is not None:
+            totals["zstd"] += len(body) if small else len(zstd.compress(body))
+
+    print(f"{label}: {len(events)} events in {posts} POSTs")
+    print(f"{'encoding':>9} {'bytes':>12} {'ratio':>7}")
+    for name, size in totals.items():
+        print(f"{name:>9} {size:>12,} {totals['json'] / size:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "60")
@@ -0,0 +1,68 @@
+"""Per-worker schema cost at startup: old boot-time DDL vs. version check.
+
+``before`` replays what every worker used to do on boot against an
+up-to-date database: ``create_all`` plus, on Postgres, every statement
+of the old ``ensure_schema_compatibility`` (now the migration steps).
+``after`` is ``migrations.ensure_schema`` with the schema at head.
+Prints the median wall time and statement count of each over ``runs``
+boots. Point ``BENCH_DATABASE_URL`` at Postgres for the numbers that
+matter - on SQLite the old path was only ``create_all``.
+
+    python -m benchmarks.worker_startup [runs]
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+
+from benchmarks._common import cleanup, count_queries, make_engine
+
+from app.db import migrations
+
+
+def _before(engine) -> None:
+    with engine.begin() as conn:
+        migrations._base_schema(conn)
+    if engine.dialect.name != "postgresql":
+        return
+    for migration in migrations.MIGRATIONS[1:]:
+        if migration.transactional:
+            with engine.begin() as conn:
+                migration.apply(conn)
+        else:
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                migration.apply(conn)
+
+
+def _after(engine) -> None:
+    migrations.ensure_schema(engine)
+
+
+def main(runs: int) -> None:
+    engine = make_engine()
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+    migrations.upgrade(engine)
+
+    print(f"{runs} boots against an up-to-date schema ({engine.dialect.name})")
+    print(f"{'path':>7} {'median ms':>10} {'statements':>11}")
+    for name, boot in (("before", _before), ("after", _after)):
+        boot(engine)  # warm the connection pool
+        samples = []
+        for _ in range(runs):
+            with count_queries(engine) as statements:
+                started = time.perf_counter()
+                boot(engine)
+                samples.append((time.perf_counter() - started) * 1000)
+        print(f"{name:>7} {statistics.median(samples):>10.2f} {len(statements):>11}")
+
+    engine.dispose()
+    cleanup()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
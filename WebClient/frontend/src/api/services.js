@@ -1,4 +1,4 @@
-import apiClient from './client'
+import apiClient, { API_BASE_URL } from './client'
 
 export const authApi = {
   register: (payload) => apiClient.post('/auth/register', payload),
@@ -28,6 +28,7 @@ export const attemptsApi = {
 export const behaviorApi = {
   logEvent: (attemptId, payload) => apiClient.post(`/behavior/attempts/${attemptId}/events`, payload),
   eventsForAttempt: (attemptId) => apiClient.get(`/behavior/attempts/${attemptId}/events`),
+  event: (eventId) => apiClient.get(`/behavior/events/${eventId}`),
   eventsForTestStudent: (testId, studentId) => apiClient.get(`/behavior/tests/${testId}/students/${studentId}/events`),
 }
 
@@ -40,17 +41,74 @@ export const dashboardApi = {
 }
 
 export const liveApi = {
-  snapshot: (testId) => apiClient.get(`/proctor/tests/${testId}/live`),
+  // With `since` (the `version` of the board the caller holds) the API
+  // may answer with a delta ({version, changed, removed}) instead of a
+  // full snapshot ({version, rows}).
+  snapshot: (testId, since) =>
+    apiClient.get(`/proctor/tests/${testId}/live`, {
+      params: since ? { since } : undefined,
+    }),
+  // Every running test the caller may watch: per-test risk band counts,
+  // the riskiest candidates across all of them and quiet kiosks.
+  overview: (top) =>
+    apiClient.get('/proctor/live/overview', { params: top ? { top } : undefined }),
+  // Server-Sent Events stream of the live board: one `snapshot` event,
+  // then `delta` events ({changed: [rows], removed: [attemptIds]}).
+  // EventSource cannot send an Authorization header, so this reads the
+  // stream with fetch. Resolves when the stream ends; rejects on HTTP
+  // errors so the caller can fall back to polling.
+  stream: async (testId, { onSnapshot, onDelta, signal }) => {
+    const token = localStorage.getItem('wc_token')
+    const response = await fetch(`${API_BASE_URL}/proctor/tests/${testId}/live/stream`, {
+      headers: {
+        Accept: 'text/event-stream',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      signal,
+    })
+    if (!response.ok || !response.body) {
+      throw new Error(`Live stream failed (HTTP ${response.status})`)
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+    let buffer = ''
+    for (;;) {
+      const { value, done } = await reader.read()
+      if (done) return
+      buffer += value
+      let boundary = buffer.indexOf('\n\n')
+      while (boundary !== -1) {
+        const block = buffer.slice(0, boundary)
+        buffer = buffer.slice(boundary + 2)
+        boundary = buffer.indexOf('\n\n')
+
+        let event = 'message'
+        let data = ''
+        block.split('\n').forEach((line) => {
+          if (line.startsWith('event: ')) event = line.slice(7)
+          else if (line.startsWith('data: ')) data += line.slice(6)
+        })
+        if (!data) continue // keep-alive comment
+        const parsed = JSON.parse(data)
+        if (event === 'snapshot') onSnapshot?.(parsed)
+        else if (event === 'delta') onDelta?.(parsed)
+      }
+    }
+  },
 }
 
 export const warningsApi = {
   send: (attemptId, payload) =>
     apiClient.post(`/proctor/attempts/${attemptId}/warnings`, payload),
+  broadcast: (testId, payload) =>
+    apiClient.post(`/proctor/tests/${testId}/warnings:broadcast`, payload),
   listForAttempt: (attemptId, sinceId = 0) => {
     const qs = sinceId ? `?since_id=${sinceId}` : ''
     return apiClient.get(`/proctor/attempts/${attemptId}/warnings${qs}`)
   },
   ack: (warningId) => apiClient.post(`/proctor/warnings/${warningId}/ack`, {}),
+  latency: (testId) =>
+    apiClient.get(testId ? `/proctor/tests/${testId}/warnings/latency` : '/proctor/warnings/latency'),
 }
 
 export const downloadsApi = {
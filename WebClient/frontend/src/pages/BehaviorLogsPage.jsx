@@ -117,14 +117,12 @@ function summarizePayload(eventType, payload) {
   const upper = (eventType || '').toUpperCase()
   switch (upper) {
     case 'KEYSTROKE': {
-      const keys = Array.isArray(payload.keys) ? payload.keys : []
+      // Stored bursts are packed server-side: lists carry only
+      // burst_size + keys_preview, the drawer fetches the full keys.
+      const keys = Array.isArray(payload.keys) ? payload.keys.map((k) => k?.key) : payload.keys_preview || []
       const burst = payload.burst_size ?? keys.length
-      const sample = keys
-        .slice(0, 3)
-        .map((k) => k?.key)
-        .filter(Boolean)
-        .join(', ')
-      return `${burst} key${burst === 1 ? '' : 's'}${sample ? ` — ${sample}${keys.length > 3 ? '…' : ''}` : ''}`
+      const sample = keys.slice(0, 3).filter(Boolean).join(', ')
+      return `${burst} key${burst === 1 ? '' : 's'}${sample ? ` — ${sample}${burst > 3 ? '…' : ''}` : ''}`
     }
     case 'BLOCKED_HOTKEY':
       return `${payload.description || payload.combo || 'blocked combo'}`
@@ -237,6 +235,17 @@ export function BehaviorLogsPage() {
     return fallback
   }
 
+  const openEvent = async (event) => {
+    setDrawerEvent(event)
+    if (!event?.payload?.packed) return
+    try {
+      const { data } = await behaviorApi.event(event.id)
+      setDrawerEvent((current) => (current?.id === data.id ? data : current))
+    } catch (error) {
+      notifications.show({ color: 'red', title: 'Failed to load keystrokes', message: getErrorMessage(error) })
+    }
+  }
+
   useEffect(() => {
     async function loadTests() {
       try {
@@ -649,7 +658,7 @@ export function BehaviorLogsPage() {
                     <Table.Tr
                       key={event.id}
                       style={{ cursor: 'pointer' }}
-                      onClick={() => setDrawerEvent(event)}
+                      onClick={() => openEvent(event)}
                     >
                       <Table.Td>
                         <Text size="sm">{formatDateIST(event.event_time)}</Text>
@@ -683,7 +692,7 @@ export function BehaviorLogsPage() {
                           aria-label="View payload"
                           onClick={(ev) => {
                             ev.stopPropagation()
-                            setDrawerEvent(event)
+                            openEvent(event)
                           }}
                         >
                           <IconEye size={16} />
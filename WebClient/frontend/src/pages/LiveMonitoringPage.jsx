@@ -158,6 +158,9 @@ export function LiveMonitoringPage() {
 
   const lastAlertedRef = useRef({})
   const pollTimerRef = useRef(null)
+  // Board version of the last poll, sent back so the API only returns
+  // the rows that changed since.
+  const versionRef = useRef(0)
 
   useEffect(() => {
     async function loadTests() {
@@ -175,34 +178,42 @@ export function LiveMonitoringPage() {
     loadTests()
   }, [])
 
-  const fetchSnapshot = async () => {
-    if (!selectedTest) return
-    try {
-      const { data } = await liveApi.snapshot(selectedTest)
-      setSnapshot(data)
+  const alertOnRiskyRows = (rows) => {
+    const now = Date.now()
+    rows
+      .filter((row) => row.risk_score >= RISK_ALERT_THRESHOLD)
+      .forEach((row) => {
+        const last = lastAlertedRef.current[row.attempt_id] || 0
+        if (now - last < RISK_ALERT_COOLDOWN_MS) return
+        lastAlertedRef.current[row.attempt_id] = now
 
-      const now = Date.now()
-      data.rows
-        .filter((row) => row.risk_score >= RISK_ALERT_THRESHOLD)
-        .forEach((row) => {
-          const last = lastAlertedRef.current[row.attempt_id] || 0
-          if (now - last < RISK_ALERT_COOLDOWN_MS) return
-          lastAlertedRef.current[row.attempt_id] = now
+        const topReasons =
+          (row.top_contributors || [])
+            .slice(0, 3)
+            .map(([type, weight]) => `${type} (+${weight})`)
+            .join(', ') || 'multiple events'
 
-          const topReasons =
-            (row.top_contributors || [])
-              .slice(0, 3)
-              .map(([type, weight]) => `${type} (+${weight})`)
-              .join(', ') || 'multiple events'
-
-          notifications.show({
-            color: 'red',
-            icon: <IconBellRinging size={16} />,
-            title: `High risk: ${row.student_name}`,
-            message: `Score ${row.risk_score} — ${topReasons}`,
-            autoClose: 12_000,
-          })
+        notifications.show({
+          color: 'red',
+          icon: <IconBellRinging size={16} />,
+          title: `High risk: ${row.student_name}`,
+          message: `Score ${row.risk_score} — ${topReasons}`,
+          autoClose: 12_000,
         })
+      })
+  }
+
+  const fetchSnapshot = async () => {
+    if (!selectedTest) return
+    try {
+      const { data } = await liveApi.snapshot(selectedTest, versionRef.current)
+      versionRef.current = data.version || 0
+      if (data.rows) {
+        setSnapshot(data)
+        alertOnRiskyRows(data.rows)
+      } else {
+        applyDelta(data)
+      }
     } catch (error) {
       notifications.show({
         color: 'red',
@@ -212,17 +223,67 @@ export function LiveMonitoringPage() {
     }
   }
 
+  // Apply a delta (SSE or `?since=` poll): replace changed rows, drop
+  // removed ones, and keep the server's highest-risk-first ordering.
+  const applyDelta = (delta) => {
+    setSnapshot((current) => {
+      if (!current) return current
+      const removed = new Set(delta.removed)
+      const byId = new Map(
+        current.rows
+          .filter((row) => !removed.has(row.attempt_id))
+          .map((row) => [row.attempt_id, row]),
+      )
+      delta.changed.forEach((row) => byId.set(row.attempt_id, row))
+      const rows = [...byId.values()].sort(
+        (a, b) =>
+          b.risk_score - a.risk_score ||
+          a.student_name.toLowerCase().localeCompare(b.student_name.toLowerCase()),
+      )
+      return {
+        ...current,
+        generated_at: delta.generated_at,
+        version: delta.version ?? current.version,
+        rows,
+      }
+    })
+    alertOnRiskyRows(delta.changed)
+  }
+
   useEffect(() => {
+    versionRef.current = 0
     if (!selectedTest) {
       setSnapshot(null)
       return undefined
     }
     setLoading(true)
-    fetchSnapshot().finally(() => setLoading(false))
-    if (autoRefresh) {
+    if (!autoRefresh) {
+      fetchSnapshot().finally(() => setLoading(false))
+      return undefined
+    }
+
+    // Prefer the push stream; fall back to polling if it can't be opened
+    // (old API, proxy stripping streaming responses, ...).
+    const controller = new AbortController()
+    const startPolling = () => {
+      if (controller.signal.aborted || pollTimerRef.current) return
+      fetchSnapshot().finally(() => setLoading(false))
       pollTimerRef.current = window.setInterval(fetchSnapshot, POLL_INTERVAL_MS)
     }
+    liveApi
+      .stream(selectedTest, {
+        signal: controller.signal,
+        onSnapshot: (data) => {
+          setSnapshot(data)
+          setLoading(false)
+          alertOnRiskyRows(data.rows)
+        },
+        onDelta: applyDelta,
+      })
+      .then(startPolling, startPolling)
+
     return () => {
+      controller.abort()
       if (pollTimerRef.current) {
         window.clearInterval(pollTimerRef.current)
         pollTimerRef.current = null
@@ -14,8 +14,13 @@ TEST_DB_PATH = BASE_DIR / f"test_{uuid4().hex}.db"
 os.environ["DATABASE_URL"] = f"sqlite+pysqlite:///{TEST_DB_PATH}"
 os.environ["SECRET_KEY"] = "test-secret"
 os.environ["DEBUG"] = "false"
+# Tests sweep and roll up explicitly; background threads would race
+# their transactions.
+os.environ["ATTEMPT_REAPER_ENABLED"] = "false"
+os.environ["WARNING_LATENCY_ROLLUP_ENABLED"] = "false"
 
 from app.api.deps import get_db  # noqa: E402
+from app.core import cache  # noqa: E402
 from app.core.security import get_password_hash  # noqa: E402
 from app.db.base import Base  # noqa: E402
 from app.main import app  # noqa: E402
@@ -23,7 +28,9 @@ from app.models.assignment import TestAssignment  # noqa: E402
 from app.models.test import Test  # noqa: E402
 from app.models.test_attempt import AttemptStatus, TestAttempt  # noqa: E402
 from app.models.user import User, UserRole  # noqa: E402
+from app.services import attempt_activity, ingest_dedup, risk_engine, warning_index, warning_latency  # noqa: E402
 from app.services.kiosk_token_service import issue_kiosk_token  # noqa: E402
+from app.services.live_service import invalidate_cache  # noqa: E402
 
 
 @pytest.fixture(scope="session")
@@ -54,6 +61,24 @@ def db_session(engine):
         connection.close()
 
 
+@pytest.fixture(autouse=True)
+def reset_in_memory_state():
+    """Drop process-level caches between tests.
+
+    Every test rolls its transaction back, so SQLite happily reuses
+    attempt / test ids - stale in-memory state keyed on them would leak
+    from one test into the next.
+    """
+    risk_engine.reset()
+    ingest_dedup.reset()
+    attempt_activity.reset()
+    warning_index.reset()
+    warning_latency.reset()
+    cache.reset()
+    invalidate_cache()
+    yield
+
+
 @pytest.fixture(scope="function")
 def client(db_session):
     def override_get_db():
@@ -177,7 +202,11 @@ def assigned_attempt(db_session, sample_test, student_user):
     HTTP path so individual tests can grab an attempt id without coupling
     to the attempt-start contract.
     """
-    assignment = TestAssignment(test_id=sample_test.id, student_id=student_user.id)
+    assignment = TestAssignment(
+        test_id=sample_test.id,
+        student_id=student_user.id,
+        added_by=sample_test.created_by,
+    )
     db_session.add(assignment)
     db_session.commit()
     db_session.refresh(assignment)
@@ -234,7 +263,9 @@ def other_attempt(db_session, sample_test, other_student_user):
     used to write to / acknowledge / end attempt B.
     """
     assignment = TestAssignment(
-        test_id=sample_test.id, student_id=other_student_user.id
+        test_id=sample_test.id,
+        student_id=other_student_user.id,
+        added_by=sample_test.created_by,
     )
     db_session.add(assignment)
     db_session.commit()
@@ -11,7 +11,11 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
+import msgpack
+import pytest
+
 from app.schemas.behavior import MAX_BATCH_SIZE
+from app.services import warning_latency
 
 
 def auth_header(token: str) -> dict[str, str]:
@@ -158,3 +162,387 @@ def test_batch_endpoint_returns_latest_warning_id(
     )
     assert resp.status_code == 200
     assert resp.json()["latest_warning_id"] == warning_id
+
+
+def _numbered(seqs) -> list[dict]:
+    return [{**_sample_event(), "seq": seq} for seq in seqs]
+
+
+def _stored_seqs(db_session, attempt_id: int) -> list[int]:
+    from app.models.behavior_event import BehaviorEvent
+
+    return sorted(
+        seq
+        for (seq,) in db_session.query(BehaviorEvent.seq).filter(
+            BehaviorEvent.attempt_id == attempt_id
+        )
+    )
+
+
+def test_retried_batch_is_not_stored_twice(
+    client, db_session, kiosk_token, assigned_attempt
+):
+    for _ in range(2):
+        response = client.post(
+            _batch_url(assigned_attempt.id),
+            headers=auth_header(kiosk_token),
+            json={"events": _numbered([1, 2, 3])},
+        )
+        assert response.status_code == 200
+
+    body = response.json()
+    assert body["accepted"] == 0
+    assert body["duplicates"] == 3
+    assert body["rejected"] == 0
+    assert body["acked_seq"] == 3
+    assert _stored_seqs(db_session, assigned_attempt.id) == [1, 2, 3]
+
+
+def test_dedup_survives_a_restart_and_overlapping_retry(
+    client, db_session, kiosk_token, assigned_attempt
+):
+    from app.services import ingest_dedup
+
+    client.post(
+        _batch_url(assigned_attempt.id),
+        headers=auth_header(kiosk_token),
+        json={"events": _numbered([1, 2, 3])},
+    )
+    # Fresh process: the high-water mark is reloaded from the table.
+    ingest_dedup.reset()
+    response = client.post(
+        _batch_url(assigned_attempt.id),
+        headers=auth_header(kiosk_token),
+        json={"events": _numbered([2, 3, 4, 4])},
+    )
+
+    body = response.json()
+    assert body["accepted"] == 1
+    assert body["duplicates"] == 3
+    assert body["acked_seq"] == 4
+    assert _stored_seqs(db_session, assigned_attempt.id) == [1, 2, 3, 4]
+
+
+def test_batch_without_seqs_gets_no_acked_seq(client, kiosk_token, assigned_attempt):
+    from app.services import ingest_dedup
+
+    response = client.post(
+        _batch_url(assigned_attempt.id),
+        headers=auth_header(kiosk_token),
+        json={"events": [{"event_type": "FOCUS_LOSS"}, {"event_type": "FOCUS_REGAIN"}]},
+    )
+    body = response.json()
+    assert body["accepted"] == 2
+    assert body["acked_seq"] is None
+    # No MAX(seq) lookup for a kiosk that doesn't number its events.
+    assert ingest_dedup.acked_seq(None, assigned_attempt.id, load=False) is None
+
+    # An empty batch is a kiosk asking where to resume.
+    response = client.post(
+        _batch_url(assigned_attempt.id), headers=auth_header(kiosk_token), json={"events": []}
+    )
+    assert response.json()["acked_seq"] == 0
+
+
+def test_malformed_numbered_events_are_acked(client, kiosk_token, assigned_attempt):
+    response = client.post(
+        _batch_url(assigned_attempt.id),
+        headers=auth_header(kiosk_token),
+        json={"events": _numbered([1]) + [{"event_type": "NOPE", "seq": 2}]},
+    )
+    body = response.json()
+    assert body["accepted"] == 1
+    assert body["rejected"] == 1
+    assert body["acked_seq"] == 2
+
+
+def test_full_ingest_queue_answers_429_with_retry_after(
+    client, kiosk_token, assigned_attempt, monkeypatch
+):
+    from app.api.v1.endpoints import behavior
+    from app.services.ingest_queue import IngestQueue
+
+    monkeypatch.setattr(behavior.settings, "ingest_write_behind", True)
+    monkeypatch.setattr(
+        behavior,
+        "ingest_queue",
+        IngestQueue(max_events=1, max_batch_rows=10, max_delay_seconds=60),
+    )
+
+    response = client.post(
+        _batch_url(assigned_attempt.id),
+        headers=auth_header(kiosk_token),
+        json={"events": [_sample_event(), _sample_event()]},
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def _post_encoded(client, attempt_id: int, token: str, body: bytes, encoding: str):
+    return client.post(
+        _batch_url(attempt_id),
+        headers={
+            **auth_header(token),
+            "Content-Type": "application/json",
+            "Content-Encoding": encoding,
+        },
+        content=body,
+    )
+
+
+def test_gzip_batch_is_decompressed(client, kiosk_token, assigned_attempt):
+    import gzip
+    import json
+
+    body = gzip.compress(json.dumps({"events": [_sample_event() for _ in range(20)]}).encode())
+    response = _post_encoded(client, assigned_attempt.id, kiosk_token, body, "gzip")
+    assert response.status_code == 200
+    assert response.json()["accepted"] == 20
+
+
+def test_gzip_bomb_is_rejected(client, kiosk_token, assigned_attempt):
+    import gzip
+
+    from app.core.config import settings
+
+    bomb = gzip.compress(b"0" * (settings.max_request_body_bytes + 1))
+    assert len(bomb) < 64 * 1024
+    response = _post_encoded(client, assigned_attempt.id, kiosk_token, bomb, "gzip")
+    assert response.status_code == 413
+
+
+def test_bad_content_encoding_is_rejected(client, kiosk_token, assigned_attempt):
+    response = _post_encoded(client, assigned_attempt.id, kiosk_token, b"\x00\x01", "br")
+    assert response.status_code == 415
+    response = _post_encoded(client, assigned_attempt.id, kiosk_token, b"not gzip", "gzip")
+    assert response.status_code == 400
+
+
+def _post_msgpack(client, attempt_id: int, token: str, envelope) -> object:
+    return client.post(
+        _batch_url(attempt_id),
+        headers={**auth_header(token), "Content-Type": "application/msgpack"},
+        content=msgpack.packb(envelope),
+    )
+
+
+def test_msgpack_batch_is_accepted(client, db_session, kiosk_token, assigned_attempt):
+    from app.models.behavior_event import BehaviorEvent
+
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    response = _post_msgpack(
+        client,
+        assigned_attempt.id,
+        kiosk_token,
+        {
+            "v": 1,
+            "events": [
+                [6, 1, now_ms, 1, {"hwnd": 1}],
+                [9, 0, now_ms, 2, {"burst_size": 3}],
+                ["clipboard_copy", 0, now_ms, 3],
+                [999, 0, now_ms, 4],
+                "not-an-event",
+            ],
+        },
+    )
+
+    assert response.status_code == 200
+    assert "application/msgpack" in response.headers["Accept-Post"]
+    body = response.json()
+    assert body["accepted"] == 3
+    assert body["rejected"] == 2
+    assert body["acked_seq"] == 4
+    stored = (
+        db_session.query(BehaviorEvent)
+        .filter(BehaviorEvent.attempt_id == assigned_attempt.id)
+        .order_by(BehaviorEvent.seq)
+        .all()
+    )
+    assert [ev.event_type.value for ev in stored] == ["FOCUS_LOSS", "KEYSTROKE", "CLIPBOARD_COPY"]
+    assert stored[0].severity == "warn"
+    assert stored[0].payload == {"hwnd": 1}
+
+
+def test_msgpack_binary_payload_drops_only_that_event(client, db_session, kiosk_token, assigned_attempt):
+    from app.models.behavior_event import BehaviorEvent
+
+    response = _post_msgpack(
+        client,
+        assigned_attempt.id,
+        kiosk_token,
+        {"v": 1, "events": [[6, 1, None, 1, {"hwnd": 1}], [6, 1, None, 2, {"raw": b"\x00"}]]},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["accepted"] == 1
+    assert response.json()["rejected"] == 1
+    stored = db_session.query(BehaviorEvent).filter(BehaviorEvent.attempt_id == assigned_attempt.id).all()
+    assert [ev.seq for ev in stored] == [1]
+
+
+def test_unsupported_batch_content_type_is_rejected(client, kiosk_token, assigned_attempt):
+    response = client.post(
+        _batch_url(assigned_attempt.id),
+        headers={**auth_header(kiosk_token), "Content-Type": "text/csv"},
+        content=b"FOCUS_LOSS,warn",
+    )
+    assert response.status_code == 415
+    assert "application/json" in response.headers["Accept-Post"]
+
+
+def test_keystroke_bursts_are_stored_packed_and_decoded_on_open(
+    client, db_session, kiosk_token, teacher_token, assigned_attempt
+):
+    keys = [
+        {"key": k, "scan_code": 30 + i, "modifiers": [], "ts": 1767258000.25 + i, "proc": "msedgewebview2.exe"}
+        for i, k in enumerate("hello")
+    ]
+    response = client.post(
+        _batch_url(assigned_attempt.id),
+        headers=auth_header(kiosk_token),
+        json={
+            "events": [
+                {"event_type": "KEYSTROKE", "severity": "info", "payload": {"keys": keys, "burst_size": 5}}
+            ]
+        },
+    )
+    assert response.status_code == 200
+
+    listed = client.get(
+        f"/api/v1/behavior/attempts/{assigned_attempt.id}/events",
+        headers=auth_header(teacher_token),
+    ).json()
+    assert listed[0]["payload"] == {"burst_size": 5, "keys_preview": ["h", "e", "l"], "packed": True}
+
+    detail = client.get(f"/api/v1/behavior/events/{listed[0]['id']}", headers=auth_header(teacher_token))
+    assert detail.status_code == 200
+    assert detail.json()["payload"] == {"keys": keys, "burst_size": 5}
+
+    from app.models.behavior_event import BehaviorEvent
+
+    # Decoding for the response must not write the full payload back.
+    db_session.expire_all()
+    stored = db_session.query(BehaviorEvent).filter(BehaviorEvent.id == listed[0]["id"]).one()
+    assert stored.payload["packed"] is True
+
+
+def test_event_detail_enforces_attempt_visibility(
+    client, db_session, kiosk_token, student_token, other_student_token, assigned_attempt
+):
+    from app.models.behavior_event import BehaviorEvent
+
+    client.post(
+        _batch_url(assigned_attempt.id),
+        headers=auth_header(kiosk_token),
+        json={"events": [_sample_event()]},
+    )
+    event_id = db_session.query(BehaviorEvent.id).filter(BehaviorEvent.attempt_id == assigned_attempt.id).scalar()
+    url = f"/api/v1/behavior/events/{event_id}"
+
+    assert client.get(url, headers=auth_header(student_token)).status_code == 200
+    assert client.get(url, headers=auth_header(other_student_token)).status_code == 403
+    assert client.get("/api/v1/behavior/events/999999", headers=auth_header(student_token)).status_code == 404
+
+
+def _send_warning(client, teacher_token, attempt_id: int, message: str) -> int:
+    send = client.post(
+        f"/api/v1/proctor/attempts/{attempt_id}/warnings",
+        headers=auth_header(teacher_token),
+        json={"message": message, "severity": "warn"},
+    )
+    assert send.status_code == 200
+    return send.json()["id"]
+
+
+def test_batch_carries_warnings_and_acks(client, kiosk_token, teacher_token, assigned_attempt):
+    first = _send_warning(client, teacher_token, assigned_attempt.id, "Eyes up")
+    second = _send_warning(client, teacher_token, assigned_attempt.id, "Phone away")
+
+    resp = client.post(
+        _batch_url(assigned_attempt.id),
+        headers=auth_header(kiosk_token),
+        json={"events": [_sample_event()]},
+    ).json()
+    assert [(w["id"], w["message"]) for w in resp["warnings"]] == [
+        (first, "Eyes up"),
+        (second, "Phone away"),
+    ]
+    assert resp["warnings"][0]["sender_name"] == "Teacher User"
+
+    delivered = "2026-01-01T09:00:00+00:00"
+    resp = client.post(
+        _batch_url(assigned_attempt.id),
+        headers=auth_header(kiosk_token),
+        json={"events": [], "acks": [{"warning_id": first, "delivered_at": delivered}, {"oops": 1}]},
+    ).json()
+    assert [w["id"] for w in resp["warnings"]] == [second]
+    assert resp["latest_warning_id"] == second
+
+    listing = client.get(
+        f"/api/v1/proctor/attempts/{assigned_attempt.id}/warnings",
+        headers=auth_header(teacher_token),
+    ).json()
+    acked = next(w for w in listing if w["id"] == first)
+    assert acked["acknowledged_at"] is not None
+    assert acked["delivered_at"].startswith("2026-01-01T09:00:00")
+    # Piggybacked acks feed the latency histograms like the ack endpoint.
+    assert warning_latency.histograms(assigned_attempt.test_id)["ack"].count == 1
+
+
+def test_batch_acks_for_another_attempt_are_ignored(
+    client, kiosk_token, teacher_token, assigned_attempt, other_attempt
+):
+    foreign = _send_warning(client, teacher_token, other_attempt.id, "for B only")
+    resp = client.post(
+        _batch_url(assigned_attempt.id),
+        headers=auth_header(kiosk_token),
+        json={"events": [], "acks": [{"warning_id": foreign}]},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["warnings"] == []
+
+    listing = client.get(
+        f"/api/v1/proctor/attempts/{other_attempt.id}/warnings",
+        headers=auth_header(teacher_token),
+    ).json()
+    assert listing[0]["acknowledged_at"] is None
+
+
+def test_msgpack_batch_carries_acks(client, kiosk_token, teacher_token, assigned_attempt):
+    warning_id = _send_warning(client, teacher_token, assigned_attempt.id, "Eyes up")
+    now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    response = _post_msgpack(
+        client,
+        assigned_attempt.id,
+        kiosk_token,
+        {"v": 1, "events": [[6, 1, now_ms, 1]], "acks": [[warning_id, now_ms], ["bad"]]},
+    )
+    assert response.status_code == 200
+    assert response.json()["warnings"] == []
+
+
+def test_steady_state_batches_do_not_query_warnings(engine, client, kiosk_token, assigned_attempt):
+    from sqlalchemy import event
+
+    statements: list[str] = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if "proctor_warnings" in statement:
+            statements.append(statement)
+
+    def post():
+        return client.post(
+            _batch_url(assigned_attempt.id),
+            headers=auth_header(kiosk_token),
+            json={"events": [_sample_event()]},
+        ).json()
+
+    post()  # loads the attempt's warning marks
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        for _ in range(3):
+            body = post()
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+    assert body["latest_warning_id"] is None and body["warnings"] == []
+    assert statements == []
@@ -0,0 +1,409 @@
+"""Tests for the live monitoring snapshot (``live_service``).
+
+The snapshot is built from a fixed set of grouped / windowed queries per
+test, so the statement count on a cache miss must not grow with the
+number of active attempts.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from app.models.assignment import TestAssignment
+from app.models.behavior_event import BehaviorEvent, BehaviorEventType
+from app.models.proctor_warning import ProctorWarning
+from app.models.test import Test
+from app.models.test_attempt import AttemptStatus, TestAttempt
+from app.models.user import User, UserRole
+from app.core.config import settings
+from app.services import live_service
+from app.services.fleet_service import build_fleet_overview
+from app.services.warning_service import create_warning
+from app.services.live_service import get_live_snapshot, invalidate_cache
+
+
+def auth_header(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+@contextmanager
+def count_queries(engine):
+    statements: list[str] = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+
+def _seed_cohort(db_session, test, size: int, *, prefix: str) -> list[TestAttempt]:
+    """Create ``size`` students, each with one in-progress attempt and a
+    handful of events, without going through the (slow) bcrypt path."""
+    now = datetime.now(timezone.utc)
+    students = [
+        User(
+            full_name=f"{prefix} Student {i}",
+            email=f"{prefix}-{i}@example.com",
+            hashed_password="x",
+            role=UserRole.STUDENT,
+            is_active=True,
+        )
+        for i in range(size)
+    ]
+    db_session.add_all(students)
+    db_session.flush()
+
+    attempts = []
+    for student in students:
+        assignment = TestAssignment(
+            test_id=test.id, student_id=student.id, added_by=test.created_by
+        )
+        db_session.add(assignment)
+        db_session.flush()
+        attempts.append(
+            TestAttempt(
+                test_id=test.id,
+                student_id=student.id,
+                assignment_id=assignment.id,
+                status=AttemptStatus.IN_PROGRESS,
+                started_at=now - timedelta(minutes=5),
+            )
+        )
+    db_session.add_all(attempts)
+    db_session.flush()
+
+    events = []
+    for attempt in attempts:
+        for etype, severity, payload in (
+            (BehaviorEventType.FOCUS_LOSS, "warn", None),
+            (BehaviorEventType.MONITOR_COUNT_CHANGE, "warn", {"count": 2, "previous_count": 1}),
+            (BehaviorEventType.KEYSTROKE, "info", {"burst_size": 3}),
+        ):
+            events.append(
+                BehaviorEvent(
+                    attempt_id=attempt.id,
+                    test_id=test.id,
+                    student_id=attempt.student_id,
+                    event_type=etype,
+                    severity=severity,
+                    payload=payload,
+                    event_time=now - timedelta(seconds=10),
+                )
+            )
+    db_session.add_all(events)
+    db_session.commit()
+    return attempts
+
+
+def test_snapshot_row_reflects_latest_events(client, db_session, sample_test, assigned_attempt, teacher_token):
+    now = datetime.now(timezone.utc)
+    db_session.add_all(
+        [
+            BehaviorEvent(
+                attempt_id=assigned_attempt.id,
+                test_id=sample_test.id,
+                student_id=assigned_attempt.student_id,
+                event_type=BehaviorEventType.VM_DETECTED,
+                severity="critical",
+                event_time=now - timedelta(minutes=30),
+            ),
+            BehaviorEvent(
+                attempt_id=assigned_attempt.id,
+                test_id=sample_test.id,
+                student_id=assigned_attempt.student_id,
+                event_type=BehaviorEventType.FOCUS_LOSS,
+                severity="warn",
+                event_time=now - timedelta(seconds=20),
+            ),
+            BehaviorEvent(
+                attempt_id=assigned_attempt.id,
+                test_id=sample_test.id,
+                student_id=assigned_attempt.student_id,
+                event_type=BehaviorEventType.MONITOR_COUNT_CHANGE,
+                severity="warn",
+                payload={"count": 2, "previous_count": 1},
+                event_time=now - timedelta(seconds=15),
+            ),
+            BehaviorEvent(
+                attempt_id=assigned_attempt.id,
+                test_id=sample_test.id,
+                student_id=assigned_attempt.student_id,
+                event_type=BehaviorEventType.FOCUS_REGAIN,
+                severity="info",
+                event_time=now - timedelta(seconds=5),
+            ),
+            ProctorWarning(
+                attempt_id=assigned_attempt.id,
+                sender_id=sample_test.created_by,
+                message="Eyes on screen",
+                severity="warn",
+            ),
+        ]
+    )
+    db_session.commit()
+    invalidate_cache()
+
+    response = client.get(
+        f"/api/v1/proctor/tests/{sample_test.id}/live",
+        headers=auth_header(teacher_token),
+    )
+    assert response.status_code == 200
+    rows = response.json()["rows"]
+    assert len(rows) == 1
+    row = rows[0]
+    assert row["attempt_id"] == assigned_attempt.id
+    assert row["attempt_number"] == 1
+    assert row["focus_state"] == "in_focus"
+    assert row["monitor_count"] == 2
+    assert row["vm_detected"] is True
+    assert row["warnings_sent"] == 1
+    assert row["latest_event_type"] == "FOCUS_REGAIN"
+    # VM_DETECTED is outside the 60s window; focus loss + monitor change are in.
+    assert row["event_count_window"] == 3
+    assert row["risk_score"] == 5 + 15
+
+
+def test_attempt_number_is_read_from_the_attempt(db_session, sample_test, assigned_attempt):
+    now = datetime.now(timezone.utc)
+    assigned_attempt.started_at = now - timedelta(minutes=1)
+    assigned_attempt.attempt_number = 2
+    earlier = TestAttempt(
+        test_id=sample_test.id,
+        student_id=assigned_attempt.student_id,
+        assignment_id=assigned_attempt.assignment_id,
+        status=AttemptStatus.ENDED,
+        started_at=now - timedelta(hours=1),
+        ended_at=now - timedelta(minutes=50),
+        attempt_number=1,
+    )
+    db_session.add_all([assigned_attempt, earlier])
+    db_session.commit()
+    invalidate_cache()
+
+    snapshot = get_live_snapshot(db_session, sample_test)
+    assert [r.attempt_id for r in snapshot.rows] == [assigned_attempt.id]
+    assert snapshot.rows[0].attempt_number == 2
+
+
+def test_snapshot_query_count_is_independent_of_cohort_size(engine, db_session, sample_test):
+    _seed_cohort(db_session, sample_test, 5, prefix="small")
+    invalidate_cache()
+    with count_queries(engine) as small:
+        small_snapshot = get_live_snapshot(db_session, sample_test)
+
+    _seed_cohort(db_session, sample_test, 120, prefix="large")
+    invalidate_cache()
+    with count_queries(engine) as large:
+        large_snapshot = get_live_snapshot(db_session, sample_test)
+
+    assert len(small_snapshot.rows) == 5
+    assert len(large_snapshot.rows) == 125
+    assert len(large) == len(small)
+
+
+def test_live_stream_requires_staff_role(client, sample_test, student_token):
+    response = client.get(
+        f"/api/v1/proctor/tests/{sample_test.id}/live/stream",
+        headers=auth_header(student_token),
+    )
+    assert response.status_code == 403
+
+
+def test_live_stream_returns_404_for_unknown_test(client, teacher_token):
+    response = client.get(
+        "/api/v1/proctor/tests/999999/live/stream",
+        headers=auth_header(teacher_token),
+    )
+    assert response.status_code == 404
+
+
+def test_live_poll_revalidates_with_etag(
+    client, db_session, sample_test, assigned_attempt, teacher_token, monkeypatch
+):
+    now = [1000.0]
+    monkeypatch.setattr(live_service, "_clock", lambda: now[0])
+    # Past the TTL is a plain miss, rebuilt on the request's session.
+    monkeypatch.setattr(live_service.settings, "live_snapshot_stale_seconds", 0.0)
+    url = f"/api/v1/proctor/tests/{sample_test.id}/live"
+    headers = auth_header(teacher_token)
+
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+    etag = first.headers["etag"]
+    conditional = {**headers, "If-None-Match": etag}
+
+    cached = client.get(url, headers=conditional)
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    # A rebuild that finds nothing new keeps the body and its ETag...
+    now[0] += 2
+    assert client.get(url, headers=conditional).status_code == 304
+
+    # ...one that does gets a fresh body.
+    # Through the service, which keeps the warning index current.
+    teacher = db_session.get(User, sample_test.created_by)
+    create_warning(db_session, assigned_attempt, teacher, "Eyes on screen", "warn")
+    now[0] += 2
+    changed = client.get(url, headers=conditional)
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["rows"][0]["warnings_sent"] == 1
+
+
+def test_live_poll_since_version_returns_a_delta(
+    client, db_session, sample_test, assigned_attempt, teacher_token, monkeypatch
+):
+    now = [1000.0]
+    monkeypatch.setattr(live_service, "_clock", lambda: now[0])
+    monkeypatch.setattr(live_service.settings, "live_snapshot_stale_seconds", 0.0)
+    url = f"/api/v1/proctor/tests/{sample_test.id}/live"
+    headers = auth_header(teacher_token)
+
+    full = client.get(url, headers=headers).json()
+    version = full["version"]
+    assert version > 0
+
+    unchanged = client.get(url, params={"since": version}, headers=headers).json()
+    assert unchanged["version"] == version
+    assert unchanged["changed"] == [] and unchanged["removed"] == []
+
+    # Through the service, which keeps the warning index current.
+    teacher = db_session.get(User, sample_test.created_by)
+    create_warning(db_session, assigned_attempt, teacher, "Eyes on screen", "warn")
+    now[0] += 2
+    delta = client.get(url, params={"since": version}, headers=headers).json()
+    assert delta["version"] > version
+    assert [row["attempt_id"] for row in delta["changed"]] == [assigned_attempt.id]
+    assert delta["changed"][0]["warnings_sent"] == 1
+
+    # A cursor from before this board's history gets everything again.
+    resync = client.get(url, params={"since": 1}, headers=headers).json()
+    assert resync["version"] == delta["version"]
+    assert len(resync["rows"]) == 1
+
+
+def test_live_board_filters_and_pages(client, db_session, sample_test, teacher_token):
+    _seed_cohort(db_session, sample_test, 5, prefix="paged")
+    invalidate_cache()
+    url = f"/api/v1/proctor/tests/{sample_test.id}/live"
+    headers = auth_header(teacher_token)
+
+    first = client.get(url, params={"limit": 2}, headers=headers).json()
+    assert len(first["rows"]) == 2
+    second = client.get(
+        url, params={"limit": 2, "cursor": first["next_cursor"]}, headers=headers
+    ).json()
+    rest = client.get(
+        url, params={"limit": 2, "cursor": second["next_cursor"]}, headers=headers
+    ).json()
+    assert rest["next_cursor"] is None
+    pages = first["rows"] + second["rows"] + rest["rows"]
+    assert len({row["attempt_id"] for row in pages}) == 5
+
+    found = client.get(url, params={"q": "PAGED STUDENT 3"}, headers=headers).json()
+    assert [row["student_name"] for row in found["rows"]] == ["paged Student 3"]
+
+    assert client.get(url, params={"cursor": "%%%"}, headers=headers).status_code == 400
+    assert client.get(url, params={"since": 1, "limit": 5}, headers=headers).status_code == 400
+    assert client.get(url, params={"band": "purple"}, headers=headers).status_code == 422
+
+
+def _other_test(db_session, owner_id: int, name: str, **window) -> Test:
+    now = datetime.now(timezone.utc)
+    record = Test(
+        name=name,
+        external_link="https://example.com/other",
+        is_active=True,
+        start_time=window.get("start_time", now - timedelta(hours=1)),
+        end_time=window.get("end_time", now + timedelta(hours=1)),
+        created_by=owner_id,
+    )
+    db_session.add(record)
+    db_session.commit()
+    return record
+
+
+def test_fleet_overview_aggregates_running_tests(
+    client, db_session, sample_test, admin_user, proctor_token, teacher_token
+):
+    other = _other_test(db_session, admin_user.id, "Admin Hall")
+    _other_test(
+        db_session,
+        admin_user.id,
+        "Finished",
+        start_time=datetime.now(timezone.utc) - timedelta(days=2),
+        end_time=datetime.now(timezone.utc) - timedelta(days=1),
+    )
+    now = datetime.now(timezone.utc)
+    attempts = _seed_cohort(db_session, sample_test, 3, prefix="hall")
+    attempts += _seed_cohort(db_session, other, 2, prefix="admin")
+    for attempt in attempts:
+        attempt.last_activity_at = now
+    quiet = attempts[-1]
+    quiet.last_activity_at = now - timedelta(minutes=5)
+    db_session.commit()
+
+    url = "/api/v1/proctor/live/overview"
+    overview = client.get(url, headers=auth_header(proctor_token)).json()
+    by_test = {test["test_name"]: test for test in overview["tests"]}
+    assert set(by_test) == {"Sample Test", "Admin Hall"}
+    assert by_test["Sample Test"]["live_attempts"] == 3
+    hall = by_test["Admin Hall"]
+    assert hall["live_attempts"] == 2 and hall["disconnected"] == 1
+    assert hall["ok"] + hall["warn"] + hall["critical"] == 2
+    assert [row["attempt_id"] for row in overview["disconnected"]] == [quiet.id]
+    assert len(overview["top_risky"]) == 5
+    scores = [row["risk_score"] for row in overview["top_risky"]]
+    assert scores == sorted(scores, reverse=True) and scores[0] > 0
+
+    top = client.get(url, params={"top": 2}, headers=auth_header(proctor_token)).json()
+    assert len(top["top_risky"]) == 2
+
+    # Teachers only see the tests they created.
+    own = client.get(url, headers=auth_header(teacher_token)).json()
+    assert [test["test_name"] for test in own["tests"]] == ["Sample Test"]
+    assert {row["test_id"] for row in own["top_risky"]} == {sample_test.id}
+
+
+def test_fleet_overview_query_count_is_independent_of_fleet_size(
+    engine, db_session, sample_test, admin_user, monkeypatch
+):
+    monkeypatch.setattr(settings, "live_risk_engine", False)
+    _seed_cohort(db_session, sample_test, 2, prefix="small")
+    with count_queries(engine) as small:
+        build_fleet_overview(db_session)
+
+    for i in range(3):
+        hall = _other_test(db_session, admin_user.id, f"Hall {i}")
+        _seed_cohort(db_session, hall, 5, prefix=f"big{i}")
+    with count_queries(engine) as large:
+        overview = build_fleet_overview(db_session)
+
+    assert len(overview.tests) == 4
+    assert len(large) == len(small)
+
+
+def test_fleet_overview_is_cached_with_etag(client, db_session, sample_test, proctor_token):
+    _seed_cohort(db_session, sample_test, 1, prefix="etag")
+    url = "/api/v1/proctor/live/overview"
+    first = client.get(url, headers=auth_header(proctor_token))
+    assert first.status_code == 200
+    again = client.get(
+        url, headers={**auth_header(proctor_token), "If-None-Match": first.headers["ETag"]}
+    )
+    assert again.status_code == 304
+
+
+def test_fleet_overview_rejects_students(client, student_token):
+    response = client.get("/api/v1/proctor/live/overview", headers=auth_header(student_token))
+    assert response.status_code == 403
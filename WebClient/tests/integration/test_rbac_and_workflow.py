@@ -95,3 +95,35 @@ def test_invalid_token_returns_401(client):
         headers={"Authorization": "Bearer invalid.token.value"},
     )
     assert response.status_code == 401
+
+
+def test_unassigning_revokes_the_kiosk_token(
+    client, teacher_token, student_user, sample_test, assigned_attempt, kiosk_token
+):
+    kiosk = auth_header(kiosk_token)
+    events_url = f"/api/v1/behavior/attempts/{assigned_attempt.id}/events"
+    event = {"event_type": "FOCUS_LOSS", "payload": {}}
+    assert client.post(events_url, json=event, headers=kiosk).status_code == 200
+
+    response = client.delete(
+        f"/api/v1/tests/{sample_test.id}/students/{student_user.id}",
+        headers=auth_header(teacher_token),
+    )
+    assert response.status_code == 200
+
+    response = client.post(events_url, json=event, headers=kiosk)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Attempt no longer exists"
+
+
+def test_renamed_test_shows_on_the_live_board(client, teacher_token, sample_test):
+    headers = auth_header(teacher_token)
+    live_url = f"/api/v1/proctor/tests/{sample_test.id}/live"
+    assert client.get(live_url, headers=headers).json()["test_name"] == "Sample Test"
+
+    response = client.patch(
+        f"/api/v1/tests/{sample_test.id}", json={"name": "Renamed"}, headers=headers
+    )
+    assert response.status_code == 200
+
+    assert client.get(live_url, headers=headers).json()["test_name"] == "Renamed"
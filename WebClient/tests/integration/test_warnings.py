@@ -2,6 +2,18 @@
 
 from __future__ import annotations
 
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from app.models.behavior_event import BehaviorEvent, BehaviorEventType
+from app.models.proctor_warning import ProctorWarning
+from app.models.test_attempt import AttemptStatus
+from app.services import warning_waiters
+from app.services.warning_service import create_warning
+
 
 def auth_header(token: str) -> dict[str, str]:
     return {"Authorization": f"Bearer {token}"}
@@ -256,3 +268,278 @@ def test_teacher_jwt_cannot_ack_warning(
         json={},
     )
     assert response.status_code == 401
+
+
+# ---------------------------------------------------------------------------
+# Long-poll (GET /attempts/{id}/warnings?wait=N)
+# ---------------------------------------------------------------------------
+def test_long_poll_returns_pending_warnings_immediately(
+    client, teacher_token, kiosk_token, assigned_attempt
+):
+    client.post(
+        _send_url(assigned_attempt.id),
+        headers=auth_header(teacher_token),
+        json={"message": "Already here", "severity": "info"},
+    )
+    started = time.monotonic()
+    listing = client.get(
+        _send_url(assigned_attempt.id),
+        params={"wait": 10},
+        headers=auth_header(kiosk_token),
+    )
+    assert listing.status_code == 200
+    assert [r["message"] for r in listing.json()] == ["Already here"]
+    assert time.monotonic() - started < 5
+
+
+def test_long_poll_times_out_empty(client, kiosk_token, assigned_attempt):
+    started = time.monotonic()
+    listing = client.get(
+        _send_url(assigned_attempt.id),
+        params={"wait": 1},
+        headers=auth_header(kiosk_token),
+    )
+    assert listing.status_code == 200
+    assert listing.json() == []
+    assert time.monotonic() - started >= 1
+
+
+def test_long_poll_wakes_on_new_warning(
+    client, db_session, kiosk_token, assigned_attempt, teacher_user, monkeypatch
+):
+    parked = threading.Event()
+    original_wait = warning_waiters.Waiter.wait
+
+    async def wait(self, timeout):
+        parked.set()
+        return await original_wait(self, timeout)
+
+    monkeypatch.setattr(warning_waiters.Waiter, "wait", wait)
+
+    responses = []
+    poll = threading.Thread(
+        target=lambda: responses.append(
+            client.get(
+                _send_url(assigned_attempt.id),
+                params={"wait": 20},
+                headers=auth_header(kiosk_token),
+            )
+        )
+    )
+    started = time.monotonic()
+    poll.start()
+    assert parked.wait(5)
+    create_warning(db_session, assigned_attempt, teacher_user, "Wake up", "warn")
+    poll.join(10)
+
+    assert [r["message"] for r in responses[0].json()] == ["Wake up"]
+    assert time.monotonic() - started < 10
+
+
+def test_long_poll_wait_is_bounded(client, kiosk_token, assigned_attempt):
+    response = client.get(
+        _send_url(assigned_attempt.id),
+        params={"wait": 3600},
+        headers=auth_header(kiosk_token),
+    )
+    assert response.status_code == 422
+
+
+# ---------------------------------------------------------------------------
+# Broadcast (POST /tests/{id}/warnings:broadcast)
+# ---------------------------------------------------------------------------
+def _broadcast_url(test_id: int) -> str:
+    return f"/api/v1/proctor/tests/{test_id}/warnings:broadcast"
+
+
+def test_broadcast_warns_every_in_progress_attempt(
+    client, db_session, engine, teacher_token, sample_test, assigned_attempt, other_attempt
+):
+    inserts: list[str] = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT INTO PROCTOR_WARNINGS"):
+            inserts.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        response = client.post(
+            _broadcast_url(sample_test.id),
+            headers=auth_header(teacher_token),
+            json={"message": "  Five minutes left.  ", "severity": "info"},
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body == {
+        "sent": 2,
+        "attempt_ids": sorted([assigned_attempt.id, other_attempt.id]),
+    }
+    assert len(inserts) == 1
+    rows = db_session.query(ProctorWarning).order_by(ProctorWarning.attempt_id).all()
+    assert [(w.attempt_id, w.message, w.severity) for w in rows] == [
+        (aid, "Five minutes left.", "info") for aid in body["attempt_ids"]
+    ]
+
+
+def test_broadcast_filters_combine(
+    client, db_session, proctor_token, sample_test, assigned_attempt, other_attempt
+):
+    db_session.add(
+        BehaviorEvent(
+            attempt_id=assigned_attempt.id,
+            test_id=sample_test.id,
+            student_id=assigned_attempt.student_id,
+            event_type=BehaviorEventType.VM_DETECTED,
+            severity="critical",
+            event_time=datetime.now(timezone.utc),
+        )
+    )
+    db_session.commit()
+
+    def send(**filters):
+        response = client.post(
+            _broadcast_url(sample_test.id),
+            headers=auth_header(proctor_token),
+            json={"message": "Heads up", **filters},
+        )
+        assert response.status_code == 200
+        return response.json()["attempt_ids"]
+
+    assert send(bands=["warn", "critical"]) == [assigned_attempt.id]
+    assert send(bands=["ok"]) == [other_attempt.id]
+    assert send(student_ids=[other_attempt.student_id]) == [other_attempt.id]
+    assert send(bands=["ok"], student_ids=[assigned_attempt.student_id]) == []
+
+    other_attempt.status = AttemptStatus.ENDED
+    db_session.commit()
+    assert send() == [assigned_attempt.id]
+    assert send(statuses=["ended"]) == [other_attempt.id]
+
+
+def test_broadcast_permissions(
+    client, db_session, admin_user, teacher_token, student_token, sample_test, assigned_attempt
+):
+    from app.models.test import Test
+
+    foreign = Test(
+        name="Admin Test",
+        external_link="https://example.com/admin",
+        is_active=True,
+        start_time=sample_test.start_time,
+        end_time=sample_test.end_time,
+        created_by=admin_user.id,
+    )
+    db_session.add(foreign)
+    db_session.commit()
+
+    payload = {"message": "Hello"}
+    assert client.post(
+        _broadcast_url(foreign.id), headers=auth_header(teacher_token), json=payload
+    ).status_code == 403
+    assert client.post(
+        _broadcast_url(sample_test.id), headers=auth_header(student_token), json=payload
+    ).status_code == 403
+    assert client.post(
+        _broadcast_url(999999), headers=auth_header(teacher_token), json=payload
+    ).status_code == 404
+    assert client.post(
+        _broadcast_url(sample_test.id),
+        headers=auth_header(teacher_token),
+        json={"message": "Hello", "bands": ["purple"]},
+    ).status_code == 422
+    assert db_session.query(ProctorWarning).count() == 0
+
+
+def test_broadcast_wakes_parked_kiosks(
+    client, kiosk_token, teacher_token, sample_test, assigned_attempt, monkeypatch
+):
+    parked = threading.Event()
+    original_wait = warning_waiters.Waiter.wait
+
+    async def wait(self, timeout):
+        parked.set()
+        return await original_wait(self, timeout)
+
+    monkeypatch.setattr(warning_waiters.Waiter, "wait", wait)
+
+    responses = []
+    poll = threading.Thread(
+        target=lambda: responses.append(
+            client.get(
+                _send_url(assigned_attempt.id),
+                params={"wait": 20},
+                headers=auth_header(kiosk_token),
+            )
+        )
+    )
+    started = time.monotonic()
+    poll.start()
+    assert parked.wait(5)
+    client.post(
+        _broadcast_url(sample_test.id),
+        headers=auth_header(teacher_token),
+        json={"message": "Pens down"},
+    )
+    poll.join(10)
+
+    assert [r["message"] for r in responses[0].json()] == ["Pens down"]
+    assert time.monotonic() - started < 10
+
+
+# ---------------------------------------------------------------------------
+# Latency (GET .../warnings/latency, /metrics)
+# ---------------------------------------------------------------------------
+def test_acks_feed_the_latency_summaries(
+    client, teacher_token, proctor_token, kiosk_token, sample_test, assigned_attempt
+):
+    sent = client.post(
+        _send_url(assigned_attempt.id),
+        headers=auth_header(teacher_token),
+        json={"message": "Time it", "severity": "warn"},
+    ).json()
+    client.post(_ack_url(sent["id"]), headers=auth_header(kiosk_token), json={})
+    # A second ack of the same warning is not a second observation.
+    client.post(_ack_url(sent["id"]), headers=auth_header(kiosk_token), json={})
+
+    per_test = client.get(
+        f"/api/v1/proctor/tests/{sample_test.id}/warnings/latency",
+        headers=auth_header(teacher_token),
+    )
+    assert per_test.status_code == 200
+    body = per_test.json()
+    assert body["test_id"] == sample_test.id
+    assert body["deliver"]["count"] == body["ack"]["count"] == 1
+    assert sum(bucket["count"] for bucket in body["deliver"]["buckets"]) == 1
+    assert body["deliver"]["buckets"][-1]["le_seconds"] is None
+
+    overall = client.get("/api/v1/proctor/warnings/latency", headers=auth_header(proctor_token))
+    assert overall.json()["test_id"] is None
+    assert overall.json()["ack"]["count"] == 1
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    assert f'test_id="{sample_test.id}",stage="deliver"' in metrics.text
+
+
+def test_latency_summary_permissions(client, db_session, admin_user, teacher_token, student_token, sample_test):
+    from app.models.test import Test
+
+    foreign = Test(
+        name="Admin Test",
+        external_link="https://example.com/admin",
+        is_active=True,
+        start_time=sample_test.start_time,
+        end_time=sample_test.end_time,
+        created_by=admin_user.id,
+    )
+    db_session.add(foreign)
+    db_session.commit()
+
+    url = "/api/v1/proctor/tests/{}/warnings/latency"
+    assert client.get(url.format(foreign.id), headers=auth_header(teacher_token)).status_code == 403
+    assert client.get(url.format(sample_test.id), headers=auth_header(student_token)).status_code == 403
+    assert client.get(url.format(999999), headers=auth_header(teacher_token)).status_code == 404
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.test_attempt import AttemptStatus, TestAttempt
+from app.services import attempt_counters
+from app.services.attempt_counters import counts_toward_limit, find_drift, repair
+from app.services.attempt_service import end_attempt, get_attempts_used, start_attempt
+
+
+def test_counts_toward_limit_excludes_system_closed_attempts():
+    assert counts_toward_limit(None) is True
+    assert counts_toward_limit("candidate_finished") is True
+    assert counts_toward_limit("auto_closed_stale_after_300s") is False
+    assert counts_toward_limit("auto_closed_stale_reaped") is False
+    assert counts_toward_limit("orphan_no_active_attempt") is False
+
+
+def test_end_attempt_charges_the_assignment(db_session, sample_test, student_user, assigned_attempt):
+    sample_test.max_attempts = 3
+    db_session.commit()
+
+    ended = end_attempt(db_session, sample_test, student_user)
+    orphan = end_attempt(db_session, sample_test, student_user)
+
+    assert ended.counts_toward_limit is True
+    assert orphan.counts_toward_limit is False
+    assert get_attempts_used(db_session, sample_test.id, student_user.id) == 1
+    assert find_drift(db_session) == []
+
+
+def test_stale_close_does_not_charge_the_assignment(db_session, sample_test, student_user, assigned_attempt):
+    sample_test.max_attempts = 2
+    assigned_attempt.started_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    db_session.commit()
+
+    start_attempt(db_session, sample_test, student_user)
+
+    db_session.refresh(assigned_attempt)
+    assert assigned_attempt.counts_toward_limit is False
+    assert get_attempts_used(db_session, sample_test.id, student_user.id) == 0
+
+
+def test_start_attempt_enforces_the_counter(db_session, sample_test, student_user, assigned_attempt):
+    end_attempt(db_session, sample_test, student_user)
+
+    with pytest.raises(HTTPException) as exc:
+        start_attempt(db_session, sample_test, student_user)
+    assert exc.value.status_code == 409
+
+
+def test_repair_recomputes_from_history(db_session, sample_test, student_user, assigned_attempt):
+    sample_test.max_attempts = 5
+    now = datetime.now(timezone.utc)
+    # Written behind the service's back: one real ended attempt, one
+    # orphan, and a counter that disagrees with both.
+    db_session.add_all(
+        [
+            TestAttempt(
+                test_id=sample_test.id,
+                student_id=student_user.id,
+                status=AttemptStatus.ENDED,
+                started_at=now - timedelta(hours=2),
+                ended_at=now - timedelta(hours=1),
+                attempt_number=2,
+            ),
+            TestAttempt(
+                test_id=sample_test.id,
+                student_id=student_user.id,
+                status=AttemptStatus.ENDED,
+                started_at=now,
+                ended_at=now,
+                ended_reason="orphan_no_active_attempt",
+                attempt_number=3,
+            ),
+        ]
+    )
+    assigned_attempt.assignment.attempts_used = 4
+    db_session.commit()
+
+    drift = find_drift(db_session)
+    assert [(d.assignment_id, d.stored, d.actual) for d in drift] == [(assigned_attempt.assignment_id, 4, 1)]
+
+    assert repair(db_session) == drift
+    assert find_drift(db_session) == []
+    assert get_attempts_used(db_session, sample_test.id, student_user.id) == 1
+    flags = {
+        a.ended_reason: a.counts_toward_limit
+        for a in db_session.query(TestAttempt).filter(TestAttempt.status == AttemptStatus.ENDED)
+    }
+    assert flags == {None: True, "orphan_no_active_attempt": False}
+
+
+def test_check_command_exits_nonzero_on_drift(db_session, assigned_attempt, monkeypatch, capsys):
+    assigned_attempt.assignment.attempts_used = 2
+    db_session.commit()
+    monkeypatch.setattr("app.db.session.SessionLocal", lambda: db_session)
+
+    assert attempt_counters.main(["check"]) == 1
+    assert "stored 2, actual 0" in capsys.readouterr().out
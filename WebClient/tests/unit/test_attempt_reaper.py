@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models.test_attempt import AttemptStatus, TestAttempt
+from app.services import attempt_reaper
+from app.services.attempt_reaper import REAPED_REASON, AttemptReaper, close_stale, idle_cutoff
+from app.services.attempt_service import get_attempts_used
+
+
+def _attempt(db, sample_test, student_id, **fields):
+    attempt = TestAttempt(test_id=sample_test.id, student_id=student_id, **fields)
+    db.add(attempt)
+    db.commit()
+    return attempt
+
+
+def test_close_stale_closes_only_idle_in_progress_attempts(db_session, sample_test, student_user, other_student_user):
+    now = datetime.now(timezone.utc)
+    idle = idle_cutoff(now) - timedelta(seconds=1)
+    busy = idle_cutoff(now) + timedelta(seconds=30)
+    stale = _attempt(db_session, sample_test, student_user.id, started_at=now - timedelta(hours=1), last_activity_at=idle)
+    quiet = _attempt(db_session, sample_test, other_student_user.id, started_at=idle, attempt_number=1)
+    live = _attempt(
+        db_session, sample_test, other_student_user.id, started_at=idle, last_activity_at=busy, attempt_number=2
+    )
+    ended = _attempt(
+        db_session,
+        sample_test,
+        student_user.id,
+        status=AttemptStatus.ENDED,
+        started_at=now - timedelta(hours=2),
+        ended_at=now - timedelta(hours=1),
+        attempt_number=2,
+    )
+
+    reaped = close_stale(db_session.connection(), now)
+    db_session.commit()
+    db_session.expire_all()
+
+    assert sorted(reaped) == sorted([(stale.id, sample_test.id), (quiet.id, sample_test.id)])
+    assert stale.status == AttemptStatus.ENDED
+    assert stale.ended_reason == REAPED_REASON
+    assert quiet.status == AttemptStatus.ENDED
+    assert live.status == AttemptStatus.IN_PROGRESS
+    assert ended.ended_reason is None
+    # Closed on the candidate's behalf: doesn't use up an attempt.
+    assert stale.counts_toward_limit is False
+    assert get_attempts_used(db_session, sample_test.id, student_user.id) == 0
+
+
+def test_close_stale_is_capped_per_sweep(db_session, sample_test, student_user, monkeypatch):
+    monkeypatch.setattr(attempt_reaper.settings, "attempt_reaper_batch_size", 2)
+    old = datetime.now(timezone.utc) - timedelta(hours=1)
+    for number in range(1, 4):
+        _attempt(db_session, sample_test, student_user.id, started_at=old, attempt_number=number)
+
+    assert len(close_stale(db_session.connection())) == 2
+    assert len(close_stale(db_session.connection())) == 1
+    assert close_stale(db_session.connection()) == []
+
+
+def test_sweep_commits_and_records_stats():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    old = datetime.now(timezone.utc) - timedelta(hours=1)
+    with Session(engine) as db:
+        db.add_all(
+            [TestAttempt(test_id=1, student_id=student_id, started_at=old) for student_id in (1, 2, 3)]
+        )
+        db.commit()
+
+    reaper = AttemptReaper(interval_seconds=60)
+    assert len(reaper.sweep(engine)) == 3
+    assert reaper.sweep(engine) == []
+
+    stats = reaper.stats()
+    assert stats.sweeps == 2
+    assert stats.reaped == 3
+    assert stats.last_reaped == 0
+    assert stats.last_sweep_at is not None
+    with Session(engine) as db:
+        assert db.query(TestAttempt).filter(TestAttempt.status == AttemptStatus.IN_PROGRESS).count() == 0
+    engine.dispose()
+
+
+def test_sweep_counters_are_scraped_from_metrics(client, monkeypatch):
+    import app.main
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        db.add(TestAttempt(test_id=1, student_id=1, started_at=datetime.now(timezone.utc) - timedelta(hours=1)))
+        db.commit()
+    reaper = AttemptReaper(interval_seconds=60)
+    monkeypatch.setattr(app.main, "attempt_reaper", reaper)
+    assert len(reaper.sweep(engine)) == 1
+    engine.dispose()
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    lines = metrics.text.splitlines()
+    assert "omniproctor_attempt_reaper_sweeps_total 1" in lines
+    assert "omniproctor_attempt_reaper_skipped_total 0" in lines
+    assert "omniproctor_attempt_reaper_failed_total 0" in lines
+    assert "omniproctor_attempt_reaper_reaped_total 1" in lines
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.models.test_attempt import AttemptStatus
+from app.services import attempt_activity
+from app.services.attempt_service import STALE_ATTEMPT_SECONDS, end_attempt, start_attempt
+from app.services.behavior_service import create_behavior_events_bulk
+from app.schemas.behavior import BehaviorEventCreateRequest
+
+
+def _as_utc(value):
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def test_attempt_numbers_are_assigned_in_order(db_session, sample_test, student_user, assigned_attempt):
+    sample_test.max_attempts = 5
+    db_session.commit()
+
+    end_attempt(db_session, sample_test, student_user)
+    second = start_attempt(db_session, sample_test, student_user)
+    end_attempt(db_session, sample_test, student_user)
+    orphan = end_attempt(db_session, sample_test, student_user, reason="double_click")
+    third = start_attempt(db_session, sample_test, student_user)
+
+    assert assigned_attempt.attempt_number == 1
+    assert second.attempt_number == 2
+    assert orphan.ended_reason == "orphan_double_click"
+    assert orphan.attempt_number == 3
+    assert third.attempt_number == 4
+
+
+def test_start_reuses_attempt_with_recent_activity(db_session, sample_test, student_user, assigned_attempt):
+    now = datetime.now(timezone.utc)
+    assigned_attempt.started_at = now - timedelta(hours=1)
+    assigned_attempt.last_activity_at = now - timedelta(seconds=STALE_ATTEMPT_SECONDS // 2)
+    db_session.commit()
+
+    attempt = start_attempt(db_session, sample_test, student_user)
+
+    assert attempt.id == assigned_attempt.id
+    assert attempt.status == AttemptStatus.IN_PROGRESS
+
+
+def test_start_closes_idle_attempt(db_session, sample_test, student_user, assigned_attempt):
+    sample_test.max_attempts = 2
+    now = datetime.now(timezone.utc)
+    assigned_attempt.started_at = now - timedelta(hours=1)
+    assigned_attempt.last_activity_at = now - timedelta(minutes=10)
+    db_session.commit()
+
+    attempt = start_attempt(db_session, sample_test, student_user)
+
+    db_session.refresh(assigned_attempt)
+    assert attempt.id != assigned_attempt.id
+    assert attempt.attempt_number == 2
+    assert assigned_attempt.status == AttemptStatus.ENDED
+    assert assigned_attempt.ended_reason.startswith("auto_closed_stale_after_")
+
+
+def test_ingest_stamps_last_activity_throttled(db_session, assigned_attempt):
+    now = datetime.now(timezone.utc)
+    first = now - timedelta(seconds=60)
+
+    def send(at):
+        event = BehaviorEventCreateRequest(event_type="FOCUS_LOSS", severity="warn", event_time=at)
+        create_behavior_events_bulk(db_session, assigned_attempt, [event])
+        db_session.refresh(assigned_attempt)
+        return _as_utc(assigned_attempt.last_activity_at)
+
+    assert send(first) == first
+    # Inside the resolution window: no write.
+    assert send(first + timedelta(seconds=attempt_activity.ACTIVITY_RESOLUTION_SECONDS - 1)) == first
+    later = first + timedelta(seconds=attempt_activity.ACTIVITY_RESOLUTION_SECONDS)
+    assert send(later) == later
+
+
+def test_stamp_never_moves_activity_back_or_into_the_future(db_session, assigned_attempt):
+    now = datetime.now(timezone.utc)
+    assigned_attempt.last_activity_at = now - timedelta(seconds=5)
+    db_session.commit()
+
+    older = SimpleNamespace(attempt_id=assigned_attempt.id, event_time=now - timedelta(minutes=5))
+    attempt_activity.record(attempt_activity.stamp(db_session, [older]))
+    db_session.commit()
+    db_session.refresh(assigned_attempt)
+    assert _as_utc(assigned_attempt.last_activity_at) == now - timedelta(seconds=5)
+
+    attempt_activity.reset()
+    future = SimpleNamespace(attempt_id=assigned_attempt.id, event_time=now + timedelta(hours=1))
+    attempt_activity.stamp(db_session, [future])
+    db_session.commit()
+    db_session.refresh(assigned_attempt)
+    assert _as_utc(assigned_attempt.last_activity_at) <= datetime.now(timezone.utc)
@@ -0,0 +1,142 @@
+"""Cache backends and the cached kiosk / test lookups."""
+
+import time
+
+import pytest
+
+from app.core import cache
+from app.core.cache import CACHE_KEY_VERSION, MemoryBackend, RedisBackend
+from app.services import lookup_cache
+
+
+@pytest.fixture
+def invalidations():
+    seen: list[str] = []
+    cache.add_invalidation_listener(seen.append)
+    yield seen
+    cache._listeners.remove(seen.append)
+
+
+def test_keys_carry_the_encoding_version():
+    backend = MemoryBackend("op")
+    assert backend.key("attempt", 7) == f"op:v{CACHE_KEY_VERSION}:attempt:7"
+
+
+def test_memory_entries_expire():
+    backend = MemoryBackend("op")
+    backend.set("k", b"v", ttl=0.05)
+    assert backend.get("k") == b"v"
+    time.sleep(0.06)
+    assert backend.get("k") is None
+
+
+def test_memory_add_only_sets_absent_keys():
+    backend = MemoryBackend("op")
+    assert backend.add("lease", b"a", ttl=0.05)
+    assert not backend.add("lease", b"b", ttl=0.05)
+    assert backend.get("lease") == b"a"
+    time.sleep(0.06)
+    assert backend.add("lease", b"c", ttl=0.05)
+
+
+def test_memory_delete_notifies_listeners(invalidations):
+    backend = MemoryBackend("op")
+    backend.set("k", b"v", ttl=10)
+    backend.delete("k")
+    assert backend.get("k") is None
+    assert invalidations == ["k"]
+
+
+def test_memory_backend_stays_bounded():
+    backend = MemoryBackend("op", max_entries=3)
+    for i in range(5):
+        backend.set(f"k{i}", b"v", ttl=10)
+    assert [backend.get(f"k{i}") for i in range(5)] == [None, None, b"v", b"v", b"v"]
+
+
+def test_attempt_ref_is_served_from_cache(db_session, assigned_attempt):
+    ref = lookup_cache.get_attempt_ref(db_session, assigned_attempt.id)
+    assert ref == lookup_cache.AttemptRef(
+        assigned_attempt.id, assigned_attempt.test_id, assigned_attempt.student_id
+    )
+
+    db_session.delete(assigned_attempt)
+    db_session.flush()
+    assert lookup_cache.get_attempt_ref(db_session, assigned_attempt.id) == ref
+
+    lookup_cache.forget_attempts([assigned_attempt.id])
+    assert lookup_cache.get_attempt_ref(db_session, assigned_attempt.id) is None
+
+
+def test_test_meta_round_trips(db_session, sample_test):
+    meta = lookup_cache.get_test_meta(db_session, sample_test.id)
+    cached = lookup_cache.get_test_meta(db_session, sample_test.id)
+    assert cached == meta
+    assert cached.name == "Sample Test"
+    assert cached.start_time == sample_test.start_time
+
+
+# ---------------------------------------------------------------------------
+# Redis backend - needs fakeredis; skipped where it isn't installed.
+# ---------------------------------------------------------------------------
+def _eventually(predicate, timeout: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+@pytest.fixture
+def redis_workers():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    workers = [RedisBackend(fakeredis.FakeRedis(server=server), "op") for _ in range(2)]
+    # A listener clears its local copies when it (re)subscribes.
+    assert _eventually(lambda: workers[0]._client.pubsub_numsub(workers[0].channel)[0][1] == 2)
+    yield workers
+    for worker in workers:
+        worker.close()
+
+
+def test_redis_entries_are_shared_between_workers(redis_workers):
+    a, b = redis_workers
+    a.set("k", b"v", ttl=10)
+    assert b.get("k") == b"v"
+    assert a.add("lease", b"1", ttl=10)
+    assert not b.add("lease", b"1", ttl=10)
+
+
+def test_redis_delete_evicts_other_workers_local_copies(redis_workers, invalidations):
+    a, b = redis_workers
+    a.set("k", b"old", ttl=10)
+    assert b.get("k", local_ttl=60) == b"old"
+    # Behind b's back: b keeps answering from its local copy...
+    b._client.set("k", b"new")
+    assert b.get("k", local_ttl=60) == b"old"
+    # ...until someone deletes the key and the invalidation arrives.
+    a.delete("k")
+    assert _eventually(lambda: b._local.get("k") is None)
+    assert b.get("k", local_ttl=60) is None
+    assert _eventually(lambda: invalidations.count("k") >= 2)
+
+
+def test_memory_delete_many_notifies_for_each_key(invalidations):
+    backend = MemoryBackend("op")
+    backend.set("a", b"1", ttl=10)
+    backend.set("b", b"2", ttl=10)
+    backend.delete_many(["a", "b"])
+    assert backend.get("a") is None and backend.get("b") is None
+    assert invalidations == ["a", "b"]
+
+
+def test_redis_delete_many_reaches_other_workers(redis_workers, invalidations):
+    a, b = redis_workers
+    a.set("x", b"1", ttl=10)
+    a.set("y", b"2", ttl=10)
+    assert b.get("x", local_ttl=60) == b"1"
+    a.delete_many(["x", "y"])
+    assert a.get("y") is None
+    assert _eventually(lambda: b._local.get("x") is None)
+    assert _eventually(lambda: invalidations.count("y") >= 2)
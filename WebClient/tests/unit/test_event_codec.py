@@ -0,0 +1,91 @@
+"""Tests for the batch body codecs (``event_codec``)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import msgpack
+
+from app.models.behavior_event import BehaviorEventType
+from app.schemas.behavior import BehaviorEventCreateRequest
+from app.services.event_codec import (
+    EVENT_TYPE_CODES,
+    SEVERITY_CODES,
+    decode_json_acks,
+    decode_json_events,
+    decode_msgpack_acks,
+    decode_msgpack_events,
+)
+
+
+def test_every_event_type_has_a_stable_code():
+    assert set(EVENT_TYPE_CODES.values()) == set(BehaviorEventType)
+    # Wire protocol - these must never be renumbered.
+    assert EVENT_TYPE_CODES[6] is BehaviorEventType.FOCUS_LOSS
+    assert EVENT_TYPE_CODES[9] is BehaviorEventType.KEYSTROKE
+    assert SEVERITY_CODES == ("info", "warn", "critical")
+
+
+def test_compact_events_decode_like_their_json_equivalent():
+    when = datetime(2026, 3, 1, 12, 0, 0, 250_000, tzinfo=timezone.utc)
+    json_batch = decode_json_events(
+        [
+            {
+                "event_type": "MONITOR_COUNT_CHANGE",
+                "severity": "critical",
+                "event_time": when.isoformat(),
+                "seq": 7,
+                "payload": {"count": 2},
+            },
+            {"event_type": "FOCUS_REGAIN", "severity": "bogus"},
+        ],
+        attempt_id=1,
+    )
+    msgpack_batch = decode_msgpack_events(
+        [[8, 2, int(when.timestamp() * 1000), 7, {"count": 2}], [7, 42]],
+        attempt_id=1,
+    )
+
+    assert msgpack_batch.rejected == json_batch.rejected == 0
+    for compact, verbose in zip(msgpack_batch.valid, json_batch.valid):
+        assert isinstance(compact, BehaviorEventCreateRequest)
+        assert compact.model_dump() == verbose.model_dump()
+
+
+def test_malformed_compact_events_are_rejected_with_their_seq():
+    batch = decode_msgpack_events(
+        [[True, 0, None, 3], [6, 0, "yesterday", 4], [6, 0, None, 5, ["x"]], [6]],
+        attempt_id=1,
+    )
+    assert batch.rejected == 3
+    assert batch.rejected_seqs == [3, 4, 5]
+    assert [ev.event_type for ev in batch.valid] == [BehaviorEventType.FOCUS_LOSS]
+
+
+def test_compact_payloads_must_be_json_storable():
+    batch = decode_msgpack_events(
+        [
+            [6, 0, None, 1, {"blob": b"\x00\x01"}],
+            [6, 0, None, 2, {"nested": [{"ok": 1}, {"t": msgpack.ExtType(5, b"x")}]}],
+            [6, 0, None, 3, {1: "int key"}],
+            [6, 0, None, 4, {"ratio": float("nan")}],
+            [6, 0, None, 5, {"nested": [{"ok": 1.5}, None, True, "x"]}],
+        ],
+        attempt_id=1,
+    )
+    assert batch.rejected_seqs == [1, 2, 3, 4]
+    assert [ev.seq for ev in batch.valid] == [5]
+
+
+def test_compact_acks_decode_like_their_json_equivalent():
+    when = datetime(2026, 3, 1, 12, 0, 0, 250_000, tzinfo=timezone.utc)
+    verbose = decode_json_acks(
+        [{"warning_id": 4, "delivered_at": when.isoformat()}, {"warning_id": 5}, {"warning_id": 0}],
+        attempt_id=1,
+    )
+    compact = decode_msgpack_acks(
+        [[4, int(when.timestamp() * 1000)], [5], [0], [True], "x"],
+        attempt_id=1,
+    )
+    assert [ack.model_dump() for ack in compact] == [ack.model_dump() for ack in verbose]
+    assert [ack.warning_id for ack in compact] == [4, 5]
@@ -0,0 +1,89 @@
+"""Tests for the behavior_events partition bookkeeping.
+
+The DDL itself needs Postgres; these cover the month arithmetic,
+retention selection and that the hand-written parent table stays in
+step with the ORM model.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import datetime, timedelta, timezone
+
+from app.models.behavior_event import BehaviorEvent
+from app.services import event_partitions
+from app.services.event_partitions import (
+    Partition,
+    add_months,
+    expired,
+    month_start,
+    months_to_create,
+    parse_upper_bound,
+    partition_name,
+)
+
+
+def _utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_month_start_uses_utc():
+    ist = timezone(timedelta(hours=5, minutes=30))
+    # 1 Nov 02:00 IST is still 31 Oct in UTC.
+    assert month_start(datetime(2026, 11, 1, 2, 0, tzinfo=ist)) == _utc(2026, 10, 1)
+
+
+def test_add_months_crosses_year_boundaries():
+    assert add_months(_utc(2026, 11, 1), 2) == _utc(2027, 1, 1)
+    assert add_months(_utc(2026, 1, 1), -1) == _utc(2025, 12, 1)
+    assert partition_name(_utc(2027, 1, 1)) == "behavior_events_2027_01"
+
+
+def test_months_to_create_skips_existing():
+    existing = {"behavior_events_2026_10", "behavior_events_default"}
+
+    months = months_to_create(existing, _utc(2026, 10, 17), months_ahead=2)
+
+    assert [partition_name(m) for m in months] == ["behavior_events_2026_11", "behavior_events_2026_12"]
+
+
+def test_parse_upper_bound():
+    bound = "FOR VALUES FROM ('2026-10-01 00:00:00+00') TO ('2026-11-01 00:00:00+00')"
+    assert parse_upper_bound(bound) == _utc(2026, 11, 1)
+    assert parse_upper_bound("FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00+00')") == _utc(2026, 11, 1)
+    assert parse_upper_bound("DEFAULT") is None
+
+
+def test_expired_keeps_retention_window_and_default():
+    partitions = [
+        Partition("behavior_events_legacy", _utc(2025, 9, 1)),
+        Partition("behavior_events_2025_09", _utc(2025, 10, 1)),
+        Partition("behavior_events_2025_10", _utc(2025, 11, 1)),
+        Partition("behavior_events_default", None),
+    ]
+    now = _utc(2026, 10, 17)
+
+    assert [p.name for p in expired(partitions, now, 12)] == [
+        "behavior_events_legacy",
+        "behavior_events_2025_09",
+    ]
+    assert expired(partitions, now, 0) == []
+
+
+def test_parent_ddl_matches_model_columns():
+    ddl_columns = set(re.findall(r"^\s{4}([a-z_]+) ", event_partitions._PARENT_DDL, re.MULTILINE))
+    ddl_columns.discard("PRIMARY")
+
+    assert ddl_columns == {column.name for column in BehaviorEvent.__table__.columns}
+
+
+def test_composite_indexes_replace_single_column_ones():
+    indexes = {index.name: index for index in BehaviorEvent.__table__.indexes}
+
+    assert set(indexes) == {
+        "ix_behavior_events_attempt_time",
+        "ix_behavior_events_attempt_type_time",
+        "ix_behavior_events_test_student_time",
+        "uq_behavior_events_attempt_seq",
+    }
+    assert all("CONCURRENTLY IF NOT EXISTS" in ddl for ddl in event_partitions.composite_index_ddl(concurrently=True))
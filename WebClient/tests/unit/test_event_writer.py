@@ -0,0 +1,86 @@
+"""Tests for the Core bulk insert path (``event_writer``).
+
+COPY needs Postgres + psycopg; here only the dispatch decision is
+checked for it.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from app.models.behavior_event import BehaviorEvent, BehaviorEventType
+from app.schemas.behavior import BehaviorEventCreateRequest
+from app.services import event_writer
+from app.services.event_writer import event_rows, insert_event_rows
+
+
+def test_event_rows_drop_malformed_entries(assigned_attempt):
+    good = BehaviorEventCreateRequest(event_type="focus_loss", severity="warn")
+    # Bypasses validation the way a kiosk/server enum skew would.
+    bad = BehaviorEventCreateRequest.model_construct(event_type="FROM_THE_FUTURE", severity="info")
+
+    rows = event_rows(assigned_attempt, [good, bad, good])
+
+    assert len(rows) == 2
+    assert {row["event_type"] for row in rows} == {BehaviorEventType.FOCUS_LOSS}
+    assert all(row["attempt_id"] == assigned_attempt.id for row in rows)
+    assert all(row["event_time"] is not None for row in rows)
+
+
+def test_insert_returns_ids_in_input_order(db_session, assigned_attempt):
+    base = datetime.now(timezone.utc)
+    events = [
+        BehaviorEventCreateRequest(
+            event_type="KEYSTROKE",
+            payload={"burst_size": i},
+            event_time=base - timedelta(seconds=i),
+        )
+        for i in range(75)
+    ]
+
+    inserted = insert_event_rows(db_session, event_rows(assigned_attempt, events))
+    db_session.commit()
+
+    assert [row.payload["burst_size"] for row in inserted] == list(range(75))
+    assert [row.id for row in inserted] == sorted(row.id for row in inserted)
+    stored = {
+        ev.id: ev.payload["burst_size"]
+        for ev in db_session.query(BehaviorEvent).filter(BehaviorEvent.attempt_id == assigned_attempt.id)
+    }
+    assert stored == {row.id: row.payload["burst_size"] for row in inserted}
+
+
+def test_copy_is_only_used_on_postgres_for_large_batches(db_session):
+    assert event_writer._use_copy(db_session, event_writer.COPY_MIN_ROWS * 10) is False
+
+
+def test_seq_conflict_skips_already_stored_rows(tmp_path, assigned_attempt):
+    # Own DB, so the conflicting rows below are the only ones stored.
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.db.base import Base
+
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'seq.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    def numbered(*seqs):
+        return event_rows(
+            assigned_attempt,
+            [BehaviorEventCreateRequest(event_type="KEYSTROKE", seq=seq) for seq in seqs],
+        )
+
+    insert_event_rows(db, numbered(1, 2))
+    db.commit()
+    # Earlier work in the same transaction survives the conflict.
+    insert_event_rows(db, numbered(None))
+    inserted = insert_event_rows(db, numbered(2, 3, 3, 4))
+    db.commit()
+
+    assert len(inserted) == 2
+    seqs = [seq for (seq,) in db.query(BehaviorEvent.seq)]
+    assert sorted(s for s in seqs if s is not None) == [1, 2, 3, 4]
+    assert seqs.count(None) == 1
+    db.close()
+    engine.dispose()
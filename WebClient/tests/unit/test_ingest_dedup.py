@@ -0,0 +1,45 @@
+"""Per-attempt acked seqs for ``events:batch`` (``ingest_dedup``)."""
+
+from app.schemas.behavior import BehaviorEventCreateRequest
+from app.services import ingest_dedup
+
+
+def _events(*seqs: int) -> list[BehaviorEventCreateRequest]:
+    return [BehaviorEventCreateRequest(event_type="FOCUS_LOSS", seq=seq) for seq in seqs]
+
+
+def test_acked_seq_only_covers_contiguous_seqs(db_session, assigned_attempt):
+    attempt_id = assigned_attempt.id
+    assert ingest_dedup.acked_seq(db_session, attempt_id) == 0
+
+    ingest_dedup.advance(attempt_id, [1, 2, 4, 5], oldest=1)
+    assert ingest_dedup.acked_seq(db_session, attempt_id) == 2
+    # Handled seqs past the gap are still duplicates; the gap is not.
+    fresh, duplicates = ingest_dedup.split_new(db_session, attempt_id, _events(3, 4))
+    assert [ev.seq for ev in fresh] == [3] and duplicates == 1
+
+    ingest_dedup.advance(attempt_id, [3])
+    assert ingest_dedup.acked_seq(db_session, attempt_id) == 5
+
+
+def test_a_batch_gives_up_on_seqs_below_its_oldest(db_session, assigned_attempt):
+    attempt_id = assigned_attempt.id
+    ingest_dedup.advance(attempt_id, [1, 2], oldest=1)
+    # The kiosk's buffer overflowed: 3..9 are gone, it now starts at 10.
+    ingest_dedup.acked_seq(db_session, attempt_id)
+    ingest_dedup.advance(attempt_id, [10, 11], oldest=10)
+    assert ingest_dedup.acked_seq(db_session, attempt_id) == 11
+
+
+def test_queued_seqs_are_duplicates_but_not_acked(db_session, assigned_attempt):
+    attempt_id = assigned_attempt.id
+    fresh, _ = ingest_dedup.split_new(db_session, attempt_id, _events(1, 2))
+    ingest_dedup.mark_pending(attempt_id, [ev.seq for ev in fresh])
+
+    assert ingest_dedup.split_new(db_session, attempt_id, _events(1, 2))[1] == 2
+    assert ingest_dedup.acked_seq(db_session, attempt_id) == 0
+
+    ingest_dedup.release(attempt_id, [2])
+    ingest_dedup.advance(attempt_id, [1])
+    assert ingest_dedup.acked_seq(db_session, attempt_id) == 1
+    assert [ev.seq for ev in ingest_dedup.split_new(db_session, attempt_id, _events(2))[0]] == [2]
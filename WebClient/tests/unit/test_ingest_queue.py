@@ -0,0 +1,133 @@
+"""Tests for the write-behind ingest queue (``ingest_queue``).
+
+Each test gets its own throwaway SQLite file: the writer thread commits
+on its own connection, which can't see (or would deadlock against) the
+per-test transaction the shared ``db_session`` fixture holds open.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.behavior_event import BehaviorEvent, BehaviorEventType
+from app.schemas.behavior import BehaviorEventCreateRequest
+from app.services import ingest_dedup
+from app.services.ingest_queue import IngestQueue, IngestQueueFull
+
+
+@pytest.fixture()
+def session_factory(tmp_path):
+    engine = create_engine(
+        f"sqlite+pysqlite:///{tmp_path / 'ingest.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+def _rows(attempt_id: int, count: int, **overrides) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    row = {
+        "attempt_id": attempt_id,
+        "test_id": 1,
+        "student_id": attempt_id,
+        "event_type": BehaviorEventType.FOCUS_LOSS,
+        "payload": None,
+        "severity": "warn",
+        "event_time": now,
+    }
+    row.update(overrides)
+    return [dict(row) for _ in range(count)]
+
+
+def _stored(session_factory) -> int:
+    with session_factory() as db:
+        return db.scalar(select(func.count()).select_from(BehaviorEvent))
+
+
+def test_batches_from_many_attempts_are_coalesced(session_factory):
+    queue = IngestQueue(
+        max_events=1_000,
+        max_batch_rows=100,
+        max_delay_seconds=60,
+        session_factory=session_factory,
+    )
+    for attempt_id in (1, 2, 3):
+        assert queue.enqueue(_rows(attempt_id, 40)) == 40
+
+    queue.drain(timeout=5)
+
+    stats = queue.stats()
+    assert stats.written == 120
+    # One full-size batch as soon as 100 rows were waiting, then the
+    # remainder on drain - not one transaction per request.
+    assert stats.batches == 2
+    assert stats.pending == 0
+    assert _stored(session_factory) == 120
+
+
+def test_enqueue_rejects_when_full(session_factory):
+    queue = IngestQueue(
+        max_events=5,
+        max_batch_rows=100,
+        max_delay_seconds=60,
+        session_factory=session_factory,
+    )
+    queue.enqueue(_rows(1, 5))
+    with pytest.raises(IngestQueueFull):
+        queue.enqueue(_rows(2, 1))
+
+    queue.drain(timeout=5)
+    assert queue.stats().rejected_full == 1
+    assert _stored(session_factory) == 5
+
+
+def test_bad_rows_only_drop_their_own_attempt(session_factory):
+    queue = IngestQueue(
+        max_events=1_000,
+        max_batch_rows=100,
+        max_delay_seconds=60,
+        session_factory=session_factory,
+    )
+    queue.enqueue(_rows(1, 3))
+    queue.enqueue(_rows(2, 2, student_id=None))
+    queue.enqueue(_rows(3, 4))
+
+    queue.drain(timeout=5)
+
+    stats = queue.stats()
+    assert stats.written == 7
+    assert stats.dropped == 2
+    assert _stored(session_factory) == 7
+
+
+def test_only_committed_rows_are_acknowledged(session_factory):
+    with session_factory() as db:
+        assert ingest_dedup.acked_seq(db, 1) == 0
+        assert ingest_dedup.acked_seq(db, 2) == 0
+    queue = IngestQueue(
+        max_events=1_000,
+        max_batch_rows=100,
+        max_delay_seconds=60,
+        session_factory=session_factory,
+    )
+    good = [dict(row, seq=seq) for seq, row in enumerate(_rows(1, 3), start=1)]
+    bad = [dict(row, seq=seq) for seq, row in enumerate(_rows(2, 2, student_id=None), start=1)]
+    for attempt_id, rows in ((1, good), (2, bad)):
+        ingest_dedup.mark_pending(attempt_id, [row["seq"] for row in rows])
+        queue.enqueue(rows)
+
+    queue.drain(timeout=5)
+
+    with session_factory() as db:
+        assert ingest_dedup.acked_seq(db, 1) == 3
+        # Dropped rows stay unacknowledged and a resend is stored again.
+        assert ingest_dedup.acked_seq(db, 2) == 0
+        resend = [BehaviorEventCreateRequest(event_type="FOCUS_LOSS", seq=1)]
+        assert ingest_dedup.split_new(db, 2, resend) == (resend, 0)
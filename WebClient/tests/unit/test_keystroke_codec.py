@@ -0,0 +1,87 @@
+"""Tests for the columnar KEYSTROKE burst encoding."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.models.behavior_event import BehaviorEventType
+from app.services.keystroke_codec import decode_keys, encode_keys, pack_payload, unpack_payload
+
+
+def _burst(n: int = 25) -> dict:
+    keys = [
+        {
+            "key": "space" if i % 5 == 4 else "etaoin"[i % 6],
+            "scan_code": 57 if i % 5 == 4 else 16 + i % 6,
+            "modifiers": ["left shift", "shift"] if i % 7 == 0 else [],
+            "ts": 1767258000.123456 + i * 0.137,
+            "proc": "msedgewebview2.exe" if i < 20 else "explorer.exe",
+        }
+        for i in range(n)
+    ]
+    for record in keys:
+        record["modifiers"].sort()
+    return {"keys": keys, "burst_size": n}
+
+
+def test_round_trip_preserves_every_field():
+    payload = _burst()
+    stored, blob = pack_payload(BehaviorEventType.KEYSTROKE, payload)
+
+    restored = unpack_payload(stored, blob)
+
+    assert restored["burst_size"] == 25
+    for original, decoded in zip(payload["keys"], restored["keys"], strict=True):
+        assert decoded["ts"] == pytest.approx(original["ts"], abs=1e-6)
+        assert {**decoded, "ts": 0} == {**original, "ts": 0}
+
+
+def test_packed_form_is_much_smaller_than_json():
+    payload = _burst()
+    stored, blob = pack_payload(BehaviorEventType.KEYSTROKE, payload)
+
+    assert stored == {"burst_size": 25, "keys_preview": ["e", "t", "a"], "packed": True}
+    assert len(json.dumps(stored)) + len(blob) < len(json.dumps(payload)) / 4
+
+
+def test_out_of_order_timestamps_survive():
+    keys = _burst(3)["keys"]
+    keys[1]["ts"] = keys[0]["ts"] - 5.0
+
+    assert [k["ts"] for k in decode_keys(encode_keys(keys))] == pytest.approx([k["ts"] for k in keys])
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        lambda p: p["keys"][0].update(extra=1),
+        lambda p: p["keys"][0].update(modifiers=["hyper"]),
+        lambda p: p["keys"][0].update(modifiers=["shift", "ctrl"]),
+        lambda p: p["keys"][0].update(scan_code=None),
+        lambda p: p["keys"][0].update(ts="yesterday"),
+        lambda p: p.update(note="manual"),
+        lambda p: p.update(keys=[]),
+    ],
+)
+def test_unusual_payloads_are_stored_as_json(mutate):
+    payload = _burst(3)
+    mutate(payload)
+
+    assert pack_payload(BehaviorEventType.KEYSTROKE, payload) == (payload, None)
+
+
+def test_other_event_types_are_not_packed():
+    payload = _burst(3)
+
+    assert pack_payload(BehaviorEventType.KEYBOARD_PRESS, payload) == (payload, None)
+    assert unpack_payload(payload, None) is payload
+
+
+def test_unknown_blob_version_is_refused():
+    blob = bytearray(encode_keys(_burst(2)["keys"]))
+    blob[0] = 99
+
+    with pytest.raises(ValueError):
+        decode_keys(bytes(blob))
@@ -0,0 +1,114 @@
+"""Filtering, top-K and cursor paging of the live board."""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.schemas.live import LiveAttemptRow, LiveTestSnapshot
+from app.services.live_service import (
+    BoardQuery,
+    _render,
+    _sort_key,
+    decode_cursor,
+    encode_cursor,
+    query_board,
+    render_page,
+)
+from app.services.risk_scorer import _band_for
+
+STARTED = datetime(2026, 1, 1, 9, 0, tzinfo=timezone.utc)
+
+
+def _row(attempt_id: int, risk: int, *, name: str | None = None, focus="in_focus", vm=False):
+    return LiveAttemptRow(
+        attempt_id=attempt_id,
+        attempt_number=1,
+        student_id=attempt_id,
+        student_name=name or f"Student {attempt_id:03d}",
+        student_email=f"s{attempt_id}@example.com",
+        status="IN_PROGRESS",
+        started_at=STARTED,
+        last_seen_at=STARTED,
+        risk_score=risk,
+        risk_band=_band_for(risk),
+        top_contributors=[],
+        event_count_window=0,
+        monitor_count=None,
+        focus_state=focus,
+        vm_detected=vm,
+        warnings_sent=0,
+        latest_event_type=None,
+        latest_event_severity=None,
+    )
+
+
+@pytest.fixture
+def board():
+    rows = [
+        _row(1, 90, vm=True),
+        _row(2, 80, focus="out_of_focus"),
+        _row(3, 60, name="Ada Lovelace"),
+        _row(4, 55),
+        _row(5, 30, focus="out_of_focus"),
+        _row(6, 10, vm=True),
+        _row(7, 0),
+        _row(8, 0),
+    ]
+    rows.sort(key=_sort_key)
+    snapshot = LiveTestSnapshot(
+        test_id=1, test_name="Hall", generated_at=datetime.now(timezone.utc), rows=rows
+    )
+    return _render(snapshot, None)
+
+
+def _ids(board, **query) -> list[int]:
+    rows, _ = query_board(board, BoardQuery(**query))
+    return [row.attempt_id for row in rows]
+
+
+def test_filters(board):
+    assert _ids(board, bands=frozenset({"critical"})) == [1, 2]
+    assert _ids(board, bands=frozenset({"warn"})) == [3, 4]
+    assert _ids(board, bands=frozenset({"ok", "critical"})) == [1, 2, 5, 6, 7, 8]
+    assert _ids(board, min_score=55) == [1, 2, 3, 4]
+    assert _ids(board, focus_state="out_of_focus") == [2, 5]
+    assert _ids(board, vm_detected=True) == [1, 6]
+    assert _ids(board, search="lovelace") == [3]
+    assert _ids(board, search="s7@") == [7]
+    assert _ids(board, bands=frozenset({"ok"}), vm_detected=True) == [6]
+
+
+def test_top_k(board):
+    rows, after = query_board(board, BoardQuery(limit=3))
+    assert [row.attempt_id for row in rows] == [1, 2, 3]
+    assert after == _sort_key(rows[-1])
+
+
+def test_cursor_pages_through_the_board(board):
+    seen, after = [], None
+    while True:
+        rows, after = query_board(board, BoardQuery(limit=3, after=after))
+        seen += [row.attempt_id for row in rows]
+        if after is None:
+            break
+        after = decode_cursor(encode_cursor(after))
+    assert seen == [1, 2, 3, 4, 5, 6, 7, 8]
+
+
+def test_last_full_page_has_no_cursor(board):
+    rows, after = query_board(board, BoardQuery(bands=frozenset({"critical"}), limit=2))
+    assert len(rows) == 2 and after is None
+
+
+def test_rendered_page(board):
+    page = json.loads(render_page(board, BoardQuery(min_score=50, limit=2)))
+    assert page["version"] == board.version
+    assert [row["attempt_id"] for row in page["rows"]] == [1, 2]
+    assert decode_cursor(page["next_cursor"]) == _sort_key(board.snapshot.rows[1])
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor(("a", "b", "c"))])
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
@@ -0,0 +1,226 @@
+"""Load tests for the live snapshot cache: 50 concurrent viewers, one
+build per TTL."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import cache
+from app.core.cache import MemoryBackend
+from app.schemas.live import LiveTestSnapshot
+from app.services import live_service
+
+VIEWERS = 50
+
+
+class FakeBuilds:
+    """Stands in for the DB build: counts calls and takes a little while,
+    so concurrent viewers genuinely overlap with it."""
+
+    def __init__(self, delay: float = 0.05) -> None:
+        self.delay = delay
+        self.calls = 0
+        self.fail_next = False
+        self._lock = threading.Lock()
+
+    def __call__(self, test_id: int) -> LiveTestSnapshot:
+        with self._lock:
+            self.calls += 1
+            version = self.calls
+            fail, self.fail_next = self.fail_next, False
+        time.sleep(self.delay)
+        if fail:
+            raise RuntimeError("db went away")
+        return LiveTestSnapshot(
+            test_id=test_id,
+            test_name=f"build {version}",
+            generated_at=datetime.now(timezone.utc),
+            rows=[],
+        )
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(live_service, "_clock", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    fake = FakeBuilds()
+    monkeypatch.setattr(live_service, "build_live_snapshot", lambda db, test: fake(test.id))
+    monkeypatch.setattr(live_service, "load_live_snapshot", fake)
+    monkeypatch.setattr(live_service.settings, "live_snapshot_stale_seconds", 5.0)
+    return fake
+
+
+class SharedMemoryBackend(MemoryBackend):
+    """Stands in for Redis: claims to be shared, so clearing
+    ``live_service._cache`` plays a second worker on the same backend."""
+
+    shared = True
+
+
+@pytest.fixture
+def shared_backend():
+    backend = SharedMemoryBackend("op")
+    cache.use_cache(backend)
+    yield backend
+    cache.use_cache(None)
+
+
+def _poll_together(test_id: int = 1) -> list[LiveTestSnapshot]:
+    barrier = threading.Barrier(VIEWERS)
+    test = SimpleNamespace(id=test_id)
+
+    def viewer(_):
+        barrier.wait()
+        return live_service.get_live_snapshot(None, test)
+
+    with ThreadPoolExecutor(max_workers=VIEWERS) as pool:
+        return list(pool.map(viewer, range(VIEWERS)))
+
+
+def _wait_for_refresh(test_id: int = 1) -> None:
+    entry = live_service._entry_for(test_id)
+    with entry.lock:
+        inflight = entry.inflight
+    if inflight is not None:
+        assert inflight.wait(5)
+
+
+def test_concurrent_misses_share_one_build(clock, builds):
+    snapshots = _poll_together()
+
+    assert builds.calls == 1
+    assert {s.test_name for s in snapshots} == {"build 1"}
+
+
+def test_one_build_per_ttl_with_stale_while_revalidate(clock, builds):
+    _poll_together()
+    for period in range(1, 6):
+        clock[0] += live_service._CACHE_TTL_SECONDS
+        snapshots = _poll_together()
+        # Everybody got the previous snapshot straight away...
+        assert {s.test_name for s in snapshots} == {f"build {period}"}
+        # ...while exactly one refresh ran behind them.
+        _wait_for_refresh()
+        assert builds.calls == period + 1
+
+    assert live_service.get_live_snapshot(None, SimpleNamespace(id=1)).test_name == "build 6"
+
+
+def test_too_stale_snapshot_is_a_miss(clock, builds):
+    _poll_together()
+    clock[0] += live_service._CACHE_TTL_SECONDS + 5.0
+
+    snapshots = _poll_together()
+
+    assert builds.calls == 2
+    assert {s.test_name for s in snapshots} == {"build 2"}
+
+
+def test_failed_build_hands_over_to_a_waiter(clock, builds):
+    builds.fail_next = True
+    test = SimpleNamespace(id=1)
+    results, errors = [], []
+
+    def viewer():
+        try:
+            results.append(live_service.get_live_snapshot(None, test))
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=viewer) for _ in range(VIEWERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 1
+    assert len(results) == VIEWERS - 1
+    assert builds.calls == 2
+
+
+def test_a_slow_build_does_not_block_other_tests(clock, monkeypatch):
+    release = threading.Event()
+
+    def build(db, test):
+        if test.id == 1:
+            release.wait(5)
+        return LiveTestSnapshot(
+            test_id=test.id, test_name="x", generated_at=datetime.now(timezone.utc), rows=[]
+        )
+
+    monkeypatch.setattr(live_service, "build_live_snapshot", build)
+    slow = threading.Thread(target=live_service.get_live_snapshot, args=(None, SimpleNamespace(id=1)))
+    slow.start()
+    try:
+        assert live_service.get_live_snapshot(None, SimpleNamespace(id=2)).test_id == 2
+        assert slow.is_alive()
+    finally:
+        release.set()
+        slow.join(5)
+
+
+def test_workers_on_a_shared_backend_build_once(clock, builds, shared_backend):
+    _poll_together()
+    live_service._cache.clear()
+
+    snapshots = _poll_together()
+
+    assert builds.calls == 1
+    assert {s.test_name for s in snapshots} == {"build 1"}
+
+
+def test_worker_waits_for_another_workers_build(clock, builds, shared_backend):
+    # Another worker holds the build lease.
+    assert shared_backend.add(shared_backend.key("live-lease", 1), b"1", ttl=10)
+    result = []
+    viewer = threading.Thread(
+        target=lambda: result.append(live_service.get_live_snapshot(None, SimpleNamespace(id=1)))
+    )
+    viewer.start()
+    time.sleep(0.1)
+    assert not result
+
+    theirs = LiveTestSnapshot(
+        test_id=1, test_name="theirs", generated_at=datetime.now(timezone.utc), rows=[]
+    )
+    shared_backend.set(
+        shared_backend.key("live", 1), live_service._encode_shared(live_service._render(theirs, None), time.time()), ttl=10
+    )
+    viewer.join(5)
+
+    assert result[0].test_name == "theirs"
+    assert builds.calls == 0
+
+
+def test_invalidate_drops_the_snapshot_everywhere(clock, builds, shared_backend):
+    _poll_together()
+
+    live_service.invalidate_cache(1)
+
+    assert shared_backend.get(shared_backend.key("live", 1)) is None
+    assert live_service.get_live_snapshot(None, SimpleNamespace(id=1)).test_name == "build 2"
+
+
+def test_second_worker_serves_the_same_build(clock, builds, shared_backend):
+    first = live_service.get_rendered_live_snapshot(None, SimpleNamespace(id=1))
+    live_service._cache.clear()
+
+    adopted = live_service.get_rendered_live_snapshot(None, SimpleNamespace(id=1))
+
+    assert builds.calls == 1
+    assert adopted.etag == first.etag
+    assert adopted.version == first.version
+    assert (adopted.floor, adopted.row_versions, adopted.removed) == (
+        first.floor,
+        first.row_versions,
+        first.removed,
+    )
@@ -0,0 +1,104 @@
+"""Board versions and ``?since=`` deltas of the live snapshot."""
+
+import json
+from datetime import datetime, timezone
+
+from app.schemas.live import LiveAttemptRow, LiveTestSnapshot
+from app.services import live_service
+from app.services.live_service import _render, render_delta
+
+STARTED = datetime(2026, 1, 1, 9, 0, tzinfo=timezone.utc)
+
+
+def _row(attempt_id: int, risk: int = 0) -> LiveAttemptRow:
+    return LiveAttemptRow(
+        attempt_id=attempt_id,
+        attempt_number=1,
+        student_id=attempt_id,
+        student_name=f"Student {attempt_id}",
+        student_email=f"s{attempt_id}@example.com",
+        status="IN_PROGRESS",
+        started_at=STARTED,
+        last_seen_at=STARTED,
+        risk_score=risk,
+        risk_band="ok",
+        top_contributors=[],
+        event_count_window=0,
+        monitor_count=None,
+        focus_state="unknown",
+        vm_detected=False,
+        warnings_sent=0,
+        latest_event_type=None,
+        latest_event_severity=None,
+    )
+
+
+def _board(*rows: LiveAttemptRow) -> LiveTestSnapshot:
+    return LiveTestSnapshot(
+        test_id=1, test_name="Test", generated_at=datetime.now(timezone.utc), rows=list(rows)
+    )
+
+
+def _delta(rendered, since):
+    return json.loads(render_delta(rendered, since))
+
+
+def test_delta_lists_only_changed_and_removed_rows():
+    first = _render(_board(_row(1), _row(2), _row(3)), None)
+    second = _render(_board(_row(1), _row(2, risk=40), _row(4)), first)
+
+    assert second.version > first.version
+    assert json.loads(second.body)["version"] == second.version
+    delta = _delta(second, first.version)
+    assert [row["attempt_id"] for row in delta["changed"]] == [2, 4]
+    assert delta["removed"] == [3]
+    assert delta["since"] == first.version
+
+
+def test_delta_from_the_current_version_is_empty():
+    rendered = _render(_board(_row(1)), None)
+    delta = _delta(rendered, rendered.version)
+    assert delta["changed"] == [] and delta["removed"] == []
+
+
+def test_unchanged_board_keeps_its_version():
+    first = _render(_board(_row(1)), None)
+    assert _render(_board(_row(1)), first) is first
+
+
+def test_delta_spans_several_builds():
+    first = _render(_board(_row(1), _row(2)), None)
+    second = _render(_board(_row(1, risk=10), _row(2)), first)
+    third = _render(_board(_row(1, risk=10), _row(2, risk=20)), second)
+
+    assert [row["attempt_id"] for row in _delta(third, first.version)["changed"]] == [1, 2]
+    assert [row["attempt_id"] for row in _delta(third, second.version)["changed"]] == [2]
+
+
+def test_readded_row_is_changed_not_removed():
+    first = _render(_board(_row(1), _row(2)), None)
+    second = _render(_board(_row(1)), first)
+    third = _render(_board(_row(1), _row(2)), second)
+
+    delta = _delta(third, first.version)
+    assert [row["attempt_id"] for row in delta["changed"]] == [2]
+    assert delta["removed"] == []
+
+
+def test_unknown_cursors_need_a_full_resync():
+    first = _render(_board(_row(1)), None)
+    assert render_delta(first, first.version - 1) is None
+    assert render_delta(first, first.version + 1) is None
+    assert render_delta(first, 0) is None
+
+
+def test_removal_log_is_bounded(monkeypatch):
+    monkeypatch.setattr(live_service, "_MAX_REMOVED", 2)
+    first = _render(_board(_row(1), _row(2), _row(3)), None)
+    second = _render(_board(_row(2), _row(3)), first)
+    third = _render(_board(), second)
+
+    assert len(third.removed) == 2
+    # Version ``first`` would need attempt 1's removal, which is gone.
+    assert render_delta(third, first.version) is None
+    assert _delta(third, second.version)["removed"] == [2, 3]
@@ -0,0 +1,119 @@
+"""Tests for the SSE live stream hub (``live_stream``).
+
+The snapshot factory is swapped for an in-memory fake so these run
+without a DB and can count how many rebuilds the hub performs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.schemas.live import LiveAttemptRow, LiveTestSnapshot
+from app.services import live_stream
+
+
+_STARTED = datetime(2026, 1, 1, 9, 0, tzinfo=timezone.utc)
+
+
+def _row(attempt_id: int, score: int) -> LiveAttemptRow:
+    return LiveAttemptRow(
+        attempt_id=attempt_id,
+        attempt_number=1,
+        student_id=attempt_id,
+        student_name=f"Student {attempt_id}",
+        student_email=f"s{attempt_id}@example.com",
+        status="in_progress",
+        started_at=_STARTED,
+        last_seen_at=_STARTED,
+        risk_score=score,
+        risk_band="ok",
+        top_contributors=[],
+        event_count_window=0,
+        monitor_count=None,
+        focus_state="unknown",
+        vm_detected=False,
+        warnings_sent=0,
+        latest_event_type=None,
+        latest_event_severity=None,
+    )
+
+
+class _FakeBoard:
+    def __init__(self, test_id: int) -> None:
+        self.test_id = test_id
+        self.scores = {1: 0, 2: 0}
+        self.builds = 0
+
+    def __call__(self, test_id: int) -> LiveTestSnapshot:
+        self.builds += 1
+        return LiveTestSnapshot(
+            test_id=test_id,
+            test_name="Fake",
+            generated_at=datetime.now(timezone.utc),
+            rows=[_row(aid, score) for aid, score in self.scores.items()],
+        )
+
+
+def _parse(message: str) -> tuple[str, dict]:
+    event_line, data_line = message.strip().split("\n")
+    return event_line.removeprefix("event: "), json.loads(data_line.removeprefix("data: "))
+
+
+@pytest.fixture(autouse=True)
+def fast_timings(monkeypatch):
+    monkeypatch.setattr(live_stream, "DEBOUNCE_SECONDS", 0.05)
+    monkeypatch.setattr(live_stream, "REFRESH_INTERVAL_SECONDS", 60.0)
+
+
+def test_viewers_share_one_build_and_receive_only_changed_rows():
+    board = _FakeBoard(test_id=9001)
+
+    async def scenario():
+        viewers = [live_stream.stream_test(board.test_id, factory=board) for _ in range(5)]
+        first = await asyncio.gather(*(anext(v) for v in viewers))
+        assert all(_parse(m)[0] == "snapshot" for m in first)
+        assert board.builds == 1
+
+        board.scores[2] = 40
+        for _ in range(10):
+            live_stream.notify_test_changed(board.test_id)
+        deltas = await asyncio.wait_for(
+            asyncio.gather(*(anext(v) for v in viewers)), timeout=2
+        )
+        for message in deltas:
+            kind, data = _parse(message)
+            assert kind == "delta"
+            assert [row["attempt_id"] for row in data["changed"]] == [2]
+            assert data["removed"] == []
+        assert board.builds == 2
+
+        for viewer in viewers:
+            await viewer.aclose()
+
+    asyncio.run(scenario())
+    assert board.test_id not in live_stream._channels
+
+
+def test_removed_rows_are_reported():
+    board = _FakeBoard(test_id=9002)
+
+    async def scenario():
+        viewer = live_stream.stream_test(board.test_id, factory=board)
+        await anext(viewer)
+        del board.scores[1]
+        live_stream.notify_test_changed(board.test_id)
+        kind, data = _parse(await asyncio.wait_for(anext(viewer), timeout=2))
+        assert kind == "delta"
+        assert data["removed"] == [1]
+        await viewer.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_notify_without_viewers_is_a_noop():
+    live_stream.notify_test_changed(424242)
+    assert 424242 not in live_stream._channels
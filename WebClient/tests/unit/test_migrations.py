@@ -0,0 +1,80 @@
+"""Tests for the versioned migration runner (``app.db.migrations``).
+
+Each test migrates its own throwaway SQLite file; the Postgres-only
+steps are recorded without running there, exactly as in local dev.
+"""
+
+from __future__ import annotations
+
+from unittest import mock
+
+import pytest
+from sqlalchemy import create_engine, event, inspect
+
+from app.core.config import settings
+from app.db import migrations
+from app.db.migrations import HEAD, MIGRATIONS, SchemaOutOfDate
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'schema.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _statements(engine) -> list[str]:
+    statements: list[str] = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+def test_versions_are_ordered_and_unique():
+    versions = [m.version for m in MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert HEAD == versions[-1]
+
+
+def test_upgrade_builds_schema_and_records_every_step(engine):
+    ran = migrations.upgrade(engine)
+
+    assert [m.version for m in ran] == [m.version for m in MIGRATIONS]
+    assert {"users", "tests", "behavior_events", "schema_migrations"} <= set(inspect(engine).get_table_names())
+    with engine.connect() as conn:
+        assert migrations.applied_versions(conn) == {m.version for m in MIGRATIONS}
+        assert migrations.pending(conn) == []
+
+
+def test_upgrade_at_head_is_a_noop(engine):
+    migrations.upgrade(engine)
+
+    assert migrations.upgrade(engine) == []
+
+
+def test_startup_at_head_only_reads_the_version(engine):
+    migrations.upgrade(engine)
+    statements = _statements(engine)
+
+    migrations.ensure_schema(engine)
+
+    assert statements
+    assert not [s for s in statements if s.lstrip().upper().startswith(("CREATE", "ALTER", "UPDATE", "INSERT"))]
+
+
+def test_startup_refuses_pending_migrations_when_disabled(engine):
+    with mock.patch.object(settings, "migrate_on_startup", False):
+        with pytest.raises(SchemaOutOfDate):
+            migrations.ensure_schema(engine)
+
+    assert "users" not in inspect(engine).get_table_names()
+
+
+def test_startup_migrates_when_enabled(engine):
+    migrations.ensure_schema(engine)
+
+    with engine.connect() as conn:
+        assert migrations.pending(conn) == []
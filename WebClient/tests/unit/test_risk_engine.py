@@ -0,0 +1,151 @@
+"""Tests for the incremental in-memory risk engine.
+
+``score_from_events`` is the oracle: for any window of events the
+engine must produce exactly the same ``RiskBreakdown``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from app.models.behavior_event import BehaviorEvent, BehaviorEventType
+from app.services import risk_engine
+from app.services.risk_engine import _AttemptWindow, window_entries
+from app.services.risk_scorer import WINDOW_SECONDS, score_from_events
+
+
+@dataclass
+class _StubEvent:
+    event_type: BehaviorEventType
+    severity: str = "info"
+    event_time: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    payload: dict | None = None
+    id: int | None = None
+
+
+def _window_for(events) -> _AttemptWindow:
+    window = _AttemptWindow()
+    for entry in window_entries(events):
+        window.add(entry)
+    return window
+
+
+ORACLE_CASES = {
+    "empty": [],
+    "focus_loss": [_StubEvent(BehaviorEventType.FOCUS_LOSS, "warn") for _ in range(2)],
+    "critical": [_StubEvent(BehaviorEventType.VM_DETECTED, "critical")],
+    "capped": [
+        _StubEvent(BehaviorEventType.VM_DETECTED, "critical"),
+        _StubEvent(BehaviorEventType.SUSPICIOUS_PROCESS, "warn"),
+        _StubEvent(BehaviorEventType.MONITOR_COUNT_CHANGE, "warn"),
+        *[_StubEvent(BehaviorEventType.FOCUS_LOSS, "warn") for _ in range(20)],
+    ],
+    "ties": [
+        _StubEvent(BehaviorEventType.BLOCKED_HOTKEY, "warn"),
+        _StubEvent(BehaviorEventType.FOCUS_LOSS, "warn"),
+        _StubEvent(BehaviorEventType.TAB_SWITCH, "warn"),
+        _StubEvent(BehaviorEventType.WINDOW_SWITCH, "warn"),
+    ],
+    "contextual": [
+        _StubEvent(BehaviorEventType.MONITOR_COUNT_CHANGE, "info", payload={"count": 1, "previous_count": 1}),
+        _StubEvent(BehaviorEventType.CLIPBOARD_COPY, "info", payload={"length": 900}),
+        _StubEvent(BehaviorEventType.KEYSTROKE, "info", payload={"burst_size": 4}),
+    ],
+}
+
+
+def test_engine_matches_pure_scorer_on_oracle_cases():
+    for name, events in ORACLE_CASES.items():
+        assert _window_for(events).breakdown() == score_from_events(events), name
+
+
+def test_eviction_matches_rescoring_the_remaining_window():
+    now = datetime.now(timezone.utc)
+    old = [
+        _StubEvent(BehaviorEventType.VM_DETECTED, "critical", now - timedelta(seconds=90), id=1),
+        _StubEvent(BehaviorEventType.FOCUS_LOSS, "warn", now - timedelta(seconds=80), id=2),
+    ]
+    recent = [
+        _StubEvent(BehaviorEventType.FOCUS_LOSS, "warn", now - timedelta(seconds=30), id=3),
+        _StubEvent(BehaviorEventType.MONITOR_COUNT_CHANGE, "warn", now - timedelta(seconds=10), id=4),
+    ]
+    window = _window_for(old + recent)
+    window.evict_before(now - timedelta(seconds=WINDOW_SECONDS))
+
+    breakdown = window.breakdown()
+    assert breakdown == score_from_events(recent)
+    assert breakdown.has_critical_event is False
+
+
+def test_out_of_order_and_duplicate_events_are_handled():
+    now = datetime.now(timezone.utc)
+    late = _StubEvent(BehaviorEventType.FOCUS_LOSS, "warn", now - timedelta(seconds=20), id=10)
+    newer = _StubEvent(BehaviorEventType.BLOCKED_HOTKEY, "warn", now - timedelta(seconds=5), id=11)
+
+    window = _window_for([newer])
+    for entry in window_entries([late, late]):
+        window.add(entry)
+
+    assert [e.event_id for e in window.entries] == [10, 11]
+    assert window.breakdown() == score_from_events([late, newer])
+
+
+def test_ingest_evicts_entries_older_than_the_window():
+    now = datetime.now(timezone.utc)
+    old = _StubEvent(BehaviorEventType.FOCUS_LOSS, "warn", now - timedelta(seconds=WINDOW_SECONDS + 30), id=1)
+    new = _StubEvent(BehaviorEventType.FOCUS_LOSS, "warn", now - timedelta(seconds=5), id=2)
+    window = _AttemptWindow()
+    risk_engine._windows[42] = window
+
+    risk_engine.record_entries(42, window_entries([old]))
+    assert [e.event_id for e in window.entries] == [1]
+    # No board read in between: the next ingest drops what fell out.
+    risk_engine.record_entries(42, window_entries([new]))
+    assert [e.event_id for e in window.entries] == [2]
+    assert window.seen_ids == {2}
+    assert window.breakdown() == score_from_events([new])
+
+
+def test_engine_hydrates_from_db_and_tracks_ingest(db_session, assigned_attempt):
+    now = datetime.now(timezone.utc)
+    db_session.add_all(
+        [
+            BehaviorEvent(
+                attempt_id=assigned_attempt.id,
+                test_id=assigned_attempt.test_id,
+                student_id=assigned_attempt.student_id,
+                event_type=BehaviorEventType.FOCUS_LOSS,
+                severity="warn",
+                event_time=now - timedelta(seconds=10),
+            ),
+            BehaviorEvent(
+                attempt_id=assigned_attempt.id,
+                test_id=assigned_attempt.test_id,
+                student_id=assigned_attempt.student_id,
+                event_type=BehaviorEventType.SUSPICIOUS_PROCESS,
+                severity="warn",
+                event_time=now - timedelta(minutes=5),
+            ),
+        ]
+    )
+    db_session.commit()
+
+    # Simulates a restart: nothing tracked, so the first read rebuilds
+    # from the last window of events in the DB.
+    risk_engine.reset()
+    first = risk_engine.get_risk_for_attempts(db_session, [assigned_attempt.id])
+    assert first[assigned_attempt.id].score == 5
+    assert first[assigned_attempt.id].event_count == 1
+
+    from app.schemas.behavior import BehaviorEventCreateRequest
+    from app.services.behavior_service import create_behavior_events_bulk
+
+    create_behavior_events_bulk(
+        db_session,
+        assigned_attempt,
+        [BehaviorEventCreateRequest(event_type="MONITOR_COUNT_CHANGE", severity="warn")],
+    )
+    second = risk_engine.get_risk_for_attempts(db_session, [assigned_attempt.id])
+    assert second[assigned_attempt.id].score == 5 + 15
+    assert second[assigned_attempt.id].event_count == 2
@@ -27,6 +27,7 @@ class _StubEvent:
     event_type: BehaviorEventType
     severity: str = "info"
     event_time: datetime = datetime.now(timezone.utc)
+    payload: dict | None = None
 
 
 def test_empty_event_stream_is_zero_score():
@@ -0,0 +1,120 @@
+"""The in-memory per-attempt warning marks (``warning_index``)."""
+
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.proctor_warning import ProctorWarning
+from app.models.user import User
+from app.services import warning_index
+from app.services.warning_service import (
+    acknowledge_warning,
+    create_warning,
+    latest_warning_id_for_attempt,
+    unacknowledged_warnings,
+)
+
+
+@contextmanager
+def warning_queries(engine):
+    statements: list[str] = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if "proctor_warnings" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+
+
+def _teacher(db_session, attempt) -> User:
+    return db_session.get(User, attempt.test.created_by)
+
+
+def test_marks_load_once_then_come_from_memory(engine, db_session, assigned_attempt):
+    create_warning(db_session, assigned_attempt, _teacher(db_session, assigned_attempt), "a", "warn")
+    with warning_queries(engine) as first:
+        marks = warning_index.marks_for(db_session, assigned_attempt.id)
+    assert len(first) == 1
+    assert (marks.count, marks.unacked) == (1, 1)
+
+    with warning_queries(engine) as again:
+        assert warning_index.marks_for(db_session, assigned_attempt.id) == marks
+    assert again == []
+
+
+def test_attempts_without_warnings_are_indexed_too(engine, db_session, assigned_attempt):
+    assert latest_warning_id_for_attempt(db_session, assigned_attempt.id) is None
+    with warning_queries(engine) as statements:
+        assert unacknowledged_warnings(db_session, assigned_attempt.id) == []
+        assert latest_warning_id_for_attempt(db_session, assigned_attempt.id) is None
+    assert statements == []
+
+
+def test_create_and_ack_keep_the_marks_current(db_session, assigned_attempt):
+    teacher = _teacher(db_session, assigned_attempt)
+    assert warning_index.marks_for(db_session, assigned_attempt.id).count == 0
+
+    first = create_warning(db_session, assigned_attempt, teacher, "a", "warn")
+    second = create_warning(db_session, assigned_attempt, teacher, "b", "warn")
+    marks = warning_index.marks_for(db_session, assigned_attempt.id)
+    assert (marks.latest_id, marks.count, marks.unacked) == (second.id, 2, 2)
+
+    acknowledge_warning(db_session, first)
+    acknowledge_warning(db_session, first)  # a repeated ack doesn't count twice
+    marks = warning_index.marks_for(db_session, assigned_attempt.id)
+    assert (marks.latest_id, marks.count, marks.unacked) == (second.id, 2, 1)
+    assert [w.id for w in unacknowledged_warnings(db_session, assigned_attempt.id)] == [second.id]
+
+
+def test_a_too_high_unacked_count_is_corrected_by_the_query(engine, db_session, assigned_attempt):
+    warning = create_warning(
+        db_session, assigned_attempt, _teacher(db_session, assigned_attempt), "a", "warn"
+    )
+    assert warning_index.marks_for(db_session, assigned_attempt.id).unacked == 1
+    # Acked behind this process's back (e.g. by another worker).
+    db_session.query(ProctorWarning).filter(ProctorWarning.id == warning.id).update(
+        {ProctorWarning.acknowledged_at: warning.created_at}
+    )
+    db_session.commit()
+
+    assert unacknowledged_warnings(db_session, assigned_attempt.id) == []
+    with warning_queries(engine) as statements:
+        assert unacknowledged_warnings(db_session, assigned_attempt.id) == []
+    assert statements == []
+
+
+def test_a_load_that_races_a_drop_is_not_stored(db_session, assigned_attempt, monkeypatch):
+    original_load = warning_index._load
+
+    def racing_load(db, attempt_ids):
+        loaded = original_load(db, attempt_ids)
+        warning_index.forget_attempt(assigned_attempt.id)  # e.g. a warning was sent
+        return loaded
+
+    monkeypatch.setattr(warning_index, "_load", racing_load)
+    warning_index.marks_for(db_session, assigned_attempt.id)
+    assert assigned_attempt.id not in warning_index._marks
+
+
+def test_marks_are_reloaded_once_older_than_the_bound(db_session, assigned_attempt, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(warning_index, "_clock", lambda: now[0])
+    assert unacknowledged_warnings(db_session, assigned_attempt.id) == []
+
+    # Sent through another worker whose drop never reached this one.
+    teacher = _teacher(db_session, assigned_attempt)
+    warning = ProctorWarning(
+        attempt_id=assigned_attempt.id, sender_id=teacher.id, message="a", severity="warn"
+    )
+    db_session.add(warning)
+    db_session.commit()
+
+    now[0] += 1
+    assert unacknowledged_warnings(db_session, assigned_attempt.id) == []
+    now[0] += settings.warning_index_max_age_seconds
+    assert [w.id for w in unacknowledged_warnings(db_session, assigned_attempt.id)] == [warning.id]
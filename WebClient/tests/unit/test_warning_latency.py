@@ -0,0 +1,154 @@
+"""Warning latency histograms and their roll-ups (``warning_latency``)."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models.test import Test
+from app.models.warning_latency import WarningLatencyRollup
+from app.services import warning_latency
+from app.services.warning_latency import LatencyHistogram
+
+T0 = datetime(2026, 3, 1, 9, 0, tzinfo=timezone.utc)
+
+
+def _at(seconds: float) -> datetime:
+    return T0 + timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def rollup_engine():
+    """A private database, so roll-ups can commit without fighting the
+    shared test transaction."""
+    engine = create_engine(
+        "sqlite+pysqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        for test_id in (1, 2):
+            session.add(
+                Test(
+                    id=test_id,
+                    name=f"Hall {test_id}",
+                    external_link="https://example.com/hall",
+                    start_time=T0,
+                    end_time=T0 + timedelta(hours=2),
+                    created_by=1,
+                )
+            )
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = LatencyHistogram()
+    for seconds in (0.05, 0.1, 0.3, 4, 4, 4, 4, 4, 4, 1000):
+        histogram.observe(seconds)
+    assert histogram.count == 10
+    assert histogram.counts[0] == 2  # bounds are inclusive
+    assert histogram.counts[-1] == 1
+    assert histogram.sum_seconds == pytest.approx(1024.45)
+    assert 3 < histogram.quantile(0.5) <= 5
+    assert histogram.quantile(0.99) == warning_latency.BOUNDS[-1]
+    assert LatencyHistogram().quantile(0.5) is None
+
+
+def test_observe_splits_stages_and_clamps_clock_skew():
+    warning_latency.observe(1, T0, _at(4), _at(4.5))
+    # Kiosk clock two seconds behind the server's.
+    warning_latency.observe(1, T0, _at(-2), _at(1))
+    warning_latency.observe(2, T0, _at(30), _at(31))
+
+    hall = warning_latency.histograms(1)
+    assert hall["deliver"].count == 2
+    assert hall["deliver"].sum_seconds == pytest.approx(4)
+    assert hall["ack"].sum_seconds == pytest.approx(3.5)
+    assert warning_latency.histograms()["deliver"].count == 3
+
+    summary = warning_latency.summary(2)
+    assert summary.deliver.count == 1
+    assert summary.deliver.mean_seconds == pytest.approx(30)
+    assert 21 <= summary.deliver.p50_seconds <= 34
+
+
+def test_rollup_survives_a_restart(rollup_engine):
+    warning_latency.observe(1, T0, _at(2), _at(3))
+    warning_latency.observe(1, T0, _at(5), _at(6))
+    assert warning_latency.flush(rollup_engine) == 2
+
+    warning_latency.reset()
+    assert warning_latency.histograms(1)["deliver"].count == 0
+    assert warning_latency.flush(rollup_engine) == 0
+    restored = warning_latency.histograms(1)
+    assert restored["deliver"].count == 2
+    assert restored["deliver"].sum_seconds == pytest.approx(7)
+    assert restored["ack"].count == 2
+
+
+def test_rollups_add_up_across_workers(rollup_engine):
+    warning_latency.observe(1, T0, _at(2), _at(3))
+    warning_latency.flush(rollup_engine)
+
+    # Another worker's roll-up adds to the same rows...
+    with rollup_engine.begin() as conn:
+        other = LatencyHistogram()
+        other.observe(8)
+        warning_latency._write(conn, {(1, "deliver"): other}, datetime.now(timezone.utc))
+
+    # ...and this one picks them up with its next roll-up, without
+    # counting its own observations twice.
+    warning_latency.observe(2, T0, _at(1), _at(2))
+    warning_latency.flush(rollup_engine)
+    assert warning_latency.histograms(1)["deliver"].count == 2
+    assert warning_latency.histograms(2)["deliver"].count == 1
+    with rollup_engine.connect() as conn:
+        counts = conn.execute(
+            select(WarningLatencyRollup.test_id, WarningLatencyRollup.count).where(
+                WarningLatencyRollup.stage == "deliver"
+            )
+        ).all()
+    assert sorted(counts) == [(1, 1), (1, 1), (2, 1)]
+
+
+def test_failed_rollup_keeps_the_observations(rollup_engine, monkeypatch):
+    warning_latency.observe(1, T0, _at(2), _at(3))
+
+    def broken(conn, taken, now):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(warning_latency, "_write", broken)
+    with pytest.raises(RuntimeError):
+        warning_latency.flush(rollup_engine)
+    assert warning_latency.histograms(1)["deliver"].count == 1
+
+    monkeypatch.undo()
+    assert warning_latency.flush(rollup_engine) == 1
+    assert warning_latency.histograms(1)["deliver"].count == 1
+
+
+def test_rollup_skips_deleted_tests(rollup_engine):
+    warning_latency.observe(99, T0, _at(2), _at(3))
+    warning_latency.flush(rollup_engine)
+    with rollup_engine.connect() as conn:
+        assert conn.execute(select(WarningLatencyRollup)).all() == []
+
+
+def test_prometheus_exposition():
+    warning_latency.observe(1, T0, _at(2), _at(3))
+    text = warning_latency.render_prometheus()
+    assert 'omniproctor_warning_latency_seconds_bucket{stage="deliver",le="1"} 0' in text
+    assert 'omniproctor_warning_latency_seconds_bucket{stage="deliver",le="2"} 1' in text
+    assert 'omniproctor_warning_latency_seconds_bucket{stage="deliver",le="+Inf"} 1' in text
+    assert 'omniproctor_warning_latency_seconds_count{stage="ack"} 1' in text
+    assert 'omniproctor_test_warning_latency_seconds_count{test_id="1",stage="deliver"} 1' in text
+
+    # Tests without recent acks drop out of the per-test series.
+    later = datetime.now(timezone.utc) + 2 * warning_latency.METRICS_TEST_WINDOW
+    assert 'test_id="1"' not in warning_latency.render_prometheus(later)
@@ -0,0 +1,43 @@
+"""Long-poll wake-ups for the kiosk warnings endpoint."""
+
+import asyncio
+import threading
+
+from app.services import warning_waiters
+from app.services.warning_waiters import notify_warning, parked_count, waiting
+
+
+def test_notify_wakes_only_that_attempt():
+    async def scenario():
+        with waiting(1) as mine, waiting(2) as other:
+            assert parked_count() == 2
+            notify_warning(1)
+            assert await mine.wait(1.0)
+            assert not await other.wait(0.05)
+        assert parked_count() == 0
+
+    asyncio.run(scenario())
+
+
+def test_notify_from_another_thread():
+    async def scenario():
+        with waiting(7) as waiter:
+            threading.Timer(0.05, notify_warning, args=(7,)).start()
+            assert await waiter.wait(2.0)
+
+    asyncio.run(scenario())
+
+
+def test_notify_before_the_wait_is_not_lost():
+    async def scenario():
+        with waiting(3) as waiter:
+            # e.g. the warning landed between the read and the wait
+            notify_warning(3)
+            assert await waiter.wait(0.5)
+
+    asyncio.run(scenario())
+
+
+def test_notify_without_waiters_is_harmless():
+    notify_warning(42)
+    assert warning_waiters._waiters == {}